@@ -18,7 +18,7 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 from orion_ai.config import get_config
 from orion_ai.pipelines import DeviceAnomalyPipeline, DomainRiskPipeline
 from orion_ai.http_server import run_server
-from orion_ai.threat_intel import ThreatIntelligenceService
+from orion_ai.threat_intel import get_threat_intel_service
 from orion_ai.data_collector import DataCollector
 import asyncio
 
@@ -53,11 +53,8 @@ def run_batch_mode(interval: int):
     config = get_config()
     threat_intel = None
     if config.threat_intel.enable_threat_intel:
-        threat_intel = ThreatIntelligenceService(
-            cache_path=config.threat_intel.cache_path,
-            otx_api_key=config.threat_intel.otx_api_key,
-            refresh_interval_hours=config.threat_intel.refresh_interval_hours
-        )
+        # Shared with the pipelines, so refreshed feeds reach their index
+        threat_intel = get_threat_intel_service()
         # Initial feed refresh
         logger.info("Refreshing threat intelligence feeds on startup...")
         try:
@@ -87,7 +84,10 @@ def run_batch_mode(interval: int):
         try:
             # Run device anomaly detection
             logger.info("Running device anomaly detection...")
-            device_results = device_pipeline.run()
+            if config.detection.incremental_device_window:
+                device_results = device_pipeline.run_incremental()
+            else:
+                device_results = device_pipeline.run()
             logger.info(
                 f"Device anomaly detection complete: "
                 f"{len(device_results)} devices processed"
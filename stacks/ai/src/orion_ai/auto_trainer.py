@@ -7,12 +7,16 @@ Handles the full training workflow without user intervention.
 
 import logging
 import json
-import gzip
+import os
+import tempfile
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import numpy as np
 
+from orion_ai.training_data import FeatureLoader, FeatureManifest
+
 logger = logging.getLogger(__name__)
 
 # Try importing scikit-learn for model training
@@ -35,6 +39,33 @@ except ImportError:
     ONNX_CONVERSION_AVAILABLE = False
     logger.warning("skl2onnx not available. ONNX export disabled.")
 
+# Try importing ONNX Runtime for variant benchmarks and quantization
+try:
+    import onnxruntime as ort
+    ORT_AVAILABLE = True
+except ImportError:
+    ORT_AVAILABLE = False
+
+try:
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    QUANTIZATION_AVAILABLE = True
+except ImportError:
+    QUANTIZATION_AVAILABLE = False
+
+# ai.onnx.ml 3 is the TreeEnsemble version skl2onnx converts forests to
+TARGET_OPSET = {"": 17, "ai.onnx.ml": 3}
+
+# Compact variants: fewer and shallower trees
+COMPACT_DEVICE_PARAMS = {"n_estimators": 40, "max_samples": 128}
+COMPACT_DOMAIN_PARAMS = {"n_estimators": 30, "max_depth": 6}
+
+# Operators dynamic quantization can rewrite, and operators it rewrites them to
+QUANTIZABLE_OPS = {"MatMul", "Gemm", "Conv", "Attention", "LSTM"}
+QUANTIZED_OPS = {"DynamicQuantizeLinear", "MatMulInteger", "ConvInteger", "QLinearMatMul", "DequantizeLinear"}
+
+# Rows of training features used to compare variants
+VARIANT_EVAL_ROWS = 2000
+
 
 class AutoTrainer:
     """
@@ -48,13 +79,29 @@ class AutoTrainer:
     5. Validate models
     """
     
-    def __init__(self, data_dir: Path, model_output_dir: Path):
+    def __init__(
+        self,
+        data_dir: Path,
+        model_output_dir: Path,
+        export_variants: bool = False,
+        max_rows: Optional[int] = 500000,
+        sampling: str = "stratified",
+        spill_dir: Optional[Path] = None
+    ):
         """
         Initialize auto trainer.
         
         Args:
             data_dir: Directory containing collected training data
             model_output_dir: Directory to save trained models
+            export_variants: Also export size/latency-optimized ONNX variants
+                and a comparison report to model_output_dir/variants (trains
+                a second, compact model)
+            max_rows: Max training rows per model; larger datasets are
+                subsampled while loading (None = all rows)
+            sampling: Subsampling strategy ("stratified" or "reservoir")
+            spill_dir: Directory for memmap spill files holding loaded
+                features outside the heap (None = in memory)
         """
         if not SKLEARN_AVAILABLE:
             raise RuntimeError("scikit-learn is required for auto-training")
@@ -62,6 +109,10 @@ class AutoTrainer:
         self.data_dir = Path(data_dir)
         self.model_output_dir = Path(model_output_dir)
         self.model_output_dir.mkdir(parents=True, exist_ok=True)
+        self.export_variants = export_variants
+        self.max_rows = max_rows
+        self.sampling = sampling
+        self.spill_dir = spill_dir
         
         self.device_dir = self.data_dir / "device_features"
         self.domain_dir = self.data_dir / "domain_features"
@@ -72,6 +123,9 @@ class AutoTrainer:
         """
         Check if collected data is ready for training.
         
+        Row counts and dates come from the data directories' manifests;
+        only files without an up-to-date manifest entry are read.
+        
         Returns:
             Tuple of (ready: bool, message: str, stats: dict)
         """
@@ -83,41 +137,22 @@ class AutoTrainer:
             "domain_files": 0
         }
         
-        # Count device records
-        device_files = list(self.device_dir.glob("*.jsonl.gz"))
-        stats["device_files"] = len(device_files)
-        
-        for f in device_files:
-            try:
-                with gzip.open(f, "rt", encoding="utf-8") as file:
-                    for line in file:
-                        stats["device_records"] += 1
-            except Exception as e:
-                logger.warning(f"Failed to read {f}: {e}")
+        device_files = FeatureManifest(self.device_dir).files()
+        domain_files = FeatureManifest(self.domain_dir).files()
         
-        # Count domain records
-        domain_files = list(self.domain_dir.glob("*.jsonl.gz"))
+        stats["device_files"] = len(device_files)
+        stats["device_records"] = sum(s.rows for s in device_files.values())
         stats["domain_files"] = len(domain_files)
+        stats["domain_records"] = sum(s.rows for s in domain_files.values())
         
-        for f in domain_files:
-            try:
-                with gzip.open(f, "rt", encoding="utf-8") as file:
-                    for line in file:
-                        stats["domain_records"] += 1
-            except Exception as e:
-                logger.warning(f"Failed to read {f}: {e}")
-        
-        # Estimate collection days from file names
-        dates = []
-        for f in list(device_files) + list(domain_files):
-            try:
-                date_str = f.stem.split("_")[-1]
-                dates.append(datetime.strptime(date_str, "%Y-%m-%d"))
-            except (ValueError, IndexError):
-                continue
-        
-        if dates:
-            stats["collection_days"] = (max(dates) - min(dates)).days + 1
+        # Collection days from the records' time range
+        all_files = list(device_files.values()) + list(domain_files.values())
+        firsts = [s.first for s in all_files if s.first]
+        lasts = [s.last for s in all_files if s.last]
+        if firsts and lasts:
+            first = datetime.fromisoformat(min(firsts)).date()
+            last = datetime.fromisoformat(max(lasts)).date()
+            stats["collection_days"] = (last - first).days + 1
         
         # Check readiness criteria
         min_device_records = 1000  # At least 1000 device observations
@@ -135,61 +170,44 @@ class AutoTrainer:
         
         return True, "Data ready for training", stats
     
+    def _loader(self, directory: Path, id_field: str) -> FeatureLoader:
+        """Create a feature loader with the trainer's row budget."""
+        return FeatureLoader(
+            directory,
+            id_field,
+            max_rows=self.max_rows,
+            sampling=self.sampling,
+            spill_dir=self.spill_dir
+        )
+    
     def load_device_features(self) -> Tuple[np.ndarray, List[str]]:
         """
-        Load all collected device features.
+        Load collected device features, subsampled to max_rows.
         
         Returns:
             Tuple of (features array, device IPs list)
         """
         logger.info("Loading device features...")
         
-        features_list = []
-        device_ips = []
-        
-        for f in sorted(self.device_dir.glob("*.jsonl.gz")):
-            try:
-                with gzip.open(f, "rt", encoding="utf-8") as file:
-                    for line in file:
-                        record = json.loads(line)
-                        features_list.append(record["feature_vector"])
-                        device_ips.append(record["device_ip"])
-            except Exception as e:
-                logger.warning(f"Failed to load {f}: {e}")
-        
-        features = np.array(features_list, dtype=np.float32)
+        features, device_ips = self._loader(self.device_dir, "device_ip").load()
         logger.info(f"Loaded {len(features)} device feature vectors (shape: {features.shape})")
         
         return features, device_ips
     
     def load_domain_features(self) -> Tuple[np.ndarray, List[str], np.ndarray]:
         """
-        Load all collected domain features.
+        Load collected domain features, subsampled to max_rows.
         
         Returns:
             Tuple of (features array, domains list, labels array)
         """
         logger.info("Loading domain features...")
         
-        features_list = []
-        domains = []
-        labels = []  # Will be populated from threat intel if available
-        
-        for f in sorted(self.domain_dir.glob("*.jsonl.gz")):
-            try:
-                with gzip.open(f, "rt", encoding="utf-8") as file:
-                    for line in file:
-                        record = json.loads(line)
-                        features_list.append(record["feature_vector"])
-                        domains.append(record["domain"])
-                        # Default label: 0 (benign)
-                        # Could enhance with threat intel matching
-                        labels.append(0)
-            except Exception as e:
-                logger.warning(f"Failed to load {f}: {e}")
+        features, domains = self._loader(self.domain_dir, "domain").load()
         
-        features = np.array(features_list, dtype=np.float32)
-        labels = np.array(labels, dtype=np.int32)
+        # Default label: 0 (benign)
+        # Could enhance with threat intel matching
+        labels = np.zeros(len(features), dtype=np.int32)
         
         logger.info(f"Loaded {len(features)} domain feature vectors (shape: {features.shape})")
         
@@ -246,12 +264,26 @@ class AutoTrainer:
             # Export to ONNX if available
             if ONNX_CONVERSION_AVAILABLE:
                 try:
-                    self._export_to_onnx(
+                    exported = self._export_to_onnx(
                         model, scaler, features_scaled[0:1],
                         "device_anomaly.onnx"
                     )
                 except Exception as e:
                     logger.warning(f"ONNX export failed: {e}")
+                    exported = None
+                
+                # Variants are compared against the exported model
+                if self.export_variants and exported is not None:
+                    try:
+                        compact = IsolationForest(
+                            contamination=0.1,
+                            random_state=42,
+                            n_jobs=-1,
+                            **COMPACT_DEVICE_PARAMS
+                        ).fit(features_scaled)
+                        self._export_variants("device_anomaly", exported, model, compact, scaler, features)
+                    except Exception as e:
+                        logger.warning(f"Variant export failed: {e}")
             
             logger.info("✓ Device anomaly model training complete")
             return True
@@ -323,12 +355,25 @@ class AutoTrainer:
             # Export to ONNX if available
             if ONNX_CONVERSION_AVAILABLE:
                 try:
-                    self._export_to_onnx(
+                    exported = self._export_to_onnx(
                         model, scaler, features_scaled[0:1],
                         "domain_risk.onnx"
                     )
                 except Exception as e:
                     logger.warning(f"ONNX export failed: {e}")
+                    exported = None
+                
+                # Variants are compared against the exported model
+                if self.export_variants and exported is not None:
+                    try:
+                        compact = RandomForestClassifier(
+                            random_state=42,
+                            n_jobs=-1,
+                            **COMPACT_DOMAIN_PARAMS
+                        ).fit(features_scaled, pseudo_labels)
+                        self._export_variants("domain_risk", exported, model, compact, scaler, features)
+                    except Exception as e:
+                        logger.warning(f"Variant export failed: {e}")
             
             logger.info("✓ Domain risk model training complete")
             logger.info("  Note: Model trained on baseline patterns. Update with labeled")
@@ -349,10 +394,25 @@ class AutoTrainer:
             scaler: Feature scaler
             sample_input: Sample input for shape inference
             output_name: Output ONNX filename
+        
+        Returns:
+            The exported ONNX model
         """
         logger.info(f"Exporting to ONNX: {output_name}")
         
-        # Create pipeline with scaler and model
+        onnx_model = self._build_onnx(model, scaler, sample_input.shape[1])
+        
+        # Save via a temporary file so a running model registry never
+        # loads a partially written model
+        output_path = self.model_output_dir / output_name
+        self._write_atomic(output_path, onnx_model.SerializeToString())
+        
+        logger.info(f"✓ Exported to {output_path}")
+        return onnx_model
+    
+    @staticmethod
+    def _build_onnx(model, scaler, n_features: int):
+        """Convert a scaler + model pipeline to one ONNX graph."""
         from sklearn.pipeline import Pipeline
         pipeline = Pipeline([
             ('scaler', scaler),
@@ -360,18 +420,285 @@ class AutoTrainer:
         ])
         
         # Define input type
-        n_features = sample_input.shape[1]
         initial_type = [('float_input', FloatTensorType([None, n_features]))]
         
-        # Convert to ONNX
-        onnx_model = convert_sklearn(pipeline, initial_types=initial_type)
+        return convert_sklearn(pipeline, initial_types=initial_type, target_opset=TARGET_OPSET)
+    
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes):
+        """Write a file via a temporary file and rename."""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    
+    def _export_variants(
+        self,
+        name: str,
+        baseline,
+        model,
+        compact_model,
+        scaler,
+        features: np.ndarray
+    ) -> Dict:
+        """
+        Export optimized variants of a model and a side-by-side report.
         
-        # Save
-        output_path = self.model_output_dir / output_name
-        with open(output_path, "wb") as f:
-            f.write(onnx_model.SerializeToString())
+        Variants, written to model_output_dir/variants/:
+        - merged: the full model with the scaler folded into the tree
+          split thresholds (one graph, no Scaler operator)
+        - compact: compact_model (fewer, shallower trees), scaler folded in
+        - compact_int8: compact with dynamic int8 quantization; only kept if
+          the graph has operators ONNX Runtime can quantize (tree
+          ensembles have none)
         
-        logger.info(f"✓ Exported to {output_path}")
+        The report compares every variant against the exported float32
+        model on a sample of the training features: file size, inference
+        latency, label agreement and score deltas.
+        
+        Args:
+            name: Model name (file stem of the exported model)
+            baseline: ONNX model written by _export_to_onnx
+            model: Exported sklearn model
+            compact_model: Compact sklearn model trained on the same data
+            scaler: Fitted feature scaler
+            features: Unscaled training features
+        
+        Returns:
+            Report dictionary
+        """
+        variants_dir = self.model_output_dir / "variants"
+        variants_dir.mkdir(parents=True, exist_ok=True)
+        n_features = features.shape[1]
+        
+        compact = self._build_onnx(compact_model, scaler, n_features)
+        
+        candidates = [
+            ("float32", baseline, len(model.estimators_), "exported model"),
+            ("merged", self._fold_scaler(baseline), len(model.estimators_), "scaler folded into thresholds"),
+        ]
+        compact_merged = self._fold_scaler(compact)
+        candidates.append((
+            "compact",
+            compact_merged or compact,
+            len(compact_model.estimators_),
+            ", ".join(f"{k}={v}" for k, v in compact_model.get_params().items()
+                      if k in ("n_estimators", "max_depth", "max_samples") and v is not None)
+        ))
+        candidates.append((
+            "compact_int8",
+            self._quantize(compact_merged or compact),
+            len(compact_model.estimators_),
+            "dynamic int8 quantization"
+        ))
+        
+        rng = np.random.default_rng(42)
+        rows = min(len(features), VARIANT_EVAL_ROWS)
+        sample = features[rng.choice(len(features), rows, replace=False)].astype(np.float32)
+        
+        report = {
+            "model": name,
+            "created_at": datetime.now().isoformat(),
+            "evaluation_rows": rows,
+            "variants": [],
+        }
+        reference = None
+        for variant, onnx_model, trees, notes in candidates:
+            if onnx_model is None:
+                logger.info(f"Skipping {name} variant '{variant}': not applicable to this graph")
+                continue
+            
+            data = onnx_model.SerializeToString()
+            if variant == "float32":
+                path = self.model_output_dir / f"{name}.onnx"
+            else:
+                path = variants_dir / f"{name}.{variant}.onnx"
+                self._write_atomic(path, data)
+            
+            entry = {
+                "variant": variant,
+                "path": str(path),
+                "size_bytes": len(data),
+                "trees": trees,
+                "notes": notes,
+            }
+            if ORT_AVAILABLE:
+                outputs, seconds = self._benchmark(data, sample)
+                if reference is None:
+                    reference = outputs
+                entry["ms_per_1k_rows"] = round(1000 * seconds * 1000 / rows, 3)
+                entry.update(self._agreement(reference, outputs))
+            report["variants"].append(entry)
+        
+        report_path = variants_dir / f"{name}.report.json"
+        self._write_atomic(report_path, json.dumps(report, indent=2).encode())
+        
+        logger.info(f"✓ Exported {len(report['variants']) - 1} {name} variants to {variants_dir}")
+        for entry in report["variants"]:
+            logger.info(
+                f"  {entry['variant']:<13} {entry['size_bytes'] / 1024:>8.1f} KB"
+                + (
+                    f"  {entry['ms_per_1k_rows']:>8.3f} ms/1k rows"
+                    f"  label agreement {entry['label_agreement']:.4f}"
+                    f"  max score delta {entry.get('max_abs_score_delta')}"
+                    if "ms_per_1k_rows" in entry else ""
+                )
+            )
+        return report
+    
+    @staticmethod
+    def _fold_scaler(onnx_model):
+        """
+        Fold a leading Scaler into the split thresholds of the tree ensembles it feeds.
+        
+        A split on a scaled feature, (x - offset) * scale <= t, is the same
+        split as x <= t / scale + offset for scale > 0, so the thresholds
+        can be rewritten in raw feature units and the Scaler dropped. The
+        scaled input may reach the trees directly or through constant
+        column Gathers (IsolationForest feature subsets).
+        
+        Args:
+            onnx_model: ONNX model from _build_onnx
+        
+        Returns:
+            Folded copy, or None if the graph does not have that shape
+        """
+        import onnx
+        from onnx import helper, numpy_helper
+        
+        folded = onnx.ModelProto()
+        folded.CopyFrom(onnx_model)
+        graph = folded.graph
+        
+        scalers = [node for node in graph.node if node.op_type == "Scaler"]
+        if len(scalers) != 1 or scalers[0].input[0] != graph.input[0].name:
+            return None
+        scaler_node = scalers[0]
+        attrs = {a.name: helper.get_attribute_value(a) for a in scaler_node.attribute}
+        n_features = graph.input[0].type.tensor_type.shape.dim[1].dim_value
+        offset = np.broadcast_to(np.asarray(attrs.get("offset", [0.0]), dtype=np.float64), (n_features,))
+        scale = np.broadcast_to(np.asarray(attrs.get("scale", [1.0]), dtype=np.float64), (n_features,))
+        if np.any(scale <= 0):
+            return None
+        
+        initializers = {init.name: numpy_helper.to_array(init) for init in graph.initializer}
+        consumers: Dict[str, List] = {}
+        for node in graph.node:
+            for name in node.input:
+                consumers.setdefault(name, []).append(node)
+        
+        # (tree node, column of the raw input for each tree feature id)
+        trees = []
+        for node in consumers.get(scaler_node.output[0], []):
+            if node.op_type in ("TreeEnsembleRegressor", "TreeEnsembleClassifier"):
+                trees.append((node, np.arange(n_features)))
+            elif node.op_type == "Gather" and node.input[1] in initializers:
+                axis = next((helper.get_attribute_value(a) for a in node.attribute if a.name == "axis"), 0)
+                columns = initializers[node.input[1]]
+                gathered = consumers.get(node.output[0], [])
+                if axis != 1 or columns.ndim != 1 or not gathered:
+                    return None
+                for tree in gathered:
+                    if tree.op_type not in ("TreeEnsembleRegressor", "TreeEnsembleClassifier"):
+                        return None
+                    trees.append((tree, columns))
+            else:
+                return None
+        if not trees:
+            return None
+        
+        for tree, columns in trees:
+            tree_attrs = {a.name: a for a in tree.attribute}
+            if "nodes_values" not in tree_attrs:
+                return None
+            feature_ids = np.asarray(tree_attrs["nodes_featureids"].ints)
+            modes = list(tree_attrs["nodes_modes"].strings)
+            values = np.asarray(tree_attrs["nodes_values"].floats, dtype=np.float64)
+            branch = np.array([mode != b"LEAF" for mode in modes])
+            cols = columns[feature_ids[branch]]
+            values[branch] = values[branch] / scale[cols] + offset[cols]
+            del tree_attrs["nodes_values"].floats[:]
+            tree_attrs["nodes_values"].floats.extend(values.astype(np.float32).tolist())
+        
+        # Feed the raw input to everything that read the scaled one
+        for node in consumers[scaler_node.output[0]]:
+            for i, name in enumerate(node.input):
+                if name == scaler_node.output[0]:
+                    node.input[i] = scaler_node.input[0]
+        graph.node.remove(scaler_node)
+        return folded
+    
+    @staticmethod
+    def _quantize(onnx_model):
+        """
+        Apply ONNX Runtime dynamic int8 quantization.
+        
+        Returns:
+            Quantized model, or None if quantization is unavailable or
+            found nothing to quantize
+        """
+        if not QUANTIZATION_AVAILABLE:
+            return None
+        if not any(node.op_type in QUANTIZABLE_OPS for node in onnx_model.graph.node):
+            return None
+        
+        import onnx
+        with tempfile.TemporaryDirectory() as tmp:
+            src, dst = Path(tmp) / "model.onnx", Path(tmp) / "model.int8.onnx"
+            onnx.save(onnx_model, str(src))
+            try:
+                quantize_dynamic(str(src), str(dst), weight_type=QuantType.QInt8)
+            except Exception as e:
+                logger.info(f"Dynamic quantization not applicable: {e}")
+                return None
+            quantized = onnx.load(str(dst))
+        
+        if not any(node.op_type in QUANTIZED_OPS for node in quantized.graph.node):
+            return None
+        return quantized
+    
+    @staticmethod
+    def _benchmark(data: bytes, sample: np.ndarray, runs: int = 5) -> Tuple[List[np.ndarray], float]:
+        """
+        Run a model on the evaluation sample.
+        
+        Returns:
+            Tuple of (outputs as 2D arrays, median seconds per run)
+        """
+        session = ort.InferenceSession(data, providers=["CPUExecutionProvider"])
+        feed = {session.get_inputs()[0].name: sample}
+        outputs = session.run(None, feed)
+        
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            session.run(None, feed)
+            timings.append(time.perf_counter() - start)
+        
+        arrays = []
+        for output in outputs:
+            if isinstance(output, list) and output and isinstance(output[0], dict):
+                # ZipMap probabilities: one {class: probability} per row
+                output = [[row[k] for k in sorted(row)] for row in output]
+            arrays.append(np.asarray(output, dtype=np.float64).reshape(len(sample), -1))
+        return arrays, float(np.median(timings))
+    
+    @staticmethod
+    def _agreement(reference: List[np.ndarray], outputs: List[np.ndarray]) -> Dict:
+        """
+        Compare variant outputs with the reference model's.
+        
+        The first output is the label; the last column of the second
+        output is the score (anomaly score or positive-class probability).
+        """
+        result = {
+            "label_agreement": round(float(np.mean(reference[0][:, 0] == outputs[0][:, 0])), 6),
+        }
+        if len(reference) > 1 and len(outputs) > 1:
+            delta = np.abs(reference[1][:, -1] - outputs[1][:, -1])
+            result["mean_abs_score_delta"] = round(float(delta.mean()), 6)
+            result["max_abs_score_delta"] = round(float(delta.max()), 6)
+        return result
     
     def train_all(self) -> bool:
         """
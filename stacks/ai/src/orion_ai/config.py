@@ -12,6 +12,9 @@ from orion_ai.core.config import (
     ModelConfig,
     ThreatIntelConfig,
     DetectionConfig,
+    OutputConfig,
+    SOARConfig,
+    UIConfig,
     AppConfig,
     get_config,
     reload_config,
@@ -23,6 +26,9 @@ __all__ = [
     "ModelConfig",
     "ThreatIntelConfig",
     "DetectionConfig",
+    "OutputConfig",
+    "SOARConfig",
+    "UIConfig",
     "AppConfig",
     "get_config",
     "reload_config",
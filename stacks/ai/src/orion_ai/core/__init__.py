@@ -13,7 +13,7 @@ from orion_ai.core.models import (
     HealthScore,
 )
 from orion_ai.core.loki_client import LokiClient
-from orion_ai.core.events import emit_event
+from orion_ai.core.events import emit_event, flush_events, close_events
 from orion_ai.core.config import get_loki_url
 
 __all__ = [
@@ -25,5 +25,7 @@ __all__ = [
     "HealthScore",
     "LokiClient",
     "emit_event",
+    "flush_events",
+    "close_events",
     "get_loki_url",
 ]
@@ -21,6 +21,65 @@ class LokiConfig(BaseSettings):
         default=30,
         description="Query timeout in seconds"
     )
+    page_size: int = Field(
+        default=5000,
+        ge=1,
+        description="Entries requested per query_range page"
+    )
+    slice_seconds: int = Field(
+        default=300,
+        ge=1,
+        description="Initial time slice walked per query (adapts to volume)"
+    )
+    max_entries: int = Field(
+        default=0,
+        ge=0,
+        description="Maximum entries read per query window (0 = unlimited)"
+    )
+    shard_seconds: int = Field(
+        default=150,
+        ge=0,
+        description="Length of each concurrently fetched time shard (0 = no sharding)"
+    )
+    concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Maximum concurrent Loki queries"
+    )
+    retries: int = Field(
+        default=3,
+        ge=0,
+        description="Retry attempts for failed or throttled Loki queries"
+    )
+    retry_backoff: float = Field(
+        default=0.5,
+        ge=0.0,
+        description="Exponential backoff factor between retries (seconds)"
+    )
+    event_batch_size: int = Field(
+        default=500,
+        ge=1,
+        description="Buffered events that trigger a push"
+    )
+    event_batch_bytes: int = Field(
+        default=1024 * 1024,
+        ge=1,
+        description="Buffered event bytes that trigger a push"
+    )
+    event_flush_seconds: float = Field(
+        default=1.0,
+        gt=0,
+        description="Max age of a buffered event before it is pushed"
+    )
+    event_buffer_limit: int = Field(
+        default=10000,
+        ge=1,
+        description="Max events held while Loki is unreachable (oldest are dropped)"
+    )
+    event_gzip: bool = Field(
+        default=False,
+        description="Gzip-compress event push bodies"
+    )
     
     class Config:
         env_prefix = "LOKI_"
@@ -45,6 +104,30 @@ class PiHoleConfig(BaseSettings):
         default=3,
         description="Number of retry attempts for failed API calls"
     )
+    queue_size: int = Field(
+        default=10000,
+        ge=1,
+        description="Max pending block/unblock requests (further requests are dropped)"
+    )
+    batch_size: int = Field(
+        default=50,
+        ge=1,
+        description="Max domains per Pi-hole add request"
+    )
+    concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Concurrent Pi-hole API requests"
+    )
+    state_path: str = Field(
+        default="/var/lib/orion-ai/pihole_blocked.db",
+        description="SQLite record of domains already blocked"
+    )
+    drain_timeout: float = Field(
+        default=30.0,
+        ge=0,
+        description="Seconds to wait for pending requests at shutdown"
+    )
     
     class Config:
         env_prefix = "PIHOLE_"
@@ -73,6 +156,75 @@ class ModelConfig(BaseSettings):
         le=1.0,
         description="Threshold for domain blocking"
     )
+    inference_batch_size: int = Field(
+        default=4096,
+        ge=1,
+        description="Maximum rows per model inference call"
+    )
+    onnx_intra_op_threads: int = Field(
+        default=0,
+        ge=0,
+        description="ONNX Runtime threads within an operator (0 = one per core)"
+    )
+    onnx_inter_op_threads: int = Field(
+        default=0,
+        ge=0,
+        description="ONNX Runtime threads across operators in parallel mode (0 = default)"
+    )
+    onnx_execution_mode: str = Field(
+        default="sequential",
+        description="ONNX Runtime execution mode (sequential, parallel)"
+    )
+    onnx_graph_optimization: str = Field(
+        default="all",
+        description="ONNX Runtime graph optimization level (disable, basic, extended, all)"
+    )
+    onnx_allow_spinning: bool = Field(
+        default=True,
+        description="Let idle ONNX Runtime threads busy-wait for work (off frees CPU for other services)"
+    )
+    onnx_mem_arena: bool = Field(
+        default=True,
+        description="Use the ONNX Runtime CPU memory arena"
+    )
+    onnx_mem_pattern: bool = Field(
+        default=True,
+        description="Pre-plan ONNX Runtime memory from the first run's allocation pattern"
+    )
+    onnx_optimized_model_dir: Optional[str] = Field(
+        default=None,
+        description="Directory caching optimized ONNX graphs between restarts (None = no cache)"
+    )
+    model_watch_interval: float = Field(
+        default=30.0,
+        ge=0,
+        description="Seconds between checks for new model files (0 = no hot swapping)"
+    )
+    model_shadow_batches: int = Field(
+        default=0,
+        ge=0,
+        description="Batches a new model is shadow-scored before it replaces the active one (0 = swap once validated)"
+    )
+    model_canary_rows: int = Field(
+        default=256,
+        ge=1,
+        description="Rows of recent features used to validate a new model"
+    )
+    tflite_num_threads: int = Field(
+        default=0,
+        ge=0,
+        description="Threads per TFLite interpreter (0 = runtime default)"
+    )
+    tflite_pool_size: int = Field(
+        default=1,
+        ge=1,
+        description="TFLite interpreters running batch chunks in parallel"
+    )
+    model_warmup_rows: int = Field(
+        default=4096,
+        ge=0,
+        description="Rows in the synthetic warm-up batch run after loading a model (0 = no warm-up)"
+    )
     
     @field_validator("device_anomaly_threshold", "domain_risk_threshold")
     @classmethod
@@ -82,6 +234,26 @@ class ModelConfig(BaseSettings):
             raise ValueError("Threshold must be between 0.0 and 1.0")
         return v
     
+    @field_validator("onnx_execution_mode")
+    @classmethod
+    def validate_execution_mode(cls, v: str) -> str:
+        """Validate ONNX Runtime execution mode."""
+        valid_modes = ["sequential", "parallel"]
+        v = v.lower()
+        if v not in valid_modes:
+            raise ValueError(f"Execution mode must be one of: {valid_modes}")
+        return v
+    
+    @field_validator("onnx_graph_optimization")
+    @classmethod
+    def validate_graph_optimization(cls, v: str) -> str:
+        """Validate ONNX Runtime graph optimization level."""
+        valid_levels = ["disable", "basic", "extended", "all"]
+        v = v.lower()
+        if v not in valid_levels:
+            raise ValueError(f"Graph optimization must be one of: {valid_levels}")
+        return v
+    
     class Config:
         env_prefix = ""
 
@@ -117,6 +289,11 @@ class ThreatIntelConfig(BaseSettings):
         ge=1,
         description="Remove threat data older than this many days"
     )
+    index_check_seconds: float = Field(
+        default=30.0,
+        ge=0.0,
+        description="How often lookups check the cache database for changes by other processes"
+    )
     
     class Config:
         env_prefix = "THREAT_INTEL_"
@@ -148,11 +325,175 @@ class DetectionConfig(BaseSettings):
         default=False,
         description="Enable real-time streaming mode (vs batch)"
     )
+    incremental_device_window: bool = Field(
+        default=False,
+        description=(
+            "Keep device aggregates in sliding-window panes between batch runs "
+            "(unique counts become HyperLogLog estimates)"
+        )
+    )
+    incremental_lag_seconds: int = Field(
+        default=120,
+        ge=0,
+        description="Margin before the read cursor re-read each incremental run, for late Loki ingestion"
+    )
+    pane_seconds: int = Field(
+        default=60,
+        ge=1,
+        description="Pane length for incremental device aggregation (seconds)"
+    )
+    sketch_precision: int = Field(
+        default=8,
+        ge=4,
+        le=16,
+        description="HyperLogLog precision for unique counts (2^p registers)"
+    )
+    domain_feature_cache_size: int = Field(
+        default=100_000,
+        ge=0,
+        description="Domains whose lexical features are cached across windows (0 disables)"
+    )
     
     class Config:
         env_prefix = ""
 
 
+class OutputConfig(BaseSettings):
+    """Result log output configuration."""
+    
+    buffer_size: int = Field(
+        default=65536,
+        ge=0,
+        description="Bytes of result lines buffered before writing (0 = write each line)"
+    )
+    flush_interval: float = Field(
+        default=1.0,
+        gt=0,
+        description="Seconds between background flushes of buffered lines"
+    )
+    max_bytes: int = Field(
+        default=100 * 1024 * 1024,
+        ge=0,
+        description="Rotate a result log once it reaches this size (0 = no size rotation)"
+    )
+    rotate_hours: float = Field(
+        default=24.0,
+        ge=0,
+        description="Rotate a result log after this many hours (0 = no time rotation)"
+    )
+    backup_count: int = Field(
+        default=5,
+        ge=0,
+        description="Rotated files kept per result log"
+    )
+    compress: bool = Field(
+        default=True,
+        description="Gzip rotated result logs"
+    )
+    compact: bool = Field(
+        default=False,
+        description="Omit feature payloads for results below compact_min_severity"
+    )
+    compact_min_severity: str = Field(
+        default="warning",
+        description="Lowest severity written with full features in compact mode (info, warning, critical)"
+    )
+    
+    @field_validator("compact_min_severity")
+    @classmethod
+    def validate_compact_min_severity(cls, v: str) -> str:
+        """Validate severity cutoff."""
+        valid_severities = ["info", "warning", "critical"]
+        v = v.lower()
+        if v not in valid_severities:
+            raise ValueError(f"Compact severity must be one of: {valid_severities}")
+        return v
+    
+    class Config:
+        env_prefix = "OUTPUT_"
+
+
+class SOARConfig(BaseSettings):
+    """SOAR action execution configuration."""
+    
+    block_concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Concurrent BLOCK_DOMAIN actions"
+    )
+    block_rate: float = Field(
+        default=10.0,
+        ge=0.0,
+        description="BLOCK_DOMAIN actions per second (0 = unlimited)"
+    )
+    block_burst: int = Field(
+        default=20,
+        ge=1,
+        description="BLOCK_DOMAIN actions allowed at once before rate limiting"
+    )
+    tag_concurrency: int = Field(
+        default=1,
+        ge=1,
+        description="Concurrent TAG_DEVICE actions (SQLite writes serialize anyway)"
+    )
+    tag_rate: float = Field(
+        default=0.0,
+        ge=0.0,
+        description="TAG_DEVICE actions per second (0 = unlimited)"
+    )
+    tag_burst: int = Field(
+        default=1,
+        ge=1,
+        description="TAG_DEVICE actions allowed at once before rate limiting"
+    )
+    notify_concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="Concurrent SEND_NOTIFICATION actions"
+    )
+    notify_rate: float = Field(
+        default=1.0,
+        ge=0.0,
+        description="SEND_NOTIFICATION actions per second (0 = unlimited)"
+    )
+    notify_burst: int = Field(
+        default=10,
+        ge=1,
+        description="SEND_NOTIFICATION actions allowed at once before rate limiting"
+    )
+    action_timeout: float = Field(
+        default=300.0,
+        gt=0.0,
+        description="Seconds a SOAR run waits for its actions to complete"
+    )
+    
+    class Config:
+        env_prefix = "SOAR_"
+
+
+class UIConfig(BaseSettings):
+    """Web UI view materialization configuration."""
+    
+    view_ttl: float = Field(
+        default=30.0,
+        gt=0.0,
+        description="Seconds a view snapshot is served before it is refreshed in the background"
+    )
+    refresh_interval: float = Field(
+        default=60.0,
+        ge=0.0,
+        description="Seconds between scheduled dashboard and device list refreshes (0 = on demand only)"
+    )
+    max_query_views: int = Field(
+        default=64,
+        ge=1,
+        description="Max distinct event queries kept materialized"
+    )
+    
+    class Config:
+        env_prefix = "UI_"
+
+
 class AppConfig(BaseSettings):
     """Main application configuration."""
     
@@ -171,6 +512,9 @@ class AppConfig(BaseSettings):
     model: ModelConfig = Field(default_factory=ModelConfig)
     detection: DetectionConfig = Field(default_factory=DetectionConfig)
     threat_intel: ThreatIntelConfig = Field(default_factory=ThreatIntelConfig)
+    output: OutputConfig = Field(default_factory=OutputConfig)
+    soar: SOARConfig = Field(default_factory=SOARConfig)
+    ui: UIConfig = Field(default_factory=UIConfig)
     
     @field_validator("log_level")
     @classmethod
@@ -208,7 +552,10 @@ def get_config() -> AppConfig:
             pihole=PiHoleConfig(),
             model=ModelConfig(),
             detection=DetectionConfig(),
-            threat_intel=ThreatIntelConfig()
+            threat_intel=ThreatIntelConfig(),
+            output=OutputConfig(),
+            soar=SOARConfig(),
+            ui=UIConfig()
         )
     return _config
 
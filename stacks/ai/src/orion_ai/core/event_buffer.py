@@ -0,0 +1,259 @@
+"""
+Batched log emission to Loki.
+
+Buffers log lines in memory grouped by label set and pushes them as Loki
+streams from a background thread, so emitting an event never waits on
+an HTTP request.
+"""
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
+
+from orion_ai.core.loki_client import LokiClient
+
+logger = logging.getLogger(__name__)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class EventBuffer:
+    """
+    In-process buffer of Loki log lines.
+    
+    add() files each line under its label set and returns immediately. A
+    background thread pushes all buffered streams in one request when the
+    buffer holds max_events lines or max_bytes of JSON, or when the oldest
+    line is max_age seconds old. If a push fails, the lines are kept for
+    the next attempt, up to max_buffered lines (oldest dropped first).
+    
+    Attributes:
+        client: Loki client used for pushes
+        max_events: Line count that triggers a push
+        max_bytes: Encoded size that triggers a push
+        max_age: Seconds a line may wait before being pushed
+        max_buffered: Max lines held while pushes fail
+        compress: Gzip-compress push bodies
+    """
+    
+    def __init__(
+        self,
+        client: LokiClient,
+        max_events: int = 500,
+        max_bytes: int = 1024 * 1024,
+        max_age: float = 1.0,
+        max_buffered: int = 10000,
+        compress: bool = False
+    ):
+        """
+        Initialize event buffer and start its flush thread.
+        
+        Args:
+            client: Loki client used for pushes
+            max_events: Line count that triggers a push
+            max_bytes: Encoded size that triggers a push
+            max_age: Seconds a line may wait before being pushed
+            max_buffered: Max lines held while pushes fail
+            compress: Gzip-compress push bodies
+        """
+        self.client = client
+        self.max_events = max_events
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_buffered = max_buffered
+        self.compress = compress
+        
+        self._streams: Dict[LabelKey, List[List[str]]] = {}
+        self._count = 0
+        self._bytes = 0
+        self._oldest: Optional[float] = None
+        self._pushing = False
+        self._flush_requested = False
+        self._closed = False
+        self._cond = threading.Condition()
+        
+        self._thread = threading.Thread(
+            target=self._run,
+            name="loki-event-flush",
+            daemon=True
+        )
+        self._thread.start()
+    
+    @property
+    def pending(self) -> int:
+        """Number of buffered lines."""
+        with self._cond:
+            return self._count
+    
+    def add(
+        self,
+        labels: Dict[str, str],
+        log: Dict[str, Any],
+        timestamp: Optional[datetime] = None
+    ) -> None:
+        """
+        Buffer a structured JSON log line.
+        
+        Args:
+            labels: Loki stream labels
+            log: Log data as dictionary (will be JSON-encoded)
+            timestamp: Optional timestamp (default: now)
+        """
+        if timestamp is None:
+            timestamp = datetime.now()
+        
+        line = json.dumps(log)
+        entry = [str(int(timestamp.timestamp() * 1e9)), line]
+        key = tuple(sorted(labels.items()))
+        
+        with self._cond:
+            if self._closed:
+                logger.warning("Event buffer closed, pushing log line directly")
+            else:
+                self._streams.setdefault(key, []).append(entry)
+                self._count += 1
+                self._bytes += len(line)
+                if self._oldest is None:
+                    # Wake the idle flush thread to start the age timer
+                    self._oldest = time.monotonic()
+                    self._cond.notify_all()
+                elif self._count >= self.max_events or self._bytes >= self.max_bytes:
+                    self._cond.notify_all()
+                return
+        
+        self.client.push_streams([{"stream": labels, "values": [entry]}], compress=self.compress)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Push all buffered lines now and wait for the push to finish.
+        
+        Args:
+            timeout: Max seconds to wait (None waits indefinitely)
+        
+        Returns:
+            True if the buffer is empty afterwards, False on timeout or
+            push failure
+        """
+        with self._cond:
+            if self._count:
+                self._flush_requested = True
+                self._cond.notify_all()
+            self._cond.wait_for(
+                lambda: not self._flush_requested and not self._pushing,
+                timeout=timeout
+            )
+            return self._count == 0 and not self._pushing
+    
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Flush buffered lines and stop the flush thread.
+        
+        Args:
+            timeout: Max seconds to wait for the final push
+        
+        Returns:
+            True if all lines were pushed
+        """
+        flushed = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            if self._count:
+                logger.warning(f"Discarding {self._count} buffered log lines")
+                self._clear()
+            self._cond.notify_all()
+        self._thread.join(timeout)
+        return flushed
+    
+    def _due(self) -> bool:
+        """Check whether buffered lines should be pushed; caller holds the lock."""
+        if not self._count:
+            return False
+        return (
+            self._flush_requested
+            or self._count >= self.max_events
+            or self._bytes >= self.max_bytes
+            or time.monotonic() - self._oldest >= self.max_age
+        )
+    
+    def _clear(self) -> None:
+        """Empty the buffer; caller holds the lock."""
+        self._streams = {}
+        self._count = 0
+        self._bytes = 0
+        self._oldest = None
+    
+    def _run(self) -> None:
+        """Flush loop: push buffered streams whenever a threshold is reached."""
+        while True:
+            with self._cond:
+                while not self._closed and not self._due():
+                    wait = None
+                    if self._count:
+                        wait = max(self.max_age - (time.monotonic() - self._oldest), 0)
+                    self._cond.wait(wait)
+                if self._closed:
+                    return
+                
+                streams, count, size = self._streams, self._count, self._bytes
+                self._clear()
+                self._flush_requested = False
+                self._pushing = True
+            
+            try:
+                self.client.push_streams(
+                    [
+                        {"stream": dict(key), "values": sorted(values, key=lambda v: int(v[0]))}
+                        for key, values in streams.items()
+                    ],
+                    compress=self.compress
+                )
+            except Exception as e:
+                logger.error(f"Failed to push {count} buffered log lines to Loki: {e}")
+                self._requeue(streams, count, size)
+                # Back off before the next attempt
+                time.sleep(self.max_age)
+            finally:
+                with self._cond:
+                    self._pushing = False
+                    self._cond.notify_all()
+    
+    def _requeue(self, streams: Dict[LabelKey, List[List[str]]], count: int, size: int) -> None:
+        """Put lines from a failed push back in front of newer ones."""
+        with self._cond:
+            if self._closed:
+                return
+            for key, values in self._streams.items():
+                streams.setdefault(key, []).extend(values)
+            self._streams = streams
+            self._count += count
+            self._bytes += size
+            self._oldest = time.monotonic()
+            
+            overflow = self._count - self.max_buffered
+            if overflow > 0:
+                self._drop_oldest(overflow)
+    
+    def _drop_oldest(self, n: int) -> None:
+        """Drop the n oldest buffered lines; caller holds the lock."""
+        entries = sorted(
+            (int(value[0]), key, i)
+            for key, values in self._streams.items()
+            for i, value in enumerate(values)
+        )[:n]
+        drop: Dict[LabelKey, set] = {}
+        for _, key, i in entries:
+            drop.setdefault(key, set()).add(i)
+        
+        for key, indices in drop.items():
+            kept = [v for i, v in enumerate(self._streams[key]) if i not in indices]
+            self._bytes -= sum(len(v[1]) for i, v in enumerate(self._streams[key]) if i in indices)
+            if kept:
+                self._streams[key] = kept
+            else:
+                del self._streams[key]
+        self._count -= n
+        
+        logger.warning(f"Event buffer full ({self.max_buffered}), dropped {n} oldest log lines")
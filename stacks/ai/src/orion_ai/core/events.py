@@ -2,20 +2,28 @@
 Event emission helpers for creating and pushing events to Loki.
 
 Provides convenience functions for emitting security events from any module.
+Events are buffered and pushed to Loki in batches from a background thread;
+call flush_events() where an event must be visible before continuing.
 """
 
+import atexit
 import logging
+import threading
 import uuid
 from datetime import datetime
 from typing import Dict, Optional, Any
 
+from orion_ai.core.config import get_config
+from orion_ai.core.event_buffer import EventBuffer
 from orion_ai.core.models import Event, EventType, EventSeverity
 from orion_ai.core.loki_client import LokiClient
 
 logger = logging.getLogger(__name__)
 
-# Global Loki client instance
+# Global Loki client and event buffer instances
 _loki_client: Optional[LokiClient] = None
+_event_buffer: Optional[EventBuffer] = None
+_event_buffer_lock = threading.Lock()
 
 
 def get_loki_client() -> LokiClient:
@@ -31,11 +39,77 @@ def get_loki_client() -> LokiClient:
     return _loki_client
 
 
+def get_event_buffer() -> EventBuffer:
+    """
+    Get or create the global event buffer.
+    
+    The buffer is flushed at interpreter exit.
+    
+    Returns:
+        EventBuffer instance
+    """
+    global _event_buffer
+    with _event_buffer_lock:
+        if _event_buffer is None:
+            config = get_config().loki
+            _event_buffer = EventBuffer(
+                get_loki_client(),
+                max_events=config.event_batch_size,
+                max_bytes=config.event_batch_bytes,
+                max_age=config.event_flush_seconds,
+                max_buffered=config.event_buffer_limit,
+                compress=config.event_gzip
+            )
+            atexit.register(close_events, config.timeout)
+    return _event_buffer
+
+
+def flush_events(timeout: Optional[float] = None) -> bool:
+    """
+    Push buffered events to Loki now.
+    
+    Args:
+        timeout: Max seconds to wait (None waits indefinitely)
+        
+    Returns:
+        True if all buffered events were pushed
+    """
+    if _event_buffer is None:
+        return True
+    try:
+        return _event_buffer.flush(timeout)
+    except Exception as e:
+        logger.error(f"Failed to flush events to Loki: {e}")
+        return False
+
+
+def close_events(timeout: Optional[float] = None) -> bool:
+    """
+    Push buffered events and stop the background flush thread.
+    
+    Later events are pushed one at a time.
+    
+    Args:
+        timeout: Max seconds to wait for the final push
+        
+    Returns:
+        True if all buffered events were pushed
+    """
+    if _event_buffer is None:
+        return True
+    try:
+        return _event_buffer.close(timeout)
+    except Exception as e:
+        logger.error(f"Failed to close event buffer: {e}")
+        return False
+
+
 def emit_event(event: Event) -> None:
     """
     Emit a security event to Loki.
     
-    Converts the Event to JSON and pushes it to Loki with consistent labels.
+    Converts the Event to JSON and queues it for Loki with consistent labels.
+    Events are pushed in batches by the global event buffer.
     
     Args:
         event: Event instance to emit
@@ -47,7 +121,7 @@ def emit_event(event: Event) -> None:
         - source: event.source
     """
     try:
-        client = get_loki_client()
+        buffer = get_event_buffer()
         
         # Build labels
         labels = {
@@ -64,8 +138,8 @@ def emit_event(event: Event) -> None:
         # Convert event to dict
         log_data = event.to_dict()
         
-        # Push to Loki
-        client.push_log(labels, log_data, timestamp=event.timestamp)
+        # Queue for Loki
+        buffer.add(labels, log_data, timestamp=event.timestamp)
         
         logger.info(
             f"Emitted event: {event.event_type.value} - {event.title} "
@@ -5,10 +5,11 @@ Provides a simple interface to Loki for reading logs via LogQL and writing
 structured JSON logs with labels.
 """
 
+import gzip
 import json
 import logging
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Union
 import requests
 from requests.auth import HTTPBasicAuth
 
@@ -24,6 +25,7 @@ class LokiClient:
     Provides methods for:
     - Pushing structured logs with labels
     - Querying logs using LogQL
+    - Running LogQL metric queries (count_over_time, sum by, ...)
     """
     
     def __init__(
@@ -53,6 +55,9 @@ class LokiClient:
         # Strip trailing slash
         self.url = self.url.rstrip('/')
         
+        # Keep-alive connections shared by pushes and queries
+        self.session = requests.Session()
+        
         logger.info(f"Initialized LokiClient with URL: {self.url}")
     
     def _get_auth(self) -> Optional[HTTPBasicAuth]:
@@ -84,34 +89,48 @@ class LokiClient:
         # Convert timestamp to nanoseconds
         ts_ns = int(timestamp.timestamp() * 1e9)
         
-        # Build labels string
-        label_str = ",".join([f'{k}="{v}"' for k, v in labels.items()])
-        
-        # Build Loki push payload
-        payload = {
-            "streams": [
-                {
-                    "stream": labels,
-                    "values": [
-                        [str(ts_ns), json.dumps(log)]
-                    ]
-                }
-            ]
-        }
+        self.push_streams([
+            {
+                "stream": labels,
+                "values": [
+                    [str(ts_ns), json.dumps(log)]
+                ]
+            }
+        ])
+    
+    def push_streams(self, streams: List[Dict[str, Any]], compress: bool = False) -> None:
+        """
+        Push several Loki streams in one request.
+        
+        Args:
+            streams: Loki push streams ({"stream": labels, "values": [[ts_ns, line], ...]})
+            compress: Gzip-compress the request body
+            
+        Raises:
+            requests.RequestException: If push fails
+        """
+        body = json.dumps({"streams": streams}).encode("utf-8")
+        headers = {"Content-Type": "application/json"}
+        if compress:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.url}/loki/api/v1/push",
-                json=payload,
+                data=body,
                 auth=self._get_auth(),
                 timeout=self.timeout,
-                headers={"Content-Type": "application/json"}
+                headers=headers
             )
             response.raise_for_status()
-            logger.debug(f"Pushed log to Loki: {label_str}")
+            logger.debug(
+                f"Pushed {sum(len(s['values']) for s in streams)} log lines "
+                f"in {len(streams)} streams to Loki"
+            )
             
         except requests.RequestException as e:
-            logger.error(f"Failed to push log to Loki: {e}")
+            logger.error(f"Failed to push logs to Loki: {e}")
             raise
     
     def query_range(
@@ -140,7 +159,7 @@ class LokiClient:
             
         Note:
             This is a basic implementation. Complex queries may need tuning.
-            TODO: Add support for step parameter and metric queries.
+            Use query_metric / query_metric_range for metric queries.
         """
         params = {
             "query": query,
@@ -151,7 +170,7 @@ class LokiClient:
         }
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.url}/loki/api/v1/query_range",
                 params=params,
                 auth=self._get_auth(),
@@ -179,6 +198,7 @@ class LokiClient:
                         
                         # Add metadata
                         log_data["_timestamp"] = datetime.fromtimestamp(int(ts_ns) / 1e9)
+                        log_data["_timestamp_ns"] = int(ts_ns)
                         log_data["_labels"] = stream_labels
                         
                         results.append(log_data)
@@ -190,6 +210,117 @@ class LokiClient:
             logger.error(f"Failed to query Loki: {e}")
             raise
     
+    def query_metric(
+        self,
+        query: str,
+        time: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluate a LogQL metric query at a single instant.
+        
+        Counting and aggregation happen in Loki, e.g.
+        'sum by (event_type) (count_over_time({stream="events"}[24h]))'
+        returns one sample per event type instead of the log lines.
+        
+        Args:
+            query: LogQL metric query
+            time: Evaluation time (default: now)
+            
+        Returns:
+            List of samples: {"labels": {...}, "value": float, "timestamp": datetime}
+            (a scalar result is returned as one sample with empty labels)
+            
+        Raises:
+            requests.RequestException: If query fails
+            ValueError: If the query returns log lines instead of samples
+        """
+        params = {"query": query}
+        if time is not None:
+            params["time"] = int(time.timestamp() * 1e9)
+        
+        data = self._get_metric("query", params)
+        result_type, result = data.get("resultType"), data.get("result", [])
+        
+        if result_type == "scalar":
+            return [{"labels": {}, **self._parse_sample(result)}]
+        if result_type != "vector":
+            raise ValueError(f"Expected a metric query, got {result_type} result")
+        
+        samples = [
+            {"labels": series.get("metric", {}), **self._parse_sample(series["value"])}
+            for series in result
+        ]
+        logger.debug(f"Metric query returned {len(samples)} samples")
+        return samples
+    
+    def query_metric_range(
+        self,
+        query: str,
+        start: datetime,
+        end: datetime,
+        step: Union[int, float, str] = 60
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluate a LogQL metric query over a time range.
+        
+        Args:
+            query: LogQL metric query
+            start: Start time
+            end: End time
+            step: Resolution in seconds, or a duration string (e.g. "5m")
+            
+        Returns:
+            List of series: {"labels": {...}, "values": [(datetime, float), ...]}
+            
+        Raises:
+            requests.RequestException: If query fails
+            ValueError: If the query returns log lines instead of samples
+        """
+        params = {
+            "query": query,
+            "start": int(start.timestamp() * 1e9),
+            "end": int(end.timestamp() * 1e9),
+            "step": step
+        }
+        
+        data = self._get_metric("query_range", params)
+        result_type = data.get("resultType")
+        if result_type != "matrix":
+            raise ValueError(f"Expected a metric query, got {result_type} result")
+        
+        series_list = []
+        for series in data.get("result", []):
+            values = []
+            for value in series.get("values", []):
+                sample = self._parse_sample(value)
+                values.append((sample["timestamp"], sample["value"]))
+            series_list.append({"labels": series.get("metric", {}), "values": values})
+        
+        logger.debug(f"Metric range query returned {len(series_list)} series")
+        return series_list
+    
+    def _get_metric(self, endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a query API request and return its "data" object."""
+        try:
+            response = self.session.get(
+                f"{self.url}/loki/api/v1/{endpoint}",
+                params=params,
+                auth=self._get_auth(),
+                timeout=self.timeout
+            )
+            response.raise_for_status()
+            return response.json().get("data", {})
+            
+        except requests.RequestException as e:
+            logger.error(f"Failed to run Loki metric query: {e}")
+            raise
+    
+    @staticmethod
+    def _parse_sample(value: List[Any]) -> Dict[str, Any]:
+        """Parse a [unix_seconds, "value"] pair."""
+        ts, sample = value
+        return {"timestamp": datetime.fromtimestamp(float(ts)), "value": float(sample)}
+    
     def query_labels(self, start: datetime, end: datetime) -> List[str]:
         """
         Get available labels in time range.
@@ -215,7 +346,7 @@ class LokiClient:
             True if healthy, False otherwise
         """
         try:
-            response = requests.get(
+            response = self.session.get(
                 f"{self.url}/ready",
                 timeout=5
             )
@@ -7,14 +7,17 @@ Run this for 7-30 days BEFORE training models to establish network baseline.
 
 import logging
 import json
+from collections import Counter
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterable, Optional
 import gzip
 
 from orion_ai.config import get_config
+from orion_ai.event_batch import EventBatch
 from orion_ai.log_reader import LokiLogReader
-from orion_ai.feature_extractor import FeatureExtractor
+from orion_ai.feature_extractor import DeviceFeatures, DomainFeatures, FeatureExtractor
+from orion_ai.training_data import FeatureManifest
 
 logger = logging.getLogger(__name__)
 
@@ -84,41 +87,50 @@ class DataCollector:
         )
         
         try:
-            # Read logs from Loki
-            suricata_events = self.log_reader.get_suricata_events(start_time, end_time)
-            dns_events = self.log_reader.get_dns_events(start_time, end_time)
+            # Stream logs from Loki, decoding every event once
+            flows = self.log_reader.stream_suricata_flows(start_time, end_time)
+            dns_queries = self.log_reader.stream_dns_queries(start_time, end_time)
+            alerts = self.log_reader.stream_suricata_alerts(start_time, end_time)
+            events = EventBatch.from_loki(flows, dns_queries, alerts)
             
             logger.info(
-                f"Retrieved {len(suricata_events)} Suricata events, "
-                f"{len(dns_events)} DNS events"
+                f"Retrieved {flows.entries_read} flows, "
+                f"{dns_queries.entries_read} DNS queries, "
+                f"{alerts.entries_read} alerts"
             )
             
-            # Extract features per device
-            device_features = self.feature_extractor.extract_device_features(
-                suricata_events, dns_events
+            # Extract features for all devices in one pass (the same rows
+            # the device pipeline scores)
+            feature_matrix, device_ips, _ = self.feature_extractor.extract_all_device_features(
+                events, start_time, end_time
             )
             
-            if not device_features:
+            if not device_ips:
                 logger.warning("No device features extracted")
                 return 0
             
             # Store features
             date_str = end_time.strftime("%Y-%m-%d")
             output_file = self.device_dir / f"device_features_{date_str}.jsonl.gz"
+            previous_size = output_file.stat().st_size if output_file.exists() else 0
             
             records_written = 0
             with gzip.open(output_file, "at", encoding="utf-8") as f:
-                for device_ip, features in device_features.items():
+                for device_ip, vector in zip(device_ips, feature_matrix):
+                    features = DeviceFeatures.from_vector(device_ip, start_time, end_time, vector)
                     record = {
                         "timestamp": end_time.isoformat(),
                         "device_ip": device_ip,
                         "window_start": start_time.isoformat(),
                         "window_end": end_time.isoformat(),
                         "features": features.to_dict(),
-                        "feature_vector": features.to_array().tolist()
+                        "feature_vector": vector.tolist()
                     }
-                    f.write(json.dumps(record) + "\n")
+                    f.write(json.dumps(record, default=str) + "\n")
                     records_written += 1
+            FeatureManifest(self.device_dir).record(
+                output_file.name, records_written, end_time, end_time, previous_size
+            )
             
             logger.info(
                 f"Collected {records_written} device records to {output_file}"
@@ -158,41 +170,45 @@ class DataCollector:
         )
         
         try:
-            # Read DNS events
-            dns_events = self.log_reader.get_dns_events(start_time, end_time)
+            # Stream DNS queries and count queries per domain
+            dns_queries = self.log_reader.stream_dns_queries(start_time, end_time)
+            domain_counts = _count_domains(dns_queries)
             
-            logger.info(f"Retrieved {len(dns_events)} DNS events")
+            logger.info(f"Retrieved {dns_queries.entries_read} DNS queries")
             
-            if not dns_events:
-                logger.warning("No DNS events found")
+            if not domain_counts:
+                logger.warning("No DNS queries found")
                 return 0
             
-            # Extract unique domains
-            unique_domains = set()
-            for event in dns_events:
-                domain = event.get("domain") or event.get("query")
-                if domain:
-                    unique_domains.add(domain)
+            logger.info(f"Found {len(domain_counts)} unique domains")
             
-            logger.info(f"Found {len(unique_domains)} unique domains")
+            # Extract features for all domains in one vectorized pass (the
+            # same rows the domain pipeline scores)
+            domains = list(domain_counts)
+            feature_matrix = self.feature_extractor.extract_domain_feature_matrix(
+                domains, [domain_counts[domain] for domain in domains]
+            )
             
-            # Extract features per domain
             date_str = end_time.strftime("%Y-%m-%d")
             output_file = self.domain_dir / f"domain_features_{date_str}.jsonl.gz"
+            previous_size = output_file.stat().st_size if output_file.exists() else 0
             
             records_written = 0
             with gzip.open(output_file, "at", encoding="utf-8") as f:
-                for domain in unique_domains:
-                    features = self.feature_extractor.extract_domain_features(domain)
+                for domain, vector in zip(domains, feature_matrix):
+                    features = DomainFeatures.from_vector(domain, vector)
                     
                     record = {
                         "timestamp": end_time.isoformat(),
                         "domain": domain,
                         "features": features.to_dict(),
-                        "feature_vector": features.to_array().tolist()
+                        "feature_vector": vector.tolist()
                     }
                     f.write(json.dumps(record) + "\n")
                     records_written += 1
+            FeatureManifest(self.domain_dir).record(
+                output_file.name, records_written, end_time, end_time, previous_size
+            )
             
             logger.info(
                 f"Collected {records_written} domain records to {output_file}"
@@ -211,8 +227,9 @@ class DataCollector:
         """
         Collect raw logs for analysis and debugging.
         
-        Stores raw Suricata and DNS events without feature extraction.
-        Useful for later re-processing or custom analysis.
+        Stores raw Suricata flow and DNS log entries (Loki timestamp, log
+        line and labels) without feature extraction, streaming them to
+        disk. Useful for later re-processing or custom analysis.
         
         Args:
             start_time: Start of collection window
@@ -235,31 +252,41 @@ class DataCollector:
         date_str = end_time.strftime("%Y-%m-%d")
         
         try:
-            # Collect Suricata events
-            suricata_events = self.log_reader.get_suricata_events(start_time, end_time)
-            if suricata_events:
-                output_file = self.raw_dir / f"suricata_{date_str}.jsonl.gz"
-                with gzip.open(output_file, "at", encoding="utf-8") as f:
-                    for event in suricata_events:
-                        f.write(json.dumps(event) + "\n")
-                        counts["suricata"] += 1
-                logger.info(f"Collected {counts['suricata']} Suricata events")
+            # Collect Suricata flows
+            counts["suricata"] = self._write_raw(
+                self.raw_dir / f"suricata_{date_str}.jsonl.gz",
+                self.log_reader.stream_suricata_flows(start_time, end_time)
+            )
+            logger.info(f"Collected {counts['suricata']} Suricata events")
             
-            # Collect DNS events
-            dns_events = self.log_reader.get_dns_events(start_time, end_time)
-            if dns_events:
-                output_file = self.raw_dir / f"dns_{date_str}.jsonl.gz"
-                with gzip.open(output_file, "at", encoding="utf-8") as f:
-                    for event in dns_events:
-                        f.write(json.dumps(event) + "\n")
-                        counts["dns"] += 1
-                logger.info(f"Collected {counts['dns']} DNS events")
+            # Collect DNS queries
+            counts["dns"] = self._write_raw(
+                self.raw_dir / f"dns_{date_str}.jsonl.gz",
+                self.log_reader.stream_dns_queries(start_time, end_time)
+            )
+            logger.info(f"Collected {counts['dns']} DNS events")
             
         except Exception as e:
             logger.error(f"Failed to collect raw logs: {e}", exc_info=True)
         
         return counts
     
+    @staticmethod
+    def _write_raw(output_file: Path, entries: Iterable[Dict]) -> int:
+        """Append log entries to a gzip JSONL file, creating it only if there are any."""
+        count = 0
+        f = None
+        try:
+            for entry in entries:
+                if f is None:
+                    f = gzip.open(output_file, "at", encoding="utf-8")
+                f.write(json.dumps(entry) + "\n")
+                count += 1
+        finally:
+            if f is not None:
+                f.close()
+        return count
+    
     def get_collection_stats(self) -> Dict:
         """
         Get statistics on collected data.
@@ -295,3 +322,11 @@ class DataCollector:
             stats["collection_days"] = (max(dates) - min(dates)).days + 1
         
         return stats
+
+
+def _count_domains(dns_queries: Iterable[Dict]) -> Dict[str, int]:
+    """Count queries per domain (lowercased, without trailing dot)."""
+    events = EventBatch.from_loki(dns_queries=dns_queries)
+    queried = events.dns_rrname[events.dns_is_query]
+    domains = (d.lower().strip(".") for d in queried.tolist())
+    return dict(Counter(d for d in domains if d))
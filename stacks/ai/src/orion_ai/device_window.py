@@ -0,0 +1,295 @@
+"""
+Incremental sliding-window aggregation of device features.
+
+Keeps per-device running state in fixed time panes so each batch
+iteration only ingests the events that arrived since the previous one,
+instead of re-reading and re-aggregating the whole window.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+from orion_ai.event_batch import EventBatch
+from orion_ai.feature_extractor import (
+    DEVICE_COUNTERS,
+    DEVICE_DISTINCT,
+    FeatureExtractor,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _hash64(values: np.ndarray) -> np.ndarray:
+    """
+    Hash values to well-mixed 64-bit integers.
+    
+    Each distinct value is hashed once with Python's hash(), then passed
+    through the SplitMix64 finalizer so small integers (ports) spread
+    across all bits. Hashes are only stable within one process.
+    
+    Args:
+        values: 1D array of hashable values
+    
+    Returns:
+        1D uint64 array of hashes
+    """
+    uniques, inverse = np.unique(values, return_inverse=True)
+    z = np.array([hash(v) for v in uniques.tolist()], dtype=np.int64).view(np.uint64)
+    
+    z = z + np.uint64(0x9E3779B97F4A7C15)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    z = z ^ (z >> np.uint64(31))
+    
+    return z[inverse]
+
+
+def _hll_add(
+    registers: np.ndarray,
+    rows: np.ndarray,
+    sketch: int,
+    hashes: np.ndarray,
+    precision: int
+) -> None:
+    """
+    Add hashed values to HyperLogLog sketches in place.
+    
+    Args:
+        registers: Sketch registers, shape (n_devices, n_sketches, 2**precision)
+        rows: Device row per value
+        sketch: Sketch index (position in DEVICE_DISTINCT)
+        hashes: 64-bit hash per value
+        precision: Number of hash bits used to select a register
+    """
+    index = (hashes & np.uint64((1 << precision) - 1)).astype(np.int64)
+    remainder = hashes >> np.uint64(precision)
+    
+    # Rank = position of the leftmost 1-bit in the remaining bits
+    _, bit_length = np.frexp(remainder.astype(np.float64))
+    rank = (64 - precision - bit_length + 1).astype(np.uint8)
+    
+    np.maximum.at(registers, (rows, sketch, index), rank)
+
+
+def _hll_estimate(registers: np.ndarray) -> np.ndarray:
+    """
+    Estimate distinct counts from HyperLogLog registers.
+    
+    Uses linear counting for small cardinalities, where it is near exact.
+    
+    Args:
+        registers: Sketch registers, shape (..., m)
+    
+    Returns:
+        Array of estimates, shape (...)
+    """
+    m = registers.shape[-1]
+    alpha = {16: 0.673, 32: 0.697, 64: 0.709}.get(m, 0.7213 / (1 + 1.079 / m))
+    
+    raw = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)), axis=-1)
+    zeros = np.count_nonzero(registers == 0, axis=-1)
+    linear = m * np.log(m / np.maximum(zeros, 1))
+    
+    return np.rint(np.where((raw <= 2.5 * m) & (zeros > 0), linear, raw))
+
+
+@dataclass
+class _Pane:
+    """Per-device counters and distinct-count sketches for one time pane."""
+    
+    device_index: Dict[str, int]
+    counters: np.ndarray
+    registers: np.ndarray
+    
+    @classmethod
+    def empty(cls, n_registers: int) -> "_Pane":
+        """Create a pane with no devices."""
+        return cls(
+            device_index={},
+            counters=np.zeros((0, len(DEVICE_COUNTERS)), dtype=np.float64),
+            registers=np.zeros((0, len(DEVICE_DISTINCT), n_registers), dtype=np.uint8)
+        )
+    
+    def rows_for(self, device_ips: List[str]) -> np.ndarray:
+        """
+        Get row numbers for devices, adding rows for unseen devices.
+        
+        Args:
+            device_ips: Device IP addresses
+        
+        Returns:
+            Row index per device
+        """
+        rows = np.array(
+            [self.device_index.setdefault(ip, len(self.device_index)) for ip in device_ips],
+            dtype=np.int64
+        )
+        
+        grow = len(self.device_index) - len(self.counters)
+        if grow > 0:
+            self.counters = np.vstack([
+                self.counters,
+                np.zeros((grow, self.counters.shape[1]), dtype=np.float64)
+            ])
+            self.registers = np.concatenate([
+                self.registers,
+                np.zeros((grow,) + self.registers.shape[1:], dtype=np.uint8)
+            ])
+        
+        return rows
+
+
+class DeviceWindowAggregator:
+    """
+    Sliding-window device aggregates kept in fixed time panes.
+    
+    Each pane holds, per device, the additive counters from
+    FeatureExtractor.device_partials (counts, byte sums, protocol and port
+    counts, duration sums, NXDOMAIN counts, ...) plus HyperLogLog sketches
+    for unique destination IPs, ports, domains and alert signatures.
+    Features for the window are derived by summing counters and merging
+    sketches across live panes.
+    
+    The window is pane-aligned: the oldest live pane may hold up to
+    pane_seconds of events from before the nominal window start.
+    
+    Attributes:
+        window_ns: Window length in nanoseconds
+        pane_ns: Pane length in nanoseconds
+        precision: HyperLogLog precision (2**precision registers per sketch)
+        panes: Live panes keyed by pane number (timestamp // pane_ns)
+    """
+    
+    def __init__(
+        self,
+        window_minutes: int,
+        pane_seconds: int = 60,
+        sketch_precision: int = 8,
+        feature_extractor: Optional[FeatureExtractor] = None
+    ):
+        """
+        Initialize device window aggregator.
+        
+        Args:
+            window_minutes: Sliding window length
+            pane_seconds: Pane length
+            sketch_precision: HyperLogLog precision (4-16)
+            feature_extractor: Extractor used for per-pane aggregates
+        """
+        self.window_ns = int(window_minutes * 60 * 1e9)
+        self.pane_ns = int(pane_seconds * 1e9)
+        self.precision = sketch_precision
+        self.feature_extractor = feature_extractor or FeatureExtractor()
+        self.panes: Dict[int, _Pane] = {}
+        
+        logger.info(
+            f"Initialized DeviceWindowAggregator: window={window_minutes}m, "
+            f"pane={pane_seconds}s, sketch registers={1 << sketch_precision}"
+        )
+    
+    def ingest(self, events: EventBatch) -> None:
+        """
+        Add a batch of events to the panes covering their timestamps.
+        
+        Args:
+            events: Newly arrived flow, DNS and alert events
+        """
+        flow_pane = events.flow_ts // self.pane_ns
+        dns_pane = events.dns_ts // self.pane_ns
+        alert_pane = events.alert_ts // self.pane_ns
+        
+        for pane_id in np.unique(np.concatenate([flow_pane, dns_pane, alert_pane])).tolist():
+            partials = self.feature_extractor.device_partials(events.take(
+                np.flatnonzero(flow_pane == pane_id),
+                np.flatnonzero(dns_pane == pane_id),
+                np.flatnonzero(alert_pane == pane_id)
+            ))
+            if not partials.device_ips:
+                continue
+            
+            pane = self.panes.get(pane_id)
+            if pane is None:
+                pane = self.panes[pane_id] = _Pane.empty(1 << self.precision)
+            
+            rows = pane.rows_for(partials.device_ips)
+            pane.counters[rows] += partials.counters
+            
+            for sketch, (codes, values) in enumerate(partials.distinct):
+                if len(values) > 0:
+                    _hll_add(pane.registers, rows[codes], sketch, _hash64(values), self.precision)
+    
+    def rewind(self, start: datetime) -> datetime:
+        """
+        Drop panes from the one containing start onwards.
+        
+        Used before re-reading events from start, so panes that are read
+        again are rebuilt instead of counted twice.
+        
+        Args:
+            start: Time events will be re-read from
+        
+        Returns:
+            Start of the first dropped pane (read events from there)
+        """
+        first_pane = int(start.timestamp() * 1e9) // self.pane_ns
+        for pane_id in [pane_id for pane_id in self.panes if pane_id >= first_pane]:
+            del self.panes[pane_id]
+        return datetime.fromtimestamp(first_pane * self.pane_ns / 1e9)
+    
+    def evict(self, window_end: datetime) -> int:
+        """
+        Drop panes that ended before the window ending at window_end.
+        
+        Args:
+            window_end: End of the current window
+        
+        Returns:
+            Number of panes evicted
+        """
+        window_start_ns = int(window_end.timestamp() * 1e9) - self.window_ns
+        expired = [
+            pane_id for pane_id in self.panes
+            if (pane_id + 1) * self.pane_ns <= window_start_ns
+        ]
+        for pane_id in expired:
+            del self.panes[pane_id]
+        return len(expired)
+    
+    def features(
+        self,
+        window_start: datetime,
+        window_end: datetime
+    ) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """
+        Derive device features from the merged live panes.
+        
+        Args:
+            window_start: Start of time window
+            window_end: End of time window
+        
+        Returns:
+            Tuple of (feature matrix of shape (n_devices, 22), device IPs,
+            threat intel hit count per device)
+        """
+        device_index: Dict[str, int] = {}
+        for pane in self.panes.values():
+            for ip in pane.device_index:
+                device_index.setdefault(ip, len(device_index))
+        
+        n = len(device_index)
+        counters = np.zeros((n, len(DEVICE_COUNTERS)), dtype=np.float64)
+        registers = np.zeros((n, len(DEVICE_DISTINCT), 1 << self.precision), dtype=np.uint8)
+        
+        for pane in self.panes.values():
+            rows = np.array([device_index[ip] for ip in pane.device_index], dtype=np.int64)
+            counters[rows] += pane.counters
+            registers[rows] = np.maximum(registers[rows], pane.registers)
+        
+        matrix = self.feature_extractor.finalize_device_features(
+            counters, _hll_estimate(registers), window_start, window_end
+        )
+        intel_hits = counters[:, DEVICE_COUNTERS.index("intel_hits")].astype(np.int64)
+        return matrix, list(device_index), intel_hits
@@ -0,0 +1,395 @@
+"""
+Asynchronous Pi-hole enforcement queue.
+
+Detection pipelines hand block and unblock decisions to an
+EnforcementQueue and return immediately. A background worker coalesces
+requests per domain, submits blocks in batches (falling back to
+concurrent per-domain requests) and remembers which domains are already
+blocked, so repeat verdicts never reach the Pi-hole API.
+"""
+
+import atexit
+import logging
+import sqlite3
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from orion_ai.config import get_config
+from orion_ai.pihole_client import PiHoleClient, DummyPiHoleClient
+
+logger = logging.getLogger(__name__)
+
+BLOCK = "block"
+UNBLOCK = "unblock"
+
+# Results of EnforcementQueue.block / unblock
+QUEUED = "queued"
+ALREADY_BLOCKED = "already_blocked"
+DROPPED = "dropped"
+
+
+class BlockedDomainStore:
+    """
+    SQLite record of domains blocked through the enforcement queue.
+    
+    Lets a restarted process skip domains it already blocked.
+    """
+    
+    def __init__(self, db_path: str):
+        """
+        Initialize blocked domain store.
+        
+        Args:
+            db_path: Path to SQLite database
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the store"""
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def _init_db(self):
+        """Initialize database schema"""
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS blocked_domains (
+                domain TEXT PRIMARY KEY,
+                comment TEXT,
+                blocked_at TEXT NOT NULL
+            )
+        """)
+        conn.commit()
+        conn.close()
+    
+    def load(self) -> Set[str]:
+        """Get all blocked domains"""
+        conn = self._connect()
+        domains = {row[0] for row in conn.execute("SELECT domain FROM blocked_domains")}
+        conn.close()
+        return domains
+    
+    def add(self, entries: List[Tuple[str, str]]):
+        """Record (domain, comment) entries as blocked"""
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        conn.executemany(
+            "INSERT OR REPLACE INTO blocked_domains (domain, comment, blocked_at) VALUES (?, ?, ?)",
+            [(domain, comment, now) for domain, comment in entries]
+        )
+        conn.commit()
+        conn.close()
+    
+    def remove(self, domains: List[str]):
+        """Forget blocked domains"""
+        conn = self._connect()
+        conn.executemany(
+            "DELETE FROM blocked_domains WHERE domain = ?",
+            [(domain,) for domain in domains]
+        )
+        conn.commit()
+        conn.close()
+
+
+class EnforcementQueue:
+    """
+    Bounded, coalescing queue of Pi-hole block and unblock requests.
+    
+    block() and unblock() never touch the network: they record the
+    request and return at once. A worker thread drains pending requests;
+    the latest request per domain wins, blocks are sent batch_size
+    domains per API call and chunks, retries and unblocks run on a pool
+    of concurrency threads sharing the client's HTTP session.
+    
+    Attributes:
+        client: Pi-hole client (PiHoleClient or DummyPiHoleClient)
+        max_size: Max pending requests
+        batch_size: Max domains per add request
+        blocked: Domains known to be on the blacklist
+    """
+    
+    def __init__(
+        self,
+        client,
+        max_size: int = 10000,
+        batch_size: int = 50,
+        concurrency: int = 4,
+        state_path: Optional[str] = None
+    ):
+        """
+        Initialize enforcement queue and start its worker.
+        
+        Args:
+            client: Pi-hole client
+            max_size: Max pending requests; further requests are dropped
+            batch_size: Max domains per add request
+            concurrency: Concurrent API requests
+            state_path: SQLite path for the blocked domain record
+                (None keeps it in memory only)
+        """
+        self.client = client
+        self.max_size = max_size
+        self.batch_size = batch_size
+        
+        self.store = BlockedDomainStore(state_path) if state_path else None
+        self.blocked: Set[str] = self.store.load() if self.store else set()
+        
+        self._pending: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+        self._in_flight: Dict[str, str] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        
+        self._executor = ThreadPoolExecutor(
+            max_workers=concurrency,
+            thread_name_prefix="pihole"
+        )
+        self._worker = threading.Thread(
+            target=self._run,
+            name="pihole-enforcement",
+            daemon=True
+        )
+        self._worker.start()
+        
+        logger.info(
+            f"Initialized EnforcementQueue: max_size={max_size}, "
+            f"batch_size={batch_size}, concurrency={concurrency}, "
+            f"{len(self.blocked)} domains already blocked"
+        )
+    
+    @property
+    def pending(self) -> int:
+        """Number of requests waiting or being submitted."""
+        with self._cond:
+            return len(self._pending) + len(self._in_flight)
+    
+    def block(self, domain: str, comment: str = "") -> str:
+        """
+        Request that a domain be blocked.
+        
+        Args:
+            domain: Domain name to block
+            comment: Comment for the blocklist entry
+        
+        Returns:
+            "already_blocked", "queued", or "dropped" if the queue is full
+        """
+        return self._submit(domain, BLOCK, comment)
+    
+    def unblock(self, domain: str) -> str:
+        """
+        Request that a domain be unblocked.
+        
+        Unblocks always reach Pi-hole, since the domain may have been
+        blocked outside this process.
+        
+        Args:
+            domain: Domain name to unblock
+        
+        Returns:
+            "queued", or "dropped" if the queue is full
+        """
+        return self._submit(domain, UNBLOCK, "")
+    
+    def _submit(self, domain: str, action: str, comment: str) -> str:
+        """Record a request, coalescing with any pending one for the domain."""
+        with self._cond:
+            if self._closed:
+                logger.warning(f"Enforcement queue closed, dropping {action} of {domain}")
+                return DROPPED
+            
+            if domain in self._pending:
+                current = self._pending[domain][0]
+            else:
+                current = self._in_flight.get(domain)
+            
+            if current == action:
+                return QUEUED
+            if current is None and action == BLOCK and domain in self.blocked:
+                return ALREADY_BLOCKED
+            
+            if domain not in self._pending and len(self._pending) >= self.max_size:
+                logger.warning(f"Enforcement queue full ({self.max_size}), dropping {action} of {domain}")
+                return DROPPED
+            
+            self._pending[domain] = (action, comment)
+            self._cond.notify_all()
+            return QUEUED
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all pending requests have been submitted.
+        
+        Args:
+            timeout: Max seconds to wait (None waits indefinitely)
+        
+        Returns:
+            True if the queue drained, False on timeout
+        """
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._in_flight,
+                timeout=timeout
+            )
+    
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Stop accepting requests and submit what is pending.
+        
+        Args:
+            timeout: Max seconds to wait for pending requests
+        
+        Returns:
+            True if the queue drained, False on timeout
+        """
+        drained = self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            if self._pending:
+                logger.warning(f"Discarding {len(self._pending)} pending enforcement requests")
+                self._pending.clear()
+            self._cond.notify_all()
+        
+        self._worker.join(timeout)
+        self._executor.shutdown(wait=drained)
+        return drained
+    
+    def _run(self):
+        """Worker loop: take all pending requests and submit them."""
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending or self._closed)
+                if self._closed:
+                    return
+                batch = dict(self._pending)
+                self._pending.clear()
+                self._in_flight = {domain: action for domain, (action, _) in batch.items()}
+            
+            try:
+                self._process(batch)
+            except Exception as e:
+                logger.error(f"Pi-hole enforcement batch failed: {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    self._in_flight = {}
+                    self._cond.notify_all()
+    
+    def _process(self, batch: Dict[str, Tuple[str, str]]):
+        """
+        Submit one round of requests.
+        
+        Blocks go out batch_size domains per request; when a multi-domain
+        request fails, its domains are retried one by one so a single bad
+        domain does not fail the rest.
+        
+        Args:
+            batch: {domain: (action, comment)}
+        """
+        blocks = [(domain, comment) for domain, (action, comment) in batch.items() if action == BLOCK]
+        unblocks = [domain for domain, (action, _) in batch.items() if action == UNBLOCK]
+        
+        chunks = [blocks[i:i + self.batch_size] for i in range(0, len(blocks), self.batch_size)]
+        unblock_results = self._executor.map(self._remove_domain, unblocks)
+        
+        added: List[Tuple[str, str]] = []
+        retry: List[Tuple[str, str]] = []
+        for chunk, ok in zip(chunks, self._executor.map(self._add_chunk, chunks)):
+            if ok:
+                added.extend(chunk)
+            elif len(chunk) > 1:
+                retry.extend(chunk)
+        
+        if retry:
+            retry_chunks = [[entry] for entry in retry]
+            for entry, ok in zip(retry, self._executor.map(self._add_chunk, retry_chunks)):
+                if ok:
+                    added.append(entry)
+        
+        removed = [domain for domain, ok in zip(unblocks, unblock_results) if ok]
+        
+        with self._cond:
+            self.blocked.update(domain for domain, _ in added)
+            self.blocked.difference_update(removed)
+        
+        if self.store:
+            if added:
+                self.store.add(added)
+            if removed:
+                self.store.remove(removed)
+        
+        failed = len(blocks) + len(unblocks) - len(added) - len(removed)
+        logger.info(
+            f"Pi-hole enforcement: {len(added)} blocked, {len(removed)} unblocked"
+            + (f", {failed} failed" if failed else "")
+        )
+    
+    def _add_chunk(self, chunk: List[Tuple[str, str]]) -> bool:
+        """
+        Block a chunk of (domain, comment) entries in one request.
+        
+        Returns:
+            True if successful, False otherwise
+        """
+        domains = [domain for domain, _ in chunk]
+        comments = {comment for _, comment in chunk}
+        comment = comments.pop() if len(comments) == 1 else f"AI-detected risk ({len(chunk)} domains)"
+        
+        return self._call(self.client.add_domains, domains, comment=comment)
+    
+    def _remove_domain(self, domain: str) -> bool:
+        """Unblock one domain."""
+        return self._call(self.client.remove_domain, domain)
+    
+    @staticmethod
+    def _call(method, *args, **kwargs) -> bool:
+        """Call a client method, treating exceptions as failure."""
+        try:
+            return bool(method(*args, **kwargs))
+        except Exception as e:
+            logger.error(f"Pi-hole request failed: {e}")
+            return False
+
+
+_queue: Optional[EnforcementQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_enforcement_queue() -> EnforcementQueue:
+    """
+    Get the process-wide enforcement queue, creating it on first use.
+    
+    Uses a real Pi-hole client when blocking is enabled and a dummy client
+    (with no persisted state) otherwise. Pending requests are drained at
+    interpreter exit for up to PIHOLE_DRAIN_TIMEOUT seconds.
+    
+    Returns:
+        EnforcementQueue
+    """
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            config = get_config()
+            if config.detection.enable_blocking:
+                client = PiHoleClient()
+                state_path = config.pihole.state_path
+            else:
+                logger.info("Blocking disabled - using dummy Pi-hole client")
+                client = DummyPiHoleClient()
+                state_path = None
+            
+            _queue = EnforcementQueue(
+                client,
+                max_size=config.pihole.queue_size,
+                batch_size=config.pihole.batch_size,
+                concurrency=config.pihole.concurrency,
+                state_path=state_path
+            )
+            atexit.register(_queue.close, config.pihole.drain_timeout)
+        return _queue
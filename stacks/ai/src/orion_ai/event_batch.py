@@ -0,0 +1,343 @@
+"""
+Columnar event batches for detection pipelines.
+
+Decodes Loki log entries exactly once and stores the fields used by the
+feature extractor in column arrays, so grouping and feature extraction
+never touch raw JSON again.
+"""
+
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Prefer a fast JSON decoder when one is installed
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _DECODE_ERRORS: Tuple[type, ...] = (orjson.JSONDecodeError, TypeError)
+    JSON_BACKEND = "orjson"
+except ImportError:
+    try:
+        import msgspec
+        _json_loads = msgspec.json.Decoder().decode
+        _DECODE_ERRORS = (msgspec.DecodeError, TypeError)
+        JSON_BACKEND = "msgspec"
+    except ImportError:
+        _json_loads = json.loads
+        _DECODE_ERRORS = (json.JSONDecodeError, TypeError)
+        JSON_BACKEND = "json"
+
+logger.debug(f"EventBatch JSON backend: {JSON_BACKEND}")
+
+
+def _decode(entry: Dict) -> Optional[Dict]:
+    """
+    Decode the JSON payload of a Loki log entry.
+    
+    Args:
+        entry: Log entry from Loki (with 'log' field containing JSON)
+    
+    Returns:
+        Parsed JSON dict or None if parsing fails
+    """
+    try:
+        log = _json_loads(entry.get("log", "{}"))
+    except _DECODE_ERRORS:
+        return None
+    return log if isinstance(log, dict) else None
+
+
+def _group_indices(keys: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Group row indices by key, skipping empty keys.
+    
+    Args:
+        keys: 1D object array of string keys
+    
+    Returns:
+        Dictionary: {key: array of row indices}
+    """
+    if len(keys) == 0:
+        return {}
+    
+    uniques, inverse = np.unique(keys, return_inverse=True)
+    order = np.argsort(inverse, kind="stable")
+    bounds = np.cumsum(np.bincount(inverse, minlength=len(uniques)))[:-1]
+    
+    return {
+        key: indices
+        for key, indices in zip(uniques.tolist(), np.split(order, bounds))
+        if key
+    }
+
+
+def _timestamp_ns(entry: Dict) -> int:
+    """Get the nanosecond timestamp of a Loki log entry (0 if unknown)."""
+    ts_ns = entry.get("timestamp_ns")
+    if ts_ns is not None:
+        return ts_ns
+    timestamp = entry.get("timestamp")
+    return int(timestamp.timestamp() * 1e9) if timestamp is not None else 0
+
+
+_EMPTY_INDEX = np.empty(0, dtype=np.int64)
+
+# Field conversion errors that make a decoded entry unusable
+_ROW_ERRORS = (ValueError, TypeError, AttributeError, OverflowError)
+
+
+@dataclass
+class EventBatch:
+    """
+    Parsed flow, DNS and alert events for one time window.
+    
+    Every column is a 1D NumPy array; columns prefixed with the same
+    stream name (flow_, dns_, alert_) share a length. String columns use
+    object dtype, missing string values are "" and missing flow ages are NaN.
+    Timestamp columns (*_ts) hold Loki entry times in nanoseconds.
+    flow_intel_hit starts all False; pipelines set it from threat intel.
+    """
+    
+    # Flow columns
+    flow_ts: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    flow_src_ip: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=object))
+    flow_dest_ip: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=object))
+    flow_dest_port: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    flow_proto: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=object))
+    flow_bytes_toserver: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    flow_bytes_toclient: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    flow_age: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.float64))
+    flow_intel_hit: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=bool))
+    
+    # DNS columns
+    dns_ts: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    dns_src_ip: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=object))
+    dns_rrname: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=object))
+    dns_rcode: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=object))
+    dns_is_query: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=bool))
+    
+    # Alert columns
+    alert_ts: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=np.int64))
+    alert_src_ip: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=object))
+    alert_signature: np.ndarray = field(default_factory=lambda: np.empty(0, dtype=object))
+    
+    # Entries that could not be decoded
+    dropped: int = 0
+    
+    # Decoded entries skipped because a field had an unusable value
+    malformed: int = 0
+    
+    @classmethod
+    def from_loki(
+        cls,
+        flows: Iterable[Dict] = (),
+        dns_queries: Iterable[Dict] = (),
+        alerts: Iterable[Dict] = ()
+    ) -> "EventBatch":
+        """
+        Build a batch from Loki log entries, decoding each line once.
+        
+        Entries that are not JSON objects are counted in `dropped`;
+        entries with a field that cannot be converted (e.g. a
+        non-numeric port) are skipped and counted in `malformed`.
+        
+        Args:
+            flows: Suricata flow events
+            dns_queries: DNS query events
+            alerts: Suricata alert events
+        
+        Returns:
+            EventBatch object
+        """
+        dropped = 0
+        malformed = 0
+        
+        flow_ts: List[int] = []
+        src_ip: List[str] = []
+        dest_ip: List[str] = []
+        dest_port: List[int] = []
+        proto: List[str] = []
+        bytes_toserver: List[int] = []
+        bytes_toclient: List[int] = []
+        age: List[float] = []
+        
+        for entry in flows:
+            log = _decode(entry)
+            if log is None:
+                dropped += 1
+                continue
+            try:
+                flow = log.get("flow") or {}
+                row = (
+                    log.get("src_ip") or "",
+                    log.get("dest_ip") or "",
+                    int(log.get("dest_port") or 0),
+                    (log.get("proto") or "").upper(),
+                    int(flow.get("bytes_toserver") or 0),
+                    int(flow.get("bytes_toclient") or 0),
+                    float(flow["age"]) if flow.get("age") is not None else np.nan,
+                )
+            except _ROW_ERRORS:
+                malformed += 1
+                continue
+            flow_ts.append(_timestamp_ns(entry))
+            src_ip.append(row[0])
+            dest_ip.append(row[1])
+            dest_port.append(row[2])
+            proto.append(row[3])
+            bytes_toserver.append(row[4])
+            bytes_toclient.append(row[5])
+            age.append(row[6])
+        
+        dns_ts: List[int] = []
+        dns_src_ip: List[str] = []
+        rrname: List[str] = []
+        rcode: List[str] = []
+        is_query: List[bool] = []
+        
+        for entry in dns_queries:
+            log = _decode(entry)
+            if log is None:
+                dropped += 1
+                continue
+            try:
+                dns = log.get("dns") or {}
+                row = (
+                    log.get("src_ip") or "",
+                    dns.get("rrname") or "",
+                    dns.get("rcode") or "",
+                    dns.get("type") == "query",
+                )
+            except _ROW_ERRORS:
+                malformed += 1
+                continue
+            dns_ts.append(_timestamp_ns(entry))
+            dns_src_ip.append(row[0])
+            rrname.append(row[1])
+            rcode.append(row[2])
+            is_query.append(row[3])
+        
+        alert_ts: List[int] = []
+        alert_src_ip: List[str] = []
+        signature: List[str] = []
+        
+        for entry in alerts:
+            log = _decode(entry)
+            if log is None:
+                dropped += 1
+                continue
+            try:
+                alert_signature = (log.get("alert") or {}).get("signature") or ""
+            except _ROW_ERRORS:
+                malformed += 1
+                continue
+            alert_ts.append(_timestamp_ns(entry))
+            alert_src_ip.append(log.get("src_ip") or "")
+            signature.append(alert_signature)
+        
+        if dropped:
+            logger.warning(f"Dropped {dropped} log entries that could not be decoded")
+        if malformed:
+            logger.warning(f"Skipped {malformed} log entries with malformed fields")
+        
+        return cls(
+            flow_ts=np.array(flow_ts, dtype=np.int64),
+            flow_src_ip=np.array(src_ip, dtype=object),
+            flow_dest_ip=np.array(dest_ip, dtype=object),
+            flow_dest_port=np.array(dest_port, dtype=np.int64),
+            flow_proto=np.array(proto, dtype=object),
+            flow_bytes_toserver=np.array(bytes_toserver, dtype=np.int64),
+            flow_bytes_toclient=np.array(bytes_toclient, dtype=np.int64),
+            flow_age=np.array(age, dtype=np.float64),
+            flow_intel_hit=np.zeros(len(flow_ts), dtype=bool),
+            dns_ts=np.array(dns_ts, dtype=np.int64),
+            dns_src_ip=np.array(dns_src_ip, dtype=object),
+            dns_rrname=np.array(rrname, dtype=object),
+            dns_rcode=np.array(rcode, dtype=object),
+            dns_is_query=np.array(is_query, dtype=bool),
+            alert_ts=np.array(alert_ts, dtype=np.int64),
+            alert_src_ip=np.array(alert_src_ip, dtype=object),
+            alert_signature=np.array(signature, dtype=object),
+            dropped=dropped,
+            malformed=malformed
+        )
+    
+    @property
+    def n_flows(self) -> int:
+        """Number of flow events."""
+        return len(self.flow_src_ip)
+    
+    @property
+    def n_dns(self) -> int:
+        """Number of DNS events."""
+        return len(self.dns_src_ip)
+    
+    @property
+    def n_alerts(self) -> int:
+        """Number of alert events."""
+        return len(self.alert_src_ip)
+    
+    def take(
+        self,
+        flow_idx: np.ndarray,
+        dns_idx: np.ndarray,
+        alert_idx: np.ndarray
+    ) -> "EventBatch":
+        """
+        Select rows from each stream.
+        
+        Args:
+            flow_idx: Flow row indices
+            dns_idx: DNS row indices
+            alert_idx: Alert row indices
+        
+        Returns:
+            New EventBatch holding only the selected rows
+        """
+        return EventBatch(
+            flow_ts=self.flow_ts[flow_idx],
+            flow_src_ip=self.flow_src_ip[flow_idx],
+            flow_dest_ip=self.flow_dest_ip[flow_idx],
+            flow_dest_port=self.flow_dest_port[flow_idx],
+            flow_proto=self.flow_proto[flow_idx],
+            flow_bytes_toserver=self.flow_bytes_toserver[flow_idx],
+            flow_bytes_toclient=self.flow_bytes_toclient[flow_idx],
+            flow_age=self.flow_age[flow_idx],
+            flow_intel_hit=self.flow_intel_hit[flow_idx],
+            dns_ts=self.dns_ts[dns_idx],
+            dns_src_ip=self.dns_src_ip[dns_idx],
+            dns_rrname=self.dns_rrname[dns_idx],
+            dns_rcode=self.dns_rcode[dns_idx],
+            dns_is_query=self.dns_is_query[dns_idx],
+            alert_ts=self.alert_ts[alert_idx],
+            alert_src_ip=self.alert_src_ip[alert_idx],
+            alert_signature=self.alert_signature[alert_idx]
+        )
+    
+    def group_by_device(self) -> Dict[str, "EventBatch"]:
+        """
+        Split the batch by device IP (source IP).
+        
+        Events without a source IP are skipped.
+        
+        Returns:
+            Dictionary: {device_ip: EventBatch}
+        """
+        flow_groups = _group_indices(self.flow_src_ip)
+        dns_groups = _group_indices(self.dns_src_ip)
+        alert_groups = _group_indices(self.alert_src_ip)
+        
+        device_ips = list(dict.fromkeys([*flow_groups, *dns_groups, *alert_groups]))
+        
+        return {
+            device_ip: self.take(
+                flow_groups.get(device_ip, _EMPTY_INDEX),
+                dns_groups.get(device_ip, _EMPTY_INDEX),
+                alert_groups.get(device_ip, _EMPTY_INDEX)
+            )
+            for device_ip in device_ips
+        }
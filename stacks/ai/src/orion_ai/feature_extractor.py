@@ -4,15 +4,16 @@ Feature extraction for AI models.
 Transforms raw log events into numerical feature vectors for ML inference.
 """
 
-import json
 import logging
 import math
-from collections import Counter
-from dataclasses import dataclass, asdict
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, asdict, fields
 from datetime import datetime
-from typing import Dict, List, Optional, Set
+from typing import Dict, List, Optional, Sequence, Tuple
 import numpy as np
 
+from orion_ai.event_batch import EventBatch
+
 logger = logging.getLogger(__name__)
 
 
@@ -66,6 +67,9 @@ class DeviceFeatures:
     alert_count: int = 0
     unique_alert_signatures: int = 0
     
+    # Threat intel enrichment (not a model input)
+    intel_hit_count: int = 0        # Flows to IPs/networks listed in threat intel
+    
     def to_vector(self) -> np.ndarray:
         """
         Convert features to numpy array for model input.
@@ -102,6 +106,37 @@ class DeviceFeatures:
     def to_dict(self) -> Dict:
         """Convert to dictionary for logging."""
         return asdict(self)
+    
+    @classmethod
+    def from_vector(
+        cls,
+        device_ip: str,
+        window_start: datetime,
+        window_end: datetime,
+        vector: np.ndarray
+    ) -> "DeviceFeatures":
+        """
+        Rebuild features from a row produced by to_vector().
+        
+        Args:
+            device_ip: IP address of device
+            window_start: Start of time window
+            window_end: End of time window
+            vector: 1D array of numerical features
+            
+        Returns:
+            DeviceFeatures object
+        """
+        values = {
+            f.name: f.type(value)
+            for f, value in zip(fields(cls)[3:], vector.tolist())
+        }
+        return cls(
+            device_ip=device_ip,
+            window_start=window_start,
+            window_end=window_end,
+            **values
+        )
 
 
 @dataclass
@@ -173,6 +208,137 @@ class DomainFeatures:
     def to_dict(self) -> Dict:
         """Convert to dictionary for logging."""
         return asdict(self)
+    
+    @classmethod
+    def from_vector(cls, domain: str, vector: np.ndarray) -> "DomainFeatures":
+        """
+        Rebuild features from a row produced by to_vector().
+        
+        Args:
+            domain: Domain name
+            vector: 1D array of numerical features
+            
+        Returns:
+            DomainFeatures object
+        """
+        v = vector.tolist()
+        return cls(
+            domain=domain,
+            domain_length=int(v[0]),
+            subdomain_count=int(v[1]),
+            tld_length=int(v[2]),
+            char_entropy=v[3],
+            vowel_ratio=v[4],
+            consonant_ratio=v[5],
+            digit_ratio=v[6],
+            special_char_count=int(v[7]),
+            has_ip_pattern=bool(v[8]),
+            max_consonant_streak=int(v[9]),
+            hex_ratio=v[10],
+            tld=domain.split(".")[-1],
+            tld_category=TLD_CATEGORIES[int(v[11])],
+            query_count=int(v[12])
+        )
+
+
+# TLD categories by DomainFeatures.to_vector() code
+TLD_CATEGORIES = ("common", "rare", "suspicious")
+
+
+def _byte_table(chars: str) -> np.ndarray:
+    """Boolean lookup table over byte values, True for the given characters."""
+    table = np.zeros(256, dtype=bool)
+    table[np.frombuffer(chars.encode("ascii"), dtype=np.uint8)] = True
+    return table
+
+
+def _pack_tld(tld: str) -> int:
+    """Pack a TLD of up to 8 ASCII characters into a 64-bit integer."""
+    return int.from_bytes(tld.encode("ascii").ljust(8, b"\0"), "little")
+
+
+# Character classes for batch domain featurization
+_VOWEL_BYTES = _byte_table("aeiou")
+_CONSONANT_BYTES = _byte_table("bcdfghjklmnpqrstvwxyz")
+_DIGIT_BYTES = _byte_table("0123456789")
+_HEX_BYTES = _byte_table("0123456789abcdef")
+_SPACE_BYTES = _byte_table(" \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f")
+
+# Additive per-device counters, in DevicePartials.counters column order
+DEVICE_COUNTERS = (
+    "conn_out",
+    "conn_in",
+    "bytes_sent",
+    "bytes_received",
+    "tcp",
+    "udp",
+    "icmp",
+    "common_ports",
+    "rare_ports",
+    "duration_sum",
+    "duration_count",
+    "dns_count",
+    "nxdomain",
+    "domain_count",
+    "length_sum",
+    "entropy_sum",
+    "alert_count",
+    "intel_hits",
+)
+
+# Per-device distinct counts, in DevicePartials.distinct order
+DEVICE_DISTINCT = ("dest_ips", "dest_ports", "domains", "signatures")
+
+
+@dataclass
+class DevicePartials:
+    """
+    Mergeable per-device aggregates for a set of events.
+    
+    Counters can be summed across event sets; distinct inputs hold the
+    (device code, value) pairs whose distinct values are counted per device.
+    """
+    
+    device_ips: List[str]
+    counters: np.ndarray
+    distinct: List[Tuple[np.ndarray, np.ndarray]]
+    
+    def distinct_counts(self) -> np.ndarray:
+        """Exact distinct counts, shape (n_devices, len(DEVICE_DISTINCT))."""
+        n = len(self.device_ips)
+        return np.column_stack([
+            _count_distinct(codes, values, n) for codes, values in self.distinct
+        ]) if n else np.zeros((0, len(DEVICE_DISTINCT)))
+
+
+def _safe_divide(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Element-wise division that yields 0 where the denominator is 0."""
+    return np.divide(
+        numerator,
+        denominator,
+        out=np.zeros(len(numerator), dtype=np.float64),
+        where=denominator > 0
+    )
+
+
+def _count_distinct(group_codes: np.ndarray, values: np.ndarray, n_groups: int) -> np.ndarray:
+    """
+    Count distinct values per group.
+    
+    Args:
+        group_codes: Integer group code per row
+        values: Value per row
+        n_groups: Number of groups
+        
+    Returns:
+        Array of distinct value counts, indexed by group code
+    """
+    if len(values) == 0:
+        return np.zeros(n_groups, dtype=np.float64)
+    
+    _, value_codes = np.unique(values, return_inverse=True)
+    pairs = np.unique(group_codes * (value_codes.max() + 1) + value_codes)
+    return np.bincount(pairs // (value_codes.max() + 1), minlength=n_groups).astype(np.float64)
 
 
 class FeatureExtractor:
@@ -197,23 +363,20 @@ class FeatureExtractor:
         "top", "xyz", "club", "work", "date", "download"
     }
     
-    @staticmethod
-    def _parse_log_entry(entry: Dict) -> Optional[Dict]:
+    # Packed TLD codes for batch domain featurization
+    _COMMON_TLD_CODES = np.array([_pack_tld(t) for t in COMMON_TLDS], dtype=np.uint64)
+    _SUSPICIOUS_TLD_CODES = np.array([_pack_tld(t) for t in SUSPICIOUS_TLDS], dtype=np.uint64)
+    
+    def __init__(self, domain_cache_size: int = 100_000):
         """
-        Parse a log entry from Loki.
+        Initialize feature extractor.
         
         Args:
-            entry: Log entry from Loki (with 'log' field containing JSON)
-            
-        Returns:
-            Parsed JSON dict or None if parsing fails
+            domain_cache_size: Max domains whose lexical features are cached
+                across windows (0 disables caching)
         """
-        try:
-            log_line = entry.get("log", "{}")
-            return json.loads(log_line)
-        except json.JSONDecodeError:
-            logger.warning(f"Failed to parse log entry: {log_line[:100]}")
-            return None
+        self.domain_cache_size = domain_cache_size
+        self._domain_cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
     
     @staticmethod
     def _calculate_entropy(s: str) -> float:
@@ -261,20 +424,16 @@ class FeatureExtractor:
     def extract_device_features(
         self,
         device_ip: str,
-        flows: List[Dict],
-        dns_queries: List[Dict],
-        alerts: List[Dict],
+        events: EventBatch,
         window_start: datetime,
         window_end: datetime
     ) -> DeviceFeatures:
         """
-        Extract device-level features from logs.
+        Extract device-level features from a parsed event batch.
         
         Args:
             device_ip: IP address of device
-            flows: Suricata flow events
-            dns_queries: DNS query events
-            alerts: Suricata alert events
+            events: Flow, DNS and alert events for this device
             window_start: Start of time window
             window_end: End of time window
             
@@ -287,65 +446,37 @@ class FeatureExtractor:
             window_end=window_end
         )
         
-        # Parse flows
-        parsed_flows = [self._parse_log_entry(f) for f in flows]
-        parsed_flows = [f for f in parsed_flows if f is not None]
-        
-        if not parsed_flows:
+        if events.n_flows == 0:
             logger.debug(f"No flows found for device {device_ip}")
             return features
         
         # Connection counts
-        features.connection_count_out = len(
-            [f for f in parsed_flows if f.get("src_ip") == device_ip]
-        )
-        features.connection_count_in = len(
-            [f for f in parsed_flows if f.get("dest_ip") == device_ip]
-        )
+        outbound = events.flow_src_ip == device_ip
+        features.connection_count_out = int(np.count_nonzero(outbound))
+        features.connection_count_in = int(np.count_nonzero(events.flow_dest_ip == device_ip))
         
         # Bytes
-        features.bytes_sent = sum(
-            f.get("flow", {}).get("bytes_toserver", 0)
-            for f in parsed_flows if f.get("src_ip") == device_ip
-        )
-        features.bytes_received = sum(
-            f.get("flow", {}).get("bytes_toclient", 0)
-            for f in parsed_flows if f.get("src_ip") == device_ip
-        )
+        features.bytes_sent = int(events.flow_bytes_toserver[outbound].sum())
+        features.bytes_received = int(events.flow_bytes_toclient[outbound].sum())
         
         # Unique destinations
-        dest_ips: Set[str] = set()
-        dest_ports: Set[int] = set()
-        protocols = []
-        durations = []
-        common_port_count = 0
-        rare_port_count = 0
-        
-        for flow in parsed_flows:
-            if flow.get("src_ip") == device_ip:
-                dest_ips.add(flow.get("dest_ip", ""))
-                dest_port = flow.get("dest_port", 0)
-                dest_ports.add(dest_port)
-                protocols.append(flow.get("proto", "").upper())
-                
-                # Duration
-                flow_data = flow.get("flow", {})
-                if "age" in flow_data:
-                    durations.append(flow_data["age"])
-                
-                # Port analysis
-                if dest_port in self.COMMON_PORTS:
-                    common_port_count += 1
-                elif dest_port > 1024:
-                    rare_port_count += 1
-        
-        features.unique_dest_ips = len(dest_ips)
-        features.unique_dest_ports = len(dest_ports)
+        dest_ports = events.flow_dest_port[outbound]
+        protocols = events.flow_proto[outbound]
+        durations = events.flow_age[outbound]
+        durations = durations[~np.isnan(durations)]
+        
+        features.unique_dest_ips = len(set(events.flow_dest_ip[outbound].tolist()))
+        features.unique_dest_ports = len(np.unique(dest_ports))
+        
+        # Port analysis
+        is_common = np.isin(dest_ports, list(self.COMMON_PORTS))
+        common_port_count = int(np.count_nonzero(is_common))
+        rare_port_count = int(np.count_nonzero(~is_common & (dest_ports > 1024)))
         
         # Protocol distribution
         total_conns = len(protocols)
         if total_conns > 0:
-            protocol_counts = Counter(protocols)
+            protocol_counts = Counter(protocols.tolist())
             features.protocol_tcp_ratio = protocol_counts.get("TCP", 0) / total_conns
             features.protocol_udp_ratio = protocol_counts.get("UDP", 0) / total_conns
             features.protocol_icmp_ratio = protocol_counts.get("ICMP", 0) / total_conns
@@ -355,8 +486,8 @@ class FeatureExtractor:
         features.rare_port_count = rare_port_count
         
         # Timing
-        if durations:
-            features.avg_connection_duration = np.mean(durations)
+        if len(durations) > 0:
+            features.avg_connection_duration = float(np.mean(durations))
         
         window_minutes = (window_end - window_start).total_seconds() / 60
         if window_minutes > 0:
@@ -372,55 +503,222 @@ class FeatureExtractor:
             features.upload_download_ratio = features.bytes_sent / features.bytes_received
         
         # DNS features
-        parsed_dns = [self._parse_log_entry(d) for d in dns_queries]
-        parsed_dns = [d for d in parsed_dns if d is not None]
-        
-        features.dns_query_count = len(parsed_dns)
-        
-        domains: Set[str] = set()
-        domain_lengths = []
-        domain_entropies = []
-        nxdomain_count = 0
-        
-        for dns in parsed_dns:
-            dns_data = dns.get("dns", {})
-            if dns_data.get("type") == "query":
-                domain = dns_data.get("rrname", "")
-                if domain:
-                    domains.add(domain)
-                    domain_lengths.append(len(domain))
-                    domain_entropies.append(self._calculate_entropy(domain))
-            
-            # Check for NXDOMAIN (failed lookups)
-            if dns_data.get("rcode") == "NXDOMAIN":
-                nxdomain_count += 1
-        
-        features.unique_domains = len(domains)
-        if domain_lengths:
-            features.avg_domain_length = np.mean(domain_lengths)
-        if domain_entropies:
-            features.avg_domain_entropy = np.mean(domain_entropies)
+        features.dns_query_count = events.n_dns
+        
+        queried = events.dns_rrname[events.dns_is_query & (events.dns_rrname != "")]
+        if len(queried) > 0:
+            # Entropy is computed once per distinct domain and weighted by frequency
+            domains, counts = np.unique(queried, return_counts=True)
+            lengths = np.fromiter((len(d) for d in domains), dtype=np.float64, count=len(domains))
+            entropies = np.fromiter(
+                (self._calculate_entropy(d) for d in domains),
+                dtype=np.float64,
+                count=len(domains)
+            )
+            features.unique_domains = len(domains)
+            features.avg_domain_length = float(np.dot(lengths, counts) / len(queried))
+            features.avg_domain_entropy = float(np.dot(entropies, counts) / len(queried))
+        
+        # Check for NXDOMAIN (failed lookups)
         if features.dns_query_count > 0:
+            nxdomain_count = int(np.count_nonzero(events.dns_rcode == "NXDOMAIN"))
             features.nxdomain_ratio = nxdomain_count / features.dns_query_count
         
         # Alert features
-        parsed_alerts = [self._parse_log_entry(a) for a in alerts]
-        parsed_alerts = [a for a in parsed_alerts if a is not None]
-        
-        features.alert_count = len(parsed_alerts)
+        features.alert_count = events.n_alerts
+        signatures = events.alert_signature[events.alert_signature != ""]
+        features.unique_alert_signatures = len(np.unique(signatures))
         
-        alert_sigs: Set[str] = set()
-        for alert in parsed_alerts:
-            alert_data = alert.get("alert", {})
-            sig = alert_data.get("signature", "")
-            if sig:
-                alert_sigs.add(sig)
-        
-        features.unique_alert_signatures = len(alert_sigs)
+        # Threat intel enrichment
+        features.intel_hit_count = int(np.count_nonzero(events.flow_intel_hit[outbound]))
         
         logger.debug(f"Extracted features for device {device_ip}: {features.to_dict()}")
         return features
     
+    def device_partials(self, events: EventBatch) -> DevicePartials:
+        """
+        Compute mergeable per-device aggregates for a batch of events.
+        
+        Devices are keyed by source IP across flows, DNS and alerts, using
+        factorized IP codes and grouped NumPy reductions.
+        
+        Args:
+            events: Flow, DNS and alert events
+            
+        Returns:
+            DevicePartials object
+        """
+        n_flows, n_dns = events.n_flows, events.n_dns
+        
+        # Factorize source IPs across all streams into device codes
+        all_src = np.concatenate([events.flow_src_ip, events.dns_src_ip, events.alert_src_ip])
+        device_ips, codes = np.unique(all_src, return_inverse=True)
+        
+        # Drop events without a source IP (sorted first as "")
+        offset = 1 if len(device_ips) > 0 and device_ips[0] == "" else 0
+        device_ips = device_ips[offset:]
+        codes = codes - offset
+        n = len(device_ips)
+        
+        flow_code = codes[:n_flows]
+        dns_code = codes[n_flows:n_flows + n_dns]
+        alert_code = codes[n_flows + n_dns:]
+        
+        flow_valid = flow_code >= 0
+        dns_valid = dns_code >= 0
+        alert_valid = alert_code >= 0
+        
+        def group_sum(group_codes: np.ndarray, weights: Optional[np.ndarray] = None) -> np.ndarray:
+            return np.bincount(group_codes, weights=weights, minlength=n).astype(np.float64)
+        
+        # Flow aggregates
+        fc = flow_code[flow_valid]
+        dest_ips = events.flow_dest_ip[flow_valid]
+        dest_ports = events.flow_dest_port[flow_valid]
+        protocols = events.flow_proto[flow_valid]
+        durations = events.flow_age[flow_valid]
+        
+        is_common = np.isin(dest_ports, list(self.COMMON_PORTS))
+        has_age = ~np.isnan(durations)
+        
+        # DNS aggregates
+        dc = dns_code[dns_valid]
+        rrnames = events.dns_rrname[dns_valid]
+        queried = events.dns_is_query[dns_valid] & (rrnames != "")
+        
+        qc = dc[queried]
+        domains, domain_codes = np.unique(rrnames[queried], return_inverse=True)
+        domain_lengths = np.fromiter((len(d) for d in domains), dtype=np.float64, count=len(domains))
+        domain_entropies = np.fromiter(
+            (self._calculate_entropy(d) for d in domains),
+            dtype=np.float64,
+            count=len(domains)
+        )
+        
+        # Alert aggregates
+        ac = alert_code[alert_valid]
+        signatures = events.alert_signature[alert_valid]
+        has_sig = signatures != ""
+        
+        counters = np.column_stack([
+            group_sum(fc),
+            group_sum(fc[events.flow_src_ip[flow_valid] == dest_ips]),
+            group_sum(fc, events.flow_bytes_toserver[flow_valid]),
+            group_sum(fc, events.flow_bytes_toclient[flow_valid]),
+            group_sum(fc, (protocols == "TCP").astype(np.float64)),
+            group_sum(fc, (protocols == "UDP").astype(np.float64)),
+            group_sum(fc, (protocols == "ICMP").astype(np.float64)),
+            group_sum(fc, is_common.astype(np.float64)),
+            group_sum(fc, (~is_common & (dest_ports > 1024)).astype(np.float64)),
+            group_sum(fc[has_age], durations[has_age]),
+            group_sum(fc[has_age]),
+            group_sum(dc),
+            group_sum(dc, (events.dns_rcode[dns_valid] == "NXDOMAIN").astype(np.float64)),
+            group_sum(qc),
+            group_sum(qc, domain_lengths[domain_codes]),
+            group_sum(qc, domain_entropies[domain_codes]),
+            group_sum(ac),
+            group_sum(fc, events.flow_intel_hit[flow_valid].astype(np.float64)),
+        ]) if n else np.zeros((0, len(DEVICE_COUNTERS)))
+        
+        distinct = [
+            (fc, dest_ips),
+            (fc, dest_ports),
+            (qc, domains[domain_codes]),
+            (ac[has_sig], signatures[has_sig]),
+        ]
+        
+        return DevicePartials(device_ips.tolist(), counters, distinct)
+    
+    @staticmethod
+    def finalize_device_features(
+        counters: np.ndarray,
+        distinct_counts: np.ndarray,
+        window_start: datetime,
+        window_end: datetime
+    ) -> np.ndarray:
+        """
+        Turn per-device aggregates into DeviceFeatures rows.
+        
+        Args:
+            counters: Summed counters, shape (n_devices, len(DEVICE_COUNTERS))
+            distinct_counts: Distinct counts, shape (n_devices, len(DEVICE_DISTINCT))
+            window_start: Start of time window
+            window_end: End of time window
+            
+        Returns:
+            Feature matrix of shape (n_devices, 22), float64 so byte
+            counters stay exact in logged features (model runners cast
+            to float32 at inference)
+        """
+        c = dict(zip(DEVICE_COUNTERS, counters.T))
+        d = dict(zip(DEVICE_DISTINCT, distinct_counts.T))
+        n = len(counters)
+        
+        conn_out = c["conn_out"]
+        window_minutes = (window_end - window_start).total_seconds() / 60
+        
+        matrix = np.column_stack([
+            c["conn_in"],
+            conn_out,
+            c["bytes_sent"],
+            c["bytes_received"],
+            d["dest_ips"],
+            d["dest_ports"],
+            _safe_divide(c["tcp"], conn_out),
+            _safe_divide(c["udp"], conn_out),
+            _safe_divide(c["icmp"], conn_out),
+            c["dns_count"],
+            d["domains"],
+            _safe_divide(c["length_sum"], c["domain_count"]),
+            _safe_divide(c["entropy_sum"], c["domain_count"]),
+            _safe_divide(c["nxdomain"], c["dns_count"]),
+            _safe_divide(c["duration_sum"], c["duration_count"]),
+            conn_out / window_minutes if window_minutes > 0 else np.zeros(n),
+            _safe_divide(c["common_ports"], conn_out),
+            c["rare_ports"],
+            _safe_divide(c["bytes_sent"] + c["bytes_received"], conn_out),
+            _safe_divide(c["bytes_sent"], c["bytes_received"]),
+            c["alert_count"],
+            d["signatures"]
+        ]) if n else np.zeros((0, 22))
+        
+        # Devices without flows keep default (zero) features
+        matrix[conn_out == 0] = 0.0
+        
+        return matrix.astype(np.float64)
+    
+    def extract_all_device_features(
+        self,
+        events: EventBatch,
+        window_start: datetime,
+        window_end: datetime
+    ) -> Tuple[np.ndarray, List[str], np.ndarray]:
+        """
+        Extract device-level features for every device in a window at once.
+        
+        Each row matches DeviceFeatures.to_vector() for that device (in
+        float64), computed with grouped NumPy reductions instead of
+        per-device passes.
+        
+        Args:
+            events: Flow, DNS and alert events for the whole window
+            window_start: Start of time window
+            window_end: End of time window
+            
+        Returns:
+            Tuple of (feature matrix of shape (n_devices, 22), device IPs,
+            threat intel hit count per device)
+        """
+        partials = self.device_partials(events)
+        matrix = self.finalize_device_features(
+            partials.counters, partials.distinct_counts(), window_start, window_end
+        )
+        intel_hits = partials.counters[:, DEVICE_COUNTERS.index("intel_hits")].astype(np.int64)
+        
+        logger.debug(f"Extracted features for {len(partials.device_ips)} devices in one pass")
+        return matrix, partials.device_ips, intel_hits
+    
     def extract_domain_features(self, domain: str, query_count: int = 0) -> DomainFeatures:
         """
         Extract domain-level features.
@@ -489,3 +787,177 @@ class FeatureExtractor:
         
         logger.debug(f"Extracted features for domain {domain}: {features.to_dict()}")
         return features
+    
+    def extract_domain_feature_matrix(
+        self,
+        domains: List[str],
+        query_counts: Optional[Sequence[int]] = None
+    ) -> np.ndarray:
+        """
+        Extract domain-level features for many domains at once.
+        
+        Each row matches extract_domain_features(domain, query_count).to_vector().
+        The lexical columns are cached per domain (LRU), so domains seen in
+        earlier windows are not recomputed; the rest are computed in one
+        vectorized pass.
+        
+        Args:
+            domains: Domain names
+            query_counts: Number of times each domain was queried (default: 0)
+            
+        Returns:
+            Feature matrix of shape (n_domains, 13), float32
+        """
+        n = len(domains)
+        lexical = np.empty((n, 12), dtype=np.float32)
+        cache = self._domain_cache
+        
+        missing = []
+        for i, domain in enumerate(domains):
+            row = cache.get(domain)
+            if row is None:
+                missing.append(i)
+            else:
+                cache.move_to_end(domain)
+                lexical[i] = row
+        
+        if missing:
+            new_domains = [domains[i] for i in missing]
+            ascii_rows = [j for j, d in enumerate(new_domains) if d.isascii()]
+            
+            computed = np.empty((len(new_domains), 12), dtype=np.float32)
+            if ascii_rows:
+                computed[ascii_rows] = self._domain_lexical_matrix(
+                    [new_domains[j] for j in ascii_rows]
+                )
+            for j, domain in enumerate(new_domains):
+                if not domain.isascii():
+                    computed[j] = self.extract_domain_features(domain).to_vector()[:12]
+            
+            lexical[missing] = computed
+            
+            if self.domain_cache_size > 0:
+                for domain, row in zip(new_domains, computed):
+                    cache[domain] = row
+                while len(cache) > self.domain_cache_size:
+                    cache.popitem(last=False)
+        
+        logger.debug(
+            f"Extracted features for {n} domains "
+            f"({n - len(missing)} from cache)"
+        )
+        
+        counts = np.zeros(n) if query_counts is None else np.asarray(query_counts)
+        return np.column_stack([lexical, counts]).astype(np.float32)
+    
+    @classmethod
+    def _domain_lexical_matrix(cls, domains: List[str]) -> np.ndarray:
+        """
+        Compute the 12 lexical DomainFeatures columns for ASCII domains.
+        
+        Domains are packed into one zero-padded uint8 array; character
+        classes use byte lookup tables, entropy uses run lengths of each
+        sorted row, and consonant streaks and IP-like labels are found in
+        one scan over the columns.
+        
+        Args:
+            domains: ASCII domain names
+            
+        Returns:
+            Array of shape (n_domains, 12), float64
+        """
+        n = len(domains)
+        if n == 0:
+            return np.empty((0, 12), dtype=np.float64)
+        lengths = np.fromiter((len(d) for d in domains), dtype=np.int64, count=n)
+        width = max(int(lengths.max()) if n else 0, 1)
+        positions = np.arange(width)
+        in_domain = positions < lengths[:, None]
+        
+        chars = np.zeros((n, width), dtype=np.uint8)
+        chars[in_domain] = np.frombuffer("".join(domains).encode("ascii"), dtype=np.uint8)
+        lower = np.where((chars >= 65) & (chars <= 90), chars + 32, chars).astype(np.uint8)
+        
+        # Character class counts
+        vowels = _VOWEL_BYTES[lower].sum(axis=1)
+        consonants = _CONSONANT_BYTES[lower].sum(axis=1)
+        digits = _DIGIT_BYTES[lower].sum(axis=1)
+        hex_count = _HEX_BYTES[lower].sum(axis=1)
+        special = ((chars == 45) | (chars == 95)).sum(axis=1)
+        
+        # Labels and TLD
+        is_dot = chars == 46
+        subdomains = np.maximum(is_dot.sum(axis=1) - 1, 0)
+        tld_start = np.where(is_dot, positions, -1).max(axis=1) + 1
+        tld_length = lengths - tld_start
+        
+        # TLD category: pack up to 8 TLD bytes into one integer per domain
+        tld_index = np.minimum(tld_start[:, None] + np.arange(8), width - 1)
+        tld_bytes = np.take_along_axis(lower, tld_index, axis=1) * (np.arange(8) < tld_length[:, None])
+        tld_codes = np.ascontiguousarray(tld_bytes, dtype=np.uint8).view("<u8").ravel()
+        tld_category = np.where(
+            np.isin(tld_codes, cls._COMMON_TLD_CODES) & (tld_length <= 8), 0,
+            np.where(np.isin(tld_codes, cls._SUSPICIOUS_TLD_CODES) & (tld_length <= 8), 2, 1)
+        )
+        
+        # Entropy from the run lengths of each row's sorted characters
+        # (padding sorts first and is excluded by position)
+        ordered = np.sort(lower, axis=1)
+        keys = (np.arange(n)[:, None] * 256 + ordered)[positions >= (width - lengths)[:, None]]
+        if len(keys):
+            run_starts = np.concatenate([[0], np.flatnonzero(np.diff(keys)) + 1])
+            run_counts = np.diff(np.append(run_starts, len(keys))).astype(np.float64)
+            c_log_c = np.bincount(
+                keys[run_starts] // 256,
+                weights=run_counts * np.log2(run_counts),
+                minlength=n
+            )
+        else:
+            # Only empty domains
+            c_log_c = np.zeros(n)
+        safe_lengths = np.maximum(lengths, 1)
+        entropy = np.where(lengths > 0, np.log2(safe_lengths) - c_log_c / safe_lengths, 0.0)
+        
+        # Column scan: consonant streaks and all-digit labels <= 255
+        is_consonant = np.ascontiguousarray(_CONSONANT_BYTES[lower].T)
+        is_digit = _DIGIT_BYTES[chars]
+        digit_value = np.ascontiguousarray(np.where(is_digit, chars.astype(np.int64) - 48, 0).T)
+        is_digit = np.ascontiguousarray(is_digit.T)
+        is_separator = np.ascontiguousarray((is_dot | _SPACE_BYTES[chars] | ~in_domain).T)
+        
+        streak = np.zeros(n, dtype=np.int64)
+        max_streak = np.zeros(n, dtype=np.int64)
+        label_length = np.zeros(n, dtype=np.int64)
+        label_digits = np.ones(n, dtype=bool)
+        label_value = np.zeros(n, dtype=np.int64)
+        has_ip = np.zeros(n, dtype=bool)
+        
+        for j in range(width + 1):
+            separator = is_separator[j] if j < width else np.ones(n, dtype=bool)
+            has_ip |= separator & (label_length > 0) & label_digits & (label_value <= 255)
+            if j == width:
+                break
+            
+            streak = np.where(is_consonant[j], streak + 1, 0)
+            np.maximum(max_streak, streak, out=max_streak)
+            
+            label_length = np.where(separator, 0, label_length + 1)
+            label_digits = np.where(separator, True, label_digits & is_digit[j])
+            label_value = np.where(separator, 0, np.minimum(label_value * 10 + digit_value[j], 256))
+        
+        alpha = vowels + consonants
+        
+        return np.column_stack([
+            lengths,
+            subdomains,
+            tld_length,
+            entropy,
+            _safe_divide(vowels, alpha),
+            _safe_divide(consonants, alpha),
+            _safe_divide(digits, lengths),
+            special,
+            has_ip,
+            max_streak,
+            _safe_divide(hex_count, lengths),
+            tld_category
+        ]).astype(np.float64)
@@ -4,8 +4,7 @@ Health score service - periodically calculates and emits health scores.
 
 import logging
 import time
-from datetime import datetime, timedelta
-from typing import Optional
+from typing import Dict, List, Optional, Tuple
 
 from orion_ai.core.events import emit_new_event, get_loki_client
 from orion_ai.core.models import EventType, EventSeverity, HealthMetrics
@@ -14,6 +13,15 @@ from orion_ai.inventory.store import DeviceStore
 
 logger = logging.getLogger(__name__)
 
+# Event counts pushed down to Loki: (HealthMetrics field, window in hours, label matchers)
+EVENT_COUNT_METRICS: List[Tuple[str, int, Dict[str, str]]] = [
+    ("high_anomaly_count", 24, {"event_type": "device_anomaly", "severity": "CRITICAL"}),
+    ("intel_matches_count", 24 * 7, {"event_type": "intel_match"}),
+    ("new_devices_count", 24 * 7, {"event_type": "new_device"}),
+    # Unresolved critical events
+    ("critical_events_count", 24 * 7, {"severity": "CRITICAL"}),
+]
+
 
 class HealthScoreService:
     """
@@ -105,87 +113,67 @@ class HealthScoreService:
         except Exception as e:
             logger.error(f"Failed to count unknown devices: {e}")
         
-        # Count high anomalies in last 24h
-        try:
-            metrics.high_anomaly_count = self._count_events(
-                event_type="device_anomaly",
-                severity="CRITICAL",
-                hours=24
-            )
-        except Exception as e:
-            logger.error(f"Failed to count high anomalies: {e}")
-        
-        # Count threat intel matches in last 7 days
+        # Count anomalies, intel matches, new devices and critical events in Loki
         try:
-            metrics.intel_matches_count = self._count_events(
-                event_type="intel_match",
-                hours=24 * 7
-            )
+            for field, count in self._count_events().items():
+                setattr(metrics, field, count)
         except Exception as e:
-            logger.error(f"Failed to count intel matches: {e}")
-        
-        # Count new devices in last 7 days
-        try:
-            metrics.new_devices_count = self._count_events(
-                event_type="new_device",
-                hours=24 * 7
-            )
-        except Exception as e:
-            logger.error(f"Failed to count new devices: {e}")
-        
-        # Count unresolved critical events
-        try:
-            metrics.critical_events_count = self._count_events(
-                severity="CRITICAL",
-                hours=24 * 7
-            )
-        except Exception as e:
-            logger.error(f"Failed to count critical events: {e}")
+            logger.error(f"Failed to count events: {e}")
         
         logger.debug(f"Collected metrics: {metrics.to_dict()}")
         return metrics
     
-    def _count_events(
-        self,
-        event_type: Optional[str] = None,
-        severity: Optional[str] = None,
-        hours: int = 24
-    ) -> int:
+    def _count_events(self) -> Dict[str, int]:
         """
-        Count events in Loki matching criteria.
+        Count the events behind EVENT_COUNT_METRICS in a single metric query.
+        
+        Loki returns one count per (window, event_type, severity), so no log
+        lines are transferred and counts are exact.
         
-        Args:
-            event_type: Optional event type filter
-            severity: Optional severity filter
-            hours: Time window in hours
-            
         Returns:
-            Event count
+            Dictionary of HealthMetrics field name to event count
         """
-        end_time = datetime.now()
-        start_time = end_time - timedelta(hours=hours)
-        
-        # Build LogQL query
-        query_parts = ['{stream="events"}']
-        
-        if event_type:
-            query_parts.append(f'event_type="{event_type}"')
-        
-        if severity:
-            query_parts.append(f'severity="{severity}"')
-        
-        query = query_parts[0]
-        if len(query_parts) > 1:
-            query += ", " + ", ".join(query_parts[1:])
+        samples = self.loki_client.query_metric(self._event_count_query())
+        
+        counts = {field: 0 for field, _, _ in EVENT_COUNT_METRICS}
+        for sample in samples:
+            labels = sample["labels"]
+            for field, hours, matchers in EVENT_COUNT_METRICS:
+                if labels.get("window") != f"{hours}h":
+                    continue
+                if all(labels.get(name) == value for name, value in matchers.items()):
+                    counts[field] += int(sample["value"])
+        
+        return counts
+    
+    @staticmethod
+    def _event_count_query() -> str:
+        """
+        Build the LogQL query counting events per window, type and severity.
         
-        query += "}"
+        Each distinct window becomes one 'sum by' over count_over_time,
+        tagged with a window label and combined with 'or'. A window's
+        stream selector includes the matchers shared by all its metrics.
+        """
+        windows: Dict[int, List[Dict[str, str]]] = {}
+        for _, hours, matchers in EVENT_COUNT_METRICS:
+            windows.setdefault(hours, []).append(matchers)
+        
+        parts = []
+        for hours, matcher_sets in windows.items():
+            common = {
+                name: value for name, value in matcher_sets[0].items()
+                if all(m.get(name) == value for m in matcher_sets[1:])
+            }
+            selector = ", ".join(
+                ['stream="events"'] + [f'{name}="{value}"' for name, value in sorted(common.items())]
+            )
+            parts.append(
+                f'label_replace(sum by (event_type, severity) '
+                f'(count_over_time({{{selector}}}[{hours}h])), "window", "{hours}h", "", "")'
+            )
         
-        try:
-            logs = self.loki_client.query_range(query, start_time, end_time, limit=10000)
-            return len(logs)
-        except Exception as e:
-            logger.warning(f"Failed to query events: {e}")
-            return 0
+        return " or ".join(parts)
     
     def _emit_health_score_event(self, health_score) -> None:
         """Emit a health score update event."""
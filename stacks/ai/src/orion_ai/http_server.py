@@ -13,6 +13,7 @@ from fastapi.responses import JSONResponse
 from pydantic import BaseModel
 
 from orion_ai.config import get_config
+from orion_ai.model_registry import get_model_registry
 from orion_ai.pipelines import DeviceAnomalyPipeline, DomainRiskPipeline
 
 logger = logging.getLogger(__name__)
@@ -47,6 +48,7 @@ async def root():
             "health": "/health",
             "device_anomaly": "/api/v1/detect/device",
             "domain_risk": "/api/v1/detect/domain",
+            "models": "/api/v1/models",
             "recent_anomalies": "/api/v1/anomalies",
             "recent_domains": "/api/v1/domains"
         }
@@ -185,6 +187,17 @@ async def get_config_endpoint():
     }
 
 
+@app.get("/api/v1/models")
+async def get_models():
+    """
+    Get loaded models, pending candidates and shadow statistics.
+    
+    Returns:
+        Model registry status
+    """
+    return {"models": get_model_registry().status()}
+
+
 # TODO: Implement endpoints to query recent results from log files
 # @app.get("/api/v1/anomalies")
 # async def get_recent_anomalies():
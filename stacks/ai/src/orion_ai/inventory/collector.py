@@ -84,11 +84,12 @@ class DeviceCollector:
         except Exception as e:
             logger.error(f"Failed to collect from DNS logs: {e}")
         
-        # Update store
+        # Update store (one lookup and one write for all devices)
         devices = list(discovered_devices.values())
+        existing_devices = self.store.get_devices_by_ids(discovered_devices)
         for device in devices:
             # Check if device exists in store
-            existing = self.store.get_device_by_id(device.device_id)
+            existing = existing_devices.get(device.device_id)
             
             if existing:
                 # Update last_seen and merge data
@@ -96,8 +97,8 @@ class DeviceCollector:
                 device.tags = existing.tags or []
                 device.guess_type = device.guess_type or existing.guess_type
                 device.owner = existing.owner
-            
-            self.store.upsert_device(device)
+        
+        self.store.upsert_devices(devices)
         
         logger.info(f"Collected {len(devices)} devices from logs")
         return devices
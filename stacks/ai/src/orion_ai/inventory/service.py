@@ -70,6 +70,7 @@ class InventoryService:
         
         # Check for new devices
         new_device_count = 0
+        guessed = []
         for device in devices:
             if device.device_id not in self.known_device_ids:
                 # New device discovered
@@ -82,7 +83,11 @@ class InventoryService:
                     guess_type = self.collector.guess_device_type(device)
                     if guess_type:
                         device.guess_type = guess_type
-                        self.store.upsert_device(device)
+                        guessed.append(device)
+        
+        # Write this run's inventory changes in one transaction
+        self.store.upsert_devices(guessed)
+        self.store.flush()
         
         logger.info(
             f"Device discovery complete: {len(devices)} total, "
@@ -1,37 +1,102 @@
 """
 Device store for persisting device inventory.
 
-Uses SQLite for lightweight persistence of device metadata.
+Uses SQLite for lightweight persistence of device metadata. Devices are
+served from an in-memory index (by ID, IP and MAC) and writes are flushed
+to the database in batched transactions.
 """
 
+import atexit
 import hashlib
 import json
 import logging
 import sqlite3
+import threading
+import time
+from dataclasses import replace
 from datetime import datetime
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from orion_ai.core.models import Device
 
 logger = logging.getLogger(__name__)
 
+# Pending tag changes of one device: tag -> True (added) / False (removed)
+TagChanges = Dict[str, bool]
+
+UPSERT_SQL = """
+    INSERT INTO devices (
+        device_id, ip, mac, hostname, 
+        first_seen, last_seen, tags, guess_type, owner
+    )
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(device_id) DO UPDATE SET
+        ip = excluded.ip,
+        mac = COALESCE(excluded.mac, devices.mac),
+        hostname = COALESCE(excluded.hostname, devices.hostname),
+        last_seen = excluded.last_seen,
+        guess_type = COALESCE(excluded.guess_type, devices.guess_type),
+        owner = COALESCE(excluded.owner, devices.owner)
+"""
+
 
 class DeviceStore:
     """
     SQLite-based storage for device inventory.
     
-    Provides CRUD operations for Device objects.
+    Provides CRUD operations for Device objects. Reads are served from an
+    in-memory index of all devices, reloaded when another process changes
+    the database. Upserts update the index at once and are written behind:
+    pending devices are flushed in one transaction after
+    write_behind_seconds, on flush()/close(), and at interpreter exit.
+    Each thread reuses one WAL-mode connection.
+    
+    Tags are written as changes: the tags an upsert adds or removes
+    relative to this store's copy are applied to the stored tags inside the
+    flush transaction, so tags set by other processes since the index was
+    loaded are kept.
     """
     
-    def __init__(self, db_path: str = "/var/lib/orion-ai/devices.db"):
+    def __init__(
+        self,
+        db_path: str = "/var/lib/orion-ai/devices.db",
+        write_behind_seconds: float = 1.0,
+        index_check_seconds: float = 5.0
+    ):
         """
         Initialize device store.
         
         Args:
             db_path: Path to SQLite database file
+            write_behind_seconds: Delay before pending upserts are flushed
+                (0 writes through on every upsert)
+            index_check_seconds: How often reads check the database file for
+                changes made by other processes
         """
         self.db_path = db_path
+        self.write_behind_seconds = write_behind_seconds
+        self.index_check_seconds = index_check_seconds
+        
+        # Per-thread persistent connections
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        
+        # In-memory index (loaded lazily)
+        self._lock = threading.RLock()
+        self._devices: Optional[Dict[str, Device]] = None
+        self._by_ip: Dict[str, Set[str]] = {}
+        self._by_mac: Dict[str, Set[str]] = {}
+        self._index_version: Optional[Tuple[int, ...]] = None
+        self._index_checked_at = 0.0
+        
+        # Write-behind state
+        self._dirty: Dict[str, Device] = {}
+        self._flushing: Dict[str, Device] = {}
+        self._tag_changes: Dict[str, TagChanges] = {}
+        self._flushing_tags: Dict[str, TagChanges] = {}
+        self._flush_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
         
         # Ensure directory exists
         Path(db_path).parent.mkdir(parents=True, exist_ok=True)
@@ -39,11 +104,29 @@ class DeviceStore:
         # Initialize database
         self._init_db()
         
+        atexit.register(self.flush)
+        
         logger.info(f"Initialized DeviceStore at {db_path}")
     
+    def _connect(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30.0)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+    
     def _init_db(self) -> None:
         """Create database schema if it doesn't exist."""
-        with sqlite3.connect(self.db_path) as conn:
+        conn = self._connect()
+        with conn:
+            # WAL lets readers in other processes proceed during flushes
+            conn.execute("PRAGMA journal_mode=WAL")
+            
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS devices (
                     device_id TEXT PRIMARY KEY,
@@ -68,8 +151,108 @@ class DeviceStore:
                 CREATE INDEX IF NOT EXISTS idx_devices_mac 
                 ON devices(mac)
             """)
+    
+    def close(self) -> None:
+        """Flush pending writes and close all connections."""
+        self.flush()
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.ProgrammingError:
+                # Connections of other threads may only be closed by them
+                pass
+        self._local = threading.local()
+    
+    # ------------------------------------------------------------------
+    # In-memory index
+    # ------------------------------------------------------------------
+    
+    def _db_version(self) -> Tuple[int, ...]:
+        """Get modification times of the database files."""
+        version = []
+        for suffix in ("", "-wal"):
+            try:
+                version.append(Path(f"{self.db_path}{suffix}").stat().st_mtime_ns)
+            except FileNotFoundError:
+                version.append(0)
+        return tuple(version)
+    
+    def reload_index(self) -> None:
+        """Load all devices into memory, keeping pending (unflushed) upserts."""
+        with self._lock:
+            version = self._db_version()
+            rows = self._connect().execute("SELECT * FROM devices").fetchall()
             
-            conn.commit()
+            self._devices = {}
+            self._by_ip = {}
+            self._by_mac = {}
+            for row in rows:
+                self._index_device(self._row_to_device(row))
+            for pending in (self._flushing, self._dirty):
+                for device in pending.values():
+                    stored = self._devices.get(device.device_id)
+                    if stored is not None:
+                        device = replace(device, tags=self._pending_tags(device.device_id, stored.tags))
+                    self._index_device(device)
+            
+            self._index_version = version
+            self._index_checked_at = time.monotonic()
+        
+        logger.debug(f"Loaded {len(rows)} devices into memory")
+    
+    def _index(self) -> Dict[str, Device]:
+        """Get the device index, reloading it if the database changed."""
+        with self._lock:
+            if self._devices is None:
+                self.reload_index()
+            else:
+                now = time.monotonic()
+                if now - self._index_checked_at >= self.index_check_seconds:
+                    self._index_checked_at = now
+                    if self._db_version() != self._index_version:
+                        self.reload_index()
+            return self._devices
+    
+    def _index_device(self, device: Device) -> None:
+        """Add or replace a device in the index; caller holds the lock."""
+        self._unindex_device(device.device_id)
+        self._devices[device.device_id] = device
+        self._by_ip.setdefault(device.ip, set()).add(device.device_id)
+        if device.mac:
+            self._by_mac.setdefault(device.mac, set()).add(device.device_id)
+    
+    def _unindex_device(self, device_id: str) -> None:
+        """Remove a device from the index; caller holds the lock."""
+        old = self._devices.pop(device_id, None)
+        if old is None:
+            return
+        for key, lookup in ((old.ip, self._by_ip), (old.mac, self._by_mac)):
+            ids = lookup.get(key)
+            if ids:
+                ids.discard(device_id)
+                if not ids:
+                    del lookup[key]
+    
+    def _pending_tags(self, device_id: str, tags: List[str]) -> List[str]:
+        """Apply a device's unwritten tag changes to stored tags; caller holds the lock."""
+        for pending in (self._flushing_tags, self._tag_changes):
+            changes = pending.get(device_id)
+            if changes:
+                tags = _apply_tag_changes(tags, changes)
+        return tags
+    
+    def _latest(self, device_ids: Optional[Set[str]]) -> Optional[Device]:
+        """Most recently seen device among IDs; caller holds the lock."""
+        if not device_ids:
+            return None
+        device = max((self._devices[i] for i in device_ids), key=lambda d: d.last_seen)
+        return _copy(device)
+    
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
     
     def get_device_by_id(self, device_id: str) -> Optional[Device]:
         """
@@ -81,17 +264,27 @@ class DeviceStore:
         Returns:
             Device if found, None otherwise
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                "SELECT * FROM devices WHERE device_id = ?",
-                (device_id,)
-            )
-            row = cursor.fetchone()
+        with self._lock:
+            device = self._index().get(device_id)
+            return _copy(device) if device else None
+    
+    def get_devices_by_ids(self, device_ids: Iterable[str]) -> Dict[str, Device]:
+        """
+        Get several devices by ID.
+        
+        Args:
+            device_ids: Device identifiers
             
-            if row:
-                return self._row_to_device(row)
-            return None
+        Returns:
+            Dictionary of device_id to Device for the IDs that exist
+        """
+        with self._lock:
+            index = self._index()
+            return {
+                device_id: _copy(index[device_id])
+                for device_id in device_ids
+                if device_id in index
+            }
     
     def get_device_by_ip(self, ip: str) -> Optional[Device]:
         """
@@ -103,17 +296,9 @@ class DeviceStore:
         Returns:
             Device if found, None otherwise
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                "SELECT * FROM devices WHERE ip = ? ORDER BY last_seen DESC LIMIT 1",
-                (ip,)
-            )
-            row = cursor.fetchone()
-            
-            if row:
-                return self._row_to_device(row)
-            return None
+        with self._lock:
+            self._index()
+            return self._latest(self._by_ip.get(ip))
     
     def get_device_by_mac(self, mac: str) -> Optional[Device]:
         """
@@ -125,17 +310,9 @@ class DeviceStore:
         Returns:
             Device if found, None otherwise
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.execute(
-                "SELECT * FROM devices WHERE mac = ? ORDER BY last_seen DESC LIMIT 1",
-                (mac,)
-            )
-            row = cursor.fetchone()
-            
-            if row:
-                return self._row_to_device(row)
-            return None
+        with self._lock:
+            self._index()
+            return self._latest(self._by_mac.get(mac))
     
     def list_devices(
         self,
@@ -150,24 +327,20 @@ class DeviceStore:
             limit: Maximum number of devices to return
             
         Returns:
-            List of Device objects
+            List of Device objects, most recently seen first
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.row_factory = sqlite3.Row
-            
-            if tag_filter:
-                # Filter by tag (tags stored as JSON array)
-                cursor = conn.execute(
-                    "SELECT * FROM devices WHERE tags LIKE ? ORDER BY last_seen DESC LIMIT ?",
-                    (f'%"{tag_filter}"%', limit)
-                )
-            else:
-                cursor = conn.execute(
-                    "SELECT * FROM devices ORDER BY last_seen DESC LIMIT ?",
-                    (limit,)
-                )
-            
-            return [self._row_to_device(row) for row in cursor.fetchall()]
+        with self._lock:
+            devices = list(self._index().values())
+        
+        if tag_filter:
+            devices = [d for d in devices if tag_filter in d.tags]
+        
+        devices.sort(key=lambda d: d.last_seen, reverse=True)
+        return [_copy(d) for d in devices[:limit]]
+    
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
     
     def upsert_device(self, device: Device) -> None:
         """
@@ -176,35 +349,146 @@ class DeviceStore:
         Args:
             device: Device object to store
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT INTO devices (
-                    device_id, ip, mac, hostname, 
-                    first_seen, last_seen, tags, guess_type, owner
+        self.upsert_devices([device])
+        logger.debug(f"Upserted device: {device.device_id} ({device.ip})")
+    
+    def upsert_devices(self, devices: Iterable[Device]) -> int:
+        """
+        Insert or update several devices.
+        
+        Existing devices keep their first_seen and any mac, hostname,
+        guess_type and owner the update leaves unset. Only the tags added
+        or removed relative to the stored device are written. The devices
+        are written in one transaction, immediately if write-behind is off.
+        
+        Args:
+            devices: Device objects to store
+            
+        Returns:
+            Number of devices upserted
+        """
+        with self._lock:
+            count = self._merge(devices)
+        
+        if count:
+            self._schedule_flush()
+        return count
+    
+    def _merge(self, devices: Iterable[Device]) -> int:
+        """Merge devices into the index and mark them pending; caller holds the lock."""
+        index = self._index()
+        count = 0
+        for device in devices:
+            existing = index.get(device.device_id)
+            merged = _copy(device)
+            if existing:
+                merged.first_seen = existing.first_seen
+                merged.mac = device.mac or existing.mac
+                merged.hostname = device.hostname or existing.hostname
+                merged.guess_type = device.guess_type or existing.guess_type
+                merged.owner = device.owner or existing.owner
+            
+            changes = _tag_diff(existing.tags if existing else [], merged.tags)
+            if changes:
+                self._tag_changes.setdefault(merged.device_id, {}).update(changes)
+            
+            self._index_device(merged)
+            self._dirty[merged.device_id] = merged
+            count += 1
+        return count
+    
+    def flush(self) -> int:
+        """
+        Write pending upserts to the database in one transaction.
+        
+        Reads and upserts continue while the transaction runs. Tag changes
+        are applied to the tags re-read inside the transaction.
+        
+        Returns:
+            Number of devices written
+        """
+        with self._flush_lock:
+            with self._lock:
+                if self._flush_timer is not None:
+                    self._flush_timer.cancel()
+                    self._flush_timer = None
+                if not self._dirty:
+                    return 0
+                self._flushing, self._dirty = self._dirty, {}
+                self._flushing_tags, self._tag_changes = self._tag_changes, {}
+                # Whether the index has seen every write made so far
+                index_current = self._db_version() == self._index_version
+            
+            rows = [
+                (
+                    d.device_id,
+                    d.ip,
+                    d.mac,
+                    d.hostname,
+                    d.first_seen.isoformat(),
+                    d.last_seen.isoformat(),
+                    json.dumps(d.tags),
+                    d.guess_type,
+                    d.owner
                 )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT(device_id) DO UPDATE SET
-                    ip = excluded.ip,
-                    mac = COALESCE(excluded.mac, devices.mac),
-                    hostname = COALESCE(excluded.hostname, devices.hostname),
-                    last_seen = excluded.last_seen,
-                    tags = excluded.tags,
-                    guess_type = COALESCE(excluded.guess_type, devices.guess_type),
-                    owner = COALESCE(excluded.owner, devices.owner)
-            """, (
-                device.device_id,
-                device.ip,
-                device.mac,
-                device.hostname,
-                device.first_seen.isoformat(),
-                device.last_seen.isoformat(),
-                json.dumps(device.tags),
-                device.guess_type,
-                device.owner
-            ))
-            conn.commit()
+                for d in self._flushing.values()
+            ]
+            
+            try:
+                conn = self._connect()
+                with conn:
+                    conn.executemany(UPSERT_SQL, rows)
+                    stored_tags = _write_tag_changes(conn, list(self._flushing), self._flushing_tags)
+            except Exception:
+                # Keep the devices pending; newer upserts take precedence
+                with self._lock:
+                    self._dirty = {**self._flushing, **self._dirty}
+                    for device_id, changes in self._tag_changes.items():
+                        self._flushing_tags.setdefault(device_id, {}).update(changes)
+                    self._tag_changes = self._flushing_tags
+                    self._flushing = {}
+                    self._flushing_tags = {}
+                raise
+            
+            with self._lock:
+                self._flushing = {}
+                self._flushing_tags = {}
+                # Show tags other processes gave the flushed devices
+                if self._devices is not None:
+                    for device_id, tags in stored_tags.items():
+                        device = self._devices.get(device_id)
+                        if device is not None:
+                            self._index_device(replace(device, tags=self._pending_tags(device_id, tags)))
+                # Our own write must not look like another process changed
+                # the file, but writes the index has not seen must still
+                # trigger a reload
+                if index_current:
+                    self._index_version = self._db_version()
         
-        logger.debug(f"Upserted device: {device.device_id} ({device.ip})")
+        logger.debug(f"Flushed {len(rows)} devices")
+        return len(rows)
+    
+    def _schedule_flush(self) -> None:
+        """Flush now (write-through) or arm the write-behind timer."""
+        if self.write_behind_seconds <= 0:
+            self.flush()
+            return
+        
+        with self._lock:
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(self.write_behind_seconds, self._timed_flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def _timed_flush(self) -> None:
+        """Write-behind timer callback."""
+        with self._lock:
+            self._flush_timer = None
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush devices: {e}", exc_info=True)
+            self._schedule_flush()
     
     def tag_device(self, device_id: str, tag: str) -> bool:
         """
@@ -217,13 +501,19 @@ class DeviceStore:
         Returns:
             True if successful, False if device not found
         """
-        device = self.get_device_by_id(device_id)
-        if not device:
-            return False
+        with self._lock:
+            device = self._index().get(device_id)
+            if not device:
+                return False
+            
+            changed = tag not in device.tags
+            if changed:
+                device = _copy(device)
+                device.tags.append(tag)
+                self._merge([device])
         
-        if tag not in device.tags:
-            device.tags.append(tag)
-            self.upsert_device(device)
+        if changed:
+            self._schedule_flush()
             logger.info(f"Added tag '{tag}' to device {device_id}")
         
         return True
@@ -239,13 +529,19 @@ class DeviceStore:
         Returns:
             True if successful, False if device not found
         """
-        device = self.get_device_by_id(device_id)
-        if not device:
-            return False
+        with self._lock:
+            device = self._index().get(device_id)
+            if not device:
+                return False
+            
+            changed = tag in device.tags
+            if changed:
+                device = _copy(device)
+                device.tags.remove(tag)
+                self._merge([device])
         
-        if tag in device.tags:
-            device.tags.remove(tag)
-            self.upsert_device(device)
+        if changed:
+            self._schedule_flush()
             logger.info(f"Removed tag '{tag}' from device {device_id}")
         
         return True
@@ -254,20 +550,29 @@ class DeviceStore:
         """
         Delete a device from the store.
         
+        Deletes are written through immediately.
+        
         Args:
             device_id: Device identifier
             
         Returns:
             True if deleted, False if not found
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "DELETE FROM devices WHERE device_id = ?",
-                (device_id,)
-            )
-            conn.commit()
+        with self._flush_lock, self._lock:
+            self._index()
+            pending = self._dirty.pop(device_id, None)
+            self._tag_changes.pop(device_id, None)
+            self._unindex_device(device_id)
+            
+            conn = self._connect()
+            with conn:
+                cursor = conn.execute(
+                    "DELETE FROM devices WHERE device_id = ?",
+                    (device_id,)
+                )
+            self._index_version = self._db_version()
             
-            deleted = cursor.rowcount > 0
+            deleted = cursor.rowcount > 0 or pending is not None
             if deleted:
                 logger.info(f"Deleted device: {device_id}")
             
@@ -302,3 +607,62 @@ class DeviceStore:
         # Use MAC if available for stability, otherwise use IP
         key = mac if mac else ip
         return hashlib.sha256(key.encode()).hexdigest()[:16]
+
+
+def _copy(device: Device) -> Device:
+    """Copy a device so callers cannot mutate the index."""
+    return replace(device, tags=list(device.tags))
+
+
+def _tag_diff(old: List[str], new: List[str]) -> TagChanges:
+    """Tags added and removed going from old to new."""
+    changes = {tag: False for tag in old if tag not in new}
+    changes.update((tag, True) for tag in new if tag not in old)
+    return changes
+
+
+def _apply_tag_changes(tags: List[str], changes: TagChanges) -> List[str]:
+    """Apply tag changes, keeping the order of existing tags."""
+    result = [tag for tag in tags if changes.get(tag, True)]
+    result.extend(tag for tag, added in changes.items() if added and tag not in result)
+    return result
+
+
+def _write_tag_changes(
+    conn: sqlite3.Connection,
+    device_ids: List[str],
+    changes: Dict[str, TagChanges]
+) -> Dict[str, List[str]]:
+    """
+    Re-read the stored tags of flushed devices and apply tag changes.
+    
+    Runs in the caller's transaction after the upsert statement, so the
+    write lock is already held and no other process can change the tags
+    in between.
+    
+    Args:
+        conn: Connection with an open write transaction
+        device_ids: Flushed device IDs
+        changes: Tag changes by device ID
+    
+    Returns:
+        Resulting tags by device ID
+    """
+    tags: Dict[str, List[str]] = {}
+    # Stay below SQLite's bound-parameter limit
+    for start in range(0, len(device_ids), 500):
+        chunk = device_ids[start:start + 500]
+        rows = conn.execute(
+            f"SELECT device_id, tags FROM devices WHERE device_id IN ({','.join('?' * len(chunk))})",
+            chunk
+        ).fetchall()
+        for device_id, stored in rows:
+            tags[device_id] = json.loads(stored) if stored else []
+    
+    updates = []
+    for device_id, device_changes in changes.items():
+        if device_id in tags:
+            tags[device_id] = _apply_tag_changes(tags[device_id], device_changes)
+            updates.append((json.dumps(tags[device_id]), device_id))
+    conn.executemany("UPDATE devices SET tags = ? WHERE device_id = ?", updates)
+    return tags
@@ -5,15 +5,330 @@ Provides abstraction layer for reading NSM and DNS events.
 """
 
 import logging
+import math
+import queue
+import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple, Union
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from orion_ai.config import get_config
 
 logger = logging.getLogger(__name__)
 
 
+class LokiStream:
+    """
+    Iterable over the log entries of one LogQL query.
+    
+    Walks the window forward in adaptive time slices and pages past the
+    Loki per-query limit using the timestamp of the last entry as cursor,
+    so entries are yielded incrementally instead of materialised at once.
+    
+    After iteration, `complete` tells whether the whole window was read
+    (False if max_entries capped the read or the cursor could not advance).
+    
+    Attributes:
+        entries_read: Number of entries yielded so far
+        pages: Number of query_range calls issued
+        complete: True once the full window has been read without capping
+    """
+    
+    # Smallest slice the adaptive walk will shrink to
+    MIN_SLICE_NS = 1_000_000_000
+    
+    def __init__(
+        self,
+        reader: "LokiLogReader",
+        query: str,
+        start: datetime,
+        end: datetime,
+        page_size: int,
+        slice_seconds: int,
+        max_entries: Optional[int] = None
+    ):
+        """
+        Initialize a log stream.
+        
+        Args:
+            reader: LokiLogReader used to issue page queries
+            query: LogQL query string
+            start: Start time for query (inclusive)
+            end: End time for query (exclusive)
+            page_size: Entries requested per page
+            slice_seconds: Initial time slice per query
+            max_entries: Stop after this many entries (default: unlimited)
+        """
+        self.reader = reader
+        self.query = query
+        self.start_ns = int(start.timestamp() * 1e9)
+        self.end_ns = int(end.timestamp() * 1e9)
+        self.page_size = page_size
+        self.slice_ns = max(self.MIN_SLICE_NS, int(slice_seconds * 1e9))
+        self.max_entries = max_entries
+        
+        self.entries_read = 0
+        self.pages = 0
+        self.complete = False
+        self._started = False
+    
+    @staticmethod
+    def _entry_key(entry: Dict) -> Tuple:
+        """Identity of an entry, used to drop repeats at a page boundary."""
+        return entry["log"], tuple(sorted(entry["labels"].items()))
+    
+    def __iter__(self) -> Iterator[Dict]:
+        """Yield log entries in timestamp order."""
+        if self._started:
+            raise RuntimeError("LokiStream can only be iterated once")
+        self._started = True
+        
+        complete = True
+        slice_ns = self.slice_ns
+        cursor = self.start_ns
+        
+        while cursor < self.end_ns:
+            slice_end = min(cursor + slice_ns, self.end_ns)
+            page_start = cursor
+            boundary_keys = set()
+            slice_pages = 0
+            slice_entries = 0
+            
+            while True:
+                page = self.reader._query_page(
+                    self.query, page_start, slice_end, self.page_size
+                )
+                self.pages += 1
+                slice_pages += 1
+                
+                # Drop entries already yielded at the cursor timestamp
+                new_entries = [
+                    e for e in page
+                    if e["timestamp_ns"] != page_start or self._entry_key(e) not in boundary_keys
+                ]
+                
+                # Entries at the last timestamp may continue on the next page
+                last_ts = page[-1]["timestamp_ns"] if page else page_start
+                next_keys = set(boundary_keys) if last_ts == page_start else set()
+                next_keys.update(
+                    self._entry_key(e) for e in page if e["timestamp_ns"] == last_ts
+                )
+                
+                for entry in new_entries:
+                    if self.max_entries is not None and self.entries_read >= self.max_entries:
+                        logger.debug(
+                            f"Loki read capped at {self.max_entries} entries "
+                            f"for query {self.query}"
+                        )
+                        return
+                    self.entries_read += 1
+                    slice_entries += 1
+                    yield entry
+                
+                if len(page) < self.page_size:
+                    break
+                
+                if not new_entries:
+                    # More than page_size entries share one timestamp
+                    logger.warning(
+                        f"Loki cursor stuck at {last_ts} for query {self.query}; "
+                        "skipping remaining entries at this timestamp"
+                    )
+                    complete = False
+                    page_start, boundary_keys = last_ts + 1, set()
+                    continue
+                
+                page_start, boundary_keys = last_ts, next_keys
+            
+            # Shrink slices that needed paging, grow slices that were sparse
+            if slice_pages > 1:
+                slice_ns = max(self.MIN_SLICE_NS, slice_ns // 2)
+            elif slice_entries < self.page_size // 4:
+                slice_ns = slice_ns * 2
+            
+            cursor = slice_end
+        
+        self.complete = complete
+        logger.debug(
+            f"Retrieved {self.entries_read} log entries from Loki "
+            f"in {self.pages} pages"
+        )
+
+
+class _ShardError:
+    """Exception raised while fetching a shard, handed to the consumer."""
+    
+    def __init__(self, error: Exception):
+        self.error = error
+
+
+# Queued after a shard's last entry
+_SHARD_DONE = object()
+
+
+def _fetch_shard(shard: LokiStream, entries: "queue.Queue", stop: threading.Event) -> None:
+    """
+    Read one shard into a bounded queue until it is exhausted or stopped.
+    
+    Args:
+        shard: Shard stream
+        entries: Queue receiving entries, then _SHARD_DONE or a _ShardError
+        stop: Set when the consumer no longer reads the shard
+    """
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                entries.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    try:
+        for entry in shard:
+            if not put(entry):
+                return
+    except Exception as e:
+        put(_ShardError(e))
+        return
+    put(_SHARD_DONE)
+
+
+class ShardedLokiStream:
+    """
+    Iterable over one LogQL query fetched as concurrent time shards.
+    
+    Splits the window into consecutive shards, each read by its own
+    LokiStream in a fetch thread. At most `prefetch` shards are fetched
+    ahead of the consumer, each into a queue of at most `buffer_entries`
+    entries, so memory stays bounded however large the window is.
+    Entries are yielded shard by shard, so output stays in timestamp
+    order while later shards are still being fetched. Fetching starts
+    when the stream is created.
+    
+    Exposes the same entries_read, pages and complete attributes as
+    LokiStream.
+    """
+    
+    def __init__(
+        self,
+        reader: "LokiLogReader",
+        query: str,
+        start: datetime,
+        end: datetime,
+        shard_seconds: int,
+        max_entries: Optional[int] = None,
+        prefetch: Optional[int] = None,
+        buffer_entries: Optional[int] = None
+    ):
+        """
+        Initialize a sharded log stream and start fetching.
+        
+        Args:
+            reader: LokiLogReader used to issue page queries
+            query: LogQL query string
+            start: Start time for query (inclusive)
+            end: End time for query (exclusive)
+            shard_seconds: Length of each shard
+            max_entries: Stop after this many entries (default: unlimited)
+            prefetch: Shards fetched at once (default: reader concurrency)
+            buffer_entries: Entries buffered per shard (default: reader page size)
+        """
+        self.query = query
+        self.max_entries = max_entries
+        self.prefetch = max(1, prefetch or reader.concurrency)
+        self.buffer_entries = max(1, buffer_entries or reader.page_size)
+        self.entries_read = 0
+        self.complete = False
+        self._started = False
+        
+        n_shards = max(1, math.ceil((end - start).total_seconds() / shard_seconds))
+        step = (end - start) / n_shards
+        bounds = [start + step * i for i in range(n_shards)] + [end]
+        
+        self.shards = [
+            LokiStream(
+                reader,
+                query,
+                bounds[i],
+                bounds[i + 1],
+                page_size=reader.page_size,
+                slice_seconds=reader.slice_seconds,
+                max_entries=max_entries
+            )
+            for i in range(n_shards)
+        ]
+        
+        # Fetch threads only reference the shard, its queue and the stop
+        # event, so an abandoned stream is collected and stops them
+        self._stop = threading.Event()
+        self._queues: List["queue.Queue"] = []
+        for _ in range(min(self.prefetch, n_shards)):
+            self._start_next()
+    
+    @property
+    def pages(self) -> int:
+        """Number of query_range calls issued across all shards."""
+        return sum(shard.pages for shard in self.shards)
+    
+    def _start_next(self) -> None:
+        """Start fetching the next shard, if any is left."""
+        index = len(self._queues)
+        if index >= len(self.shards):
+            return
+        
+        entries: "queue.Queue" = queue.Queue(maxsize=self.buffer_entries)
+        self._queues.append(entries)
+        threading.Thread(
+            target=_fetch_shard,
+            args=(self.shards[index], entries, self._stop),
+            name=f"loki-shard-{index}",
+            daemon=True
+        ).start()
+    
+    def close(self) -> None:
+        """Stop fetching shards nobody will read."""
+        self._stop.set()
+    
+    def __del__(self):
+        self._stop.set()
+    
+    def __iter__(self) -> Iterator[Dict]:
+        """Yield log entries in timestamp order."""
+        if self._started:
+            raise RuntimeError("ShardedLokiStream can only be iterated once")
+        self._started = True
+        
+        try:
+            complete = True
+            for index, shard in enumerate(self.shards):
+                entries = self._queues[index]
+                
+                while True:
+                    entry = entries.get()
+                    if entry is _SHARD_DONE:
+                        break
+                    if isinstance(entry, _ShardError):
+                        raise entry.error
+                    if self.max_entries is not None and self.entries_read >= self.max_entries:
+                        logger.warning(
+                            f"Loki read capped at {self.max_entries} entries "
+                            f"for query {self.query}"
+                        )
+                        return
+                    self.entries_read += 1
+                    yield entry
+                
+                complete = complete and shard.complete
+                self._start_next()
+            
+            self.complete = complete
+        finally:
+            self.close()
+
+
 class LokiLogReader:
     """
     Client for reading logs from Loki using LogQL queries.
@@ -21,6 +336,12 @@ class LokiLogReader:
     Attributes:
         base_url: Loki HTTP API base URL
         timeout: Request timeout in seconds
+        page_size: Entries requested per query page
+        slice_seconds: Initial time slice walked per query
+        max_entries: Default cap on entries per query window (None = unlimited)
+        shard_seconds: Length of concurrently fetched shards (0 = no sharding)
+        concurrency: Maximum concurrent Loki queries
+        session: Keep-alive HTTP session shared by all queries
     """
     
     def __init__(self, base_url: Optional[str] = None, timeout: Optional[int] = None):
@@ -34,30 +355,59 @@ class LokiLogReader:
         config = get_config()
         self.base_url = base_url or config.loki.url
         self.timeout = timeout or config.loki.timeout
+        self.page_size = config.loki.page_size
+        self.slice_seconds = config.loki.slice_seconds
+        self.max_entries = config.loki.max_entries or None
+        self.shard_seconds = config.loki.shard_seconds
+        self.concurrency = config.loki.concurrency
         
         # Ensure base_url doesn't end with slash
         self.base_url = self.base_url.rstrip('/')
         
+        # Pooled keep-alive session with retry/backoff on transient errors
+        retry = Retry(
+            total=config.loki.retries,
+            backoff_factor=config.loki.retry_backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"])
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.concurrency,
+            max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # Caps concurrent query_range calls across all streams and shards
+        self._query_slots = threading.BoundedSemaphore(self.concurrency)
+        
         logger.info(f"Initialized LokiLogReader with base_url={self.base_url}")
     
-    def _query_range(
+    def close(self) -> None:
+        """Close the HTTP session."""
+        self.session.close()
+    
+    def _query_page(
         self,
         query: str,
-        start: datetime,
-        end: datetime,
-        limit: int = 5000
+        start_ns: int,
+        end_ns: int,
+        limit: int
     ) -> List[Dict]:
         """
-        Execute a LogQL range query.
+        Execute a single forward LogQL range query.
         
         Args:
             query: LogQL query string
-            start: Start time for query
-            end: End time for query
+            start_ns: Start time in nanoseconds (inclusive)
+            end_ns: End time in nanoseconds (exclusive)
             limit: Maximum number of results
             
         Returns:
-            List of log entries as dictionaries
+            List of log entries sorted by timestamp, each carrying its raw
+            nanosecond timestamp under 'timestamp_ns'
             
         Raises:
             requests.RequestException: If query fails
@@ -66,16 +416,18 @@ class LokiLogReader:
         
         params = {
             "query": query,
-            "start": int(start.timestamp() * 1e9),  # Nanoseconds
-            "end": int(end.timestamp() * 1e9),
-            "limit": limit
+            "start": start_ns,
+            "end": end_ns,
+            "limit": limit,
+            "direction": "forward"
         }
         
         logger.debug(f"Executing Loki query: {query}")
-        logger.debug(f"Time range: {start} to {end}")
+        logger.debug(f"Time range: {start_ns} to {end_ns}")
         
         try:
-            response = requests.get(url, params=params, timeout=self.timeout)
+            with self._query_slots:
+                response = self.session.get(url, params=params, timeout=self.timeout)
             response.raise_for_status()
             
             data = response.json()
@@ -85,27 +437,162 @@ class LokiLogReader:
             if data.get("status") == "success":
                 result = data.get("data", {}).get("result", [])
                 for stream in result:
+                    labels = stream.get("stream", {})
                     for value in stream.get("values", []):
                         # value is [timestamp_ns, log_line]
                         timestamp_ns, log_line = value
+                        ts_ns = int(timestamp_ns)
                         entries.append({
-                            "timestamp": datetime.fromtimestamp(int(timestamp_ns) / 1e9),
+                            "timestamp": datetime.fromtimestamp(ts_ns / 1e9),
                             "log": log_line,
-                            "labels": stream.get("stream", {})
+                            "labels": labels,
+                            "timestamp_ns": ts_ns
                         })
             
-            logger.info(f"Retrieved {len(entries)} log entries from Loki")
+            # Streams are returned separately; merge them into one timeline
+            entries.sort(key=lambda e: e["timestamp_ns"])
             return entries
             
         except requests.RequestException as e:
             logger.error(f"Failed to query Loki: {e}")
             raise
     
+    def stream_range(
+        self,
+        query: str,
+        start: datetime,
+        end: datetime,
+        limit: Optional[int] = None
+    ) -> Union[LokiStream, ShardedLokiStream]:
+        """
+        Stream a LogQL range query, paging past the Loki limit.
+        
+        Windows longer than shard_seconds are split into shards that are
+        fetched concurrently, starting immediately.
+        
+        Args:
+            query: LogQL query string
+            start: Start time for query
+            end: End time for query
+            limit: Maximum number of results (default: reader max_entries)
+            
+        Returns:
+            LokiStream or ShardedLokiStream yielding log entries as dictionaries
+        """
+        max_entries = limit if limit is not None else self.max_entries
+        
+        if self.shard_seconds and (end - start).total_seconds() > self.shard_seconds:
+            return ShardedLokiStream(
+                self,
+                query,
+                start,
+                end,
+                shard_seconds=self.shard_seconds,
+                max_entries=max_entries
+            )
+        
+        return LokiStream(
+            self,
+            query,
+            start,
+            end,
+            page_size=self.page_size,
+            slice_seconds=self.slice_seconds,
+            max_entries=max_entries
+        )
+    
+    def _query_range(
+        self,
+        query: str,
+        start: datetime,
+        end: datetime,
+        limit: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Execute a LogQL range query and collect every entry.
+        
+        Args:
+            query: LogQL query string
+            start: Start time for query
+            end: End time for query
+            limit: Maximum number of results (default: reader max_entries)
+            
+        Returns:
+            List of log entries as dictionaries
+            
+        Raises:
+            requests.RequestException: If query fails
+        """
+        return list(self.stream_range(query, start, end, limit))
+    
+    # LogQL selectors for each event stream
+    FLOW_QUERY = '{service="suricata", event_type="flow"}'
+    ALERT_QUERY = '{service="suricata", event_type="alert"}'
+    # Query both Suricata DNS events and Pi-hole logs, combined with logical OR
+    DNS_QUERY = '{service="suricata", event_type="dns"} or {service="pihole"}'
+    
+    def stream_suricata_flows(
+        self,
+        start: datetime,
+        end: datetime,
+        limit: Optional[int] = None
+    ) -> Union[LokiStream, ShardedLokiStream]:
+        """
+        Stream Suricata flow events for a time window.
+        
+        Args:
+            start: Start time
+            end: End time
+            limit: Maximum results (default: reader max_entries)
+            
+        Returns:
+            LokiStream of flow events
+        """
+        return self.stream_range(self.FLOW_QUERY, start, end, limit)
+    
+    def stream_suricata_alerts(
+        self,
+        start: datetime,
+        end: datetime,
+        limit: Optional[int] = None
+    ) -> Union[LokiStream, ShardedLokiStream]:
+        """
+        Stream Suricata alert events for a time window.
+        
+        Args:
+            start: Start time
+            end: End time
+            limit: Maximum results (default: reader max_entries)
+            
+        Returns:
+            LokiStream of alert events
+        """
+        return self.stream_range(self.ALERT_QUERY, start, end, limit)
+    
+    def stream_dns_queries(
+        self,
+        start: datetime,
+        end: datetime,
+        limit: Optional[int] = None
+    ) -> Union[LokiStream, ShardedLokiStream]:
+        """
+        Stream DNS query events from Suricata and Pi-hole.
+        
+        Args:
+            start: Start time
+            end: End time
+            limit: Maximum results (default: reader max_entries)
+            
+        Returns:
+            LokiStream of DNS query events
+        """
+        return self.stream_range(self.DNS_QUERY, start, end, limit)
+    
     def get_suricata_flows(
         self,
         start: datetime,
         end: datetime,
-        limit: int = 5000
+        limit: Optional[int] = None
     ) -> List[Dict]:
         """
         Get Suricata flow events for a time window.
@@ -113,19 +600,18 @@ class LokiLogReader:
         Args:
             start: Start time
             end: End time
-            limit: Maximum results
+            limit: Maximum results (default: reader max_entries)
             
         Returns:
             List of flow events
         """
-        query = '{service="suricata", event_type="flow"}'
-        return self._query_range(query, start, end, limit)
+        return list(self.stream_suricata_flows(start, end, limit))
     
     def get_suricata_alerts(
         self,
         start: datetime,
         end: datetime,
-        limit: int = 5000
+        limit: Optional[int] = None
     ) -> List[Dict]:
         """
         Get Suricata alert events for a time window.
@@ -133,19 +619,18 @@ class LokiLogReader:
         Args:
             start: Start time
             end: End time
-            limit: Maximum results
+            limit: Maximum results (default: reader max_entries)
             
         Returns:
             List of alert events
         """
-        query = '{service="suricata", event_type="alert"}'
-        return self._query_range(query, start, end, limit)
+        return list(self.stream_suricata_alerts(start, end, limit))
     
     def get_dns_queries(
         self,
         start: datetime,
         end: datetime,
-        limit: int = 5000
+        limit: Optional[int] = None
     ) -> List[Dict]:
         """
         Get DNS query events from Suricata and Pi-hole.
@@ -153,26 +638,19 @@ class LokiLogReader:
         Args:
             start: Start time
             end: End time
-            limit: Maximum results
+            limit: Maximum results (default: reader max_entries)
             
         Returns:
             List of DNS query events
         """
-        # Query both Suricata DNS events and Pi-hole logs
-        suricata_query = '{service="suricata", event_type="dns"}'
-        pihole_query = '{service="pihole"}'
-        
-        # Combine queries with logical OR
-        combined_query = f'{suricata_query} or {pihole_query}'
-        
-        return self._query_range(combined_query, start, end, limit)
+        return list(self.stream_dns_queries(start, end, limit))
     
     def get_logs_by_device(
         self,
         device_ip: str,
         start: datetime,
         end: datetime,
-        limit: int = 5000
+        limit: Optional[int] = None
     ) -> Dict[str, List[Dict]]:
         """
         Get all logs for a specific device (by IP).
@@ -181,7 +659,7 @@ class LokiLogReader:
             device_ip: Device IP address
             start: Start time
             end: End time
-            limit: Maximum results per log type
+            limit: Maximum results per log type (default: reader max_entries)
             
         Returns:
             Dictionary with keys: flows, alerts, dns_queries
@@ -193,11 +671,11 @@ class LokiLogReader:
         }
         
         # Query flows for this device (as source)
-        flow_query = f'{{service="suricata", event_type="flow"}} |= "{device_ip}"'
+        flow_query = f'{self.FLOW_QUERY} |= "{device_ip}"'
         result["flows"] = self._query_range(flow_query, start, end, limit)
         
         # Query alerts for this device
-        alert_query = f'{{service="suricata", event_type="alert"}} |= "{device_ip}"'
+        alert_query = f'{self.ALERT_QUERY} |= "{device_ip}"'
         result["alerts"] = self._query_range(alert_query, start, end, limit)
         
         # Query DNS for this device
@@ -0,0 +1,560 @@
+"""
+Hot-swappable model registry.
+
+Pipelines score through a ManagedModel instead of a fixed ModelRunner. A
+background watcher polls the models directory; when a new ONNX or TFLite
+file for a model appears (for example after AutoTrainer retrains it), the
+file is loaded off the scoring path, validated on a canary batch of recent
+production features and swapped in atomically. Optionally the candidate
+first runs in shadow mode on the same feature matrices as the active
+model, recording score deltas and latency without affecting decisions.
+"""
+
+import atexit
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from orion_ai.config import get_config
+from orion_ai.model_runner import ModelRunner, SessionProfile, load_model
+
+logger = logging.getLogger(__name__)
+
+MODEL_SUFFIXES = (".onnx", ".tflite", ".tfl")
+
+# (path, size, mtime_ns) identifying one version of a model file
+ModelKey = Tuple[str, int, int]
+
+
+@dataclass
+class ShadowStats:
+    """
+    Comparison of a shadow candidate against the active model.
+    
+    Attributes:
+        batches: Feature matrices scored by both models
+        rows: Rows scored by both models
+        abs_delta_sum: Sum of |candidate - active| over all rows
+        max_abs_delta: Largest |candidate - active|
+        flips: Rows whose decision (score >= threshold) would change
+        active_seconds: Time the active model spent on these batches
+        candidate_seconds: Time the candidate spent on these batches
+    """
+    batches: int = 0
+    rows: int = 0
+    abs_delta_sum: float = 0.0
+    max_abs_delta: float = 0.0
+    flips: int = 0
+    active_seconds: float = 0.0
+    candidate_seconds: float = 0.0
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Summary for status reports."""
+        return {
+            "batches": self.batches,
+            "rows": self.rows,
+            "mean_abs_delta": round(self.abs_delta_sum / self.rows, 6) if self.rows else None,
+            "max_abs_delta": round(self.max_abs_delta, 6),
+            "flips": self.flips,
+            "active_ms_per_batch": round(1000 * self.active_seconds / self.batches, 2) if self.batches else None,
+            "candidate_ms_per_batch": round(1000 * self.candidate_seconds / self.batches, 2) if self.batches else None,
+        }
+
+
+@dataclass
+class _Entry:
+    """A loaded model version and the scoring calls currently using it."""
+    runner: Any
+    key: Optional[ModelKey]
+    loaded_at: datetime = field(default_factory=datetime.now)
+    users: int = 0
+    retired: bool = False
+
+
+def _scores(prediction: np.ndarray, rows: int) -> np.ndarray:
+    """First output column as 1D scores (as the pipelines read them)."""
+    return np.asarray(prediction).reshape(rows, -1)[:, 0].astype(np.float64)
+
+
+class ManagedModel:
+    """
+    A named model whose runner can be replaced while it is in use.
+    
+    predict() matches ModelRunner.predict, so pipelines use a ManagedModel
+    wherever they used a runner. A replaced runner is closed once the last
+    scoring call using it returns.
+    
+    Attributes:
+        name: Model name
+        path: Configured model path
+        threshold: Decision threshold, used to count shadow decision flips
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        path: Path,
+        profile: SessionProfile,
+        threshold: Optional[float] = None,
+        shadow_batches: int = 0,
+        canary_rows: int = 256,
+        settle_seconds: float = 5.0
+    ):
+        """
+        Initialize managed model and load the configured model file.
+        
+        Args:
+            name: Model name
+            path: Configured model path (dummy model if neither it nor a
+                versioned sibling exists)
+            profile: Session tuning for loaded runners
+            threshold: Decision threshold
+            shadow_batches: Batches a candidate is shadow-scored before it
+                is promoted (0 = promote as soon as it validates)
+            canary_rows: Rows of recent production features kept for
+                candidate validation
+            settle_seconds: Min age of a model file before it is loaded,
+                so files still being copied are skipped
+        """
+        self.name = name
+        self.path = Path(path)
+        self.profile = profile
+        self.threshold = threshold
+        self.shadow_batches = shadow_batches
+        self.canary_rows = canary_rows
+        self.settle_seconds = settle_seconds
+        
+        self._lock = threading.Lock()
+        self._canary: Optional[np.ndarray] = None
+        self._candidate: Optional[_Entry] = None
+        self._shadow = ShadowStats()
+        self._shadow_busy = False
+        self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"shadow-{name}")
+        self._rejected: Optional[ModelKey] = None
+        self.swaps = 0
+        
+        initial = self._latest_file() or self.path
+        key = self._key(initial) if initial.exists() else None
+        self._active = _Entry(load_model(initial, profile=profile), key)
+    
+    @property
+    def runner(self):
+        """Active runner."""
+        return self._active.runner
+    
+    def predict(self, features: np.ndarray, batch_size: Optional[int] = None) -> np.ndarray:
+        """
+        Score features with the active model (shadow-scoring a candidate).
+        
+        Args:
+            features: Input feature array
+            batch_size: Maximum rows per inference call
+        
+        Returns:
+            Active model output
+        """
+        if features.ndim == 1:
+            features = features.reshape(1, -1)
+        
+        entry = self._acquire()
+        try:
+            start = time.monotonic()
+            prediction = entry.runner.predict(features, batch_size=batch_size)
+            elapsed = time.monotonic() - start
+        finally:
+            self._release(entry)
+        
+        if len(features):
+            self._canary = np.array(features[:self.canary_rows], dtype=np.float32)
+        self._submit_shadow(features, prediction, elapsed, batch_size)
+        return prediction
+    
+    def predict_batch(self, features_list: List[np.ndarray]) -> np.ndarray:
+        """Score a list of feature vectors with the active model."""
+        return self.predict(np.vstack(features_list))
+    
+    def poll(self) -> Optional[str]:
+        """
+        Check for a new model file and load, validate and stage it.
+        
+        Returns:
+            "swapped", "shadow" or "rejected" if a new file was handled, else None
+        """
+        path = self._latest_file()
+        if path is None:
+            return None
+        
+        key = self._key(path)
+        candidate = self._candidate
+        if key in (self._active.key, self._rejected) or (candidate and candidate.key == key):
+            return None
+        if time.time() - key[2] / 1e9 < self.settle_seconds:
+            return None
+        
+        logger.info(f"New {self.name} model file {path.name}, loading in background")
+        try:
+            runner = ModelRunner(path, profile=self.profile)
+        except Exception as e:
+            logger.error(f"Rejected {self.name} model {path.name}: failed to load: {e}")
+            self._rejected = key
+            return "rejected"
+        
+        error = self._validate(runner)
+        if error:
+            logger.error(f"Rejected {self.name} model {path.name}: {error}")
+            self._rejected = key
+            runner.close()
+            return "rejected"
+        
+        entry = _Entry(runner, key)
+        if self.shadow_batches > 0 and isinstance(self._active.runner, ModelRunner):
+            with self._lock:
+                previous, self._candidate = self._candidate, entry
+                self._shadow = ShadowStats()
+            if previous is not None:
+                previous.runner.close()
+            logger.info(
+                f"Shadow-scoring {self.name} candidate {path.name} "
+                f"for {self.shadow_batches} batches"
+            )
+            return "shadow"
+        
+        self._swap(entry)
+        return "swapped"
+    
+    def status(self) -> Dict[str, Any]:
+        """Get active model, candidate and shadow statistics."""
+        active, candidate = self._active, self._candidate
+        return {
+            "name": self.name,
+            "active": Path(active.key[0]).name if active.key else None,
+            "active_loaded_at": active.loaded_at.isoformat(),
+            "dummy": not isinstance(active.runner, ModelRunner),
+            "swaps": self.swaps,
+            "candidate": Path(candidate.key[0]).name if candidate else None,
+            "shadow": self._shadow.to_dict() if candidate or self._shadow.batches else None,
+            "rejected": Path(self._rejected[0]).name if self._rejected else None,
+        }
+    
+    def close(self) -> None:
+        """Stop shadow scoring and release the loaded runners."""
+        self._shadow_executor.shutdown(wait=True)
+        with self._lock:
+            entries = [self._active] + ([self._candidate] if self._candidate else [])
+            self._candidate = None
+        for entry in entries:
+            entry.runner.close()
+    
+    def _latest_file(self) -> Optional[Path]:
+        """
+        Newest model file for this model in the models directory.
+        
+        Matches the configured file name with any model suffix, plus
+        versioned drops named "<stem>-<version>.<suffix>".
+        """
+        directory = self.path.parent
+        if not directory.is_dir():
+            return None
+        
+        stem = self.path.stem
+        files = [
+            f for f in directory.iterdir()
+            if f.suffix.lower() in MODEL_SUFFIXES
+            and (f.stem == stem or f.stem.startswith(f"{stem}-"))
+            and f.is_file()
+        ]
+        return max(files, key=lambda f: f.stat().st_mtime_ns, default=None)
+    
+    @staticmethod
+    def _key(path: Path) -> ModelKey:
+        """Identity of one version of a model file."""
+        stat = path.stat()
+        return (str(path), stat.st_size, stat.st_mtime_ns)
+    
+    def _validate(self, runner: ModelRunner) -> Optional[str]:
+        """
+        Run a candidate on the canary batch.
+        
+        Uses the latest production features, or zeros of the model's input
+        width if nothing has been scored yet.
+        
+        Returns:
+            Reason for rejection, or None if the candidate is usable
+        """
+        canary = self._canary
+        if canary is None:
+            width = runner.input_shape[1] if len(runner.input_shape) == 2 else None
+            if not isinstance(width, (int, np.integer)):
+                return None
+            canary = np.zeros((min(self.canary_rows, 16), int(width)), dtype=np.float32)
+        
+        try:
+            scores = _scores(runner.predict(canary), len(canary))
+        except Exception as e:
+            return f"canary batch failed: {e}"
+        if not np.all(np.isfinite(scores)):
+            return "canary batch produced non-finite scores"
+        return None
+    
+    def _acquire(self) -> _Entry:
+        """Mark the active entry as in use."""
+        with self._lock:
+            entry = self._active
+            entry.users += 1
+            return entry
+    
+    def _release(self, entry: _Entry) -> None:
+        """Release an entry, closing it if it was retired meanwhile."""
+        with self._lock:
+            entry.users -= 1
+            close = entry.retired and entry.users == 0
+        if close:
+            entry.runner.close()
+    
+    def _swap(self, entry: _Entry) -> None:
+        """Make entry the active model."""
+        with self._lock:
+            old, self._active = self._active, entry
+            old.retired = True
+            close = old.users == 0
+            self.swaps += 1
+        if close:
+            old.runner.close()
+        logger.info(f"Swapped {self.name} model to {Path(entry.key[0]).name}")
+    
+    def _submit_shadow(
+        self,
+        features: np.ndarray,
+        prediction: np.ndarray,
+        active_seconds: float,
+        batch_size: Optional[int]
+    ) -> None:
+        """Hand one scored matrix to the shadow worker unless it is busy."""
+        with self._lock:
+            candidate = self._candidate
+            if candidate is None or self._shadow_busy:
+                return
+            self._shadow_busy = True
+        
+        try:
+            self._shadow_executor.submit(
+                self._run_shadow, candidate, features, prediction, active_seconds, batch_size
+            )
+        except RuntimeError:
+            # Closed
+            self._shadow_busy = False
+    
+    def _run_shadow(
+        self,
+        candidate: _Entry,
+        features: np.ndarray,
+        prediction: np.ndarray,
+        active_seconds: float,
+        batch_size: Optional[int]
+    ) -> None:
+        """Score one matrix with the candidate and compare it with the active model."""
+        try:
+            rows = len(features)
+            start = time.monotonic()
+            try:
+                candidate_scores = _scores(candidate.runner.predict(features, batch_size=batch_size), rows)
+            except Exception as e:
+                logger.error(f"Dropping {self.name} candidate: shadow scoring failed: {e}")
+                self._drop_candidate(candidate, reject=True)
+                return
+            candidate_seconds = time.monotonic() - start
+            
+            active_scores = _scores(prediction, rows)
+            delta = np.abs(candidate_scores - active_scores)
+            
+            with self._lock:
+                if self._candidate is not candidate:
+                    return
+                stats = self._shadow
+                stats.batches += 1
+                stats.rows += rows
+                stats.abs_delta_sum += float(delta.sum())
+                stats.max_abs_delta = max(stats.max_abs_delta, float(delta.max(initial=0.0)))
+                if self.threshold is not None:
+                    stats.flips += int(np.count_nonzero(
+                        (candidate_scores >= self.threshold) != (active_scores >= self.threshold)
+                    ))
+                stats.active_seconds += active_seconds
+                stats.candidate_seconds += candidate_seconds
+                promote = stats.batches >= self.shadow_batches
+                if promote:
+                    self._candidate = None
+            
+            if promote:
+                logger.info(f"Promoting {self.name} candidate after shadow run: {stats.to_dict()}")
+                self._swap(candidate)
+        finally:
+            self._shadow_busy = False
+    
+    def _drop_candidate(self, candidate: _Entry, reject: bool = False) -> None:
+        """Discard a shadow candidate."""
+        with self._lock:
+            if self._candidate is candidate:
+                self._candidate = None
+        if reject:
+            self._rejected = candidate.key
+        candidate.runner.close()
+
+
+class ModelRegistry:
+    """
+    Named managed models plus a watcher polling their model files.
+    
+    Attributes:
+        profile: Session tuning for loaded runners
+        watch_interval: Seconds between model directory polls
+    """
+    
+    def __init__(
+        self,
+        profile: Optional[SessionProfile] = None,
+        watch_interval: float = 30.0,
+        shadow_batches: int = 0,
+        canary_rows: int = 256
+    ):
+        """
+        Initialize model registry.
+        
+        Args:
+            profile: Session tuning for loaded runners
+            watch_interval: Seconds between model directory polls
+            shadow_batches: Batches a candidate is shadow-scored before
+                promotion (0 = promote once validated)
+            canary_rows: Rows of recent features kept for validation
+        """
+        self.profile = profile or SessionProfile()
+        self.watch_interval = watch_interval
+        self.shadow_batches = shadow_batches
+        self.canary_rows = canary_rows
+        self._models: Dict[str, ManagedModel] = {}
+        self._lock = threading.Lock()
+        self._stop: Optional[threading.Event] = None
+    
+    def model(self, name: str, path: str, threshold: Optional[float] = None) -> ManagedModel:
+        """
+        Get a managed model, loading it on first use.
+        
+        Args:
+            name: Model name
+            path: Configured model path
+            threshold: Decision threshold (for shadow decision flips)
+        
+        Returns:
+            ManagedModel
+        """
+        with self._lock:
+            managed = self._models.get(name)
+            if managed is None or managed.path != Path(path):
+                if managed is not None:
+                    managed.close()
+                managed = ManagedModel(
+                    name,
+                    Path(path),
+                    self.profile,
+                    threshold=threshold,
+                    shadow_batches=self.shadow_batches,
+                    canary_rows=self.canary_rows
+                )
+                self._models[name] = managed
+            return managed
+    
+    def poll(self) -> Dict[str, str]:
+        """
+        Check all models for new files once.
+        
+        Returns:
+            {model name: outcome} for models with a new file
+        """
+        with self._lock:
+            models = list(self._models.values())
+        
+        outcomes = {}
+        for managed in models:
+            try:
+                outcome = managed.poll()
+            except Exception as e:
+                logger.error(f"Model poll failed for {managed.name}: {e}", exc_info=True)
+                continue
+            if outcome:
+                outcomes[managed.name] = outcome
+        return outcomes
+    
+    def status(self) -> List[Dict[str, Any]]:
+        """Get status of all models."""
+        with self._lock:
+            models = list(self._models.values())
+        return [managed.status() for managed in models]
+    
+    def start(self) -> None:
+        """Start polling every watch_interval seconds (0 disables watching)."""
+        if self.watch_interval <= 0 or self._stop is not None:
+            return
+        
+        self._stop = threading.Event()
+        threading.Thread(
+            target=self._run,
+            args=(self._stop,),
+            name="model-watcher",
+            daemon=True
+        ).start()
+        logger.info(f"Watching model files every {self.watch_interval}s")
+    
+    def stop(self) -> None:
+        """Stop the watcher."""
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+    
+    def close(self) -> None:
+        """Stop the watcher and release all models."""
+        self.stop()
+        with self._lock:
+            models = list(self._models.values())
+            self._models.clear()
+        for managed in models:
+            managed.close()
+    
+    def _run(self, stop: threading.Event) -> None:
+        """Watcher loop."""
+        while not stop.wait(self.watch_interval):
+            self.poll()
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """
+    Get the process-wide model registry, creating it on first use.
+    
+    The watcher starts with the registry unless MODEL_WATCH_INTERVAL is 0.
+    
+    Returns:
+        ModelRegistry
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            config = get_config().model
+            _registry = ModelRegistry(
+                profile=SessionProfile.from_config(config),
+                watch_interval=config.model_watch_interval,
+                shadow_batches=config.model_shadow_batches,
+                canary_rows=config.model_canary_rows
+            )
+            _registry.start()
+            atexit.register(_registry.close)
+        return _registry
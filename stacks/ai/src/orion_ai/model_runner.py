@@ -4,10 +4,15 @@ Model runner for ML inference.
 Loads and runs ONNX or TFLite models for anomaly detection and risk scoring.
 """
 
+import hashlib
 import logging
 import os
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Union
+from typing import Any, Dict, Optional, Union
 import numpy as np
 
 logger = logging.getLogger(__name__)
@@ -29,20 +34,125 @@ except ImportError:
     logger.warning("tflite_runtime not available. TFLite models cannot be loaded.")
 
 
+@dataclass
+class SessionProfile:
+    """
+    Inference session tuning for ONNX Runtime and TFLite.
+    
+    The defaults match a bare InferenceSession and a single TFLite
+    interpreter. On small ARM boxes that also run Suricata, pinning
+    intra_op_threads below the core count and turning allow_spinning off
+    stops idle inference threads from busy-waiting on cores the IDS needs.
+    
+    Attributes:
+        intra_op_threads: Threads within an operator (0 = one per core)
+        inter_op_threads: Threads across operators in parallel mode (0 = default)
+        execution_mode: "sequential" or "parallel"
+        graph_optimization: "disable", "basic", "extended" or "all"
+        allow_spinning: Let idle threads busy-wait for work
+        mem_arena: Use the CPU memory arena
+        mem_pattern: Pre-plan memory from the first run's allocation pattern
+        optimized_model_dir: Directory caching optimized graphs between
+            restarts (None = optimize on every load)
+        warmup_rows: Rows in the synthetic warm-up batch (0 = no warm-up)
+        tflite_threads: Threads per TFLite interpreter (0 = runtime default)
+        tflite_pool_size: TFLite interpreters running chunks in parallel
+        tflite_max_batch: Max rows per TFLite invocation for models with a
+            dynamic batch dimension
+    """
+    intra_op_threads: int = 0
+    inter_op_threads: int = 0
+    execution_mode: str = "sequential"
+    graph_optimization: str = "all"
+    allow_spinning: bool = True
+    mem_arena: bool = True
+    mem_pattern: bool = True
+    optimized_model_dir: Optional[str] = None
+    warmup_rows: int = 0
+    tflite_threads: int = 0
+    tflite_pool_size: int = 1
+    tflite_max_batch: int = 4096
+    
+    @classmethod
+    def from_config(cls, config) -> 'SessionProfile':
+        """Build a session profile from model configuration."""
+        return cls(
+            intra_op_threads=config.onnx_intra_op_threads,
+            inter_op_threads=config.onnx_inter_op_threads,
+            execution_mode=config.onnx_execution_mode,
+            graph_optimization=config.onnx_graph_optimization,
+            allow_spinning=config.onnx_allow_spinning,
+            mem_arena=config.onnx_mem_arena,
+            mem_pattern=config.onnx_mem_pattern,
+            optimized_model_dir=config.onnx_optimized_model_dir,
+            warmup_rows=config.model_warmup_rows,
+            tflite_threads=config.tflite_num_threads,
+            tflite_pool_size=config.tflite_pool_size,
+            tflite_max_batch=config.inference_batch_size,
+        )
+    
+    def session_options(self, graph_optimization: Optional[str] = None) -> "ort.SessionOptions":
+        """
+        Build ONNX Runtime session options.
+        
+        Args:
+            graph_optimization: Override of the optimization level
+        
+        Returns:
+            SessionOptions
+        """
+        levels = {
+            "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+            "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+            "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+            "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+        }
+        
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.intra_op_threads
+        options.inter_op_num_threads = self.inter_op_threads
+        options.execution_mode = (
+            ort.ExecutionMode.ORT_PARALLEL if self.execution_mode == "parallel"
+            else ort.ExecutionMode.ORT_SEQUENTIAL
+        )
+        options.graph_optimization_level = levels[graph_optimization or self.graph_optimization]
+        options.enable_cpu_mem_arena = self.mem_arena
+        options.enable_mem_pattern = self.mem_pattern
+        spinning = "1" if self.allow_spinning else "0"
+        options.add_session_config_entry("session.intra_op.allow_spinning", spinning)
+        options.add_session_config_entry("session.inter_op.allow_spinning", spinning)
+        return options
+
+
 class ModelRunner:
     """
     ML model runner supporting ONNX and TFLite formats.
     
     Handles model loading, input preprocessing, inference, and output postprocessing.
+    
+    Attributes:
+        profile: ONNX Runtime session tuning
+        load_seconds: Seconds spent creating the session or interpreter
+        warmup_seconds: Seconds spent on the warm-up batch
+        optimized_cache_hit: Whether the session loaded a cached optimized graph
     """
     
-    def __init__(self, model_path: Union[str, Path], model_format: Optional[str] = None):
+    def __init__(
+        self,
+        model_path: Union[str, Path],
+        model_format: Optional[str] = None,
+        profile: Optional[SessionProfile] = None,
+        input_width: Optional[int] = None
+    ):
         """
         Initialize model runner.
         
         Args:
             model_path: Path to model file
             model_format: Model format ('onnx' or 'tflite'). Auto-detected if None.
+            profile: ONNX Runtime session tuning (default: runtime defaults)
+            input_width: Feature count for the warm-up batch, used when the
+                model input has no fixed width
             
         Raises:
             FileNotFoundError: If model file doesn't exist
@@ -70,17 +180,41 @@ class ModelRunner:
         self.model = None
         self.session = None
         self.interpreter = None
+        self.input_shape: list = []
+        self.profile = profile or SessionProfile()
+        self.input_width = input_width
+        self.load_seconds = 0.0
+        self.warmup_seconds = 0.0
+        self.optimized_cache_hit = False
         
         logger.info(f"Loading {self.model_format.upper()} model from {model_path}")
         
+        start = time.monotonic()
         if self.model_format == "onnx":
             self._load_onnx()
         elif self.model_format == "tflite":
             self._load_tflite()
         else:
             raise ValueError(f"Unsupported model format: {model_format}")
+        self.load_seconds = time.monotonic() - start
+        
+        self._warm_up()
         
-        logger.info(f"Successfully loaded model: {self.model_path.name}")
+        logger.info(
+            f"Successfully loaded model: {self.model_path.name} "
+            f"(load {self.load_seconds:.3f}s, warm-up {self.warmup_seconds:.3f}s"
+            + (", cached optimized graph" if self.optimized_cache_hit else "")
+            + ")"
+        )
+    
+    @property
+    def timings(self) -> Dict[str, Any]:
+        """Load and warm-up timings."""
+        return {
+            "load_seconds": round(self.load_seconds, 4),
+            "warmup_seconds": round(self.warmup_seconds, 4),
+            "optimized_cache_hit": self.optimized_cache_hit,
+        }
     
     def _load_onnx(self):
         """Load ONNX model."""
@@ -91,10 +225,36 @@ class ModelRunner:
         # Use CPUExecutionProvider for compatibility (AI Hat support may require custom provider)
         providers = ["CPUExecutionProvider"]
         
-        self.session = ort.InferenceSession(
-            str(self.model_path),
-            providers=providers
-        )
+        cache_path = self._optimized_cache_path()
+        if cache_path is not None and cache_path.exists():
+            try:
+                # Already optimized: skip graph optimization entirely
+                self.session = ort.InferenceSession(
+                    str(cache_path),
+                    sess_options=self.profile.session_options("disable"),
+                    providers=providers
+                )
+                self.optimized_cache_hit = True
+                logger.info(f"Using cached optimized graph {cache_path.name}")
+            except Exception as e:
+                logger.warning(f"Ignoring unreadable optimized graph {cache_path}: {e}")
+                cache_path.unlink(missing_ok=True)
+        
+        if self.session is None:
+            options = self.profile.session_options()
+            tmp_path = None
+            if cache_path is not None:
+                tmp_path = cache_path.with_name(cache_path.name + f".{os.getpid()}.tmp")
+                options.optimized_model_filepath = str(tmp_path)
+            
+            self.session = ort.InferenceSession(
+                str(self.model_path),
+                sess_options=options,
+                providers=providers
+            )
+            
+            if tmp_path is not None:
+                self._store_optimized(tmp_path, cache_path)
         
         # Get input/output metadata
         self.input_name = self.session.get_inputs()[0].name
@@ -102,17 +262,91 @@ class ModelRunner:
         
         input_shape = self.session.get_inputs()[0].shape
         output_shape = self.session.get_outputs()[0].shape
+        self.input_shape = list(input_shape)
         
         logger.info(f"ONNX model input: {self.input_name}, shape: {input_shape}")
         logger.info(f"ONNX model output: {self.output_name}, shape: {output_shape}")
     
+    def _optimized_cache_path(self) -> Optional[Path]:
+        """
+        Path of the cached optimized graph for this model and profile.
+        
+        The name encodes the model file's size and mtime, the optimization
+        level and the runtime version, so a retrained model or an upgraded
+        runtime never picks up a stale graph.
+        
+        Returns:
+            Cache path, or None if caching is off or pointless
+        """
+        if not self.profile.optimized_model_dir or self.profile.graph_optimization == "disable":
+            return None
+        
+        stat = self.model_path.stat()
+        key = hashlib.sha1(
+            f"{stat.st_size}:{stat.st_mtime_ns}:{self.profile.graph_optimization}:{ort.__version__}".encode()
+        ).hexdigest()[:12]
+        return Path(self.profile.optimized_model_dir) / f"{self.model_path.stem}.{key}.opt.onnx"
+    
+    def _store_optimized(self, tmp_path: Path, cache_path: Path):
+        """Move a freshly written optimized graph into the cache, dropping older ones."""
+        if not tmp_path.exists():
+            logger.warning(f"ONNX Runtime did not write an optimized graph for {self.model_path.name}")
+            return
+        
+        try:
+            os.replace(tmp_path, cache_path)
+            for stale in cache_path.parent.glob(f"{self.model_path.stem}.*.opt.onnx"):
+                if stale != cache_path:
+                    stale.unlink(missing_ok=True)
+            logger.info(f"Cached optimized graph at {cache_path}")
+        except OSError as e:
+            logger.warning(f"Failed to cache optimized graph at {cache_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+    
+    def _warm_up(self):
+        """
+        Run one synthetic batch so lazy initialization and arena growth
+        happen at load time rather than on the first real batch.
+        """
+        rows = self.profile.warmup_rows
+        if rows <= 0:
+            return
+        
+        width = self.input_width
+        fixed = [
+            int(dim) if isinstance(dim, (int, np.integer)) and dim > 0 else None
+            for dim in self.input_shape
+        ]
+        if len(fixed) == 2:
+            rows = fixed[0] or rows
+            width = fixed[1] or width
+        
+        if not width:
+            logger.warning(
+                f"Skipping warm-up of {self.model_path.name}: input width unknown"
+            )
+            return
+        
+        start = time.monotonic()
+        try:
+            self.predict(np.zeros((rows, width), dtype=np.float32))
+        except Exception as e:
+            logger.warning(f"Warm-up of {self.model_path.name} failed: {e}")
+        self.warmup_seconds = time.monotonic() - start
+    
     def _load_tflite(self):
-        """Load TFLite model."""
+        """
+        Load TFLite model.
+        
+        Models whose input signature has a dynamic batch dimension are
+        resized to run a whole chunk per invocation; models with a fixed
+        batch dimension run in chunks of that size.
+        """
         if not TFLITE_AVAILABLE:
             raise ValueError("tflite_runtime is not installed. Cannot load TFLite model.")
         
         # Create TFLite interpreter
-        self.interpreter = tflite.Interpreter(model_path=str(self.model_path))
+        self.interpreter = self._new_interpreter()
         self.interpreter.allocate_tensors()
         
         # Get input/output details
@@ -122,10 +356,72 @@ class ModelRunner:
         self.input_index = input_details["index"]
         self.output_index = output_details["index"]
         
-        logger.info(f"TFLite model input shape: {input_details['shape']}")
+        shape = [int(dim) for dim in input_details["shape"]]
+        signature = [int(dim) for dim in input_details.get("shape_signature", shape)]
+        self.input_shape = [dim if dim > 0 else None for dim in signature]
+        self._tflite_row_shape = shape[1:]
+        self._tflite_output_row_shape = [int(dim) for dim in output_details["shape"]][1:]
+        self.tflite_dynamic_batch = bool(signature) and signature[0] == -1
+        
+        allocated_batch = shape[0] if shape else 1
+        if self.tflite_dynamic_batch:
+            self._tflite_chunk = max(self.profile.tflite_max_batch, 1)
+        else:
+            self._tflite_chunk = max(allocated_batch, 1)
+        
+        # Each pool slot holds one allocated interpreter per batch bucket, so
+        # resize_tensor_input and allocate_tensors run once per bucket
+        pool_size = max(self.profile.tflite_pool_size, 1)
+        self._tflite_slots: "queue.Queue[Dict[int, Any]]" = queue.Queue()
+        self._tflite_slots.put({allocated_batch: self.interpreter})
+        for _ in range(pool_size - 1):
+            self._tflite_slots.put({})
+        self._tflite_executor = (
+            ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="tflite")
+            if pool_size > 1 else None
+        )
+        
+        logger.info(f"TFLite model input shape: {input_details['shape']} (signature {signature})")
         logger.info(f"TFLite model output shape: {output_details['shape']}")
+        logger.info(
+            "TFLite batching: "
+            + (f"dynamic, up to {self._tflite_chunk} rows" if self.tflite_dynamic_batch
+               else f"fixed chunks of {self._tflite_chunk} rows")
+            + f", {pool_size} interpreter(s)"
+        )
+    
+    def _new_interpreter(self) -> "tflite.Interpreter":
+        """Create a TFLite interpreter for the model."""
+        return tflite.Interpreter(
+            model_path=str(self.model_path),
+            num_threads=self.profile.tflite_threads or None
+        )
+    
+    def _tflite_bucket(self, rows: int) -> int:
+        """Batch size allocated for a chunk of rows: the next power of two, or the fixed batch."""
+        if not self.tflite_dynamic_batch:
+            return self._tflite_chunk
+        return min(1 << max(rows - 1, 0).bit_length(), self._tflite_chunk)
+    
+    def _tflite_interpreter(self, slot: Dict[int, Any], bucket: int) -> "tflite.Interpreter":
+        """Get a slot's interpreter for a batch bucket, allocating it on first use."""
+        interpreter = slot.get(bucket)
+        if interpreter is None:
+            interpreter = self._new_interpreter()
+            interpreter.resize_tensor_input(self.input_index, [bucket] + self._tflite_row_shape)
+            interpreter.allocate_tensors()
+            slot[bucket] = interpreter
+            logger.debug(f"Allocated TFLite interpreter for batch {bucket}")
+        return interpreter
     
-    def predict(self, features: np.ndarray) -> np.ndarray:
+    def close(self):
+        """Release inference worker threads."""
+        executor = getattr(self, "_tflite_executor", None)
+        if executor is not None:
+            executor.shutdown(wait=True)
+            self._tflite_executor = None
+    
+    def predict(self, features: np.ndarray, batch_size: Optional[int] = None) -> np.ndarray:
         """
         Run inference on a single feature vector or batch.
         
@@ -133,6 +429,7 @@ class ModelRunner:
             features: Input feature array
                 - Shape: (num_features,) for single sample
                 - Shape: (batch_size, num_features) for batch
+            batch_size: Maximum rows per inference call (default: all rows at once)
                 
         Returns:
             Model output (scores/predictions)
@@ -145,6 +442,13 @@ class ModelRunner:
         # Ensure float32 dtype
         features = features.astype(np.float32)
         
+        # Split large inputs into chunks of at most batch_size rows
+        if batch_size and features.shape[0] > batch_size:
+            return np.concatenate([
+                self.predict(features[i:i + batch_size])
+                for i in range(0, features.shape[0], batch_size)
+            ])
+        
         if self.model_format == "onnx":
             return self._predict_onnx(features)
         elif self.model_format == "tflite":
@@ -161,19 +465,40 @@ class ModelRunner:
         return outputs[0]
     
     def _predict_tflite(self, features: np.ndarray) -> np.ndarray:
-        """Run TFLite inference."""
-        # TFLite typically processes one sample at a time
-        # For batch processing, iterate over samples
-        results = []
-        
-        for i in range(features.shape[0]):
-            sample = features[i:i+1, :]
-            self.interpreter.set_tensor(self.input_index, sample)
-            self.interpreter.invoke()
-            output = self.interpreter.get_tensor(self.output_index)
-            results.append(output[0])
-        
-        return np.array(results)
+        """Run TFLite inference, one interpreter invocation per chunk."""
+        rows = features.shape[0]
+        if rows == 0:
+            return np.empty([0] + self._tflite_output_row_shape, dtype=np.float32)
+        
+        size = self._tflite_chunk
+        if self.tflite_dynamic_batch and self._tflite_executor is not None:
+            # Spread one batch over the pool
+            size = min(size, -(-rows // self.profile.tflite_pool_size))
+        chunks = [features[i:i + size] for i in range(0, rows, size)]
+        
+        if self._tflite_executor is not None and len(chunks) > 1:
+            outputs = list(self._tflite_executor.map(self._invoke_tflite, chunks))
+        else:
+            outputs = [self._invoke_tflite(chunk) for chunk in chunks]
+        return np.concatenate(outputs)
+    
+    def _invoke_tflite(self, chunk: np.ndarray) -> np.ndarray:
+        """Run one chunk, zero-padded up to its batch bucket."""
+        rows = chunk.shape[0]
+        bucket = self._tflite_bucket(rows)
+        if rows < bucket:
+            padding = np.zeros((bucket - rows,) + chunk.shape[1:], dtype=chunk.dtype)
+            chunk = np.concatenate([chunk, padding])
+        
+        slot = self._tflite_slots.get()
+        try:
+            interpreter = self._tflite_interpreter(slot, bucket)
+            interpreter.set_tensor(self.input_index, chunk)
+            interpreter.invoke()
+            output = interpreter.get_tensor(self.output_index)
+        finally:
+            self._tflite_slots.put(slot)
+        return output[:rows]
     
     def predict_batch(self, features_list: list[np.ndarray]) -> np.ndarray:
         """
@@ -210,12 +535,13 @@ class DummyModelRunner:
             "This is for testing only and returns random scores!"
         )
     
-    def predict(self, features: np.ndarray) -> np.ndarray:
+    def predict(self, features: np.ndarray, batch_size: Optional[int] = None) -> np.ndarray:
         """
         Return random scores.
         
         Args:
             features: Input features (shape: (batch_size, num_features))
+            batch_size: Ignored (accepted for ModelRunner compatibility)
             
         Returns:
             Random scores (shape: (batch_size, 1))
@@ -235,15 +561,26 @@ class DummyModelRunner:
         """Return random scores for batch."""
         features_batch = np.vstack(features_list)
         return self.predict(features_batch)
+    
+    def close(self):
+        """Nothing to release (accepted for ModelRunner compatibility)."""
 
 
-def load_model(model_path: Union[str, Path], use_dummy: bool = False) -> Union[ModelRunner, DummyModelRunner]:
+def load_model(
+    model_path: Union[str, Path],
+    use_dummy: bool = False,
+    profile: Optional[SessionProfile] = None,
+    input_width: Optional[int] = None
+) -> Union[ModelRunner, DummyModelRunner]:
     """
     Load a model with automatic fallback to dummy model.
     
     Args:
         model_path: Path to model file
         use_dummy: Force use of dummy model (for testing)
+        profile: ONNX Runtime session tuning
+        input_width: Feature count for the warm-up batch if the model
+            input has no fixed width
         
     Returns:
         ModelRunner or DummyModelRunner
@@ -259,7 +596,7 @@ def load_model(model_path: Union[str, Path], use_dummy: bool = False) -> Union[M
         return DummyModelRunner(model_path)
     
     try:
-        return ModelRunner(model_path)
+        return ModelRunner(model_path, profile=profile, input_width=input_width)
     except Exception as e:
         logger.error(f"Failed to load model {model_path}: {e}")
         logger.warning("Falling back to dummy model (random scores)")
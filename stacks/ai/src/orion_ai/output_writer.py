@@ -2,24 +2,287 @@
 Output writer for AI detection results.
 
 Writes detection results as structured JSON logs for Promtail/Loki ingestion.
+Each log file keeps one open handle per process; lines are buffered and
+flushed by a background thread, and files are rotated by size and age
+(rotated files are renamed out of Promtail's *.json glob and gzipped).
 """
 
+import atexit
+import gzip
 import json
 import logging
+import os
+import shutil
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+
+import numpy as np
 
 from orion_ai.config import get_config
 
 logger = logging.getLogger(__name__)
 
+# Prefer a fast JSON encoder when one is installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+SEVERITY_LEVELS = {"info": 0, "warning": 1, "critical": 2}
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize values the JSON encoder does not handle natively."""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    return str(value)
+
+
+def _dumps(data: Dict[str, Any]) -> bytes:
+    """Encode one result as a JSON line."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            data,
+            default=_json_default,
+            option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return (json.dumps(data, default=_json_default) + "\n").encode("utf-8")
+
+
+class RotatingJsonLog:
+    """
+    Buffered, rotating JSON-lines file.
+    
+    Lines are collected in memory and written with one append per flush,
+    so a reader never sees a partial line. When the file reaches max_bytes
+    or has been open for rotate_seconds, it is renamed to
+    <name>.<YYYYmmdd-HHMMSS-ffffff> (gzipped in the background if compress is
+    set) and a new file is started; Promtail follows the new file.
+    
+    Thread-safe; use get_log() to share one instance per path.
+    """
+    
+    def __init__(
+        self,
+        path: Path,
+        buffer_size: int = 65536,
+        max_bytes: int = 0,
+        rotate_seconds: float = 0,
+        backup_count: int = 5,
+        compress: bool = True
+    ):
+        """
+        Open (or create) the log file.
+        
+        Args:
+            path: Log file path
+            buffer_size: Bytes buffered before writing (0 = write each line)
+            max_bytes: Size that triggers rotation (0 = never)
+            rotate_seconds: Age that triggers rotation (0 = never)
+            backup_count: Rotated files kept
+            compress: Gzip rotated files
+        """
+        self.path = Path(path)
+        self.buffer_size = buffer_size
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self.compress = compress
+        
+        self._lock = threading.Lock()
+        self._lines: List[bytes] = []
+        self._buffered = 0
+        self._open()
+    
+    def _open(self) -> None:
+        """Open the log file for appending."""
+        self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._size = os.fstat(self._fd).st_size
+        self._opened_at = time.monotonic()
+    
+    def write(self, line: bytes) -> None:
+        """
+        Buffer one encoded line (must end with a newline).
+        
+        Args:
+            line: Encoded JSON line
+        
+        Raises:
+            ValueError: If the log is closed
+        """
+        with self._lock:
+            if self._fd < 0:
+                raise ValueError(f"Write to closed log {self.path}")
+            self._lines.append(line)
+            self._buffered += len(line)
+            if self._buffered >= self.buffer_size:
+                self._flush_locked()
+    
+    def flush(self) -> None:
+        """Write buffered lines and rotate if due."""
+        with self._lock:
+            self._flush_locked()
+    
+    def close(self) -> None:
+        """Flush and close the file (closing again does nothing)."""
+        with self._lock:
+            if self._fd < 0:
+                return
+            self._flush_locked()
+            os.close(self._fd)
+            self._fd = -1
+    
+    def _flush_locked(self) -> None:
+        """Write buffered lines; caller holds the lock."""
+        if self._fd < 0:
+            return
+        
+        if self._lines:
+            data = b"".join(self._lines)
+            self._lines = []
+            self._buffered = 0
+            os.write(self._fd, data)
+            self._size += len(data)
+        
+        if self._rotation_due():
+            self._rotate_locked()
+    
+    def _rotation_due(self) -> bool:
+        """Check size and age limits."""
+        if self._size == 0:
+            return False
+        if self.max_bytes and self._size >= self.max_bytes:
+            return True
+        return bool(self.rotate_seconds) and time.monotonic() - self._opened_at >= self.rotate_seconds
+    
+    def _rotate_locked(self) -> None:
+        """Rename the current file aside and start a new one; caller holds the lock."""
+        os.close(self._fd)
+        
+        # Timestamped names sort in rotation order
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        rotated = self.path.with_name(f"{self.path.name}.{stamp}")
+        
+        os.rename(self.path, rotated)
+        self._open()
+        logger.info(f"Rotated {self.path} to {rotated.name}")
+        
+        # Compress and prune off the write path
+        threading.Thread(
+            target=self._finish_rotation,
+            args=(rotated,),
+            name="output-rotate",
+            daemon=True
+        ).start()
+    
+    def _finish_rotation(self, rotated: Path) -> None:
+        """Gzip a rotated file and remove backups beyond backup_count."""
+        try:
+            if self.compress:
+                with rotated.open("rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                rotated.unlink()
+            
+            backups = sorted(self.path.parent.glob(f"{self.path.name}.*"))
+            for old in backups[:max(len(backups) - self.backup_count, 0)]:
+                old.unlink()
+        except Exception as e:
+            logger.error(f"Failed to finish rotation of {rotated}: {e}")
+
+
+# Process-wide logs by path, shared by all OutputWriter instances
+_logs: Dict[Path, RotatingJsonLog] = {}
+_logs_lock = threading.Lock()
+_flusher: Optional[threading.Thread] = None
+
+
+def _flush_loop(interval: float) -> None:
+    """Flush all logs every interval seconds."""
+    while True:
+        time.sleep(interval)
+        flush_all()
+
+
+def flush_all() -> None:
+    """Write all buffered result lines."""
+    with _logs_lock:
+        logs = list(_logs.values())
+    for log in logs:
+        try:
+            log.flush()
+        except Exception as e:
+            logger.error(f"Failed to flush {log.path}: {e}")
+
+
+def close_all() -> None:
+    """Flush and close all result logs."""
+    with _logs_lock:
+        logs = list(_logs.values())
+        _logs.clear()
+    for log in logs:
+        try:
+            log.close()
+        except Exception as e:
+            logger.error(f"Failed to close {log.path}: {e}")
+
+
+def get_log(path: Path) -> RotatingJsonLog:
+    """
+    Get the shared log for a path, opening it on first use.
+    
+    Starts the background flush thread on first call and closes all logs
+    at interpreter exit.
+    
+    Args:
+        path: Log file path
+    
+    Returns:
+        RotatingJsonLog
+    """
+    global _flusher
+    config = get_config().output
+    path = Path(path).resolve()
+    
+    with _logs_lock:
+        log = _logs.get(path)
+        if log is None:
+            log = _logs[path] = RotatingJsonLog(
+                path,
+                buffer_size=config.buffer_size,
+                max_bytes=config.max_bytes,
+                rotate_seconds=config.rotate_hours * 3600,
+                backup_count=config.backup_count,
+                compress=config.compress
+            )
+        
+        if _flusher is None:
+            _flusher = threading.Thread(
+                target=_flush_loop,
+                args=(config.flush_interval,),
+                name="output-flush",
+                daemon=True
+            )
+            _flusher.start()
+            atexit.register(close_all)
+    
+    return log
+
 
 class OutputWriter:
     """
     Writes AI detection results as JSON logs.
     
     Results are written to files that Promtail can tail and ship to Loki.
+    In compact mode, results below the severity cutoff are written without
+    their feature payload.
     """
     
     def __init__(self, output_dir: Optional[str] = None):
@@ -38,8 +301,23 @@ class OutputWriter:
         # Separate files for different log types
         self.device_anomaly_file = self.output_dir / "device_anomaly.json"
         self.domain_risk_file = self.output_dir / "domain_risk.json"
+        self._logs = {
+            filepath: get_log(filepath)
+            for filepath in (self.device_anomaly_file, self.domain_risk_file)
+        }
+        
+        self.compact = config.output.compact
+        self.compact_min_level = SEVERITY_LEVELS[config.output.compact_min_severity]
         
-        logger.info(f"Initialized OutputWriter with output_dir={self.output_dir}")
+        logger.info(
+            f"Initialized OutputWriter with output_dir={self.output_dir}"
+            + (f" (compact below {config.output.compact_min_severity})" if self.compact else "")
+        )
+    
+    def flush(self) -> None:
+        """Write buffered results to disk."""
+        for log in self._logs.values():
+            log.flush()
     
     def write_device_anomaly(
         self,
@@ -98,7 +376,7 @@ class OutputWriter:
             "top_anomalies": top_anomalies
         }
         
-        self._write_json_line(self.device_anomaly_file, result)
+        self._write_json_line(self.device_anomaly_file, self._compacted(result))
         
         if severity in ["warning", "critical"]:
             logger.info(
@@ -165,7 +443,7 @@ class OutputWriter:
         if pihole_response:
             result["pihole_response"] = pihole_response
         
-        self._write_json_line(self.domain_risk_file, result)
+        self._write_json_line(self.domain_risk_file, self._compacted(result))
         
         if action == "BLOCK":
             logger.warning(
@@ -178,17 +456,30 @@ class OutputWriter:
                 f"(score={risk_score:.3f}, action={action})"
             )
     
+    def _compacted(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Drop the feature payload from results below the compact cutoff.
+        
+        Args:
+            result: Result record with a "severity" field
+        
+        Returns:
+            Result record to write
+        """
+        if not self.compact or SEVERITY_LEVELS[result["severity"]] >= self.compact_min_level:
+            return result
+        return {key: value for key, value in result.items() if key not in ("features", "top_anomalies")}
+    
     def _write_json_line(self, filepath: Path, data: Dict[str, Any]) -> None:
         """
-        Write a single JSON line to file.
+        Buffer a single JSON line for the file.
         
         Args:
             filepath: Path to output file
             data: Data to write as JSON
         """
         try:
-            with filepath.open("a") as f:
-                f.write(json.dumps(data) + "\n")
+            self._logs[filepath].write(_dumps(data))
         except Exception as e:
             logger.error(f"Failed to write to {filepath}: {e}")
 
@@ -2,12 +2,14 @@
 Pi-hole API client for domain blocking.
 
 Provides interface to Pi-hole's HTTP API for adding/removing domains from blocklists.
+Pipelines submit through orion_ai.enforcement rather than calling it directly.
 """
 
 import logging
 import time
-from typing import Optional
+from typing import List, Optional
 import requests
+import requests.adapters
 
 from orion_ai.config import get_config
 
@@ -26,7 +28,8 @@ class PiHoleClient:
         base_url: Optional[str] = None,
         api_token: Optional[str] = None,
         timeout: Optional[int] = None,
-        retry_attempts: Optional[int] = None
+        retry_attempts: Optional[int] = None,
+        pool_size: Optional[int] = None
     ):
         """
         Initialize Pi-hole API client.
@@ -36,6 +39,7 @@ class PiHoleClient:
             api_token: API authentication token (default from config)
             timeout: Request timeout in seconds (default from config)
             retry_attempts: Number of retry attempts (default from config)
+            pool_size: Max pooled HTTP connections (default from config)
         """
         config = get_config()
         
@@ -43,10 +47,20 @@ class PiHoleClient:
         self.api_token = api_token or config.pihole.api_token
         self.timeout = timeout or config.pihole.timeout
         self.retry_attempts = retry_attempts or config.pihole.retry_attempts
+        pool_size = pool_size or config.pihole.concurrency
         
         # Remove trailing slash from base URL
         self.base_url = self.base_url.rstrip('/')
         
+        # Keep-alive connections shared by all calls (thread-safe for requests)
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=pool_size
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
         if not self.api_token:
             logger.warning(
                 "Pi-hole API token not configured. "
@@ -63,6 +77,21 @@ class PiHoleClient:
             domain: Domain name to block
             comment: Optional comment for the blocklist entry
             
+        Returns:
+            True if successful, False otherwise
+        """
+        return self.add_domains([domain], comment=comment)
+    
+    def add_domains(self, domains: List[str], comment: str = "") -> bool:
+        """
+        Add several domains to Pi-hole's blacklist in one API call.
+        
+        Pi-hole accepts a space-separated list of domains for "add".
+        
+        Args:
+            domains: Domain names to block
+            comment: Optional comment for the blocklist entries
+            
         Returns:
             True if successful, False otherwise
         """
@@ -72,63 +101,17 @@ class PiHoleClient:
         
         params = {
             "list": "black",
-            "add": domain,
+            "add": " ".join(domains),
             "auth": self.api_token
         }
         
         if comment:
             params["comment"] = comment
         
-        logger.info(f"Adding domain to Pi-hole blacklist: {domain}")
+        label = domains[0] if len(domains) == 1 else f"{len(domains)} domains"
+        logger.info(f"Adding {label} to Pi-hole blacklist")
         
-        for attempt in range(1, self.retry_attempts + 1):
-            try:
-                response = requests.get(
-                    self.base_url,
-                    params=params,
-                    timeout=self.timeout
-                )
-                response.raise_for_status()
-                
-                # Check response for success
-                # Pi-hole typically returns JSON with success indicator
-                try:
-                    data = response.json()
-                    if "success" in data and data["success"]:
-                        logger.info(f"Successfully added domain to blacklist: {domain}")
-                        return True
-                    else:
-                        logger.warning(
-                            f"Pi-hole returned non-success response for {domain}: {data}"
-                        )
-                        return False
-                except ValueError:
-                    # Response not JSON - check status code
-                    if response.status_code == 200:
-                        logger.info(f"Successfully added domain to blacklist: {domain}")
-                        return True
-                    else:
-                        logger.warning(
-                            f"Pi-hole returned status {response.status_code} for {domain}"
-                        )
-                        return False
-                
-            except requests.RequestException as e:
-                logger.warning(
-                    f"Attempt {attempt}/{self.retry_attempts} failed "
-                    f"to add domain {domain}: {e}"
-                )
-                
-                if attempt < self.retry_attempts:
-                    # Exponential backoff
-                    sleep_time = 2 ** attempt
-                    logger.debug(f"Retrying in {sleep_time} seconds...")
-                    time.sleep(sleep_time)
-                else:
-                    logger.error(f"Failed to add domain {domain} after {self.retry_attempts} attempts")
-                    return False
-        
-        return False
+        return self._send(params, f"add {label} to blacklist")
     
     def remove_domain(self, domain: str) -> bool:
         """
@@ -152,9 +135,22 @@ class PiHoleClient:
         
         logger.info(f"Removing domain from Pi-hole blacklist: {domain}")
         
+        return self._send(params, f"remove {domain} from blacklist")
+    
+    def _send(self, params: dict, action: str) -> bool:
+        """
+        Send a list-management request, retrying with exponential backoff.
+        
+        Args:
+            params: Query parameters
+            action: Description of the request for log messages
+            
+        Returns:
+            True if successful, False otherwise
+        """
         for attempt in range(1, self.retry_attempts + 1):
             try:
-                response = requests.get(
+                response = self.session.get(
                     self.base_url,
                     params=params,
                     timeout=self.timeout
@@ -162,39 +158,41 @@ class PiHoleClient:
                 response.raise_for_status()
                 
                 # Check response for success
+                # Pi-hole typically returns JSON with success indicator
                 try:
                     data = response.json()
                     if "success" in data and data["success"]:
-                        logger.info(f"Successfully removed domain from blacklist: {domain}")
+                        logger.info(f"Pi-hole request succeeded: {action}")
                         return True
                     else:
                         logger.warning(
-                            f"Pi-hole returned non-success response for {domain}: {data}"
+                            f"Pi-hole returned non-success response to {action}: {data}"
                         )
                         return False
                 except ValueError:
                     # Response not JSON - check status code
                     if response.status_code == 200:
-                        logger.info(f"Successfully removed domain from blacklist: {domain}")
+                        logger.info(f"Pi-hole request succeeded: {action}")
                         return True
                     else:
                         logger.warning(
-                            f"Pi-hole returned status {response.status_code} for {domain}"
+                            f"Pi-hole returned status {response.status_code} to {action}"
                         )
                         return False
                 
             except requests.RequestException as e:
                 logger.warning(
                     f"Attempt {attempt}/{self.retry_attempts} failed "
-                    f"to remove domain {domain}: {e}"
+                    f"to {action}: {e}"
                 )
                 
                 if attempt < self.retry_attempts:
+                    # Exponential backoff
                     sleep_time = 2 ** attempt
                     logger.debug(f"Retrying in {sleep_time} seconds...")
                     time.sleep(sleep_time)
                 else:
-                    logger.error(f"Failed to remove domain {domain} after {self.retry_attempts} attempts")
+                    logger.error(f"Failed to {action} after {self.retry_attempts} attempts")
                     return False
         
         return False
@@ -216,7 +214,7 @@ class PiHoleClient:
         }
         
         try:
-            response = requests.get(
+            response = self.session.get(
                 self.base_url,
                 params=params,
                 timeout=self.timeout
@@ -265,6 +263,14 @@ class DummyPiHoleClient:
         logger.info(f"[DUMMY] Would add domain to blacklist: {domain} (comment: {comment})")
         return True
     
+    def add_domains(self, domains: List[str], comment: str = "") -> bool:
+        """Log batch domain addition (no actual API call)."""
+        logger.info(
+            f"[DUMMY] Would add {len(domains)} domains to blacklist: "
+            f"{', '.join(domains)} (comment: {comment})"
+        )
+        return True
+    
     def remove_domain(self, domain: str) -> bool:
         """Log domain removal (no actual API call)."""
         logger.info(f"[DUMMY] Would remove domain from blacklist: {domain}")
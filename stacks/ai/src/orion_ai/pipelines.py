@@ -7,20 +7,58 @@ Includes threat intelligence integration for enhanced detection.
 
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple, Union
 from dataclasses import dataclass, asdict
+import numpy as np
 
 from orion_ai.config import get_config
-from orion_ai.log_reader import LokiLogReader
-from orion_ai.feature_extractor import FeatureExtractor
-from orion_ai.model_runner import load_model
+from orion_ai.log_reader import LokiLogReader, LokiStream, ShardedLokiStream
+from orion_ai.event_batch import EventBatch
+from orion_ai.device_window import DeviceWindowAggregator
+from orion_ai.feature_extractor import FeatureExtractor, DeviceFeatures, DomainFeatures
+from orion_ai.model_registry import get_model_registry
 from orion_ai.output_writer import OutputWriter
-from orion_ai.pihole_client import PiHoleClient, DummyPiHoleClient
-from orion_ai.threat_intel import ThreatIntelligenceService
+from orion_ai.enforcement import get_enforcement_queue
+from orion_ai.threat_intel import get_threat_intel_service
 
 logger = logging.getLogger(__name__)
 
 
+def _window_complete(*streams: Union[LokiStream, ShardedLokiStream]) -> bool:
+    """
+    Check whether every stream read its full time window.
+    
+    Logs a warning naming the capped queries, so results computed from a
+    partial window can be told apart from complete ones.
+    
+    Returns:
+        True if no stream was capped
+    """
+    capped = [stream for stream in streams if not stream.complete]
+    for stream in capped:
+        logger.warning(
+            f"Incomplete window for query {stream.query}: "
+            f"stopped after {stream.entries_read} entries"
+        )
+    return not capped
+
+
+def _predict_scores(model, feature_matrix: np.ndarray, batch_size: int) -> np.ndarray:
+    """
+    Score a feature matrix in batched model calls.
+    
+    Args:
+        model: ManagedModel, ModelRunner or DummyModelRunner
+        feature_matrix: Features of shape (n_rows, n_features)
+        batch_size: Maximum rows per inference call
+        
+    Returns:
+        1D array of scalar scores, one per row
+    """
+    prediction = np.asarray(model.predict(feature_matrix, batch_size=batch_size))
+    return prediction.reshape(len(feature_matrix), -1)[:, 0].astype(np.float64)
+
+
 @dataclass
 class DeviceAnomalyResult:
     """Result from device anomaly detection."""
@@ -50,10 +88,9 @@ class DeviceAnomalyPipeline:
     
     Workflow:
     1. Read Suricata flows, DNS queries, and alerts from Loki
-    2. Group by source IP (device)
-    3. Extract features per device
-    4. Run anomaly detection model
-    5. Write results to logs
+    2. Extract features for every source IP (device) in one vectorized pass
+    3. Run anomaly detection model in batches
+    4. Write results to logs
     """
     
     def __init__(self):
@@ -63,9 +100,32 @@ class DeviceAnomalyPipeline:
         self.feature_extractor = FeatureExtractor()
         self.output_writer = OutputWriter()
         
-        # Load model (with auto-fallback to dummy if not found)
-        model_path = self.config.model.device_anomaly_model
-        self.model = load_model(model_path, use_dummy=False)
+        # Load model (with auto-fallback to dummy if not found); new model
+        # files are swapped in by the registry without a restart
+        self.model = get_model_registry().model(
+            "device_anomaly",
+            self.config.model.device_anomaly_model,
+            threshold=self.config.model.device_anomaly_threshold
+        )
+        
+        # Threat intelligence service for IP enrichment (if enabled)
+        if self.config.threat_intel.enable_threat_intel:
+            self.threat_intel = get_threat_intel_service()
+        else:
+            self.threat_intel = None
+        
+        # Whether the last run read its full window from Loki
+        self.last_window_complete = True
+        
+        # Sliding-window state for run_incremental()
+        detection = self.config.detection
+        self.aggregator = DeviceWindowAggregator(
+            window_minutes=detection.device_window_minutes,
+            pane_seconds=detection.pane_seconds,
+            sketch_precision=detection.sketch_precision,
+            feature_extractor=self.feature_extractor
+        )
+        self.cursor: Optional[datetime] = None
         
         logger.info("Initialized DeviceAnomalyPipeline")
     
@@ -96,40 +156,181 @@ class DeviceAnomalyPipeline:
             f"{start_time} to {end_time}"
         )
         
-        # Read logs from Loki
+        events = self._read_events(start_time, end_time)
+        if events is None:
+            return []
+        
+        # Extract features for all devices
+        feature_matrix, device_ips, intel_hits = (
+            self.feature_extractor.extract_all_device_features(events, start_time, end_time)
+        )
+        
+        return self._score_devices(
+            feature_matrix, device_ips, intel_hits, start_time, end_time
+        )
+    
+    def run_incremental(
+        self,
+        end_time: Optional[datetime] = None
+    ) -> List[DeviceAnomalyResult]:
+        """
+        Run device anomaly detection over the sliding window ending at end_time.
+        
+        Only events since the previous run (minus INCREMENTAL_LAG_SECONDS,
+        for entries Loki ingested late) are read; the panes they fall into
+        are rebuilt, expired panes are evicted and features are derived
+        from the merged panes. Unique-count features are HyperLogLog
+        estimates. The cursor only advances after a complete read, so a
+        capped read is retried on the next run.
+        
+        Args:
+            end_time: End of time window (default: now)
+            
+        Returns:
+            List of DeviceAnomalyResult objects
+        """
+        if end_time is None:
+            end_time = datetime.now()
+        window_minutes = self.config.detection.device_window_minutes
+        start_time = end_time - timedelta(minutes=window_minutes)
+        
+        # Read only what arrived since the last run (or the whole window),
+        # re-reading a margin for events Loki ingested late
+        read_start = start_time
+        if self.cursor is not None and start_time < self.cursor < end_time:
+            lag = timedelta(seconds=self.config.detection.incremental_lag_seconds)
+            read_start = max(start_time, self.cursor - lag)
+        read_start = self.aggregator.rewind(read_start)
+        
+        logger.info(
+            f"Running incremental device anomaly detection for window: "
+            f"{start_time} to {end_time} (reading from {read_start})"
+        )
+        
+        events = self._read_events(read_start, end_time)
+        if events is None:
+            return []
+        
+        self.aggregator.ingest(events)
+        evicted = self.aggregator.evict(end_time)
+        if self.last_window_complete:
+            self.cursor = end_time
+        else:
+            logger.warning(
+                f"Incomplete device window read; keeping cursor at {self.cursor} "
+                "to re-read it next run"
+            )
+        
+        logger.debug(
+            f"Device window: {len(self.aggregator.panes)} live panes, "
+            f"{evicted} evicted"
+        )
+        
+        feature_matrix, device_ips, intel_hits = self.aggregator.features(start_time, end_time)
+        
+        return self._score_devices(
+            feature_matrix, device_ips, intel_hits, start_time, end_time
+        )
+    
+    def _read_events(
+        self,
+        start_time: datetime,
+        end_time: datetime
+    ) -> Optional[EventBatch]:
+        """
+        Stream flow, DNS and alert logs from Loki into an EventBatch.
+        
+        Args:
+            start_time: Start of time range
+            end_time: End of time range
+            
+        Returns:
+            EventBatch, or None if Loki could not be read
+        """
+        # Stream logs from Loki, decoding every event once
         try:
-            flows = self.log_reader.get_suricata_flows(start_time, end_time)
-            dns_queries = self.log_reader.get_dns_queries(start_time, end_time)
-            alerts = self.log_reader.get_suricata_alerts(start_time, end_time)
+            flows = self.log_reader.stream_suricata_flows(start_time, end_time)
+            dns_queries = self.log_reader.stream_dns_queries(start_time, end_time)
+            alerts = self.log_reader.stream_suricata_alerts(start_time, end_time)
+            events = EventBatch.from_loki(flows, dns_queries, alerts)
             
             logger.info(
-                f"Retrieved {len(flows)} flows, "
-                f"{len(dns_queries)} DNS queries, "
-                f"{len(alerts)} alerts"
+                f"Retrieved {flows.entries_read} flows, "
+                f"{dns_queries.entries_read} DNS queries, "
+                f"{alerts.entries_read} alerts"
             )
         except Exception as e:
             logger.error(f"Failed to read logs from Loki: {e}")
+            return None
+        
+        self.last_window_complete = _window_complete(flows, dns_queries, alerts)
+        
+        # Flag flows to IPs and networks listed in threat intel
+        if self.threat_intel and events.n_flows:
+            try:
+                events.flow_intel_hit = self.threat_intel.ip_hits(events.flow_dest_ip)
+            except Exception as e:
+                logger.error(f"Threat intel IP matching failed: {e}")
+            else:
+                hits = int(np.count_nonzero(events.flow_intel_hit))
+                if hits:
+                    logger.warning(f"{hits} flows to threat intel listed IPs")
+        
+        return events
+    
+    def _score_devices(
+        self,
+        feature_matrix: np.ndarray,
+        device_ips: List[str],
+        intel_hits: np.ndarray,
+        start_time: datetime,
+        end_time: datetime
+    ) -> List[DeviceAnomalyResult]:
+        """
+        Score a device feature matrix and record every device.
+        
+        Args:
+            feature_matrix: Device features, one row per device
+            device_ips: Device IP per row
+            intel_hits: Threat intel hit count per row
+            start_time: Start of time window
+            end_time: End of time window
+            
+        Returns:
+            List of DeviceAnomalyResult objects
+        """
+        logger.info(f"Processing {len(device_ips)} unique devices")
+        
+        if not device_ips:
             return []
         
-        # Group logs by device IP
-        device_logs = self._group_by_device(flows, dns_queries, alerts)
+        # Score every device in a few batched inference calls
+        try:
+            anomaly_scores = _predict_scores(
+                self.model, feature_matrix, self.config.model.inference_batch_size
+            )
+        except Exception as e:
+            logger.error(f"Model inference failed for device batch: {e}")
+            return []
         
-        logger.info(f"Processing {len(device_logs)} unique devices")
+        # Determine which devices are anomalous
+        threshold = self.config.model.device_anomaly_threshold
+        is_anomalous = anomaly_scores >= threshold
         
-        # Process each device
+        # Record each device
         results = []
-        for device_ip, logs in device_logs.items():
+        for i, device_ip in enumerate(device_ips):
             try:
-                result = self._process_device(
+                results.append(self._record_device(
                     device_ip,
-                    logs["flows"],
-                    logs["dns_queries"],
-                    logs["alerts"],
+                    feature_matrix[i],
+                    int(intel_hits[i]),
+                    float(anomaly_scores[i]),
+                    threshold,
+                    bool(is_anomalous[i]),
                     start_time,
                     end_time
-                )
-                if result:
-                    results.append(result)
+                ))
             except Exception as e:
                 logger.error(f"Failed to process device {device_ip}: {e}")
         
@@ -141,94 +342,27 @@ class DeviceAnomalyPipeline:
         
         return results
     
-    def _group_by_device(
-        self,
-        flows: List[Dict],
-        dns_queries: List[Dict],
-        alerts: List[Dict]
-    ) -> Dict[str, Dict[str, List[Dict]]]:
-        """
-        Group logs by device IP (source IP).
-        
-        Returns:
-            Dictionary: {device_ip: {flows: [...], dns_queries: [...], alerts: [...]}}
-        """
-        device_logs = {}
-        
-        # Helper to extract IP from log entry
-        def get_src_ip(entry: Dict) -> Optional[str]:
-            try:
-                import json
-                log = json.loads(entry.get("log", "{}"))
-                return log.get("src_ip")
-            except:
-                return None
-        
-        # Group flows
-        for flow in flows:
-            src_ip = get_src_ip(flow)
-            if src_ip:
-                if src_ip not in device_logs:
-                    device_logs[src_ip] = {"flows": [], "dns_queries": [], "alerts": []}
-                device_logs[src_ip]["flows"].append(flow)
-        
-        # Group DNS queries
-        for dns in dns_queries:
-            src_ip = get_src_ip(dns)
-            if src_ip:
-                if src_ip not in device_logs:
-                    device_logs[src_ip] = {"flows": [], "dns_queries": [], "alerts": []}
-                device_logs[src_ip]["dns_queries"].append(dns)
-        
-        # Group alerts
-        for alert in alerts:
-            src_ip = get_src_ip(alert)
-            if src_ip:
-                if src_ip not in device_logs:
-                    device_logs[src_ip] = {"flows": [], "dns_queries": [], "alerts": []}
-                device_logs[src_ip]["alerts"].append(alert)
-        
-        return device_logs
-    
-    def _process_device(
+    def _record_device(
         self,
         device_ip: str,
-        flows: List[Dict],
-        dns_queries: List[Dict],
-        alerts: List[Dict],
+        feature_vector: np.ndarray,
+        intel_hit_count: int,
+        anomaly_score: float,
+        threshold: float,
+        is_anomalous: bool,
         start_time: datetime,
         end_time: datetime
-    ) -> Optional[DeviceAnomalyResult]:
+    ) -> DeviceAnomalyResult:
         """
-        Process a single device: extract features, run model, write results.
+        Record a scored device: build its result and write it to logs.
         
         Returns:
-            DeviceAnomalyResult or None if processing failed
+            DeviceAnomalyResult
         """
-        # Extract features
-        features = self.feature_extractor.extract_device_features(
-            device_ip=device_ip,
-            flows=flows,
-            dns_queries=dns_queries,
-            alerts=alerts,
-            window_start=start_time,
-            window_end=end_time
+        features = DeviceFeatures.from_vector(
+            device_ip, start_time, end_time, feature_vector
         )
-        
-        # Convert to feature vector
-        feature_vector = features.to_vector()
-        
-        # Run model
-        try:
-            prediction = self.model.predict(feature_vector)
-            anomaly_score = float(prediction[0][0])  # Extract scalar score
-        except Exception as e:
-            logger.error(f"Model inference failed for device {device_ip}: {e}")
-            return None
-        
-        # Determine if anomalous
-        threshold = self.config.model.device_anomaly_threshold
-        is_anomalous = anomaly_score >= threshold
+        features.intel_hit_count = intel_hit_count
         
         # Create result
         result = DeviceAnomalyResult(
@@ -261,10 +395,10 @@ class DomainRiskPipeline:
     Workflow:
     1. Read DNS queries from Loki
     2. Extract unique domains
-    3. Extract features per domain
-    4. Run risk scoring model
+    3. Extract features per domain into one matrix
+    4. Run risk scoring model in batches
     5. Apply policy (block if score >= threshold)
-    6. Call Pi-hole API if blocking
+    6. Queue Pi-hole blocks (submitted in the background)
     7. Write results to logs
     """
     
@@ -272,32 +406,33 @@ class DomainRiskPipeline:
         """Initialize domain risk pipeline."""
         self.config = get_config()
         self.log_reader = LokiLogReader()
-        self.feature_extractor = FeatureExtractor()
+        self.feature_extractor = FeatureExtractor(
+            domain_cache_size=self.config.detection.domain_feature_cache_size
+        )
         self.output_writer = OutputWriter()
         
-        # Load model
-        model_path = self.config.model.domain_risk_model
-        self.model = load_model(model_path, use_dummy=False)
+        # Load model (hot-swapped by the registry)
+        self.model = get_model_registry().model(
+            "domain_risk",
+            self.config.model.domain_risk_model,
+            threshold=self.config.model.domain_risk_threshold
+        )
         
-        # Pi-hole client (use dummy if blocking disabled)
-        if self.config.detection.enable_blocking:
-            self.pihole_client = PiHoleClient()
-        else:
-            logger.info("Blocking disabled - using dummy Pi-hole client")
-            self.pihole_client = DummyPiHoleClient()
+        # Pi-hole enforcement runs in the background (dummy client if blocking disabled)
+        self.enforcement = get_enforcement_queue()
+        self.pihole_client = self.enforcement.client
         
         # Threat intelligence service (if enabled)
         if self.config.threat_intel.enable_threat_intel:
-            self.threat_intel = ThreatIntelligenceService(
-                cache_path=self.config.threat_intel.cache_path,
-                otx_api_key=self.config.threat_intel.otx_api_key,
-                refresh_interval_hours=self.config.threat_intel.refresh_interval_hours
-            )
+            self.threat_intel = get_threat_intel_service()
             logger.info("Threat intelligence integration enabled")
         else:
             self.threat_intel = None
             logger.info("Threat intelligence integration disabled")
         
+        # Whether the last run read its full window from Loki
+        self.last_window_complete = True
+        
         logger.info("Initialized DomainRiskPipeline")
     
     def run(
@@ -327,26 +462,71 @@ class DomainRiskPipeline:
             f"{start_time} to {end_time}"
         )
         
-        # Read DNS queries
+        # Stream DNS queries and extract unique domains
         try:
-            dns_queries = self.log_reader.get_dns_queries(start_time, end_time)
-            logger.info(f"Retrieved {len(dns_queries)} DNS queries")
+            dns_queries = self.log_reader.stream_dns_queries(start_time, end_time)
+            domain_counts = self._extract_unique_domains(dns_queries)
+            logger.info(f"Retrieved {dns_queries.entries_read} DNS queries")
         except Exception as e:
             logger.error(f"Failed to read DNS queries from Loki: {e}")
             return []
         
-        # Extract unique domains
-        domain_counts = self._extract_unique_domains(dns_queries)
+        self.last_window_complete = _window_complete(dns_queries)
         
         logger.info(f"Processing {len(domain_counts)} unique domains")
         
-        # Process each domain
+        if not domain_counts:
+            return []
+        
+        domains = list(domain_counts)
+        
+        # Check threat intelligence first (if enabled)
+        threat_indicators = self._lookup_threat_intel(domains)
+        
+        # Extract features for all domains in one vectorized pass
+        feature_matrix = self.feature_extractor.extract_domain_feature_matrix(
+            domains, [domain_counts[domain] for domain in domains]
+        )
+        
+        # Score every domain in a few batched inference calls
+        try:
+            model_scores = _predict_scores(
+                self.model, feature_matrix, self.config.model.inference_batch_size
+            )
+        except Exception as e:
+            logger.error(f"Model inference failed for domain batch: {e}")
+            return []
+        
+        # Boost risk scores where threat intelligence matched
+        has_intel = np.array([t is not None for t in threat_indicators], dtype=bool)
+        ioc_boost = self.config.threat_intel.ioc_score_boost
+        risk_scores = np.where(has_intel, np.minimum(1.0, model_scores + ioc_boost), model_scores)
+        
+        for i in np.flatnonzero(has_intel):
+            threat_indicator = threat_indicators[i]
+            logger.warning(
+                f"Threat intel match for {domains[i]} ({threat_indicator.value}): "
+                f"{threat_indicator.threat_type.value} "
+                f"from {threat_indicator.source} (confidence={threat_indicator.confidence:.2f}). "
+                f"Score boosted from {model_scores[i]:.3f} to {risk_scores[i]:.3f}"
+            )
+        
+        # Apply policy
+        threshold = self.config.model.domain_risk_threshold
+        block = risk_scores >= threshold
+        
+        # Enforce and record each domain
         results = []
-        for domain, query_count in domain_counts.items():
+        for i, domain in enumerate(domains):
             try:
-                result = self._process_domain(domain, query_count)
-                if result:
-                    results.append(result)
+                results.append(self._record_domain(
+                    domain,
+                    DomainFeatures.from_vector(domain, feature_matrix[i]),
+                    float(risk_scores[i]),
+                    threshold,
+                    bool(block[i]),
+                    threat_indicators[i]
+                ))
             except Exception as e:
                 logger.error(f"Failed to process domain {domain}: {e}")
         
@@ -359,81 +539,55 @@ class DomainRiskPipeline:
         
         return results
     
-    def _extract_unique_domains(self, dns_queries: List[Dict]) -> Dict[str, int]:
+    def _extract_unique_domains(self, dns_queries: Iterable[Dict]) -> Dict[str, int]:
         """
         Extract unique domains from DNS queries with query counts.
         
         Returns:
             Dictionary: {domain: query_count}
         """
-        import json
         from collections import Counter
         
-        domains = []
+        events = EventBatch.from_loki(dns_queries=dns_queries)
+        queried = events.dns_rrname[events.dns_is_query]
         
-        for entry in dns_queries:
-            try:
-                log = json.loads(entry.get("log", "{}"))
-                dns_data = log.get("dns", {})
-                
-                if dns_data.get("type") == "query":
-                    domain = dns_data.get("rrname", "").lower().strip(".")
-                    if domain:
-                        domains.append(domain)
-            except:
-                continue
-        
-        return dict(Counter(domains))
+        domains = (d.lower().strip(".") for d in queried.tolist())
+        return dict(Counter(d for d in domains if d))
     
-    def _process_domain(
-        self,
-        domain: str,
-        query_count: int
-    ) -> Optional[DomainRiskResult]:
+    def _lookup_threat_intel(self, domains: List[str]) -> List:
         """
-        Process a single domain: extract features, run model, apply policy.
+        Look up threat intelligence for all domains in one bulk check.
         
         Returns:
-            DomainRiskResult or None if processing failed
+            List of ThreatIndicator or None, aligned with domains
         """
-        # Check threat intelligence first (if enabled)
-        threat_indicator = None
-        if self.threat_intel:
-            threat_indicator = self.threat_intel.check_domain(domain)
-        
-        # Extract features
-        features = self.feature_extractor.extract_domain_features(
-            domain=domain,
-            query_count=query_count
-        )
-        
-        # Convert to feature vector
-        feature_vector = features.to_vector()
+        if not self.threat_intel:
+            return [None] * len(domains)
         
-        # Run model
         try:
-            prediction = self.model.predict(feature_vector)
-            risk_score = float(prediction[0][0])  # Extract scalar score
+            matches = self.threat_intel.check_domains(domains)
         except Exception as e:
-            logger.error(f"Model inference failed for domain {domain}: {e}")
-            return None
+            logger.error(f"Threat intel lookup failed for domain batch: {e}")
+            return [None] * len(domains)
         
-        # Boost risk score if threat intelligence match found
-        original_score = risk_score
-        if threat_indicator:
-            ioc_boost = self.config.threat_intel.ioc_score_boost
-            risk_score = min(1.0, risk_score + ioc_boost)
-            logger.warning(
-                f"Threat intel match for {domain}: {threat_indicator.threat_type.value} "
-                f"from {threat_indicator.source} (confidence={threat_indicator.confidence:.2f}). "
-                f"Score boosted from {original_score:.3f} to {risk_score:.3f}"
-            )
+        return [matches.get(domain) for domain in domains]
+    
+    def _record_domain(
+        self,
+        domain: str,
+        features: DomainFeatures,
+        risk_score: float,
+        threshold: float,
+        block: bool,
+        threat_indicator=None
+    ) -> DomainRiskResult:
+        """
+        Record a scored domain: enforce the policy decision and write results.
         
-        # Apply policy
-        threshold = self.config.model.domain_risk_threshold
-        action, reason = self._apply_policy(
-            domain, risk_score, threshold, features.to_dict(), threat_indicator
-        )
+        Returns:
+            DomainRiskResult
+        """
+        action, reason = self._apply_policy(risk_score, threshold, block, threat_indicator)
         
         # Enforce if action is BLOCK
         pihole_response = None
@@ -444,6 +598,7 @@ class DomainRiskPipeline:
         features_dict = features.to_dict()
         if threat_indicator:
             features_dict["threat_intel_match"] = {
+                "indicator": threat_indicator.value,
                 "source": threat_indicator.source,
                 "threat_type": threat_indicator.threat_type.value,
                 "confidence": threat_indicator.confidence,
@@ -475,21 +630,20 @@ class DomainRiskPipeline:
     
     def _apply_policy(
         self,
-        domain: str,
         risk_score: float,
         threshold: float,
-        features: Dict,
+        block: bool,
         threat_indicator=None
     ) -> Tuple[str, str]:
         """
-        Apply blocking policy.
+        Turn a blocking decision into an action and reason.
         
         Returns:
             Tuple of (action, reason)
         """
         if threat_indicator:
             # If threat intel match, include in reason
-            if risk_score >= threshold:
+            if block:
                 return "BLOCK", (
                     f"Risk score {risk_score:.3f} >= threshold {threshold} "
                     f"+ Threat intel match ({threat_indicator.source})"
@@ -501,26 +655,17 @@ class DomainRiskPipeline:
                     f"but flagged by {threat_indicator.source}"
                 )
         else:
-            if risk_score >= threshold:
+            if block:
                 return "BLOCK", f"Risk score {risk_score:.3f} >= threshold {threshold}"
             else:
                 return "ALLOW", f"Risk score {risk_score:.3f} < threshold {threshold}"
     
     def _enforce_block(self, domain: str, risk_score: float) -> Optional[str]:
         """
-        Enforce blocking via Pi-hole API.
+        Queue a Pi-hole block without waiting for the API.
         
         Returns:
-            Response string or None
+            "queued", "already_blocked" or "dropped" (queue full)
         """
         comment = f"AI-detected risk: score={risk_score:.3f}"
-        
-        try:
-            success = self.pihole_client.add_domain(domain, comment=comment)
-            if success:
-                return "success"
-            else:
-                return "failed"
-        except Exception as e:
-            logger.error(f"Failed to block domain {domain} via Pi-hole: {e}")
-            return f"error: {str(e)}"
+        return self.enforcement.block(domain, comment=comment)
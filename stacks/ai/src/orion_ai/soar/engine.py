@@ -1,17 +1,79 @@
 """
 Playbook engine for evaluating events against playbooks.
+
+Playbooks are compiled when loaded: conditions become predicates over
+pre-split field paths, identical conditions are shared between playbooks,
+and enabled playbooks are indexed by event type.
 """
 
 import logging
 import yaml
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+import numpy as np
 
 from orion_ai.core.models import Event
 from orion_ai.soar.models import Playbook, TriggeredAction, Action
 
 logger = logging.getLogger(__name__)
 
+WILDCARD = "*"
+
+
+def _field_getter(field: str) -> Callable[[Dict[str, Any]], Any]:
+    """
+    Build a getter for a dotted field path (e.g. "metadata.score").
+    
+    Args:
+        field: Field path
+        
+    Returns:
+        Function returning the field value, or None if any part is missing
+    """
+    parts = tuple(field.split("."))
+    
+    if len(parts) == 1:
+        key = parts[0]
+        return lambda data: data.get(key)
+    
+    def get(data: Dict[str, Any]) -> Any:
+        value = data
+        for part in parts:
+            if not isinstance(value, dict):
+                return None
+            value = value.get(part)
+        return value
+    
+    return get
+
+
+@dataclass
+class _CompiledCondition:
+    """A condition compiled once and shared by every playbook that uses it."""
+    
+    key: Tuple[str, str, str]
+    field: str
+    get: Callable[[Dict[str, Any]], Any]
+    test: Callable[[Any], bool]
+    
+    def __call__(self, event_data: Dict[str, Any]) -> bool:
+        value = self.get(event_data)
+        return value is not None and self.test(value)
+
+
+@dataclass
+class _CompiledPlaybook:
+    """An enabled playbook with compiled conditions."""
+    
+    order: int
+    playbook: Playbook
+    conditions: List[_CompiledCondition]
+    
+    def matches(self, event_data: Dict[str, Any]) -> bool:
+        return all(condition(event_data) for condition in self.conditions)
+
 
 class PlaybookEngine:
     """
@@ -30,6 +92,9 @@ class PlaybookEngine:
         """
         self.playbooks_path = playbooks_path
         self.playbooks: List[Playbook] = []
+        self._by_id: Dict[str, Playbook] = {}
+        self._by_type: Dict[str, List[_CompiledPlaybook]] = {}
+        self._wildcard: List[_CompiledPlaybook] = []
         
         # Load playbooks
         self.reload_playbooks()
@@ -47,6 +112,7 @@ class PlaybookEngine:
             Number of playbooks loaded
         """
         self.playbooks = []
+        self._compile()
         
         # Check if file exists
         if not Path(self.playbooks_path).exists():
@@ -71,6 +137,7 @@ class PlaybookEngine:
             
             # Sort by priority (higher first)
             self.playbooks.sort(key=lambda p: p.priority, reverse=True)
+            self._compile()
             
             logger.info(f"Loaded {len(self.playbooks)} playbooks")
             return len(self.playbooks)
@@ -79,6 +146,57 @@ class PlaybookEngine:
             logger.error(f"Failed to load playbooks: {e}")
             return 0
     
+    def _compile(self) -> None:
+        """
+        Compile loaded playbooks and rebuild the lookup indexes.
+        
+        Enabled playbooks are indexed by match_event_type; each typed bucket
+        also holds the wildcard playbooks, merged in priority order.
+        """
+        self._by_id = {}
+        for playbook in self.playbooks:
+            self._by_id.setdefault(playbook.id, playbook)
+        
+        shared: Dict[Tuple[str, str, str], _CompiledCondition] = {}
+        typed: Dict[str, List[_CompiledPlaybook]] = {}
+        self._wildcard = []
+        
+        for order, playbook in enumerate(self.playbooks):
+            if not playbook.enabled:
+                continue
+            
+            conditions = []
+            for condition in playbook.conditions:
+                key = (condition.field, condition.operator.value, repr(condition.value))
+                if key not in shared:
+                    shared[key] = _CompiledCondition(
+                        key=key,
+                        field=condition.field,
+                        get=_field_getter(condition.field),
+                        test=condition.compile()
+                    )
+                conditions.append(shared[key])
+            
+            compiled = _CompiledPlaybook(order=order, playbook=playbook, conditions=conditions)
+            if playbook.match_event_type == WILDCARD:
+                self._wildcard.append(compiled)
+            else:
+                typed.setdefault(playbook.match_event_type, []).append(compiled)
+        
+        self._by_type = {
+            event_type: sorted(bucket + self._wildcard, key=lambda c: c.order)
+            for event_type, bucket in typed.items()
+        }
+        
+        logger.debug(
+            f"Compiled {sum(len(b) for b in typed.values()) + len(self._wildcard)} enabled playbooks "
+            f"({len(shared)} distinct conditions, {len(typed)} event types)"
+        )
+    
+    def _candidates(self, event_type: Optional[str]) -> List[_CompiledPlaybook]:
+        """Get the enabled playbooks that can match an event type, in priority order."""
+        return self._by_type.get(event_type, self._wildcard)
+    
     def evaluate_event(self, event: Event) -> List[TriggeredAction]:
         """
         Evaluate an event against all playbooks.
@@ -94,26 +212,88 @@ class PlaybookEngine:
         # Convert event to dict for evaluation
         event_data = event.to_dict()
         
-        for playbook in self.playbooks:
-            if playbook.matches(event_data):
-                logger.info(
-                    f"Playbook '{playbook.name}' matched event {event.event_id}"
-                )
-                
-                # Create triggered actions for each action in playbook
-                for action in playbook.actions:
-                    triggered_action = TriggeredAction(
-                        playbook_id=playbook.id,
-                        playbook_name=playbook.name,
-                        action=action,
-                        event_id=event.event_id,
-                        executed=False
-                    )
-                    triggered_actions.append(triggered_action)
+        for compiled in self._candidates(event_data.get("event_type")):
+            if compiled.matches(event_data):
+                self._trigger(compiled.playbook, event, triggered_actions)
         
         return triggered_actions
     
-    def get_playbook(self, playbook_id: str) -> Playbook:
+    def evaluate_events(self, events: List[Event]) -> List[List[TriggeredAction]]:
+        """
+        Evaluate many events against all playbooks.
+        
+        Events are grouped by event type; within a group each distinct
+        condition is evaluated once over the whole column of field values
+        and playbooks combine the resulting masks.
+        
+        Args:
+            events: Events to evaluate
+            
+        Returns:
+            Triggered actions per event, aligned with events
+        """
+        results: List[List[TriggeredAction]] = [[] for _ in events]
+        event_data = [event.to_dict() for event in events]
+        
+        groups: Dict[Any, List[int]] = {}
+        for i, data in enumerate(event_data):
+            groups.setdefault(data.get("event_type"), []).append(i)
+        
+        for event_type, rows in groups.items():
+            candidates = self._candidates(event_type)
+            if not candidates:
+                continue
+            
+            group_data = [event_data[i] for i in rows]
+            columns: Dict[str, List[Any]] = {}
+            masks: Dict[Tuple[str, str, str], np.ndarray] = {}
+            
+            for compiled in candidates:
+                matched = np.ones(len(rows), dtype=bool)
+                for condition in compiled.conditions:
+                    mask = masks.get(condition.key)
+                    if mask is None:
+                        column = columns.get(condition.field)
+                        if column is None:
+                            column = columns[condition.field] = [condition.get(d) for d in group_data]
+                        test = condition.test
+                        mask = masks[condition.key] = np.fromiter(
+                            (v is not None and test(v) for v in column),
+                            dtype=bool,
+                            count=len(column)
+                        )
+                    matched &= mask
+                    if not matched.any():
+                        break
+                
+                for j in np.flatnonzero(matched).tolist():
+                    self._trigger(compiled.playbook, events[rows[j]], results[rows[j]])
+        
+        return results
+    
+    def _trigger(
+        self,
+        playbook: Playbook,
+        event: Event,
+        triggered_actions: List[TriggeredAction]
+    ) -> None:
+        """Append a triggered action for each action in a matched playbook."""
+        logger.info(
+            f"Playbook '{playbook.name}' matched event {event.event_id}"
+        )
+        
+        # Create triggered actions for each action in playbook
+        for action in playbook.actions:
+            triggered_action = TriggeredAction(
+                playbook_id=playbook.id,
+                playbook_name=playbook.name,
+                action=action,
+                event_id=event.event_id,
+                executed=False
+            )
+            triggered_actions.append(triggered_action)
+    
+    def get_playbook(self, playbook_id: str) -> Optional[Playbook]:
         """
         Get a playbook by ID.
         
@@ -123,10 +303,7 @@ class PlaybookEngine:
         Returns:
             Playbook if found, None otherwise
         """
-        for playbook in self.playbooks:
-            if playbook.id == playbook_id:
-                return playbook
-        return None
+        return self._by_id.get(playbook_id)
     
     def list_playbooks(self, enabled_only: bool = False) -> List[Playbook]:
         """
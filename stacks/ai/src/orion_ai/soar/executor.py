@@ -0,0 +1,271 @@
+"""
+Concurrent SOAR action executor.
+
+Runs triggered actions on per-action-type worker pools, each with its own
+concurrency limit and token-bucket rate limit, so slow notification
+providers never hold up device tagging or domain blocks. Identical actions
+submitted while one is still pending share a single execution; apart from
+domain blocks, actions are only identical when triggered by the same event.
+"""
+
+import json
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from orion_ai.core.config import SOARConfig
+from orion_ai.soar.actions import ActionHandler
+from orion_ai.soar.models import ActionType, TriggeredAction
+
+logger = logging.getLogger(__name__)
+
+# (action type, executes for real, canonical params, triggering event or None)
+ActionKey = Tuple[ActionType, bool, str, Optional[str]]
+
+# Actions whose effect does not depend on the triggering event
+_IDEMPOTENT_ACTIONS = frozenset({ActionType.BLOCK_DOMAIN})
+
+# (executed, success, error) of one action execution
+ActionResult = Tuple[bool, Optional[bool], Optional[str]]
+
+
+@dataclass
+class ActionLimits:
+    """
+    Execution limits for one action type.
+    
+    Attributes:
+        concurrency: Max actions running at once
+        rate: Max actions started per second (0 = unlimited)
+        burst: Actions that may start back to back before rate limiting
+    """
+    concurrency: int = 1
+    rate: float = 0.0
+    burst: int = 1
+    
+    @classmethod
+    def from_config(cls, config: SOARConfig) -> Dict[ActionType, 'ActionLimits']:
+        """Build per-action-type limits from SOAR configuration."""
+        return {
+            ActionType.BLOCK_DOMAIN: cls(config.block_concurrency, config.block_rate, config.block_burst),
+            ActionType.TAG_DEVICE: cls(config.tag_concurrency, config.tag_rate, config.tag_burst),
+            ActionType.SEND_NOTIFICATION: cls(config.notify_concurrency, config.notify_rate, config.notify_burst),
+        }
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+    
+    Callers that find the bucket empty reserve the next token and sleep
+    until it is due, so waiting callers are released at the configured rate
+    in arrival order.
+    """
+    
+    def __init__(self, rate: float, burst: int = 1):
+        """
+        Initialize token bucket (initially full).
+        
+        Args:
+            rate: Tokens added per second (0 = unlimited)
+            burst: Bucket capacity
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def acquire(self) -> float:
+        """
+        Take one token, blocking until it is available.
+        
+        Returns:
+            Seconds spent waiting
+        """
+        if self.rate <= 0:
+            return 0.0
+        
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+class ActionExecutor:
+    """
+    Runs SOAR actions concurrently with per-action-type limits.
+    
+    submit() returns immediately with a Future resolving to the action's
+    success. An action identical to one still pending or running (same
+    type, params and dry-run mode, and for anything but a domain block the
+    same triggering event) is not executed again: it receives the result
+    of the running one. Completion callbacks run on the worker
+    thread that finished the action.
+    
+    Attributes:
+        handler: Action handler performing the actual work
+        limits: Per-action-type limits
+    """
+    
+    def __init__(
+        self,
+        handler: ActionHandler,
+        limits: Optional[Dict[ActionType, ActionLimits]] = None,
+        default_limits: Optional[ActionLimits] = None
+    ):
+        """
+        Initialize action executor.
+        
+        Args:
+            handler: Action handler performing the actual work
+            limits: Per-action-type limits
+            default_limits: Limits for action types not in limits
+                (default: 2 concurrent, unlimited rate)
+        """
+        self.handler = handler
+        self.limits = dict(limits or {})
+        self.default_limits = default_limits or ActionLimits(concurrency=2)
+        
+        self._pools: Dict[ActionType, ThreadPoolExecutor] = {}
+        self._buckets: Dict[ActionType, TokenBucket] = {}
+        self._in_flight: Dict[ActionKey, Future] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        
+        self.deduplicated = 0
+    
+    def submit(
+        self,
+        triggered_action: TriggeredAction,
+        dry_run: bool = False,
+        callback: Optional[Callable[[TriggeredAction], None]] = None
+    ) -> Future:
+        """
+        Queue a triggered action for execution.
+        
+        Args:
+            triggered_action: Action to execute; its executed, success and
+                error fields are set on completion
+            dry_run: Playbook-level dry-run flag
+            callback: Called with the triggered action once it completes
+        
+        Returns:
+            Future resolving to True if the action succeeded
+        """
+        key = self._key(triggered_action, dry_run)
+        
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Action executor is closed")
+            
+            shared = self._in_flight.get(key)
+            is_new = shared is None
+            if is_new:
+                shared = self._pool(key[0]).submit(self._run, triggered_action, dry_run)
+                self._in_flight[key] = shared
+            else:
+                self.deduplicated += 1
+        
+        if is_new:
+            # Registered outside the lock: runs inline if already finished
+            shared.add_done_callback(lambda f: self._forget(key, f))
+        else:
+            logger.debug(
+                f"Action {key[0].value} from playbook '{triggered_action.playbook_name}' "
+                f"already pending, sharing its result"
+            )
+        
+        result: Future = Future()
+        result.set_running_or_notify_cancel()
+        shared.add_done_callback(
+            lambda f: self._complete(f, triggered_action, callback, result)
+        )
+        return result
+    
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop accepting actions and shut down the worker pools.
+        
+        Args:
+            wait: Wait for queued and running actions to finish
+        """
+        with self._lock:
+            self._closed = True
+            pools = list(self._pools.values())
+        for pool in pools:
+            pool.shutdown(wait=wait)
+    
+    def _key(self, triggered_action: TriggeredAction, dry_run: bool) -> ActionKey:
+        """Identity of an action for deduplication."""
+        action = triggered_action.action
+        execute = not (self.handler.global_dry_run or dry_run)
+        params = json.dumps(action.params, sort_keys=True, default=str)
+        # Notifications and tags from different events are separate actions
+        event_id = None if action.type in _IDEMPOTENT_ACTIONS else triggered_action.event_id
+        return (action.type, execute, params, event_id)
+    
+    def _pool(self, action_type: ActionType) -> ThreadPoolExecutor:
+        """Get the worker pool for an action type; caller holds the lock."""
+        pool = self._pools.get(action_type)
+        if pool is None:
+            limits = self.limits.get(action_type, self.default_limits)
+            pool = ThreadPoolExecutor(
+                max_workers=limits.concurrency,
+                thread_name_prefix=f"soar-{action_type.value.lower()}"
+            )
+            self._pools[action_type] = pool
+            self._buckets[action_type] = TokenBucket(limits.rate, limits.burst)
+        return pool
+    
+    def _run(self, triggered_action: TriggeredAction, dry_run: bool) -> ActionResult:
+        """Execute one action once its rate limit allows."""
+        waited = self._buckets[triggered_action.action.type].acquire()
+        if waited > 1.0:
+            logger.debug(
+                f"Rate limit delayed {triggered_action.action.type.value} by {waited:.1f}s"
+            )
+        
+        self.handler.execute(triggered_action, dry_run)
+        return triggered_action.executed, triggered_action.success, triggered_action.error
+    
+    def _forget(self, key: ActionKey, future: Future) -> None:
+        """Drop a finished execution from the in-flight index."""
+        with self._lock:
+            if self._in_flight.get(key) is future:
+                del self._in_flight[key]
+    
+    @staticmethod
+    def _complete(
+        shared: Future,
+        triggered_action: TriggeredAction,
+        callback: Optional[Callable[[TriggeredAction], None]],
+        result: Future
+    ) -> None:
+        """Copy a shared execution's outcome to one triggered action and report it."""
+        try:
+            executed, success, error = shared.result()
+        except Exception as e:
+            logger.error(f"Action execution failed: {e}", exc_info=True)
+            executed, success, error = False, False, str(e)
+        
+        triggered_action.executed = executed
+        triggered_action.success = success
+        triggered_action.error = error
+        
+        if callback is not None:
+            try:
+                callback(triggered_action)
+            except Exception as e:
+                logger.error(f"Action completion callback failed: {e}", exc_info=True)
+        
+        result.set_result(bool(success))
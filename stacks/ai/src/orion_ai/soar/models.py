@@ -5,7 +5,7 @@ SOAR data models for playbooks, conditions, and actions.
 from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from pydantic import BaseModel
 
@@ -89,6 +89,65 @@ class Condition:
         
         return False
     
+    def compile(self) -> Callable[[Any], bool]:
+        """
+        Build a predicate for this condition's operator and value.
+        
+        The predicate takes the already resolved (non-None) field value,
+        so playbook engines can resolve each field once and share it
+        across conditions. Values that cannot be compared do not match.
+        
+        Returns:
+            Function mapping a field value to True/False
+        """
+        op = self.operator
+        expected = self.value
+        
+        if op == ConditionOperator.EQUALS:
+            test = lambda v: v == expected
+        elif op == ConditionOperator.NOT_EQUALS:
+            test = lambda v: v != expected
+        elif op == ConditionOperator.GREATER_THAN:
+            test = lambda v: v > expected
+        elif op == ConditionOperator.LESS_THAN:
+            test = lambda v: v < expected
+        elif op == ConditionOperator.GREATER_EQUAL:
+            test = lambda v: v >= expected
+        elif op == ConditionOperator.LESS_EQUAL:
+            test = lambda v: v <= expected
+        elif op == ConditionOperator.CONTAINS:
+            test = lambda v: expected in str(v)
+        elif op == ConditionOperator.NOT_CONTAINS:
+            test = lambda v: expected not in str(v)
+        elif op in (ConditionOperator.IN, ConditionOperator.NOT_IN):
+            members = expected
+            if isinstance(expected, (list, tuple, set)):
+                try:
+                    members = frozenset(expected)
+                except TypeError:
+                    pass
+            
+            def test(v):
+                try:
+                    return v in members
+                except TypeError:
+                    # Unhashable value: fall back to equality scan
+                    return v in expected
+            
+            if op == ConditionOperator.NOT_IN:
+                is_in = test
+                test = lambda v: not is_in(v)
+        else:
+            return lambda v: False
+        
+        def predicate(value: Any) -> bool:
+            try:
+                return bool(test(value))
+            except TypeError:
+                return False
+        
+        return predicate
+    
     def _get_nested_value(self, data: Dict[str, Any], field: str) -> Any:
         """Get value from nested dictionary using dot notation."""
         parts = field.split(".")
@@ -4,24 +4,41 @@ SOAR service - orchestrates playbook evaluation and action execution.
 
 import logging
 import time
+from concurrent.futures import wait
 from datetime import datetime, timedelta
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from orion_ai.core.config import get_config
 from orion_ai.core.events import emit_new_event, get_loki_client
 from orion_ai.core.models import Event, EventType, EventSeverity
 from orion_ai.soar.actions import ActionHandler
 from orion_ai.soar.engine import PlaybookEngine
+from orion_ai.soar.executor import ActionExecutor, ActionLimits
 from orion_ai.soar.models import TriggeredAction
+from orion_ai.soar.state import ProcessedEvents, SOARStateStore
 
 logger = logging.getLogger(__name__)
 
 
+def _ns_to_datetime(ts_ns: int) -> datetime:
+    """
+    Convert a Loki nanosecond timestamp to a datetime no later than it.
+    
+    The result is floored to the microsecond and backed off one more
+    microsecond, since query times are re-encoded through float seconds.
+    """
+    seconds, ns = divmod(ts_ns, 1_000_000_000)
+    return datetime.fromtimestamp(seconds) + timedelta(microseconds=ns // 1000 - 1)
+
+
 class SOARService:
     """
     SOAR service that evaluates events and executes playbook actions.
     
-    Periodically fetches recent events from Loki and runs them through
-    the playbook engine.
+    Periodically fetches new events from Loki and runs them through
+    the playbook engine. Consumption resumes from a persisted cursor (the
+    last consumed event), re-reading a short overlap for late-arriving
+    events; a bounded window of processed event IDs prevents re-execution.
     """
     
     def __init__(
@@ -30,7 +47,12 @@ class SOARService:
         lookback_minutes: int = 10,
         playbooks_path: str = "/etc/orion-ai/playbooks.yml",
         engine: Optional[PlaybookEngine] = None,
-        action_handler: Optional[ActionHandler] = None
+        action_handler: Optional[ActionHandler] = None,
+        executor: Optional[ActionExecutor] = None,
+        state_path: Optional[str] = "/var/lib/orion-ai/soar_state.db",
+        page_size: int = 1000,
+        dedup_size: int = 50000,
+        late_arrival_seconds: int = 120
     ):
         """
         Initialize SOAR service.
@@ -41,16 +63,37 @@ class SOARService:
             playbooks_path: Path to playbooks configuration
             engine: Playbook engine instance
             action_handler: Action handler instance
+            executor: Action executor (default: limits from SOAR_* settings)
+            state_path: SQLite path for the cursor and processed event IDs
+                (None keeps them in memory only)
+            page_size: Events requested per Loki query page
+            dedup_size: Processed event IDs remembered
+            late_arrival_seconds: Overlap re-read before the cursor to pick up
+                events that reached Loki late
         """
         self.interval_minutes = interval_minutes
         self.lookback_minutes = lookback_minutes
+        self.page_size = page_size
+        self.late_arrival_ns = int(late_arrival_seconds * 1e9)
         
         self.engine = engine or PlaybookEngine(playbooks_path)
         self.action_handler = action_handler or ActionHandler()
+        
+        soar_config = get_config().soar
+        self.action_timeout = soar_config.action_timeout
+        self.executor = executor or ActionExecutor(
+            self.action_handler,
+            limits=ActionLimits.from_config(soar_config)
+        )
         self.loki_client = get_loki_client()
         
-        # Track processed events to avoid duplicates
-        self.processed_event_ids = set()
+        # Resume from the persisted cursor and processed event window
+        self.state = SOARStateStore(state_path) if state_path else None
+        if self.state:
+            self.cursor, self.processed_event_ids = self.state.load(dedup_size)
+        else:
+            self.cursor: Optional[Tuple[int, str]] = None
+            self.processed_event_ids = ProcessedEvents(dedup_size)
         
         logger.info(
             f"Initialized SOARService "
@@ -67,47 +110,78 @@ class SOARService:
         end_time = datetime.now()
         start_time = end_time - timedelta(minutes=self.lookback_minutes)
         
+        # Resume just before the cursor, but never beyond the lookback window
+        if self.cursor:
+            resume_time = _ns_to_datetime(self.cursor[0] - self.late_arrival_ns)
+            if resume_time < start_time:
+                logger.warning(
+                    f"SOAR cursor is older than the {self.lookback_minutes}m lookback; "
+                    f"skipping events before {start_time}"
+                )
+            start_time = max(start_time, resume_time)
+        
         logger.info(f"Running SOAR evaluation from {start_time} to {end_time}")
         
-        # Fetch recent events from Loki
-        events = self._fetch_events(start_time, end_time)
+        # Fetch events from Loki, oldest first
+        entries = self._fetch_events(start_time, end_time)
         
         # Filter out already processed events
-        new_events = [e for e in events if e.event_id not in self.processed_event_ids]
+        new_entries = [
+            (ts_ns, event) for ts_ns, event in entries
+            if event.event_id not in self.processed_event_ids
+        ]
+        new_events = [event for _, event in new_entries]
         
         logger.info(f"Evaluating {len(new_events)} new events")
         
-        # Evaluate events and execute actions
-        total_actions = 0
-        for event in new_events:
-            triggered_actions = self.engine.evaluate_event(event)
+        # Evaluate all events in one batch, then execute actions concurrently
+        futures = []
+        triggered_per_event = self.engine.evaluate_events(new_events)
+        added: List[Tuple[str, int]] = []
+        evicted: List[str] = []
+        for (ts_ns, event), triggered_actions in zip(new_entries, triggered_per_event):
             
             if triggered_actions:
                 logger.info(
                     f"Event {event.event_id} triggered {len(triggered_actions)} actions"
                 )
                 
-                # Execute actions
+                # Queue actions; each emits its SOAR action event on completion
                 for triggered_action in triggered_actions:
                     # Check if playbook is in dry-run mode
                     playbook = self.engine.get_playbook(triggered_action.playbook_id)
                     dry_run = playbook.dry_run if playbook else False
                     
-                    success = self.action_handler.execute(triggered_action, dry_run)
-                    
-                    if success:
-                        total_actions += 1
-                    
-                    # Emit SOAR action event
-                    self._emit_soar_action_event(triggered_action, event)
+                    futures.append(self.executor.submit(
+                        triggered_action,
+                        dry_run,
+                        callback=lambda action, event=event: self._emit_soar_action_event(action, event)
+                    ))
             
             # Mark as processed
-            self.processed_event_ids.add(event.event_id)
+            evicted.extend(self.processed_event_ids.add(event.event_id, ts_ns))
+            added.append((event.event_id, ts_ns))
+        
+        # Wait for this run's actions before recording progress
+        done, not_done = wait(futures, timeout=self.action_timeout)
+        total_actions = sum(1 for future in done if future.result())
+        if not_done:
+            logger.warning(
+                f"{len(not_done)} SOAR actions still running after {self.action_timeout}s; "
+                f"they will report when complete"
+            )
         
-        # Cleanup old processed IDs (keep last 10000)
-        if len(self.processed_event_ids) > 10000:
-            # Convert to list, keep last 5000
-            self.processed_event_ids = set(list(self.processed_event_ids)[-5000:])
+        # Advance the cursor to the newest consumed event
+        if entries:
+            last_ts_ns, last_event = entries[-1]
+            if self.cursor is None or (last_ts_ns, last_event.event_id) > self.cursor:
+                self.cursor = (last_ts_ns, last_event.event_id)
+        
+        if self.state:
+            try:
+                self.state.save(self.cursor, added, evicted)
+            except Exception as e:
+                logger.error(f"Failed to persist SOAR state: {e}")
         
         logger.info(f"SOAR evaluation complete: {total_actions} actions executed")
         return total_actions
@@ -130,29 +204,58 @@ class SOARService:
             logger.debug(f"Sleeping for {self.interval_minutes} minutes")
             time.sleep(self.interval_minutes * 60)
     
-    def _fetch_events(self, start_time: datetime, end_time: datetime) -> List[Event]:
+    def _fetch_events(
+        self,
+        start_time: datetime,
+        end_time: datetime
+    ) -> List[Tuple[int, Event]]:
         """
-        Fetch events from Loki.
+        Fetch events from Loki, following pages past the query limit.
         
         Args:
             start_time: Start of time window
             end_time: End of time window
             
         Returns:
-            List of Event objects
+            List of (timestamp_ns, Event), ordered by timestamp then event ID
         """
         # Query events stream
         query = '{stream="events"}'
         
-        try:
-            logs = self.loki_client.query_range(query, start_time, end_time, limit=1000)
-        except Exception as e:
-            logger.error(f"Failed to fetch events from Loki: {e}")
-            return []
+        logs_by_key = {}
+        page_start = start_time
+        while True:
+            try:
+                logs = self.loki_client.query_range(
+                    query, page_start, end_time,
+                    limit=self.page_size,
+                    direction="forward"
+                )
+            except Exception as e:
+                logger.error(f"Failed to fetch events from Loki: {e}")
+                break
+            
+            for log in logs:
+                key = (log.get("_timestamp_ns", 0), log.get("event_id", "unknown"))
+                logs_by_key[key] = log
+            
+            if len(logs) < self.page_size:
+                break
+            
+            # Next page starts at the newest entry seen (repeats are deduplicated)
+            newest = _ns_to_datetime(max(log.get("_timestamp_ns", 0) for log in logs))
+            if newest <= page_start:
+                logger.warning(
+                    f"More than {self.page_size} events at {page_start}; "
+                    f"skipping ahead 1 microsecond"
+                )
+                newest = page_start + timedelta(microseconds=1)
+            page_start = newest
         
         # Convert log entries to Event objects
         events = []
-        for log in logs:
+        for key in sorted(logs_by_key):
+            log = logs_by_key[key]
             try:
                 # Reconstruct Event from log data
                 event = Event(
@@ -167,7 +270,7 @@ class SOARService:
                     source=log.get("source", ""),
                     metadata=log.get("metadata", {})
                 )
-                events.append(event)
+                events.append((key[0], event))
             except Exception as e:
                 logger.warning(f"Failed to parse event from log: {e}")
         
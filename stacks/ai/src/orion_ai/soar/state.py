@@ -0,0 +1,167 @@
+"""
+Persisted SOAR consumption state: event cursor and processed-event window.
+"""
+
+import logging
+import sqlite3
+from collections import OrderedDict
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessedEvents:
+    """
+    Bounded, time-ordered set of processed event IDs.
+    
+    Membership and insertion are O(1). IDs are kept in the order they were
+    processed (event time order, since events are consumed forward); once
+    capacity is exceeded the oldest IDs are evicted.
+    
+    Attributes:
+        capacity: Max IDs remembered
+    """
+    
+    def __init__(self, capacity: int = 50000):
+        """
+        Initialize processed event window.
+        
+        Args:
+            capacity: Max IDs remembered
+        """
+        self.capacity = capacity
+        self._ids: "OrderedDict[str, int]" = OrderedDict()
+    
+    def __contains__(self, event_id: str) -> bool:
+        return event_id in self._ids
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+    
+    def add(self, event_id: str, ts_ns: int) -> List[str]:
+        """
+        Remember an event ID.
+        
+        Args:
+            event_id: Event identifier
+            ts_ns: Event timestamp in nanoseconds
+        
+        Returns:
+            IDs evicted to stay within capacity
+        """
+        self._ids[event_id] = ts_ns
+        self._ids.move_to_end(event_id)
+        
+        evicted = []
+        while len(self._ids) > self.capacity:
+            evicted.append(self._ids.popitem(last=False)[0])
+        return evicted
+    
+    def items(self) -> List[Tuple[str, int]]:
+        """Get (event_id, ts_ns) pairs, oldest first."""
+        return list(self._ids.items())
+
+
+class SOARStateStore:
+    """
+    SQLite persistence for the SOAR cursor and processed-event window.
+    
+    The cursor is the (timestamp, event_id) of the last consumed event; the
+    event ID breaks ties between events sharing a timestamp.
+    """
+    
+    def __init__(self, db_path: str):
+        """
+        Initialize SOAR state store.
+        
+        Args:
+            db_path: Path to SQLite database
+        """
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the store"""
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    
+    def _init_db(self):
+        """Initialize database schema"""
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cursor (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                ts_ns INTEGER NOT NULL,
+                event_id TEXT NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS processed_events (
+                event_id TEXT PRIMARY KEY,
+                ts_ns INTEGER NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_processed_ts ON processed_events(ts_ns)")
+        conn.commit()
+        conn.close()
+    
+    def load(self, capacity: int) -> Tuple[Optional[Tuple[int, str]], ProcessedEvents]:
+        """
+        Load the cursor and the newest processed event IDs.
+        
+        Args:
+            capacity: Max IDs to load
+        
+        Returns:
+            Tuple of (cursor or None, ProcessedEvents)
+        """
+        conn = self._connect()
+        row = conn.execute("SELECT ts_ns, event_id FROM cursor WHERE id = 1").fetchone()
+        rows = conn.execute("""
+            SELECT event_id, ts_ns FROM (
+                SELECT event_id, ts_ns FROM processed_events
+                ORDER BY ts_ns DESC LIMIT ?
+            ) ORDER BY ts_ns
+        """, (capacity,)).fetchall()
+        conn.close()
+        
+        processed = ProcessedEvents(capacity)
+        for event_id, ts_ns in rows:
+            processed.add(event_id, ts_ns)
+        
+        return (tuple(row) if row else None), processed
+    
+    def save(
+        self,
+        cursor: Optional[Tuple[int, str]],
+        added: Iterable[Tuple[str, int]],
+        evicted: Iterable[str]
+    ):
+        """
+        Record one tick's progress in a single transaction.
+        
+        Args:
+            cursor: New cursor (None leaves it unchanged)
+            added: (event_id, ts_ns) pairs processed this tick
+            evicted: Event IDs dropped from the processed window
+        """
+        conn = self._connect()
+        with conn:
+            if cursor is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO cursor (id, ts_ns, event_id) VALUES (1, ?, ?)",
+                    cursor
+                )
+            conn.executemany(
+                "INSERT OR REPLACE INTO processed_events (event_id, ts_ns) VALUES (?, ?)",
+                added
+            )
+            conn.executemany(
+                "DELETE FROM processed_events WHERE event_id = ?",
+                [(event_id,) for event_id in evicted]
+            )
+        conn.close()
@@ -16,6 +16,13 @@ from orion_ai.threat_intel.ioc_fetchers import (
 )
 from orion_ai.threat_intel.lookup import ThreatIntelLookup, get_ti_lookup, enrich_event_with_ti
 from orion_ai.threat_intel.sync import ThreatIntelSync
+from orion_ai.threat_intel.ioc_index import IOCIndex
+from orion_ai.threat_intel.service import (
+    ThreatIndicator,
+    ThreatIntelligenceCache,
+    ThreatIntelligenceService,
+    get_threat_intel_service,
+)
 
 __all__ = [
     'ThreatIntelSource',
@@ -34,4 +41,9 @@ __all__ = [
     'get_ti_lookup',
     'enrich_event_with_ti',
     'ThreatIntelSync',
+    'IOCIndex',
+    'ThreatIndicator',
+    'ThreatIntelligenceCache',
+    'ThreatIntelligenceService',
+    'get_threat_intel_service',
 ]
@@ -0,0 +1,454 @@
+"""
+In-Memory IOC Index
+
+Memory-resident snapshot of IOCs used by the detection pipelines, so
+lookups never touch SQLite. Owners build a new index after every sync
+and swap the reference; readers keep using the old snapshot until then.
+"""
+
+import ipaddress
+import logging
+import socket
+from datetime import datetime
+from enum import Enum
+from typing import Dict, Generic, Iterable, List, Optional, Sequence, Tuple, TypeVar, Union
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# IOC type as a plain string or an IOCType enum member
+TypeKey = Union[str, Enum]
+
+# IOC types whose values are IP addresses or networks
+IP_TYPES = ("ip", "ipv4", "ipv6")
+
+
+def _type_key(ioc_type: TypeKey) -> str:
+    """Get the string key for an IOC type."""
+    return ioc_type.value if isinstance(ioc_type, Enum) else ioc_type
+
+
+def normalize_value(value: str) -> str:
+    """
+    Normalize an IOC value for indexing and lookup.
+    
+    Args:
+        value: Domain, IP, URL or hash
+    
+    Returns:
+        Lower-cased value
+    """
+    return value.lower()
+
+
+def indicator_type(value: str) -> str:
+    """
+    Classify an indicator value as "ip" or "domain".
+    
+    Args:
+        value: Indicator value
+    
+    Returns:
+        "ip" for IP addresses and networks, "domain" otherwise
+    """
+    try:
+        ipaddress.ip_network(value, strict=False)
+        return "ip"
+    except ValueError:
+        return "domain"
+
+
+def _ip_to_int(value: str) -> Optional[Tuple[int, int]]:
+    """
+    Convert an IP address string to an integer.
+    
+    Args:
+        value: IPv4 or IPv6 address
+    
+    Returns:
+        Tuple of (IP version, address as integer), None if not an address
+    """
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, value), "big")
+    except (OSError, TypeError):
+        pass
+    try:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, value), "big")
+    except (OSError, TypeError):
+        return None
+
+
+class _IPSegments:
+    """
+    Disjoint address segments for one IP version.
+    
+    Segment i covers [bounds[i], bounds[i + 1]) and belongs to the most
+    specific range containing it (owner[i], -1 if none).
+    """
+    
+    def __init__(self, ranges: List[Tuple[int, int, int]], dtype):
+        """
+        Flatten (first, last, row) address ranges into segments.
+        
+        Args:
+            ranges: Inclusive address ranges with their row numbers
+            dtype: Array dtype (int64 for IPv4, object for IPv6)
+        """
+        firsts = np.array([r[0] for r in ranges], dtype=dtype)
+        stops = np.array([r[1] + 1 for r in ranges], dtype=dtype)
+        
+        self.bounds = np.unique(np.concatenate([firsts, stops]))
+        self.owner = np.full(len(self.bounds), -1, dtype=np.int64)
+        
+        lo = np.searchsorted(self.bounds, firsts)
+        hi = np.searchsorted(self.bounds, stops)
+        
+        # Paint widest ranges first so nested, narrower ranges win
+        for i in sorted(range(len(ranges)), key=lambda i: ranges[i][0] - ranges[i][1]):
+            self.owner[lo[i]:hi[i]] = ranges[i][2]
+    
+    def match(self, addresses: np.ndarray) -> np.ndarray:
+        """Get the owning row per address (-1 if none)."""
+        segment = np.searchsorted(self.bounds, addresses, side="right") - 1
+        return np.where(segment >= 0, self.owner[np.maximum(segment, 0)], -1)
+
+
+class IPRangeIndex(Generic[T]):
+    """
+    Interval index over IP address and CIDR indicators.
+    
+    Addresses and networks are stored as integer intervals, flattened into
+    sorted, disjoint segments per IP version, so matching a batch of IPs
+    is a single searchsorted call. A single address is a /32 (or /128)
+    interval; where ranges nest, the most specific one matches.
+    
+    Attributes:
+        networks: Indexed networks in canonical form, by row
+        records: Record per row
+    """
+    
+    def __init__(self, rows: Iterable[Tuple[str, T]] = ()):
+        """
+        Initialize IP range index.
+        
+        Args:
+            rows: (address or CIDR, record) pairs; other values are skipped
+        """
+        self.networks: List[str] = []
+        self.records: List[T] = []
+        ranges: Dict[int, List[Tuple[int, int, int]]] = {4: [], 6: []}
+        
+        for value, record in rows:
+            value = value.strip()
+            row = len(self.networks)
+            
+            # Plain addresses (most indicators) skip the slower network parser
+            address = _ip_to_int(value)
+            if address is not None:
+                version, first = address
+                last = first
+            else:
+                try:
+                    network = ipaddress.ip_network(value, strict=False)
+                except ValueError:
+                    continue
+                version = network.version
+                first = int(network.network_address)
+                last = int(network.broadcast_address)
+                if first == last:
+                    value = str(network.network_address)
+                else:
+                    value = str(network)
+            
+            self.networks.append(value)
+            self.records.append(record)
+            ranges[version].append((first, last, row))
+        
+        self._v4 = _IPSegments(ranges[4], np.int64) if ranges[4] else None
+        self._v6 = _IPSegments(ranges[6], object) if ranges[6] else None
+    
+    def __len__(self) -> int:
+        return len(self.networks)
+    
+    def match(self, ips: Sequence[str]) -> np.ndarray:
+        """
+        Find the most specific matching range for each IP.
+        
+        Each distinct IP is parsed once, so repeated values (e.g. the
+        dest_ip column of a flow batch) are cheap.
+        
+        Args:
+            ips: IP address strings
+        
+        Returns:
+            Row index per IP (-1 if no range matches)
+        """
+        rows = np.full(len(ips), -1, dtype=np.int64)
+        if not self.networks or len(ips) == 0:
+            return rows
+        
+        uniques, inverse = np.unique(np.asarray(ips, dtype=object), return_inverse=True)
+        parsed = [_ip_to_int(ip) if isinstance(ip, str) else None for ip in uniques.tolist()]
+        unique_rows = np.full(len(uniques), -1, dtype=np.int64)
+        
+        for version, segments, dtype in ((4, self._v4, np.int64), (6, self._v6, object)):
+            if segments is None:
+                continue
+            positions = [i for i, p in enumerate(parsed) if p is not None and p[0] == version]
+            if positions:
+                addresses = np.array([parsed[i][1] for i in positions], dtype=dtype)
+                unique_rows[positions] = segments.match(addresses)
+        
+        return unique_rows[inverse.reshape(-1)]
+    
+    def lookup(self, ip: str) -> Optional[Tuple[str, T]]:
+        """
+        Find the most specific range containing an IP.
+        
+        Args:
+            ip: IP address
+        
+        Returns:
+            Tuple of (matched network, record) if found, None otherwise
+        """
+        row = int(self.match([ip])[0])
+        return (self.networks[row], self.records[row]) if row >= 0 else None
+
+
+class IOCIndex(Generic[T]):
+    """
+    Immutable in-memory IOC index.
+    
+    Holds one hash map per IOC type from normalized value to a record
+    (whatever the owner stores, e.g. an (ioc_id, confidence, source)
+    tuple). An index is never modified after it is built, so it can be
+    shared between threads and replaced by assigning a new one.
+    
+    Domain IOCs also match their subdomains: match_domain() probes the
+    domain and each parent suffix (most specific first) in the same hash
+    map, so a lookup costs one probe per label. IP and CIDR IOCs of every
+    IP type are also held in an IPRangeIndex for range matching.
+    
+    Attributes:
+        ip_ranges: Interval index over IP and CIDR IOCs
+        loaded_at: When the index was built
+    """
+    
+    def __init__(self, entries: Optional[Dict[str, Dict[str, T]]] = None):
+        """
+        Initialize IOC index.
+        
+        Args:
+            entries: Dictionary: {ioc_type: {normalized value: record}}
+        """
+        self._entries: Dict[str, Dict[str, T]] = entries or {}
+        self.ip_ranges: IPRangeIndex[T] = IPRangeIndex(
+            item
+            for ioc_type in IP_TYPES
+            for item in self._entries.get(ioc_type, {}).items()
+        )
+        self.loaded_at = datetime.now()
+    
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[TypeKey, str, T]]) -> "IOCIndex[T]":
+        """
+        Build an index from (ioc_type, value, record) rows.
+        
+        Later rows replace earlier rows with the same type and value.
+        
+        Args:
+            rows: IOC rows
+        
+        Returns:
+            IOCIndex object
+        """
+        entries: Dict[str, Dict[str, T]] = {}
+        for ioc_type, value, record in rows:
+            entries.setdefault(_type_key(ioc_type), {})[normalize_value(value)] = record
+        
+        index = cls(entries)
+        logger.debug(f"Built IOC index: {index.counts()}")
+        return index
+    
+    def __len__(self) -> int:
+        return sum(len(values) for values in self._entries.values())
+    
+    def counts(self) -> Dict[str, int]:
+        """
+        Get the number of indexed IOCs per type.
+        
+        Returns:
+            Dictionary: {ioc_type: count}
+        """
+        return {ioc_type: len(values) for ioc_type, values in self._entries.items()}
+    
+    def lookup(self, ioc_type: TypeKey, value: str) -> Optional[T]:
+        """
+        Look up a single IOC.
+        
+        Args:
+            ioc_type: IOC type
+            value: IOC value
+        
+        Returns:
+            Record if found, None otherwise
+        """
+        values = self._entries.get(_type_key(ioc_type))
+        if not values:
+            return None
+        return values.get(normalize_value(value))
+    
+    def bulk_lookup(self, ioc_type: TypeKey, values: Iterable[str]) -> Dict[str, T]:
+        """
+        Look up many IOCs of one type.
+        
+        Args:
+            ioc_type: IOC type
+            values: IOC values
+        
+        Returns:
+            Dictionary: {value: record} for values that matched, keyed by
+            the value as given
+        """
+        entries = self._entries.get(_type_key(ioc_type))
+        if not entries:
+            return {}
+        
+        matches = {}
+        for value in values:
+            record = entries.get(normalize_value(value))
+            if record is not None:
+                matches[value] = record
+        return matches
+    
+    def contains(self, ioc_type: TypeKey, values: Sequence[str]) -> np.ndarray:
+        """
+        Check membership for many values at once.
+        
+        Args:
+            ioc_type: IOC type
+            values: IOC values
+        
+        Returns:
+            Boolean array aligned with values
+        """
+        entries = self._entries.get(_type_key(ioc_type))
+        if not entries:
+            return np.zeros(len(values), dtype=bool)
+        
+        return np.fromiter(
+            (normalize_value(value) in entries for value in values),
+            dtype=bool,
+            count=len(values)
+        )
+    
+    def match_domain(
+        self,
+        domain: str,
+        ioc_type: TypeKey = "domain"
+    ) -> Optional[Tuple[str, T]]:
+        """
+        Find the most specific domain IOC matching a domain or any parent.
+        
+        A query for "a1b2.evil-c2.top" matches an IOC for "evil-c2.top".
+        Parents are only tried down to two labels, so a single-label IOC
+        (a bare TLD) only matches exactly.
+        
+        Args:
+            domain: Domain name
+            ioc_type: IOC type holding domain values
+        
+        Returns:
+            Tuple of (matched IOC value, record) if found, None otherwise
+        """
+        entries = self._entries.get(_type_key(ioc_type))
+        if not entries:
+            return None
+        return self._match_suffix(entries, normalize_value(domain).rstrip("."))
+    
+    def bulk_match_domains(
+        self,
+        domains: Iterable[str],
+        ioc_type: TypeKey = "domain"
+    ) -> Dict[str, Tuple[str, T]]:
+        """
+        Find the most specific matching domain IOC for many domains.
+        
+        Args:
+            domains: Domain names
+            ioc_type: IOC type holding domain values
+        
+        Returns:
+            Dictionary: {domain: (matched IOC value, record)} for domains
+            that matched, keyed by the domain as given
+        """
+        entries = self._entries.get(_type_key(ioc_type))
+        if not entries:
+            return {}
+        
+        matches = {}
+        for domain in domains:
+            match = self._match_suffix(entries, normalize_value(domain).rstrip("."))
+            if match is not None:
+                matches[domain] = match
+        return matches
+    
+    @staticmethod
+    def _match_suffix(entries: Dict[str, T], name: str) -> Optional[Tuple[str, T]]:
+        """Probe name and its parent suffixes (at least two labels) in entries."""
+        record = entries.get(name)
+        if record is not None:
+            return name, record
+        
+        start = name.find(".") + 1
+        while start and name.find(".", start) != -1:
+            suffix = name[start:]
+            record = entries.get(suffix)
+            if record is not None:
+                return suffix, record
+            start = name.find(".", start) + 1
+        
+        return None
+    
+    def match_ip(self, ip: str) -> Optional[Tuple[str, T]]:
+        """
+        Find the most specific IP or CIDR IOC containing an address.
+        
+        Args:
+            ip: IP address
+        
+        Returns:
+            Tuple of (matched network, record) if found, None otherwise
+        """
+        return self.ip_ranges.lookup(ip)
+    
+    def bulk_match_ips(self, ips: Iterable[str]) -> Dict[str, Tuple[str, T]]:
+        """
+        Find the most specific IP or CIDR IOC for many addresses.
+        
+        Args:
+            ips: IP addresses
+        
+        Returns:
+            Dictionary: {ip: (matched network, record)} for addresses that matched
+        """
+        ips = list(ips)
+        rows = self.ip_ranges.match(ips)
+        return {
+            ips[i]: (self.ip_ranges.networks[row], self.ip_ranges.records[row])
+            for i, row in zip(np.flatnonzero(rows >= 0).tolist(), rows[rows >= 0].tolist())
+        }
+    
+    def ip_hits(self, ips: Sequence[str]) -> np.ndarray:
+        """
+        Check which addresses fall in any IP or CIDR IOC.
+        
+        Args:
+            ips: IP addresses (e.g. a flow dest_ip column)
+        
+        Returns:
+            Boolean array aligned with ips
+        """
+        return self.ip_ranges.match(ips) >= 0
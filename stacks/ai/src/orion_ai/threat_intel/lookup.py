@@ -42,19 +42,23 @@ class ThreatIntelLookup:
         """
         Lookup a domain in threat intel.
         
+        Matches IOCs for the domain itself or any parent domain; the most
+        specific match wins.
+        
         Args:
             domain: Domain name to lookup
             
         Returns:
             Dict with IOC info if found, None otherwise
         """
-        result = self.store.lookup(IOCType.DOMAIN, domain.lower())
+        result = self.store.match_domain(domain)
         
         if result:
-            ioc_id, confidence, source = result
+            ioc_value, (ioc_id, confidence, source) = result
             return {
                 "ioc_id": ioc_id,
                 "value": domain,
+                "ioc_value": ioc_value,
                 "type": "domain",
                 "source": source,
                 "confidence": confidence,
@@ -66,19 +70,22 @@ class ThreatIntelLookup:
         """
         Lookup an IP address in threat intel.
         
+        Matches IP IOCs and network (CIDR) IOCs containing the address.
+        
         Args:
             ip: IP address to lookup
             
         Returns:
             Dict with IOC info if found, None otherwise
         """
-        result = self.store.lookup(IOCType.IP, ip)
+        result = self.store.match_ip(ip)
         
         if result:
-            ioc_id, confidence, source = result
+            ioc_value, (ioc_id, confidence, source) = result
             return {
                 "ioc_id": ioc_id,
                 "value": ip,
+                "ioc_value": ioc_value,
                 "type": "ip",
                 "source": source,
                 "confidence": confidence,
@@ -112,7 +119,7 @@ class ThreatIntelLookup:
     
     def bulk_lookup_domains(self, domains: Set[str]) -> Dict[str, Dict]:
         """
-        Bulk lookup multiple domains.
+        Bulk lookup multiple domains, matching parent domains too.
         
         Args:
             domains: Set of domain names
@@ -123,19 +130,14 @@ class ThreatIntelLookup:
         if not domains:
             return {}
         
-        results = self.store.bulk_lookup(IOCType.DOMAIN, domains)
-        
-        # Convert to more usable format
-        # Create reverse mapping for case-insensitive match
-        domain_lower_map = {d.lower(): d for d in domains}
+        results = self.store.bulk_match_domains(domains)
         
         matches = {}
-        for domain_lower, (ioc_id, confidence, source) in results.items():
-            # Get original domain (case-preserved)
-            original_domain = domain_lower_map.get(domain_lower, domain_lower)
-            matches[original_domain] = {
+        for domain, (ioc_value, (ioc_id, confidence, source)) in results.items():
+            matches[domain] = {
                 "ioc_id": ioc_id,
-                "value": original_domain,
+                "value": domain,
+                "ioc_value": ioc_value,
                 "type": "domain",
                 "source": source,
                 "confidence": confidence,
@@ -156,13 +158,14 @@ class ThreatIntelLookup:
         if not ips:
             return {}
         
-        results = self.store.bulk_lookup(IOCType.IP, ips)
+        results = self.store.bulk_match_ips(ips)
         
         matches = {}
-        for ip, (ioc_id, confidence, source) in results.items():
+        for ip, (ioc_value, (ioc_id, confidence, source)) in results.items():
             matches[ip] = {
                 "ioc_id": ioc_id,
                 "value": ip,
+                "ioc_value": ioc_value,
                 "type": "ip",
                 "source": source,
                 "confidence": confidence,
@@ -258,6 +261,7 @@ def enrich_event_with_ti(event_data: Dict, ti_lookup: ThreatIntelLookup = None)
             ioc_matches.append({
                 "type": "domain",
                 "value": domain,
+                "ioc_value": match_info["ioc_value"],
                 "source": match_info["source"],
                 "confidence": match_info["confidence"],
             })
@@ -278,6 +282,7 @@ def enrich_event_with_ti(event_data: Dict, ti_lookup: ThreatIntelLookup = None)
             ioc_matches.append({
                 "type": "ip",
                 "value": ip,
+                "ioc_value": match_info["ioc_value"],
                 "source": match_info["source"],
                 "confidence": match_info["confidence"],
             })
@@ -8,13 +8,19 @@ Cross-references detected domains/IPs against known threats to boost risk scores
 import asyncio
 import logging
 import sqlite3
+import threading
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Set
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from dataclasses import dataclass
 from enum import Enum
 
 import aiohttp
+import numpy as np
+
+from orion_ai.config import get_config
+from orion_ai.threat_intel.ioc_index import IOCIndex, indicator_type
 
 logger = logging.getLogger(__name__)
 
@@ -44,24 +50,47 @@ class ThreatIntelligenceCache:
     """
     SQLite-backed cache for threat intelligence indicators.
     Provides fast lookups during detection pipelines.
+    
+    Lookups are answered from an in-memory IOCIndex that is loaded at
+    startup and rebuilt after every write through this cache, and when the
+    database file changes (e.g. after a feed refresh in another process).
     """
     
-    def __init__(self, db_path: str = "/var/lib/orion-ai/threat_intel.db"):
+    def __init__(
+        self,
+        db_path: str = "/var/lib/orion-ai/threat_intel.db",
+        index_check_seconds: float = 30.0
+    ):
         """
         Initialize threat intelligence cache.
         
         Args:
             db_path: Path to SQLite database file
+            index_check_seconds: How often lookups check the database
+                file for changes made by other instances
         """
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.index_check_seconds = index_check_seconds
+        self._index_version: Optional[Tuple[int, ...]] = None
+        self._index_checked_at = 0.0
         self._init_db()
+        self._index: IOCIndex[ThreatIndicator] = self.reload_index()
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with pragmas suited to bulk writes and concurrent reads"""
+        conn = sqlite3.connect(self.db_path, timeout=30.0)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
     
     def _init_db(self):
         """Initialize database schema"""
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
+        # WAL lets readers proceed while feeds are being written
+        cursor.execute("PRAGMA journal_mode=WAL")
+        
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS threat_indicators (
                 value TEXT PRIMARY KEY,
@@ -94,15 +123,15 @@ class ThreatIntelligenceCache:
         Args:
             indicators: List of threat indicators to add
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for indicator in indicators:
-            cursor.execute("""
-                INSERT OR REPLACE INTO threat_indicators 
-                (value, threat_type, source, confidence, first_seen, last_updated, description)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+        conn = self._connect()
+        
+        # One executemany in a single transaction
+        conn.executemany("""
+            INSERT OR REPLACE INTO threat_indicators 
+            (value, threat_type, source, confidence, first_seen, last_updated, description)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, [
+            (
                 indicator.value,
                 indicator.threat_type.value,
                 indicator.source,
@@ -110,36 +139,46 @@ class ThreatIntelligenceCache:
                 indicator.first_seen.isoformat(),
                 indicator.last_updated.isoformat(),
                 indicator.description
-            ))
+            )
+            for indicator in indicators
+        ])
         
         conn.commit()
         conn.close()
         logger.info(f"Added {len(indicators)} threat indicators to cache")
+        
+        self.reload_index()
     
-    def lookup(self, value: str) -> Optional[ThreatIndicator]:
+    def _db_version(self) -> Tuple[int, ...]:
+        """Get modification times of the database files."""
+        version = []
+        for suffix in ("", "-wal"):
+            try:
+                version.append(Path(f"{self.db_path}{suffix}").stat().st_mtime_ns)
+            except FileNotFoundError:
+                version.append(0)
+        return tuple(version)
+    
+    def reload_index(self) -> IOCIndex:
         """
-        Look up a domain or IP in the threat intelligence cache.
+        Load all indicators into a new in-memory index and swap it in.
+        
+        Lookups running concurrently keep using the previous index.
         
-        Args:
-            value: Domain or IP to check
-            
         Returns:
-            ThreatIndicator if found, None otherwise
+            The new IOCIndex
         """
-        conn = sqlite3.connect(self.db_path)
+        version = self._db_version()
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute("""
             SELECT value, threat_type, source, confidence, first_seen, last_updated, description
             FROM threat_indicators
-            WHERE value = ?
-        """, (value,))
-        
-        row = cursor.fetchone()
-        conn.close()
+        """)
         
-        if row:
-            return ThreatIndicator(
+        index = IOCIndex.from_rows(
+            (indicator_type(row[0]), row[0], ThreatIndicator(
                 value=row[0],
                 threat_type=ThreatType(row[1]),
                 source=row[2],
@@ -147,8 +186,76 @@ class ThreatIntelligenceCache:
                 first_seen=datetime.fromisoformat(row[4]),
                 last_updated=datetime.fromisoformat(row[5]),
                 description=row[6]
-            )
-        return None
+            ))
+            for row in cursor
+        )
+        conn.close()
+        
+        self._index = index
+        self._index_version = version
+        self._index_checked_at = time.monotonic()
+        logger.info(f"Loaded {len(index)} threat indicators into memory")
+        return index
+    
+    @property
+    def index(self) -> IOCIndex:
+        """
+        Get the current in-memory index, reloading it if the database changed.
+        
+        Returns:
+            IOCIndex mapping (type, value) -> ThreatIndicator
+        """
+        now = time.monotonic()
+        if now - self._index_checked_at >= self.index_check_seconds:
+            self._index_checked_at = now
+            if self._db_version() != self._index_version:
+                return self.reload_index()
+        
+        return self._index
+    
+    def lookup(self, value: str) -> Optional[ThreatIndicator]:
+        """
+        Look up a domain or IP in the threat intelligence cache.
+        
+        Domains also match indicators for any parent domain, and IPs match
+        network (CIDR) indicators; the most specific match is returned.
+        
+        Args:
+            value: Domain or IP to check
+            
+        Returns:
+            ThreatIndicator if found, None otherwise
+        """
+        if indicator_type(value) == "ip":
+            match = self.index.match_ip(value)
+        else:
+            match = self.index.match_domain(value)
+        return match[1] if match else None
+    
+    def bulk_lookup(
+        self,
+        values: Iterable[str],
+        ioc_type: str = "domain"
+    ) -> Dict[str, ThreatIndicator]:
+        """
+        Look up many domains or IPs in the threat intelligence cache.
+        
+        Domains also match indicators for any parent domain, and IPs
+        match network (CIDR) indicators.
+        
+        Args:
+            values: Domains or IPs to check
+            ioc_type: "domain" or "ip"
+            
+        Returns:
+            Dictionary: {value: ThreatIndicator} for values that matched
+        """
+        if ioc_type == "ip":
+            matches = self.index.bulk_match_ips(values)
+        else:
+            matches = self.index.bulk_match_domains(values)
+        
+        return {value: indicator for value, (_, indicator) in matches.items()}
     
     def cleanup_old_indicators(self, days: int = 30):
         """
@@ -159,7 +266,7 @@ class ThreatIntelligenceCache:
         """
         cutoff = datetime.now() - timedelta(days=days)
         
-        conn = sqlite3.connect(self.db_path)
+        conn = self._connect()
         cursor = conn.cursor()
         
         cursor.execute("""
@@ -172,6 +279,9 @@ class ThreatIntelligenceCache:
         conn.close()
         
         logger.info(f"Cleaned up {deleted} old threat indicators")
+        
+        if deleted:
+            self.reload_index()
 
 
 class ThreatFeedFetcher:
@@ -421,7 +531,8 @@ class ThreatIntelligenceService:
         self,
         cache_path: str = "/var/lib/orion-ai/threat_intel.db",
         otx_api_key: Optional[str] = None,
-        refresh_interval_hours: int = 6
+        refresh_interval_hours: int = 6,
+        index_check_seconds: float = 30.0
     ):
         """
         Initialize threat intelligence service.
@@ -430,8 +541,10 @@ class ThreatIntelligenceService:
             cache_path: Path to SQLite cache database
             otx_api_key: AlienVault OTX API key (optional)
             refresh_interval_hours: How often to refresh feeds
+            index_check_seconds: How often lookups check the cache database
+                for changes made by other processes
         """
-        self.cache = ThreatIntelligenceCache(cache_path)
+        self.cache = ThreatIntelligenceCache(cache_path, index_check_seconds)
         self.fetcher = ThreatFeedFetcher(otx_api_key=otx_api_key)
         self.refresh_interval = timedelta(hours=refresh_interval_hours)
         self.last_refresh: Optional[datetime] = None
@@ -460,27 +573,66 @@ class ThreatIntelligenceService:
     
     def check_domain(self, domain: str) -> Optional[ThreatIndicator]:
         """
-        Check if a domain is a known threat.
+        Check if a domain, or any of its parent domains, is a known threat.
         
         Args:
             domain: Domain to check
             
         Returns:
-            ThreatIndicator if domain is malicious, None otherwise
+            Most specific matching ThreatIndicator, None if not malicious
         """
-        return self.cache.lookup(domain)
+        match = self.cache.index.match_domain(domain)
+        return match[1] if match else None
+    
+    def check_domains(self, domains: Iterable[str]) -> Dict[str, ThreatIndicator]:
+        """
+        Check many domains (and their parent domains) against known
+        threats in one pass.
+        
+        Args:
+            domains: Domains to check
+            
+        Returns:
+            Dictionary: {domain: ThreatIndicator} for malicious domains
+        """
+        return self.cache.bulk_lookup(domains, "domain")
     
     def check_ip(self, ip: str) -> Optional[ThreatIndicator]:
         """
-        Check if an IP is a known threat.
+        Check if an IP is a known threat or inside a known malicious network.
         
         Args:
             ip: IP address to check
             
         Returns:
-            ThreatIndicator if IP is malicious, None otherwise
+            Most specific matching ThreatIndicator, None if not malicious
+        """
+        match = self.cache.index.match_ip(ip)
+        return match[1] if match else None
+    
+    def check_ips(self, ips: Iterable[str]) -> Dict[str, ThreatIndicator]:
+        """
+        Check many IPs against known malicious addresses and networks.
+        
+        Args:
+            ips: IP addresses to check
+            
+        Returns:
+            Dictionary: {ip: ThreatIndicator} for malicious IPs
+        """
+        return self.cache.bulk_lookup(ips, "ip")
+    
+    def ip_hits(self, ips: Sequence[str]) -> np.ndarray:
+        """
+        Flag which IPs are known malicious addresses or fall in malicious networks.
+        
+        Args:
+            ips: IP addresses (e.g. the dest_ip column of a flow batch)
+            
+        Returns:
+            Boolean array aligned with ips
         """
-        return self.cache.lookup(ip)
+        return self.cache.index.ip_hits(ips)
     
     def cleanup_old_data(self, days: int = 30):
         """
@@ -490,3 +642,30 @@ class ThreatIntelligenceService:
             days: Remove data older than this many days
         """
         self.cache.cleanup_old_indicators(days)
+
+
+_service: Optional[ThreatIntelligenceService] = None
+_service_lock = threading.Lock()
+
+
+def get_threat_intel_service() -> ThreatIntelligenceService:
+    """
+    Get the process-wide threat intelligence service, creating it on first use.
+    
+    Pipelines share this instance, so a feed refresh is visible to all of
+    them at once and the indicator index is held in memory only once.
+    
+    Returns:
+        ThreatIntelligenceService
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            config = get_config().threat_intel
+            _service = ThreatIntelligenceService(
+                cache_path=config.cache_path,
+                otx_api_key=config.otx_api_key,
+                refresh_interval_hours=config.refresh_interval_hours,
+                index_check_seconds=config.index_check_seconds
+            )
+        return _service
@@ -7,12 +7,14 @@ Provides fast lookups and deduplication.
 
 import logging
 import sqlite3
+import time
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional, Set, Tuple
+from typing import Dict, List, Optional, Set, Tuple
 from contextlib import contextmanager
 
 from .ioc_extractor import IOC, IOCType
+from .ioc_index import IOCIndex
 
 logger = logging.getLogger(__name__)
 
@@ -25,20 +27,39 @@ class IOCStore:
     - Fast lookups with indexes
     - Automatic deduplication
     - Expiration of old IOCs
-    - Source attribution
+    - Source attribution (normalized into a sources table)
     - Confidence tracking
+    - Bulk ingestion in one short write transaction (WAL mode, so
+      readers are never blocked by a sync)
+    
+    Lookups are answered from an in-memory IOCIndex loaded on first use.
+    The index is rebuilt after writes through this store, and when the
+    database file changes (e.g. after a sync run in another process).
     """
     
-    def __init__(self, db_path: Path, retention_days: int = 90):
+    def __init__(
+        self,
+        db_path: Path,
+        retention_days: int = 90,
+        index_check_seconds: float = 30.0
+    ):
         """
         Initialize IOC store.
         
         Args:
             db_path: Path to SQLite database file
             retention_days: How long to keep IOCs (default: 90 days)
+            index_check_seconds: How often lookups check the database
+                file for changes made by other processes
         """
         self.db_path = Path(db_path)
         self.retention_days = retention_days
+        self.index_check_seconds = index_check_seconds
+        
+        # In-memory index state (loaded lazily)
+        self._index: Optional[IOCIndex[Tuple[int, float, str]]] = None
+        self._index_version: Optional[Tuple[int, ...]] = None
+        self._index_checked_at = 0.0
         
         # Ensure directory exists
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -51,6 +72,9 @@ class IOCStore:
     def _init_db(self):
         """Create database schema if it doesn't exist."""
         with self._get_connection() as conn:
+            # WAL lets lookups read while a sync is writing (persists in the file)
+            conn.execute("PRAGMA journal_mode=WAL")
+            
             conn.execute("""
                 CREATE TABLE IF NOT EXISTS iocs (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -95,68 +119,256 @@ class IOCStore:
                 ON ioc_matches(matched_at)
             """)
             
+            # Normalized IOC sources
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sources (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL UNIQUE
+                )
+            """)
+            
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS ioc_sources (
+                    ioc_id INTEGER NOT NULL,
+                    source_id INTEGER NOT NULL,
+                    PRIMARY KEY(ioc_id, source_id),
+                    FOREIGN KEY(ioc_id) REFERENCES iocs(id),
+                    FOREIGN KEY(source_id) REFERENCES sources(id)
+                ) WITHOUT ROWID
+            """)
+            
             conn.commit()
+            
+            self._migrate_sources(conn)
+    
+    def _migrate_sources(self, conn: sqlite3.Connection):
+        """
+        Populate the sources tables from legacy comma-joined source columns.
+        
+        Runs once, when IOCs exist but no IOC sources have been recorded.
+        """
+        if conn.execute("SELECT 1 FROM ioc_sources LIMIT 1").fetchone():
+            return
+        
+        rows = conn.execute("SELECT id, source FROM iocs").fetchall()
+        if not rows:
+            return
+        
+        links = {
+            (row['id'], name.strip())
+            for row in rows
+            for name in row['source'].split(',')
+            if name.strip()
+        }
+        
+        with conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO sources (name) VALUES (?)",
+                {(name,) for _, name in links}
+            )
+            conn.executemany("""
+                INSERT OR IGNORE INTO ioc_sources (ioc_id, source_id)
+                SELECT ?, id FROM sources WHERE name = ?
+            """, links)
+            conn.execute("""
+                UPDATE iocs SET source = (
+                    SELECT group_concat(name, ',') FROM (
+                        SELECT s.name FROM ioc_sources x
+                        JOIN sources s ON s.id = x.source_id
+                        WHERE x.ioc_id = iocs.id
+                        ORDER BY s.name
+                    )
+                )
+            """)
+        
+        logger.info(f"Migrated sources for {len(rows)} IOCs")
     
     @contextmanager
     def _get_connection(self):
         """Get database connection with context manager."""
-        conn = sqlite3.connect(str(self.db_path))
+        conn = sqlite3.connect(str(self.db_path), timeout=30.0)
         conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
         try:
             yield conn
         finally:
             conn.close()
     
+    def _db_version(self) -> Tuple[int, ...]:
+        """Get modification times of the database files."""
+        version = []
+        for suffix in ("", "-wal"):
+            try:
+                version.append(Path(f"{self.db_path}{suffix}").stat().st_mtime_ns)
+            except FileNotFoundError:
+                version.append(0)
+        return tuple(version)
+    
+    def reload_index(self) -> IOCIndex:
+        """
+        Load all IOCs into a new in-memory index and swap it in.
+        
+        Lookups running concurrently keep using the previous index.
+        
+        Returns:
+            The new IOCIndex
+        """
+        version = self._db_version()
+        
+        with self._get_connection() as conn:
+            cursor = conn.execute("""
+                SELECT type, value, id, confidence, source
+                FROM iocs
+            """)
+            index = IOCIndex.from_rows(
+                (row['type'], row['value'], (row['id'], row['confidence'], row['source']))
+                for row in cursor
+            )
+        
+        self._index = index
+        self._index_version = version
+        self._index_checked_at = time.monotonic()
+        
+        logger.info(f"Loaded {len(index)} IOCs into memory: {index.counts()}")
+        return index
+    
+    @property
+    def index(self) -> IOCIndex:
+        """
+        Get the current in-memory index, reloading it if the database changed.
+        
+        Returns:
+            IOCIndex mapping (type, value) -> (ioc_id, confidence, source)
+        """
+        if self._index is None:
+            return self.reload_index()
+        
+        now = time.monotonic()
+        if now - self._index_checked_at >= self.index_check_seconds:
+            self._index_checked_at = now
+            if self._db_version() != self._index_version:
+                return self.reload_index()
+        
+        return self._index
+    
     def add_iocs(self, iocs: List[IOC]) -> int:
         """
         Add IOCs to store.
         
-        Deduplicates and updates existing IOCs.
+        Deduplicates and updates existing IOCs. Rows are staged into a
+        temporary table with executemany, then merged with set-based
+        statements in a single write transaction; each IOC's sources are
+        recorded once in the ioc_sources table.
         
         Args:
             iocs: List of IOC objects
             
         Returns:
-            Number of IOCs added/updated
+            Number of distinct IOCs added/updated
         """
         if not iocs:
             return 0
         
         now = datetime.now()
-        count = 0
+        rows = []
+        for ioc in iocs:
+            try:
+                rows.append((
+                    ioc.type.value,
+                    ioc.value.strip().lower(),
+                    getattr(ioc.source, 'value', ioc.source),
+                    ioc.confidence,
+                    getattr(ioc, 'context', None) or getattr(ioc, 'description', None)
+                ))
+            except Exception as e:
+                logger.warning(f"Failed to add IOC {ioc.value}: {e}")
         
         with self._get_connection() as conn:
-            for ioc in iocs:
-                try:
-                    conn.execute("""
-                        INSERT INTO iocs 
-                        (type, value, source, first_seen, last_seen, confidence, context)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                        ON CONFLICT(type, value) DO UPDATE SET
-                            last_seen = ?,
-                            confidence = MAX(confidence, ?),
-                            context = COALESCE(?, context),
-                            source = source || ',' || ?
-                    """, (
-                        ioc.type.value,
-                        ioc.value,
-                        ioc.source,
-                        now,
-                        now,
-                        ioc.confidence,
-                        ioc.context,
-                        now,
-                        ioc.confidence,
-                        ioc.context,
-                        ioc.source
-                    ))
-                    count += 1
-                except Exception as e:
-                    logger.warning(f"Failed to add IOC {ioc.value}: {e}")
-            
+            conn.execute("""
+                CREATE TEMP TABLE IF NOT EXISTS ioc_stage (
+                    type TEXT NOT NULL,
+                    value TEXT NOT NULL,
+                    source TEXT NOT NULL,
+                    confidence REAL NOT NULL,
+                    context TEXT
+                )
+            """)
+            conn.execute("DELETE FROM ioc_stage")
+            conn.executemany("INSERT INTO ioc_stage VALUES (?, ?, ?, ?, ?)", rows)
+            conn.execute("CREATE INDEX IF NOT EXISTS temp.idx_stage ON ioc_stage(type, value)")
             conn.commit()
+            
+            # Merge in one short write transaction
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("""
+                    INSERT OR IGNORE INTO sources (name)
+                    SELECT DISTINCT source FROM ioc_stage
+                """)
+                
+                cursor = conn.execute("""
+                    INSERT INTO iocs
+                    (type, value, source, first_seen, last_seen, confidence, context)
+                    SELECT type, value, MIN(source), ?, ?, MAX(confidence), MAX(context)
+                    FROM ioc_stage
+                    GROUP BY type, value
+                    ON CONFLICT(type, value) DO UPDATE SET
+                        last_seen = excluded.last_seen,
+                        confidence = MAX(confidence, excluded.confidence),
+                        context = COALESCE(excluded.context, context)
+                """, (now, now))
+                count = cursor.rowcount
+                
+                # Record (IOC, source) pairs not seen before
+                conn.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS ioc_new_links (
+                        ioc_id INTEGER NOT NULL,
+                        source_id INTEGER NOT NULL
+                    )
+                """)
+                conn.execute("DELETE FROM ioc_new_links")
+                conn.execute("""
+                    INSERT INTO ioc_new_links (ioc_id, source_id)
+                    SELECT DISTINCT i.id, s.id
+                    FROM ioc_stage st
+                    JOIN iocs i ON i.type = st.type AND i.value = st.value
+                    JOIN sources s ON s.name = st.source
+                    WHERE NOT EXISTS (
+                        SELECT 1 FROM ioc_sources x
+                        WHERE x.ioc_id = i.id AND x.source_id = s.id
+                    )
+                """)
+                conn.execute("""
+                    INSERT OR IGNORE INTO ioc_sources (ioc_id, source_id)
+                    SELECT ioc_id, source_id FROM ioc_new_links
+                """)
+                
+                # Keep the denormalized source column as a deduplicated list
+                # (only IOCs that gained a source and have more than one)
+                conn.execute("""
+                    UPDATE iocs SET source = (
+                        SELECT group_concat(name, ',') FROM (
+                            SELECT s.name FROM ioc_sources x
+                            JOIN sources s ON s.id = x.source_id
+                            WHERE x.ioc_id = iocs.id
+                            ORDER BY s.name
+                        )
+                    )
+                    WHERE id IN (SELECT ioc_id FROM ioc_new_links)
+                    AND (SELECT COUNT(*) FROM ioc_sources x WHERE x.ioc_id = iocs.id) > 1
+                """)
+                
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
         
         logger.info(f"Added/updated {count} IOCs to store")
+        
+        if self._index is not None:
+            self.reload_index()
+        
         return count
     
     def lookup(
@@ -174,19 +386,7 @@ class IOCStore:
         Returns:
             Tuple of (ioc_id, confidence, source) if found, None otherwise
         """
-        with self._get_connection() as conn:
-            cursor = conn.execute("""
-                SELECT id, confidence, source
-                FROM iocs
-                WHERE type = ? AND value = ?
-                LIMIT 1
-            """, (ioc_type.value, value.lower()))
-            
-            row = cursor.fetchone()
-            if row:
-                return (row['id'], row['confidence'], row['source'])
-        
-        return None
+        return self.index.lookup(ioc_type, value)
     
     def bulk_lookup(
         self,
@@ -206,33 +406,63 @@ class IOCStore:
         if not values:
             return {}
         
-        results = {}
+        return self.index.bulk_lookup(ioc_type, values)
+    
+    def match_domain(self, domain: str) -> Optional[Tuple[str, Tuple[int, float, str]]]:
+        """
+        Find the most specific domain IOC for a domain or any parent domain.
         
-        # Normalize values
-        values_lower = {v.lower() for v in values}
+        Args:
+            domain: Domain name
+            
+        Returns:
+            Tuple of (matched IOC value, (ioc_id, confidence, source)) if
+            found, None otherwise
+        """
+        return self.index.match_domain(domain, IOCType.DOMAIN)
+    
+    def bulk_match_domains(
+        self,
+        domains: Set[str]
+    ) -> Dict[str, Tuple[str, Tuple[int, float, str]]]:
+        """
+        Find the most specific domain IOC for many domains.
         
-        with self._get_connection() as conn:
-            # Build query with placeholders
-            placeholders = ','.join('?' * len(values_lower))
-            query = f"""
-                SELECT value, id, confidence, source
-                FROM iocs
-                WHERE type = ? AND value IN ({placeholders})
-            """
+        Args:
+            domains: Set of domain names
             
-            cursor = conn.execute(
-                query,
-                [ioc_type.value] + list(values_lower)
-            )
+        Returns:
+            Dict mapping domain -> (matched IOC value, (ioc_id, confidence, source))
+        """
+        return self.index.bulk_match_domains(domains, IOCType.DOMAIN)
+    
+    def match_ip(self, ip: str) -> Optional[Tuple[str, Tuple[int, float, str]]]:
+        """
+        Find the most specific IP or CIDR IOC containing an address.
+        
+        Args:
+            ip: IP address
             
-            for row in cursor:
-                results[row['value']] = (
-                    row['id'],
-                    row['confidence'],
-                    row['source']
-                )
+        Returns:
+            Tuple of (matched network, (ioc_id, confidence, source)) if
+            found, None otherwise
+        """
+        return self.index.match_ip(ip)
+    
+    def bulk_match_ips(
+        self,
+        ips: Set[str]
+    ) -> Dict[str, Tuple[str, Tuple[int, float, str]]]:
+        """
+        Find the most specific IP or CIDR IOC for many addresses.
         
-        return results
+        Args:
+            ips: Set of IP addresses
+            
+        Returns:
+            Dict mapping IP -> (matched network, (ioc_id, confidence, source))
+        """
+        return self.index.bulk_match_ips(ips)
     
     def record_match(
         self,
@@ -285,10 +515,17 @@ class IOCStore:
             """, (cutoff,))
             
             count = cursor.rowcount
+            
+            conn.execute("""
+                DELETE FROM ioc_sources
+                WHERE ioc_id NOT IN (SELECT id FROM iocs)
+            """)
             conn.commit()
         
         if count > 0:
             logger.info(f"Cleaned up {count} old IOCs")
+            if self._index is not None:
+                self.reload_index()
         
         return count
     
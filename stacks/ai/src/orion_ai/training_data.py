@@ -0,0 +1,450 @@
+"""
+Memory-bounded access to collected training data.
+
+DataCollector appends feature records to daily `*.jsonl.gz` files and
+records per-file row counts and time ranges in a manifest next to them,
+so readiness checks never decompress the data. FeatureLoader streams the
+files straight into a float32 array (optionally an np.memmap spill file)
+sized from the manifest, subsampling to a row budget on the way, so peak
+memory is the budget rather than a multiple of the dataset.
+"""
+
+import gzip
+import json
+import logging
+import os
+import tempfile
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Prefer a fast JSON decoder when one is installed
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+MANIFEST_NAME = "manifest.json"
+
+SAMPLING_STRATEGIES = ("reservoir", "stratified")
+
+# Records parsed per vectorized reservoir update
+CHUNK_ROWS = 4096
+
+
+def _loads(line: bytes):
+    """Decode one JSON line."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+@dataclass
+class FileStats:
+    """
+    Manifest entry for one data file.
+    
+    Attributes:
+        rows: Records in the file
+        first: Earliest record timestamp (ISO format)
+        last: Latest record timestamp (ISO format)
+        size: File size when the entry was written
+        mtime_ns: File modification time when the entry was written
+    """
+    rows: int
+    first: Optional[str]
+    last: Optional[str]
+    size: int
+    mtime_ns: int
+    
+    def matches(self, path: Path) -> bool:
+        """Check the entry still describes the file on disk."""
+        stat = path.stat()
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+
+class FeatureManifest:
+    """
+    Row counts and time ranges of the data files in one directory.
+    
+    Entries are keyed by file name and remember the file's size and mtime;
+    a file without a matching entry (written before manifests existed, or
+    changed outside DataCollector) is scanned once and its entry saved.
+    """
+    
+    def __init__(self, directory: Path):
+        """
+        Initialize manifest for a data directory.
+        
+        Args:
+            directory: Directory holding *.jsonl.gz data files
+        """
+        self.directory = Path(directory)
+        self.path = self.directory / MANIFEST_NAME
+    
+    def record(
+        self,
+        file_name: str,
+        rows: int,
+        first: datetime,
+        last: datetime,
+        previous_size: int = 0
+    ):
+        """
+        Account for records just appended to a file.
+        
+        Args:
+            file_name: Data file name
+            rows: Records appended
+            first: Earliest appended record timestamp
+            last: Latest appended record timestamp
+            previous_size: File size before the append (0 for a new file)
+        """
+        entries = self._load()
+        path = self.directory / file_name
+        stat = path.stat()
+        
+        entry = entries.get(file_name)
+        if previous_size and (entry is None or entry.size != previous_size):
+            # Earlier contents are not in the manifest: index the whole file
+            entries[file_name] = self._scan(path)
+            self._save(entries)
+            return
+        
+        if entry is None:
+            entry = FileStats(0, first.isoformat(), last.isoformat(), 0, 0)
+        entry.rows += rows
+        entry.first = min(entry.first or first.isoformat(), first.isoformat())
+        entry.last = max(entry.last or last.isoformat(), last.isoformat())
+        entry.size = stat.st_size
+        entry.mtime_ns = stat.st_mtime_ns
+        entries[file_name] = entry
+        self._save(entries)
+    
+    def files(self) -> Dict[Path, FileStats]:
+        """
+        Get up-to-date stats for every data file, oldest file first.
+        
+        Returns:
+            {path: FileStats}
+        """
+        entries = self._load()
+        paths = sorted(self.directory.glob("*.jsonl.gz"))
+        
+        stale = [p for p in paths if p.name not in entries or not entries[p.name].matches(p)]
+        for path in stale:
+            logger.info(f"Indexing {path.name} (no manifest entry)")
+            entries[path.name] = self._scan(path)
+        
+        names = {p.name for p in paths}
+        if stale or set(entries) - names:
+            self._save({name: entry for name, entry in entries.items() if name in names})
+        
+        return {p: entries[p.name] for p in paths}
+    
+    def totals(self) -> Tuple[int, Optional[str], Optional[str]]:
+        """
+        Get total rows and overall time range.
+        
+        Returns:
+            Tuple of (rows, first timestamp, last timestamp)
+        """
+        stats = list(self.files().values())
+        firsts = [s.first for s in stats if s.first]
+        lasts = [s.last for s in stats if s.last]
+        return (
+            sum(s.rows for s in stats),
+            min(firsts) if firsts else None,
+            max(lasts) if lasts else None
+        )
+    
+    def _load(self) -> Dict[str, FileStats]:
+        """Read the manifest file."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return {name: FileStats(**entry) for name, entry in data.items()}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable manifest {self.path}: {e}")
+            return {}
+    
+    def _save(self, entries: Dict[str, FileStats]):
+        """Write the manifest file atomically."""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({name: vars(entry) for name, entry in sorted(entries.items())}, f, indent=1)
+        os.replace(tmp_path, self.path)
+    
+    @staticmethod
+    def _scan(path: Path) -> FileStats:
+        """Count records and find the time range of one file."""
+        stat = path.stat()
+        rows, first, last = 0, None, None
+        try:
+            with gzip.open(path, "rb") as f:
+                for line in f:
+                    rows += 1
+                    try:
+                        timestamp = _loads(line).get("timestamp")
+                    except ValueError:
+                        continue
+                    if timestamp:
+                        first = min(first or timestamp, timestamp)
+                        last = max(last or timestamp, timestamp)
+        except Exception as e:
+            logger.warning(f"Failed to read {path} after {rows} records: {e}")
+        return FileStats(rows, first, last, stat.st_size, stat.st_mtime_ns)
+
+
+class FeatureLoader:
+    """
+    Streams feature vectors from collected data files into a float32 array.
+    
+    With a row budget, rows are subsampled while reading:
+    - "reservoir": uniform sample over all rows (Algorithm R)
+    - "stratified": the budget is split evenly across files (one file per
+      collection day), so quiet days are as well represented as busy
+      ones; only the selected lines are decoded
+    
+    Attributes:
+        directory: Directory holding *.jsonl.gz data files
+        id_field: Record field identifying the row (device_ip, domain)
+        max_rows: Row budget (None = all rows)
+        sampling: "reservoir" or "stratified"
+        spill_dir: Directory for an np.memmap backing file (None = in memory)
+    """
+    
+    def __init__(
+        self,
+        directory: Path,
+        id_field: str,
+        max_rows: Optional[int] = None,
+        sampling: str = "stratified",
+        spill_dir: Optional[Path] = None,
+        seed: int = 42
+    ):
+        """
+        Initialize feature loader.
+        
+        Args:
+            directory: Directory holding *.jsonl.gz data files
+            id_field: Record field identifying the row
+            max_rows: Row budget (None = all rows)
+            sampling: "reservoir" or "stratified"
+            spill_dir: Directory for an np.memmap backing file
+            seed: Random seed for subsampling
+        """
+        if sampling not in SAMPLING_STRATEGIES:
+            raise ValueError(f"Sampling must be one of: {SAMPLING_STRATEGIES}")
+        
+        self.directory = Path(directory)
+        self.id_field = id_field
+        self.max_rows = max_rows
+        self.sampling = sampling
+        self.spill_dir = Path(spill_dir) if spill_dir else None
+        self.manifest = FeatureManifest(self.directory)
+        self._rng = np.random.default_rng(seed)
+    
+    def load(self) -> Tuple[np.ndarray, List[str]]:
+        """
+        Load (a sample of) the feature vectors.
+        
+        Returns:
+            Tuple of (float32 array of shape (rows, width), row IDs)
+        """
+        files = self.manifest.files()
+        total = sum(stats.rows for stats in files.values())
+        width = self._width(files)
+        if not total or width is None:
+            return np.empty((0, width or 0), dtype=np.float32), []
+        
+        budget = total if self.max_rows is None else min(self.max_rows, total)
+        if budget <= 0:
+            return np.empty((0, width), dtype=np.float32), []
+        features = self._allocate(budget, width)
+        
+        if budget == total:
+            count, ids = self._load_all(files, features)
+        elif self.sampling == "stratified":
+            count, ids = self._load_stratified(files, features, budget)
+        else:
+            count, ids = self._load_reservoir(files, features, budget)
+        
+        if count < budget:
+            features = features[:count]
+        
+        logger.info(
+            f"Loaded {count} of {total} rows from {len(files)} files in {self.directory}"
+            + (f" ({self.sampling} sample)" if budget < total else "")
+            + (" into a memmap spill file" if self.spill_dir else "")
+        )
+        return features, ids
+    
+    def _allocate(self, rows: int, width: int) -> np.ndarray:
+        """Allocate the output array, in memory or as a memmap spill file."""
+        if self.spill_dir is None:
+            return np.empty((rows, width), dtype=np.float32)
+        
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        # Unlinked on close; the mapping stays valid until the array is freed
+        with tempfile.TemporaryFile(dir=self.spill_dir, prefix="features-") as f:
+            return np.memmap(f, dtype=np.float32, mode="w+", shape=(rows, width))
+    
+    def _width(self, files: Dict[Path, FileStats]) -> Optional[int]:
+        """Feature vector width, from the first record."""
+        for path, stats in files.items():
+            if not stats.rows:
+                continue
+            for _, _, vector in self._records(path, 1):
+                return len(vector)
+        return None
+    
+    def _records(self, path: Path, limit: int, select: Optional[np.ndarray] = None) -> Iterator[Tuple[int, str, list]]:
+        """
+        Yield (line number, ID, feature vector) of a file's records.
+        
+        Args:
+            path: Data file
+            limit: Lines to read (the manifest row count, so rows appended
+                while loading are ignored)
+            select: Sorted line numbers to decode (None = all)
+        """
+        wanted = iter(select) if select is not None else None
+        next_wanted = next(wanted, None) if wanted is not None else None
+        try:
+            with gzip.open(path, "rb") as f:
+                for i, line in enumerate(islice(f, limit)):
+                    if wanted is not None:
+                        if i != next_wanted:
+                            continue
+                        next_wanted = next(wanted, None)
+                    try:
+                        record = _loads(line)
+                        yield i, record[self.id_field], record["feature_vector"]
+                    except (ValueError, KeyError, TypeError) as e:
+                        logger.debug(f"Skipping bad record {path.name}:{i}: {e}")
+                    if wanted is not None and next_wanted is None:
+                        return
+        except (OSError, EOFError) as e:
+            logger.warning(f"Failed to read {path}: {e}")
+    
+    def _load_all(self, files: Dict[Path, FileStats], features: np.ndarray) -> Tuple[int, List[str]]:
+        """Copy every row into the preallocated array."""
+        width = features.shape[1]
+        count, ids, skipped = 0, [], 0
+        for path, stats in files.items():
+            for _, row_id, vector in self._records(path, stats.rows):
+                if len(vector) != width:
+                    skipped += 1
+                    continue
+                features[count] = vector
+                ids.append(row_id)
+                count += 1
+        self._warn_skipped(skipped, width)
+        return count, ids
+    
+    def _load_stratified(
+        self,
+        files: Dict[Path, FileStats],
+        features: np.ndarray,
+        budget: int
+    ) -> Tuple[int, List[str]]:
+        """Decode a random, evenly split selection of lines from each file."""
+        width = features.shape[1]
+        quotas = self._quotas({path: stats.rows for path, stats in files.items()}, budget)
+        
+        count, ids, skipped = 0, [], 0
+        for path, stats in files.items():
+            quota = quotas[path]
+            if not quota:
+                continue
+            select = np.sort(self._rng.choice(stats.rows, quota, replace=False))
+            for _, row_id, vector in self._records(path, stats.rows, select):
+                if len(vector) != width:
+                    skipped += 1
+                    continue
+                features[count] = vector
+                ids.append(row_id)
+                count += 1
+        self._warn_skipped(skipped, width)
+        return count, ids
+    
+    @staticmethod
+    def _quotas(rows: Dict[Path, int], budget: int) -> Dict[Path, int]:
+        """Split a row budget evenly across files, giving unused share to larger files."""
+        quotas = {}
+        remaining = budget
+        ordered = sorted(rows, key=lambda p: rows[p])
+        for i, path in enumerate(ordered):
+            quotas[path] = min(rows[path], remaining // (len(ordered) - i))
+            remaining -= quotas[path]
+        return quotas
+    
+    def _load_reservoir(
+        self,
+        files: Dict[Path, FileStats],
+        features: np.ndarray,
+        budget: int
+    ) -> Tuple[int, List[str]]:
+        """Keep a uniform sample of budget rows in one pass."""
+        width = features.shape[1]
+        ids: List[Optional[str]] = [None] * budget
+        seen, skipped = 0, 0
+        
+        chunk_ids: List[str] = []
+        chunk = np.empty((CHUNK_ROWS, width), dtype=np.float32)
+        
+        def consume(n: int):
+            nonlocal seen
+            positions = np.arange(seen, seen + n)
+            fill = positions < budget
+            # Rows before the reservoir is full fill it in order
+            for k in np.flatnonzero(fill):
+                features[positions[k]] = chunk[k]
+                ids[positions[k]] = chunk_ids[k]
+            # Later row i replaces a random slot with probability budget / (i + 1)
+            rest = np.flatnonzero(~fill)
+            if len(rest):
+                slots = self._rng.integers(0, positions[rest] + 1)
+                keep = slots < budget
+                rest, slots = rest[keep], slots[keep]
+                # Later rows win when they draw the same slot, as in the sequential algorithm
+                slots_rev, first = np.unique(slots[::-1], return_index=True)
+                rows = rest[::-1][first]
+                features[slots_rev] = chunk[rows]
+                for slot, k in zip(slots_rev, rows):
+                    ids[slot] = chunk_ids[k]
+            seen += n
+        
+        n = 0
+        for path, stats in files.items():
+            for _, row_id, vector in self._records(path, stats.rows):
+                if len(vector) != width:
+                    skipped += 1
+                    continue
+                chunk[n] = vector
+                chunk_ids.append(row_id)
+                n += 1
+                if n == CHUNK_ROWS:
+                    consume(n)
+                    chunk_ids, n = [], 0
+        if n:
+            consume(n)
+        
+        self._warn_skipped(skipped, width)
+        count = min(seen, budget)
+        return count, ids[:count]
+    
+    def _warn_skipped(self, skipped: int, width: int):
+        """Report records whose vector width did not match."""
+        if skipped:
+            logger.warning(f"Skipped {skipped} records in {self.directory} without {width} features")
@@ -35,6 +35,18 @@ if static_dir.exists():
     app.mount("/static", StaticFiles(directory=str(static_dir)), name="static")
 
 
+@app.on_event("startup")
+async def start_views():
+    """Start background refresh of materialized views."""
+    views.start_view_refresh()
+
+
+@app.on_event("shutdown")
+async def stop_views():
+    """Stop background refresh of materialized views."""
+    views.stop_view_refresh()
+
+
 # ============================================================================
 # HTML Pages
 # ============================================================================
@@ -196,9 +208,11 @@ async def api_health():
         health = data.get("health_score")
         
         if health:
-            return health.to_dict()
+            result = health.to_dict()
         else:
-            return {"score": 0, "status": "Unknown", "metrics": {}}
+            result = {"score": 0, "status": "Unknown", "metrics": {}}
+        result["as_of"] = data["timestamp"].isoformat()
+        return result
     except Exception as e:
         logger.error(f"API health error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -323,6 +337,35 @@ async def api_device(device_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/api/views")
+async def api_views():
+    """
+    Get materialized view status.
+    
+    Returns:
+        Version, computation time and age of each view
+    """
+    return {"views": views.get_view_status()}
+
+
+@app.post("/api/views/refresh")
+async def api_refresh_views(name: Optional[str] = None):
+    """
+    Refresh materialized views in the background.
+    
+    Args:
+        name: Optional view name ("dashboard" or "devices"; default: all)
+        
+    Returns:
+        Refresh status
+    """
+    try:
+        views.refresh_views(name, wait=False)
+        return {"success": True, "view": name or "all"}
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f"Unknown view: {name}") from e
+
+
 @app.get("/api/config")
 async def api_config():
     """
@@ -0,0 +1,300 @@
+"""
+Materialized views for the web UI.
+
+Each view holds an in-memory snapshot of a computed value (dashboard
+aggregates, the device list, an event query). Requests are served from
+the snapshot; a snapshot older than its TTL is recomputed in the
+background while the old one keeps being served, and concurrent refresh
+requests share a single computation. Page latency therefore does not
+depend on Loki query time or on how many viewers are connected.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """
+    One computed version of a view.
+    
+    Attributes:
+        value: Computed view data
+        version: Increments with every successful refresh
+        computed_at: When the value was computed
+        duration: Seconds the computation took
+        error: Error of the latest failed refresh, if any (value is then
+            the last good one)
+    """
+    value: Any
+    version: int
+    computed_at: datetime
+    duration: float
+    error: Optional[str] = None
+    
+    @property
+    def age_seconds(self) -> float:
+        """Seconds since the value was computed."""
+        return (datetime.now() - self.computed_at).total_seconds()
+
+
+class MaterializedView:
+    """
+    Single-flight, TTL-refreshed snapshot of a computed value.
+    
+    Attributes:
+        name: View name (for logging and status)
+        ttl: Seconds a snapshot is served before a refresh is triggered
+    """
+    
+    def __init__(self, name: str, compute: Callable[[], Any], ttl: float):
+        """
+        Initialize materialized view (nothing is computed yet).
+        
+        Args:
+            name: View name
+            compute: Function computing the view value
+            ttl: Seconds a snapshot is served before a refresh is triggered
+        """
+        self.name = name
+        self.ttl = ttl
+        self._compute = compute
+        self._snapshot: Optional[Snapshot] = None
+        self._version = 0
+        self._refreshing: Optional[threading.Event] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def snapshot(self) -> Optional[Snapshot]:
+        """Current snapshot, or None if never computed."""
+        return self._snapshot
+    
+    def get(self) -> Snapshot:
+        """
+        Get the current snapshot.
+        
+        Blocks only when no snapshot exists yet. A snapshot older than
+        ttl is returned as is while a background refresh runs.
+        
+        Returns:
+            Snapshot
+        
+        Raises:
+            RuntimeError: If the view could not be computed at all
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.refresh(wait=True)
+            if snapshot is None:
+                raise RuntimeError(f"View '{self.name}' is unavailable")
+        elif snapshot.age_seconds >= self.ttl:
+            self.refresh(wait=False)
+        return snapshot
+    
+    def refresh(self, wait: bool = True) -> Optional[Snapshot]:
+        """
+        Recompute the view, joining a refresh already in progress.
+        
+        Args:
+            wait: Wait for the refresh to finish
+        
+        Returns:
+            The snapshot after the refresh if waiting, else the current one
+        """
+        with self._lock:
+            done = self._refreshing
+            leader = done is None
+            if leader:
+                done = self._refreshing = threading.Event()
+        
+        if leader:
+            if wait:
+                self._run(done)
+            else:
+                threading.Thread(
+                    target=self._run,
+                    args=(done,),
+                    name=f"view-{self.name}",
+                    daemon=True
+                ).start()
+        
+        if wait:
+            done.wait()
+        return self._snapshot
+    
+    def _run(self, done: threading.Event) -> None:
+        """Compute a new snapshot and release waiting callers."""
+        start = time.monotonic()
+        try:
+            value, error = self._compute(), None
+        except Exception as e:
+            logger.error(f"Failed to refresh view '{self.name}': {e}", exc_info=True)
+            value, error = None, str(e)
+        duration = time.monotonic() - start
+        
+        with self._lock:
+            if error is None:
+                self._version += 1
+                self._snapshot = Snapshot(value, self._version, datetime.now(), duration)
+                logger.debug(
+                    f"Refreshed view '{self.name}' to version {self._version} in {duration:.2f}s"
+                )
+            elif self._snapshot is not None:
+                # Keep serving the last good value, flagged with the error
+                self._snapshot = replace(self._snapshot, error=error)
+            self._refreshing = None
+        done.set()
+    
+    def status(self) -> Dict[str, Any]:
+        """Get version and staleness information."""
+        snapshot = self._snapshot
+        return {
+            "name": self.name,
+            "version": snapshot.version if snapshot else 0,
+            "computed_at": snapshot.computed_at.isoformat() if snapshot else None,
+            "age_seconds": round(snapshot.age_seconds, 1) if snapshot else None,
+            "duration_seconds": round(snapshot.duration, 3) if snapshot else None,
+            "refreshing": self._refreshing is not None,
+            "error": snapshot.error if snapshot else None,
+        }
+
+
+class ViewRegistry:
+    """
+    Named materialized views plus a scheduler refreshing some of them.
+    
+    Scheduled views are registered up front and refreshed every
+    refresh_interval. Query views (one per distinct query) are created on
+    first use and the least recently used ones are dropped beyond
+    max_query_views.
+    """
+    
+    def __init__(self, ttl: float = 30.0, max_query_views: int = 64):
+        """
+        Initialize view registry.
+        
+        Args:
+            ttl: Default snapshot TTL in seconds
+            max_query_views: Max query views kept
+        """
+        self.ttl = ttl
+        self.max_query_views = max_query_views
+        self._scheduled: Dict[str, MaterializedView] = {}
+        self._queries: "OrderedDict[str, MaterializedView]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop: Optional[threading.Event] = None
+    
+    def register(
+        self,
+        name: str,
+        compute: Callable[[], Any],
+        ttl: Optional[float] = None
+    ) -> MaterializedView:
+        """
+        Register a scheduled view.
+        
+        Args:
+            name: View name
+            compute: Function computing the view value
+            ttl: Snapshot TTL in seconds (default: registry TTL)
+        
+        Returns:
+            The view
+        """
+        view = MaterializedView(name, compute, ttl or self.ttl)
+        with self._lock:
+            self._scheduled[name] = view
+        return view
+    
+    def get(self, name: str) -> Snapshot:
+        """Get the snapshot of a scheduled view."""
+        return self._scheduled[name].get()
+    
+    def query(self, key: str, compute: Callable[[], Any]) -> Snapshot:
+        """
+        Get the snapshot of a query view, creating the view on first use.
+        
+        Args:
+            key: Canonical query key
+            compute: Function computing the view value
+        
+        Returns:
+            Snapshot
+        """
+        with self._lock:
+            view = self._queries.get(key)
+            if view is None:
+                view = self._queries[key] = MaterializedView(key, compute, self.ttl)
+                while len(self._queries) > self.max_query_views:
+                    self._queries.popitem(last=False)
+            else:
+                self._queries.move_to_end(key)
+        return view.get()
+    
+    def refresh(self, name: Optional[str] = None, wait: bool = True) -> None:
+        """
+        Refresh one scheduled view, or all scheduled views and drop query views.
+        
+        Args:
+            name: View name (None refreshes everything)
+            wait: Wait for the refreshes to finish
+        """
+        if name is not None:
+            self._scheduled[name].refresh(wait=wait)
+            return
+        
+        with self._lock:
+            views = list(self._scheduled.values())
+            self._queries.clear()
+        for view in views:
+            view.refresh(wait=wait)
+    
+    def status(self) -> List[Dict[str, Any]]:
+        """Get status of all views."""
+        with self._lock:
+            views = list(self._scheduled.values()) + list(self._queries.values())
+        return [view.status() for view in views]
+    
+    def start(self, interval: float) -> None:
+        """
+        Start refreshing scheduled views every interval seconds.
+        
+        The first refresh runs immediately so the first viewer does not
+        wait for it.
+        
+        Args:
+            interval: Seconds between refreshes (0 disables scheduling)
+        """
+        if interval <= 0 or self._stop is not None:
+            return
+        
+        self._stop = threading.Event()
+        threading.Thread(
+            target=self._run,
+            args=(interval, self._stop),
+            name="view-scheduler",
+            daemon=True
+        ).start()
+        logger.info(f"Refreshing {len(self._scheduled)} UI views every {interval}s")
+    
+    def stop(self) -> None:
+        """Stop the scheduler."""
+        if self._stop is not None:
+            self._stop.set()
+            self._stop = None
+    
+    def _run(self, interval: float, stop: threading.Event) -> None:
+        """Scheduler loop."""
+        while not stop.is_set():
+            with self._lock:
+                views = list(self._scheduled.values())
+            for view in views:
+                view.refresh(wait=True)
+            stop.wait(interval)
@@ -6,57 +6,146 @@ Functions that query data and prepare view models for templates.
 
 import logging
 import os
+import re
 import yaml
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Optional, Any
 
-from orion_ai.core.loki_client import LokiClient
+from orion_ai.core.config import get_config
+from orion_ai.core.events import get_loki_client
 from orion_ai.core.models import Event, EventType, EventSeverity
 from orion_ai.health_score.calculator import HealthScoreCalculator
 from orion_ai.health_score.service import HealthScoreService
 from orion_ai.inventory.store import DeviceStore
 from orion_ai.soar.models import Playbook
+from orion_ai.ui.materialized import ViewRegistry
 
 logger = logging.getLogger(__name__)
 
+# Max devices in the device list view (most recently seen first)
+DEVICE_VIEW_LIMIT = 1000
+
+_device_store: Optional[DeviceStore] = None
+_health_service: Optional[HealthScoreService] = None
+_registry: Optional[ViewRegistry] = None
+
+
+def _get_device_store() -> DeviceStore:
+    """Get the device store shared by all views."""
+    global _device_store
+    if _device_store is None:
+        _device_store = DeviceStore()
+    return _device_store
+
+
+def _get_health_service() -> HealthScoreService:
+    """Get the health score service shared by all views."""
+    global _health_service
+    if _health_service is None:
+        _health_service = HealthScoreService(device_store=_get_device_store())
+    return _health_service
+
+
+def get_view_registry() -> ViewRegistry:
+    """
+    Get the materialized view registry, creating it on first use.
+    
+    Registers the "devices" and "dashboard" views; event queries are
+    materialized on demand.
+    
+    Returns:
+        ViewRegistry
+    """
+    global _registry
+    if _registry is None:
+        config = get_config().ui
+        registry = ViewRegistry(ttl=config.view_ttl, max_query_views=config.max_query_views)
+        # Dashboard aggregates are derived from the device list snapshot
+        registry.register("devices", _compute_device_views)
+        registry.register("dashboard", _compute_dashboard)
+        _registry = registry
+    return _registry
+
+
+def start_view_refresh() -> None:
+    """Start refreshing dashboard and device views in the background."""
+    get_view_registry().start(get_config().ui.refresh_interval)
+
+
+def stop_view_refresh() -> None:
+    """Stop background view refreshes."""
+    if _registry is not None:
+        _registry.stop()
+
+
+def get_view_status() -> List[Dict[str, Any]]:
+    """
+    Get version and staleness of all materialized views.
+    
+    Returns:
+        List of view status dictionaries
+    """
+    return get_view_registry().status()
+
+
+def refresh_views(name: Optional[str] = None, wait: bool = False) -> None:
+    """
+    Refresh materialized views on demand.
+    
+    Args:
+        name: View name (None refreshes all views)
+        wait: Wait for the refresh to finish
+    """
+    get_view_registry().refresh(name, wait=wait)
+
 
 def get_dashboard_view() -> Dict[str, Any]:
     """
     Get data for dashboard/home page.
     
+    Served from the materialized dashboard snapshot.
+    
     Returns:
-        Dictionary with dashboard data
+        Dictionary with dashboard data; "timestamp" is when the snapshot
+        was computed
     """
-    loki = LokiClient()
-    device_store = DeviceStore()
-    health_service = HealthScoreService()
-    
-    # Get current health score
+    snapshot = get_view_registry().get("dashboard")
+    return {
+        **snapshot.value,
+        "timestamp": snapshot.computed_at,
+        "view_version": snapshot.version,
+        "view_age_seconds": snapshot.age_seconds,
+        "view_error": snapshot.error,
+    }
+
+
+def _compute_dashboard() -> Dict[str, Any]:
+    """Compute dashboard aggregates."""
+    # Get current health score (emitting score events is the health service's job)
     try:
-        health_score = health_service.run_once()
-        health_service_instance = health_service
-        calculator = health_service_instance.calculator
-        metrics = health_service_instance._collect_metrics()
-        health_obj = calculator.compute_health_score(metrics)
+        health_service = _get_health_service()
+        metrics = health_service._collect_metrics()
+        health_obj = health_service.calculator.compute_health_score(metrics)
     except Exception as e:
         logger.error(f"Failed to get health score: {e}")
         health_obj = None
     
     # Get recent events (last 24 hours)
     try:
-        recent_events = get_recent_events(limit=10, hours=24)
+        recent_events = _query_events(limit=10, hours=24)
     except Exception as e:
         logger.error(f"Failed to get recent events: {e}")
         recent_events = []
     
     # Get device stats
     try:
-        devices = device_store.list_devices(limit=1000)
+        device_views = get_view_registry().get("devices").value
+        now = datetime.now()
         device_stats = {
-            "total": len(devices),
-            "unknown": sum(1 for d in devices if not d.tags or d.guess_type == "unknown"),
-            "recent": sum(1 for d in devices if (datetime.now() - d.last_seen).days < 1),
+            "total": len(device_views),
+            "unknown": sum(1 for dv in device_views if dv["unknown"]),
+            "recent": sum(1 for dv in device_views if (now - dv["device"].last_seen).days < 1),
         }
     except Exception as e:
         logger.error(f"Failed to get device stats: {e}")
@@ -74,7 +163,6 @@ def get_dashboard_view() -> Dict[str, Any]:
         "recent_events": recent_events,
         "device_stats": device_stats,
         "suspicious_devices": suspicious_devices,
-        "timestamp": datetime.now(),
     }
 
 
@@ -87,6 +175,9 @@ def get_recent_events(
     """
     Get recent security events from Loki.
     
+    Each distinct query is materialized, so repeated requests are served
+    from memory and refreshed in the background.
+    
     Args:
         limit: Maximum number of events
         hours: How far back to look
@@ -96,33 +187,57 @@ def get_recent_events(
     Returns:
         List of event dictionaries
     """
-    loki = LokiClient()
-    
-    end_time = datetime.now()
-    start_time = end_time - timedelta(hours=hours)
-    
-    # Build query
-    query = '{stream="events"}'
-    
-    # TODO: Add label filters for severity and type if provided
-    # LogQL filtering would be more efficient than post-processing
+    severities = sorted(set(severity_filter or []))
+    types = sorted(set(type_filter or []))
+    key = (
+        f"events?limit={limit}&hours={hours}"
+        f"&severity={','.join(severities)}&type={','.join(types)}"
+    )
     
     try:
-        logs = loki.query_range(query, start_time, end_time, limit=limit)
-        
-        # Filter results if needed
-        if severity_filter:
-            logs = [l for l in logs if l.get("severity") in severity_filter]
-        
-        if type_filter:
-            logs = [l for l in logs if l.get("event_type") in type_filter]
-        
-        return logs
+        snapshot = get_view_registry().query(
+            key,
+            lambda: _query_events(limit, hours, severities, types)
+        )
+        return snapshot.value
     except Exception as e:
         logger.error(f"Failed to query events: {e}")
         return []
 
 
+def _query_events(
+    limit: int,
+    hours: int,
+    severities: Optional[List[str]] = None,
+    types: Optional[List[str]] = None
+) -> List[Dict[str, Any]]:
+    """Query recent events, filtering severity and type with label matchers."""
+    end_time = datetime.now()
+    start_time = end_time - timedelta(hours=hours)
+    
+    matchers = ['stream="events"']
+    if severities:
+        matchers.append(_label_matcher("severity", severities))
+    if types:
+        matchers.append(_label_matcher("event_type", types))
+    query = "{" + ", ".join(matchers) + "}"
+    
+    return get_loki_client().query_range(query, start_time, end_time, limit=limit)
+
+
+def _label_matcher(label: str, values: List[str]) -> str:
+    """Build a LogQL label matcher accepting any of the values."""
+    if len(values) == 1:
+        return f'{label}="{_escape_label(values[0])}"'
+    pattern = "|".join(re.escape(value) for value in values)
+    return f'{label}=~"{_escape_label(pattern)}"'
+
+
+def _escape_label(value: str) -> str:
+    """Escape a value for use inside a double-quoted LogQL string."""
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
 def list_devices_view(
     tag_filter: Optional[str] = None,
     search: Optional[str] = None
@@ -130,6 +245,8 @@ def list_devices_view(
     """
     Get list of devices with summary stats.
     
+    Served from the materialized device list snapshot.
+    
     Args:
         tag_filter: Optional tag to filter by
         search: Optional search term (IP, hostname, MAC)
@@ -137,25 +254,32 @@ def list_devices_view(
     Returns:
         List of device view models
     """
-    device_store = DeviceStore()
-    loki = LokiClient()
+    device_views = get_view_registry().get("devices").value
     
-    # Get devices
-    devices = device_store.list_devices(tag_filter=tag_filter, limit=1000)
+    if tag_filter:
+        device_views = [dv for dv in device_views if tag_filter in dv["device"].tags]
     
     # Apply search filter
     if search:
         search_lower = search.lower()
-        devices = [
-            d for d in devices
-            if (search_lower in d.ip.lower() or
-                (d.hostname and search_lower in d.hostname.lower()) or
-                (d.mac and search_lower in d.mac.lower()))
+        device_views = [
+            dv for dv in device_views
+            if (search_lower in dv["device"].ip.lower() or
+                (dv["device"].hostname and search_lower in dv["device"].hostname.lower()) or
+                (dv["device"].mac and search_lower in dv["device"].mac.lower()))
         ]
     
+    return list(device_views)
+
+
+def _compute_device_views() -> List[Dict[str, Any]]:
+    """Compute device view models for the device list."""
+    devices = _get_device_store().list_devices(limit=DEVICE_VIEW_LIMIT)
+    
     # Enrich with event counts (simple version - count from last 7 days)
     device_views = []
     for device in devices:
+        unknown = not device.tags or device.guess_type == "unknown"
         # TODO: Query event counts per device from Loki
         # For now, just use basic device data
         device_views.append({
@@ -163,6 +287,8 @@ def list_devices_view(
             "alert_count": 0,  # TODO
             "anomaly_count": 0,  # TODO
             "risk_level": "low",  # TODO: calculate based on tags and events
+            "risk_score": _device_risk_score(device, unknown),
+            "unknown": unknown,
         })
     
     return device_views
@@ -178,8 +304,8 @@ def get_device_profile(device_id: str) -> Optional[Dict[str, Any]]:
     Returns:
         Device profile dictionary or None if not found
     """
-    device_store = DeviceStore()
-    loki = LokiClient()
+    device_store = _get_device_store()
+    loki = get_loki_client()
     
     # Get device
     device = device_store.get_device_by_id(device_id)
@@ -227,33 +353,13 @@ def get_suspicious_devices(limit: int = 5) -> List[Dict[str, Any]]:
     Returns:
         List of device dictionaries with risk scores
     """
-    device_store = DeviceStore()
-    loki = LokiClient()
+    device_views = get_view_registry().get("devices").value
     
-    devices = device_store.list_devices(limit=1000)
-    
-    # Score devices based on tags and recent events
-    scored_devices = []
-    for device in devices:
-        risk_score = 0
-        
-        # Tags contribute to risk
-        if "threat-intel-match" in device.tags:
-            risk_score += 50
-        if "anomalous" in device.tags:
-            risk_score += 30
-        if "honeypot-access" in device.tags:
-            risk_score += 70
-        
-        # Unknown devices are slightly suspicious
-        if not device.tags or device.guess_type == "unknown":
-            risk_score += 10
-        
-        if risk_score > 0:
-            scored_devices.append({
-                "device": device,
-                "risk_score": risk_score,
-            })
+    scored_devices = [
+        {"device": dv["device"], "risk_score": dv["risk_score"]}
+        for dv in device_views
+        if dv["risk_score"] > 0
+    ]
     
     # Sort by risk score
     scored_devices.sort(key=lambda x: x["risk_score"], reverse=True)
@@ -261,6 +367,25 @@ def get_suspicious_devices(limit: int = 5) -> List[Dict[str, Any]]:
     return scored_devices[:limit]
 
 
+def _device_risk_score(device, unknown: bool) -> int:
+    """Score a device based on its tags."""
+    risk_score = 0
+    
+    # Tags contribute to risk
+    if "threat-intel-match" in device.tags:
+        risk_score += 50
+    if "anomalous" in device.tags:
+        risk_score += 30
+    if "honeypot-access" in device.tags:
+        risk_score += 70
+    
+    # Unknown devices are slightly suspicious
+    if unknown:
+        risk_score += 10
+    
+    return risk_score
+
+
 def _build_device_timeline(device, events: List[Dict]) -> List[Dict[str, Any]]:
     """Build a timeline of device activity."""
     timeline = []
@@ -0,0 +1,11 @@
+"""
+Shared setup for AI stack tests.
+
+Run with: cd stacks/ai && pytest tests/
+"""
+
+import sys
+from pathlib import Path
+
+# The AI stack ships its own orion_ai package under stacks/ai/src
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
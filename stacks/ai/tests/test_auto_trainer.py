@@ -0,0 +1,85 @@
+"""
+Tests for ONNX export of trained models and their optimized variants.
+"""
+
+import gzip
+import json
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("sklearn")
+pytest.importorskip("skl2onnx")
+onnx = pytest.importorskip("onnx")
+ort = pytest.importorskip("onnxruntime")
+
+from orion_ai.auto_trainer import AutoTrainer
+
+
+def training_features(rows=600, width=6, seed=3):
+    """Features on very different scales, so a wrong fold changes decisions."""
+    rng = np.random.default_rng(seed)
+    scales = np.array([1, 10, 1000, 0.01, 1e5, 3])[:width]
+    offsets = np.array([0, 50, -2000, 1, 1e6, 7])[:width]
+    return (rng.normal(size=(rows, width)) * scales + offsets).astype(np.float32)
+
+
+def write_features(directory, features, id_field):
+    directory.mkdir(parents=True, exist_ok=True)
+    with gzip.open(directory / "features_2026-01-01.jsonl.gz", "wt") as f:
+        for i, vector in enumerate(features.tolist()):
+            f.write(json.dumps({"timestamp": "2026-01-01T00:00:00", id_field: str(i), "feature_vector": vector}) + "\n")
+
+
+def labels(path, sample):
+    session = ort.InferenceSession(str(path), providers=["CPUExecutionProvider"])
+    return session.run(None, {session.get_inputs()[0].name: sample})[0].ravel()
+
+
+@pytest.fixture
+def trainer(tmp_path):
+    features = training_features()
+    write_features(tmp_path / "data" / "device_features", features, "device_ip")
+    write_features(tmp_path / "data" / "domain_features", features, "domain")
+    return AutoTrainer(tmp_path / "data", tmp_path / "models", export_variants=True)
+
+
+class TestVariantExport:
+    """Test that variants match the exported model and the report lists them."""
+    
+    @pytest.mark.parametrize("name, train", [
+        ("device_anomaly", AutoTrainer.train_device_anomaly_model),
+        ("domain_risk", AutoTrainer.train_domain_risk_model),
+    ])
+    def test_merged_variant_matches_float32_model(self, trainer, name, train):
+        assert train(trainer)
+        
+        variants = trainer.model_output_dir / "variants"
+        sample = training_features(rows=1000, seed=4)
+        reference = labels(trainer.model_output_dir / f"{name}.onnx", sample)
+        merged = variants / f"{name}.merged.onnx"
+        np.testing.assert_array_equal(labels(merged, sample), reference)
+        assert "Scaler" not in {node.op_type for node in onnx.load(str(merged)).graph.node}
+        
+        report = json.loads((variants / f"{name}.report.json").read_text())
+        entries = {entry["variant"]: entry for entry in report["variants"]}
+        written = {path.name.split(".")[1] for path in variants.glob(f"{name}.*.onnx")}
+        assert set(entries) == {"float32"} | written
+        assert written >= {"merged", "compact"}
+        for entry in entries.values():
+            assert entry["size_bytes"] == Path(entry["path"]).stat().st_size
+        assert entries["float32"]["label_agreement"] == 1.0
+        assert entries["merged"]["label_agreement"] == 1.0
+    
+    def test_variants_skipped_when_export_fails(self, trainer, monkeypatch):
+        def fail(*args, **kwargs):
+            raise RuntimeError("conversion failed")
+        monkeypatch.setattr(trainer, "_export_to_onnx", fail)
+        monkeypatch.setattr(trainer, "_export_variants", lambda *args: pytest.fail("variants exported"))
+        
+        assert trainer.train_device_anomaly_model()
+        assert not (trainer.model_output_dir / "variants").exists()
+    
+    def test_variants_are_opt_in(self, tmp_path):
+        assert not AutoTrainer(tmp_path, tmp_path / "models").export_variants
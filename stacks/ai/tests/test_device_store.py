@@ -0,0 +1,133 @@
+"""
+Tests for the write-behind device store.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from orion_ai.core.models import Device
+from orion_ai.inventory.store import DeviceStore
+
+SEEN = datetime(2026, 1, 1, 12, 0)
+
+
+def device(n, **kwargs):
+    fields = {"device_id": f"d{n}", "ip": f"10.0.0.{n}", "first_seen": SEEN, "last_seen": SEEN}
+    fields.update(kwargs)
+    return Device(**fields)
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "devices.db")
+
+
+def open_store(db_path, **kwargs):
+    # Reads always check the database, as another process would after the interval
+    return DeviceStore(db_path, **{"write_behind_seconds": 60, "index_check_seconds": 0, **kwargs})
+
+
+class TestBulkUpsert:
+    """Test batched upserts and field merging."""
+    
+    def test_upserts_are_written_on_flush(self, db_path):
+        store = open_store(db_path)
+        assert store.upsert_devices(device(i) for i in range(1, 51)) == 50
+        # Served from the index before the write
+        assert store.get_device_by_ip("10.0.0.7").device_id == "d7"
+        
+        other = open_store(db_path)
+        assert other.get_device_by_id("d7") is None
+        assert store.flush() == 50
+        assert len(other.list_devices()) == 50
+    
+    def test_update_keeps_known_fields(self, db_path):
+        store = open_store(db_path, write_behind_seconds=0)
+        store.upsert_device(device(1, mac="aa:bb", hostname="tv", owner="alice"))
+        store.upsert_device(device(1, ip="10.0.0.99", last_seen=SEEN + timedelta(hours=1)))
+        
+        stored = open_store(db_path).get_device_by_id("d1")
+        assert (stored.ip, stored.mac, stored.hostname, stored.owner) == ("10.0.0.99", "aa:bb", "tv", "alice")
+        assert stored.first_seen == SEEN
+        assert stored.last_seen == SEEN + timedelta(hours=1)
+    
+    def test_lookups_follow_updates(self, db_path):
+        store = open_store(db_path)
+        store.upsert_device(device(1, mac="aa:bb"))
+        store.upsert_device(device(1, ip="10.0.0.99", mac="cc:dd"))
+        
+        assert store.get_device_by_ip("10.0.0.1") is None
+        assert store.get_device_by_mac("aa:bb") is None
+        assert store.get_device_by_mac("cc:dd").ip == "10.0.0.99"
+    
+    def test_returned_devices_are_copies(self, db_path):
+        store = open_store(db_path)
+        store.upsert_device(device(1))
+        store.get_device_by_id("d1").tags.append("mutated")
+        assert store.get_device_by_id("d1").tags == []
+    
+    def test_delete_drops_pending_upsert(self, db_path):
+        store = open_store(db_path)
+        store.upsert_device(device(1))
+        assert store.delete_device("d1")
+        assert store.flush() == 0
+        assert store.get_device_by_id("d1") is None
+
+
+class TestCrossInstanceTags:
+    """Test that tags written by another store instance are not lost."""
+    
+    def test_stale_upsert_keeps_other_instance_tag(self, db_path):
+        collector = open_store(db_path, write_behind_seconds=0, index_check_seconds=3600)
+        collector.upsert_device(device(1, tags=["iot"]))
+        # The collector's copy predates the tag
+        existing = collector.get_device_by_id("d1")
+        
+        soar = open_store(db_path, write_behind_seconds=0)
+        assert soar.tag_device("d1", "anomalous")
+        
+        existing.last_seen = SEEN + timedelta(minutes=5)
+        collector.upsert_device(existing)
+        
+        assert open_store(db_path).get_device_by_id("d1").tags == ["iot", "anomalous"]
+        # The flush also shows the other instance's tag to the collector
+        assert collector.get_device_by_id("d1").tags == ["iot", "anomalous"]
+    
+    def test_concurrent_tag_and_untag_merge(self, db_path):
+        first = open_store(db_path, write_behind_seconds=0)
+        first.upsert_device(device(1, tags=["a", "b"]))
+        second = open_store(db_path, index_check_seconds=3600)
+        second.get_device_by_id("d1")
+        
+        first.untag_device("d1", "a")
+        second.tag_device("d1", "c")
+        second.flush()
+        
+        assert open_store(db_path).get_device_by_id("d1").tags == ["b", "c"]
+    
+    def test_pending_tags_survive_reload(self, db_path):
+        store = open_store(db_path)
+        store.upsert_device(device(1))
+        store.flush()
+        store.tag_device("d1", "pending")
+        
+        other = open_store(db_path, write_behind_seconds=0)
+        other.tag_device("d1", "remote")
+        store.reload_index()
+        
+        assert store.get_device_by_id("d1").tags == ["remote", "pending"]
+        store.flush()
+        assert open_store(db_path).get_device_by_id("d1").tags == ["remote", "pending"]
+    
+    def test_other_instance_writes_reach_index_after_own_flush(self, db_path):
+        store = open_store(db_path)
+        store.upsert_device(device(1))
+        store.flush()
+        
+        other = open_store(db_path, write_behind_seconds=0)
+        other.upsert_device(device(2))
+        store.upsert_device(device(3))
+        store.flush()
+        
+        assert store.get_device_by_id("d2") is not None
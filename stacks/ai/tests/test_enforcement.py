@@ -0,0 +1,143 @@
+"""
+Tests for the asynchronous Pi-hole enforcement queue.
+"""
+
+import threading
+
+import pytest
+
+from orion_ai.enforcement import ALREADY_BLOCKED, DROPPED, QUEUED, EnforcementQueue
+
+
+class FakePiHole:
+    """Pi-hole client recording requests; domains in `bad` make a request fail."""
+    
+    def __init__(self, bad=()):
+        self.bad = set(bad)
+        self.adds = []
+        self.removes = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+        self._lock = threading.Lock()
+    
+    def add_domains(self, domains, comment=""):
+        self.entered.set()
+        self.gate.wait()
+        with self._lock:
+            self.adds.append(list(domains))
+        return not self.bad.intersection(domains)
+    
+    def remove_domain(self, domain):
+        self.gate.wait()
+        with self._lock:
+            self.removes.append(domain)
+        return True
+
+
+@pytest.fixture
+def client():
+    return FakePiHole()
+
+
+def make_queue(client, **kwargs):
+    return EnforcementQueue(client, **{"batch_size": 3, "concurrency": 2, **kwargs})
+
+
+def hold_worker(queue, client):
+    """Park the worker inside a request so further requests stay pending."""
+    client.gate.clear()
+    queue.block("held.com")
+    assert client.entered.wait(5)
+
+
+class TestEnforcementQueue:
+    """Test coalescing, batching, retries and persistence."""
+    
+    def test_blocks_are_batched(self, client):
+        queue = make_queue(client)
+        hold_worker(queue, client)
+        for i in range(7):
+            assert queue.block(f"d{i}.com") == QUEUED
+        client.gate.set()
+        
+        assert queue.flush(timeout=5)
+        sent = [domain for chunk in client.adds for domain in chunk]
+        assert sorted(sent) == sorted(["held.com"] + [f"d{i}.com" for i in range(7)])
+        assert max(len(chunk) for chunk in client.adds) <= 3
+        assert queue.blocked == set(sent)
+        queue.close(timeout=5)
+    
+    def test_repeat_requests_coalesce(self, client):
+        queue = make_queue(client)
+        hold_worker(queue, client)
+        queue.block("evil.com")
+        queue.block("evil.com")
+        queue.unblock("flip.com")
+        queue.block("flip.com")
+        client.gate.set()
+        
+        assert queue.flush(timeout=5)
+        sent = [domain for chunk in client.adds for domain in chunk]
+        assert sent.count("evil.com") == 1
+        assert "flip.com" in sent and client.removes == []
+        queue.close(timeout=5)
+    
+    def test_already_blocked_skips_api(self, client):
+        queue = make_queue(client)
+        queue.block("evil.com")
+        assert queue.flush(timeout=5)
+        
+        assert queue.block("evil.com") == ALREADY_BLOCKED
+        assert len(client.adds) == 1
+        queue.close(timeout=5)
+    
+    def test_failed_chunk_is_retried_per_domain(self):
+        client = FakePiHole(bad={"bad.com"})
+        queue = make_queue(client)
+        hold_worker(queue, client)
+        for domain in ("a.com", "bad.com", "b.com"):
+            queue.block(domain)
+        client.gate.set()
+        
+        assert queue.flush(timeout=5)
+        assert ["a.com"] in client.adds and ["b.com"] in client.adds
+        assert queue.blocked == {"held.com", "a.com", "b.com"}
+        # A failed block can be requested again
+        assert queue.block("bad.com") == QUEUED
+        queue.close(timeout=5)
+    
+    def test_unblock_forgets_domain(self, client):
+        queue = make_queue(client)
+        queue.block("evil.com")
+        queue.flush(timeout=5)
+        queue.unblock("evil.com")
+        
+        assert queue.flush(timeout=5)
+        assert client.removes == ["evil.com"]
+        assert "evil.com" not in queue.blocked
+        queue.close(timeout=5)
+    
+    def test_full_queue_drops(self, client):
+        queue = make_queue(client, max_size=2)
+        hold_worker(queue, client)
+        assert queue.block("a.com") == QUEUED
+        assert queue.block("b.com") == QUEUED
+        assert queue.block("c.com") == DROPPED
+        client.gate.set()
+        queue.close(timeout=5)
+    
+    def test_blocked_domains_survive_restart(self, client, tmp_path):
+        state = str(tmp_path / "enforcement.db")
+        queue = make_queue(client, state_path=state)
+        queue.block("evil.com")
+        queue.close(timeout=5)
+        
+        restarted = make_queue(FakePiHole(), state_path=state)
+        assert restarted.block("evil.com") == ALREADY_BLOCKED
+        restarted.close(timeout=5)
+    
+    def test_closed_queue_drops(self, client):
+        queue = make_queue(client)
+        queue.close(timeout=5)
+        assert queue.block("evil.com") == DROPPED
@@ -0,0 +1,86 @@
+"""
+Tests for columnar Loki event decoding.
+"""
+
+import json
+
+import numpy as np
+
+from orion_ai.event_batch import EventBatch
+
+
+def entry(payload, ts_ns=1_000):
+    """Loki log entry carrying a JSON payload."""
+    line = payload if isinstance(payload, str) else json.dumps(payload)
+    return {"log": line, "timestamp_ns": ts_ns}
+
+
+def flow(src_ip="10.0.0.2", dest_ip="1.1.1.1", dest_port=443, proto="tcp", **flow_fields):
+    """Suricata flow event."""
+    return {
+        "src_ip": src_ip,
+        "dest_ip": dest_ip,
+        "dest_port": dest_port,
+        "proto": proto,
+        "flow": {"bytes_toserver": 100, "bytes_toclient": 200, "age": 3, **flow_fields},
+    }
+
+
+class TestFromLoki:
+    """Test decoding Loki entries into columns."""
+    
+    def test_decodes_columns(self):
+        batch = EventBatch.from_loki(
+            flows=[entry(flow(), ts_ns=5), entry(flow(dest_port=None, proto=None))],
+            dns_queries=[entry({"src_ip": "10.0.0.2", "dns": {"type": "query", "rrname": "a.com", "rcode": "NOERROR"}})],
+            alerts=[entry({"src_ip": "10.0.0.2", "alert": {"signature": "ET SCAN"}})]
+        )
+        
+        assert batch.n_flows == 2 and batch.n_dns == 1 and batch.n_alerts == 1
+        assert batch.flow_ts.tolist() == [5, 1_000]
+        assert batch.flow_dest_port.tolist() == [443, 0]
+        assert batch.flow_proto.tolist() == ["TCP", ""]
+        assert batch.flow_bytes_toserver.tolist() == [100, 100]
+        assert batch.dns_is_query.tolist() == [True]
+        assert batch.alert_signature.tolist() == ["ET SCAN"]
+        assert batch.dropped == 0 and batch.malformed == 0
+    
+    def test_missing_age_is_nan(self):
+        payload = flow()
+        del payload["flow"]["age"]
+        batch = EventBatch.from_loki(flows=[entry(payload)])
+        assert np.isnan(batch.flow_age[0])
+    
+    def test_undecodable_entries_are_dropped(self):
+        batch = EventBatch.from_loki(flows=[entry("{not json"), entry("[1, 2]"), entry(flow())])
+        assert batch.n_flows == 1
+        assert batch.dropped == 2
+    
+    def test_malformed_rows_are_skipped(self):
+        batch = EventBatch.from_loki(
+            flows=[
+                entry(flow(dest_port="N/A")),
+                entry(flow(bytes_toserver="lots")),
+                entry({**flow(), "flow": "broken"}),
+                entry(flow(dest_port=53)),
+            ],
+            dns_queries=[entry({"src_ip": "10.0.0.2", "dns": ["not", "a", "dict"]})],
+            alerts=[entry({"src_ip": "10.0.0.2", "alert": "oops"})]
+        )
+        
+        assert batch.flow_dest_port.tolist() == [53]
+        assert batch.n_dns == 0 and batch.n_alerts == 0
+        assert batch.malformed == 5
+        assert len(batch.flow_ts) == len(batch.flow_src_ip) == len(batch.flow_age) == 1
+    
+    def test_group_by_device(self):
+        batch = EventBatch.from_loki(
+            flows=[entry(flow(src_ip="10.0.0.2")), entry(flow(src_ip="10.0.0.3")), entry(flow(src_ip=""))],
+            alerts=[entry({"src_ip": "10.0.0.3", "alert": {"signature": "x"}})]
+        )
+        groups = batch.group_by_device()
+        
+        assert set(groups) == {"10.0.0.2", "10.0.0.3"}
+        assert groups["10.0.0.3"].n_flows == 1
+        assert groups["10.0.0.3"].n_alerts == 1
+        assert groups["10.0.0.2"].n_alerts == 0
@@ -0,0 +1,117 @@
+"""
+Tests for batched Loki log emission.
+"""
+
+import threading
+import time
+
+from orion_ai.core.event_buffer import EventBuffer
+
+
+class FakeLokiClient:
+    """Loki client recording pushed streams; fails the first `failures` pushes."""
+    
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.pushes = []
+        self.pushed = threading.Event()
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+    
+    def push_streams(self, streams, compress=False):
+        self.entered.set()
+        self.gate.wait()
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("loki down")
+        self.pushes.append((time.monotonic(), streams))
+        self.pushed.set()
+        return True
+    
+    def lines(self):
+        return [value[1] for _, streams in self.pushes for stream in streams for value in stream["values"]]
+
+
+class TestEventBuffer:
+    """Test age and size flushes, failures and shutdown."""
+    
+    def test_single_event_is_pushed_after_max_age(self):
+        client = FakeLokiClient()
+        buffer = EventBuffer(client, max_age=0.2)
+        # Let the flush thread go idle on the empty buffer first
+        time.sleep(0.05)
+        
+        added = time.monotonic()
+        buffer.add({"job": "ai"}, {"n": 1})
+        assert client.pushed.wait(2)
+        
+        pushed_at = client.pushes[0][0]
+        assert 0.15 <= pushed_at - added < 1.0
+        assert client.lines() == ['{"n": 1}']
+        buffer.close(timeout=2)
+    
+    def test_max_events_pushes_early(self):
+        client = FakeLokiClient()
+        buffer = EventBuffer(client, max_events=5, max_age=60)
+        for i in range(5):
+            buffer.add({"job": "ai"}, {"n": i})
+        
+        assert client.pushed.wait(2)
+        assert len(client.lines()) == 5
+        buffer.close(timeout=2)
+    
+    def test_max_bytes_pushes_early(self):
+        client = FakeLokiClient()
+        buffer = EventBuffer(client, max_bytes=100, max_age=60)
+        buffer.add({"job": "ai"}, {"data": "x" * 200})
+        
+        assert client.pushed.wait(2)
+        buffer.close(timeout=2)
+    
+    def test_lines_are_grouped_by_labels(self):
+        client = FakeLokiClient()
+        buffer = EventBuffer(client, max_age=60)
+        buffer.add({"job": "ai", "type": "a"}, {"n": 1})
+        buffer.add({"type": "a", "job": "ai"}, {"n": 2})
+        buffer.add({"job": "ai", "type": "b"}, {"n": 3})
+        
+        assert buffer.flush(timeout=2)
+        streams = client.pushes[0][1]
+        assert sorted(len(stream["values"]) for stream in streams) == [1, 2]
+        buffer.close(timeout=2)
+    
+    def test_failed_push_is_retried(self):
+        client = FakeLokiClient(failures=1)
+        buffer = EventBuffer(client, max_age=0.05)
+        buffer.add({"job": "ai"}, {"n": 1})
+        
+        assert client.pushed.wait(2)
+        assert client.lines() == ['{"n": 1}']
+        buffer.close(timeout=2)
+    
+    def test_failed_pushes_drop_oldest_beyond_limit(self):
+        client = FakeLokiClient(failures=1)
+        client.gate.clear()
+        buffer = EventBuffer(client, max_events=4, max_age=0.05, max_buffered=4)
+        for i in range(4):
+            buffer.add({"job": "ai"}, {"n": i})
+        # Lines added during the failing push overflow max_buffered on requeue
+        assert client.entered.wait(2)
+        for i in range(4, 6):
+            buffer.add({"job": "ai"}, {"n": i})
+        client.gate.set()
+        
+        assert client.pushed.wait(2)
+        assert buffer.flush(timeout=2)
+        assert sorted(client.lines()) == [f'{{"n": {i}}}' for i in range(2, 6)]
+        buffer.close(timeout=2)
+    
+    def test_closed_buffer_pushes_directly(self):
+        client = FakeLokiClient()
+        buffer = EventBuffer(client, max_age=60)
+        buffer.add({"job": "ai"}, {"n": 1})
+        assert buffer.close(timeout=2)
+        
+        buffer.add({"job": "ai"}, {"n": 2})
+        assert client.lines() == ['{"n": 1}', '{"n": 2}']
@@ -0,0 +1,179 @@
+"""
+Tests for vectorized device feature extraction.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from orion_ai.event_batch import EventBatch
+from orion_ai.feature_extractor import DeviceFeatures, FeatureExtractor
+
+WINDOW_END = datetime(2026, 1, 1, 12, 0)
+WINDOW_START = WINDOW_END - timedelta(minutes=10)
+
+
+def entry(payload):
+    """Loki log entry carrying a JSON payload."""
+    return {"log": json.dumps(payload), "timestamp_ns": 0}
+
+
+def random_batch(seed=0, n_flows=3000, n_dns=2000, n_alerts=100):
+    """Mixed traffic for a handful of devices."""
+    rng = np.random.default_rng(seed)
+    devices = [f"192.168.1.{i}" for i in range(2, 12)]
+    flows = [
+        entry({
+            "src_ip": str(rng.choice(devices)),
+            "dest_ip": str(rng.choice(devices + ["8.8.8.8", "1.1.1.1", "93.184.216.34"])),
+            "dest_port": int(rng.choice([53, 80, 443, 22, 8080, 51234])),
+            "proto": str(rng.choice(["tcp", "udp", "icmp"])),
+            "flow": {
+                "bytes_toserver": int(rng.integers(0, 10_000)),
+                "bytes_toclient": int(rng.integers(0, 50_000)),
+                **({"age": int(rng.integers(0, 120))} if rng.random() < 0.8 else {}),
+            },
+        })
+        for _ in range(n_flows)
+    ]
+    dns = [
+        entry({
+            # One device only queries DNS (no flows)
+            "src_ip": str(rng.choice(devices + ["192.168.1.99"])),
+            "dns": {
+                "type": "query" if rng.random() < 0.9 else "answer",
+                "rrname": str(rng.choice(["example.com", "x7kq2p.net", "a.b.c.org", ""])),
+                "rcode": "NXDOMAIN" if rng.random() < 0.1 else "NOERROR",
+            },
+        })
+        for _ in range(n_dns)
+    ]
+    alerts = [
+        entry({"src_ip": str(rng.choice(devices)), "alert": {"signature": str(rng.choice(["A", "B", ""]))}})
+        for _ in range(n_alerts)
+    ]
+    return EventBatch.from_loki(flows, dns, alerts)
+
+
+class TestDeviceFeatures:
+    """Test the one-pass extractor against the per-device extractor."""
+    
+    def test_matches_per_device_extraction(self):
+        extractor = FeatureExtractor()
+        batch = random_batch()
+        
+        matrix, device_ips, intel_hits = extractor.extract_all_device_features(
+            batch, WINDOW_START, WINDOW_END
+        )
+        groups = batch.group_by_device()
+        
+        assert sorted(device_ips) == sorted(groups)
+        for row, device_ip in enumerate(device_ips):
+            expected = extractor.extract_device_features(
+                device_ip, groups[device_ip], WINDOW_START, WINDOW_END
+            ).to_vector()
+            np.testing.assert_allclose(matrix[row].astype(np.float32), expected, rtol=1e-5, atol=1e-6)
+        assert intel_hits.sum() == 0
+    
+    def test_device_without_flows_has_zero_features(self):
+        extractor = FeatureExtractor()
+        matrix, device_ips, _ = extractor.extract_all_device_features(
+            random_batch(), WINDOW_START, WINDOW_END
+        )
+        assert not matrix[device_ips.index("192.168.1.99")].any()
+    
+    def test_intel_hits_per_device(self):
+        extractor = FeatureExtractor()
+        batch = random_batch(n_dns=0, n_alerts=0)
+        batch.flow_intel_hit = batch.flow_dest_ip == "8.8.8.8"
+        
+        _, device_ips, intel_hits = extractor.extract_all_device_features(
+            batch, WINDOW_START, WINDOW_END
+        )
+        for device_ip, hits in zip(device_ips, intel_hits):
+            expected = np.count_nonzero(
+                (batch.flow_src_ip == device_ip) & (batch.flow_dest_ip == "8.8.8.8")
+            )
+            assert hits == expected
+    
+    def test_large_byte_counters_stay_exact(self):
+        extractor = FeatureExtractor()
+        sent = 2**24 + 1
+        batch = EventBatch.from_loki([
+            entry({"src_ip": "10.0.0.2", "dest_ip": "1.1.1.1", "dest_port": 443, "proto": "tcp",
+                   "flow": {"bytes_toserver": sent, "bytes_toclient": 3_000_000_007}})
+        ])
+        
+        matrix, device_ips, _ = extractor.extract_all_device_features(batch, WINDOW_START, WINDOW_END)
+        features = DeviceFeatures.from_vector(device_ips[0], WINDOW_START, WINDOW_END, matrix[0])
+        
+        assert features.bytes_sent == sent
+        assert features.bytes_received == 3_000_000_007
+    
+    def test_empty_batch(self):
+        matrix, device_ips, intel_hits = FeatureExtractor().extract_all_device_features(
+            EventBatch(), WINDOW_START, WINDOW_END
+        )
+        assert matrix.shape == (0, 22)
+        assert device_ips == [] and len(intel_hits) == 0
+
+
+DOMAINS = [
+    "example.com", "WWW.Example.COM.", "x7kq2p.net", "a.b.c.org", "192.168.1.1",
+    "my-host_name.local", "abcdefghij.xyz", "aaaa", "tk", "1.2.3.999.co.uk",
+]
+
+
+def per_domain_rows(extractor, domains, counts):
+    return np.array([
+        extractor.extract_domain_features(domain, count).to_vector()
+        for domain, count in zip(domains, counts)
+    ])
+
+
+class TestDomainFeatures:
+    """Test the vectorized domain extractor against the per-domain extractor."""
+    
+    def test_matches_per_domain_extraction(self):
+        extractor = FeatureExtractor()
+        counts = list(range(len(DOMAINS)))
+        
+        matrix = extractor.extract_domain_feature_matrix(DOMAINS, counts)
+        
+        assert matrix.dtype == np.float32
+        np.testing.assert_allclose(matrix, per_domain_rows(extractor, DOMAINS, counts), rtol=1e-5, atol=1e-6)
+    
+    def test_cached_rows_match_and_are_evicted(self):
+        extractor = FeatureExtractor(domain_cache_size=4)
+        first = extractor.extract_domain_feature_matrix(DOMAINS[:4], [1] * 4)
+        assert list(extractor._domain_cache) == DOMAINS[:4]
+        
+        # All hits, with the query counts still taken from this call
+        again = extractor.extract_domain_feature_matrix(DOMAINS[:4], [2] * 4)
+        np.testing.assert_array_equal(again[:, :12], first[:, :12])
+        assert again[:, 12].tolist() == [2] * 4
+        
+        # A hit refreshes its entry, so the oldest other domain is evicted
+        extractor.extract_domain_feature_matrix([DOMAINS[0], DOMAINS[4]], [1, 1])
+        assert list(extractor._domain_cache) == [DOMAINS[2], DOMAINS[3], DOMAINS[0], DOMAINS[4]]
+    
+    def test_non_ascii_only_batch(self):
+        extractor = FeatureExtractor()
+        extractor.extract_domain_feature_matrix(["example.com"], [1])
+        domains = ["bücher.de", "пример.рф"]
+        
+        matrix = extractor.extract_domain_feature_matrix(["example.com"] + domains, [1, 2, 3])
+        np.testing.assert_allclose(
+            matrix[1:], per_domain_rows(extractor, domains, [2, 3]), rtol=1e-5, atol=1e-6
+        )
+    
+    def test_empty_domain(self):
+        extractor = FeatureExtractor()
+        for domains in ([""], ["", "example.com"]):
+            counts = [1] * len(domains)
+            matrix = extractor.extract_domain_feature_matrix(domains, counts)
+            np.testing.assert_allclose(matrix, per_domain_rows(extractor, domains, counts), rtol=1e-5, atol=1e-6)
+    
+    def test_no_domains(self):
+        assert FeatureExtractor().extract_domain_feature_matrix([], []).shape == (0, 13)
@@ -0,0 +1,157 @@
+"""
+Tests for paged and sharded Loki streaming.
+"""
+
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+from orion_ai.log_reader import LokiLogReader, LokiStream, ShardedLokiStream
+
+START = datetime(2026, 1, 1, 12, 0)
+END = START + timedelta(minutes=10)
+START_NS = int(START.timestamp() * 1e9)
+
+
+class FakeLoki:
+    """In-memory stand-in for Loki's forward query_range."""
+    
+    def __init__(self, timestamps, fail_after=None):
+        self.entries = [
+            {"timestamp_ns": ts, "log": f'{{"n": {i}}}', "labels": {"service": "suricata"}}
+            for i, ts in enumerate(sorted(timestamps))
+        ]
+        self.returned = 0
+        self.calls = 0
+        self.fail_after = fail_after
+        self._lock = threading.Lock()
+    
+    def query_page(self, query, start_ns, end_ns, limit):
+        with self._lock:
+            self.calls += 1
+            if self.fail_after is not None and self.calls > self.fail_after:
+                raise requests.ConnectionError("loki down")
+        page = [e for e in self.entries if start_ns <= e["timestamp_ns"] < end_ns][:limit]
+        with self._lock:
+            self.returned += len(page)
+        return page
+
+
+@pytest.fixture
+def reader():
+    reader = LokiLogReader(base_url="http://loki.test:3100")
+    reader.page_size = 10
+    reader.slice_seconds = 60
+    yield reader
+    reader.close()
+
+
+def seconds(*offsets):
+    """Nanosecond timestamps at second offsets from START."""
+    return [START_NS + int(offset * 1e9) for offset in offsets]
+
+
+class TestLokiStream:
+    """Test cursor paging within one stream."""
+    
+    def test_pages_past_limit_without_duplicates(self, reader):
+        # Runs of equal timestamps straddle page boundaries
+        timestamps = seconds(*[i // 4 for i in range(95)])
+        loki = FakeLoki(timestamps)
+        reader._query_page = loki.query_page
+        
+        stream = LokiStream(reader, "q", START, END, page_size=10, slice_seconds=60)
+        entries = list(stream)
+        
+        assert [e["log"] for e in entries] == [e["log"] for e in loki.entries]
+        assert stream.entries_read == 95
+        assert stream.pages > 1
+        assert stream.complete
+    
+    def test_max_entries_caps_read(self, reader):
+        reader._query_page = FakeLoki(seconds(*range(50))).query_page
+        
+        stream = LokiStream(reader, "q", START, END, page_size=10, slice_seconds=60, max_entries=25)
+        assert len(list(stream)) == 25
+        assert not stream.complete
+    
+    def test_stuck_cursor_skips_timestamp(self, reader):
+        # More entries share one timestamp than fit on a page
+        reader._query_page = FakeLoki(seconds(*([5] * 15 + [6, 7]))).query_page
+        
+        stream = LokiStream(reader, "q", START, END, page_size=10, slice_seconds=60)
+        entries = list(stream)
+        
+        assert [e["timestamp_ns"] for e in entries] == seconds(*([5] * 10 + [6, 7]))
+        assert not stream.complete
+    
+    def test_iterates_once(self, reader):
+        reader._query_page = FakeLoki([]).query_page
+        stream = LokiStream(reader, "q", START, END, page_size=10, slice_seconds=60)
+        list(stream)
+        with pytest.raises(RuntimeError):
+            list(stream)
+
+
+class TestShardedLokiStream:
+    """Test concurrent shard fetching."""
+    
+    def test_matches_unsharded_order(self, reader):
+        timestamps = seconds(*[i * 0.37 for i in range(1500)])
+        loki = FakeLoki(timestamps)
+        reader._query_page = loki.query_page
+        
+        stream = ShardedLokiStream(reader, "q", START, END, shard_seconds=60)
+        entries = list(stream)
+        
+        assert len(stream.shards) == 10
+        assert [e["log"] for e in entries] == [e["log"] for e in loki.entries]
+        assert stream.entries_read == 1500
+        assert stream.complete
+    
+    def test_buffers_a_bounded_number_of_entries(self, reader):
+        loki = FakeLoki(seconds(*[i * 0.1 for i in range(5000)]))
+        reader._query_page = loki.query_page
+        
+        stream = ShardedLokiStream(
+            reader, "q", START, END, shard_seconds=60, prefetch=2, buffer_entries=20
+        )
+        iterator = iter(stream)
+        next(iterator)
+        time.sleep(0.3)
+        
+        # Two shards in flight, each at most one page beyond its queue
+        assert loki.returned <= 2 * (20 + reader.page_size) + reader.page_size
+        assert sum(1 for _ in iterator) == 4999
+    
+    def test_max_entries_caps_read(self, reader):
+        reader._query_page = FakeLoki(seconds(*range(500))).query_page
+        
+        stream = ShardedLokiStream(reader, "q", START, END, shard_seconds=60, max_entries=70)
+        assert len(list(stream)) == 70
+        assert not stream.complete
+    
+    def test_shard_errors_propagate(self, reader):
+        reader._query_page = FakeLoki(seconds(*range(500)), fail_after=3).query_page
+        
+        stream = ShardedLokiStream(reader, "q", START, END, shard_seconds=60, prefetch=1)
+        with pytest.raises(requests.ConnectionError):
+            list(stream)
+    
+    def test_abandoned_stream_stops_fetching(self, reader):
+        loki = FakeLoki(seconds(*[i * 0.1 for i in range(5000)]))
+        reader._query_page = loki.query_page
+        
+        stream = ShardedLokiStream(reader, "q", START, END, shard_seconds=60, buffer_entries=5)
+        for _ in zip(range(3), stream):
+            pass
+        stream.close()
+        time.sleep(0.3)
+        calls = loki.calls
+        time.sleep(0.3)
+        
+        assert loki.calls == calls
+        assert not any(t.name.startswith("loki-shard") for t in threading.enumerate())
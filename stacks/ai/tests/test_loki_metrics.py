@@ -0,0 +1,167 @@
+"""
+Tests for LogQL metric queries and the health score event counts built on them.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from orion_ai.core.loki_client import LokiClient
+from orion_ai.health_score import service as health_service
+from orion_ai.health_score.service import HealthScoreService
+
+EVENT_COUNT_QUERY = (
+    'label_replace(sum by (event_type, severity) '
+    '(count_over_time({stream="events", event_type="device_anomaly", severity="CRITICAL"}[24h])), '
+    '"window", "24h", "", "")'
+    ' or '
+    'label_replace(sum by (event_type, severity) '
+    '(count_over_time({stream="events"}[168h])), '
+    '"window", "168h", "", "")'
+)
+
+
+class FakeResponse:
+    """Successful query API response."""
+    
+    def __init__(self, data):
+        self.data = data
+    
+    def raise_for_status(self):
+        pass
+    
+    def json(self):
+        return {"status": "success", "data": self.data}
+
+
+class FakeSession:
+    """Records query requests and answers them with a canned "data" object."""
+    
+    def __init__(self, data):
+        self.data = data
+        self.requests = []
+    
+    def get(self, url, params=None, auth=None, timeout=None):
+        self.requests.append((url, params))
+        return FakeResponse(self.data)
+
+
+def client_with(data):
+    client = LokiClient(url="http://loki:3100/")
+    client.session = FakeSession(data)
+    return client
+
+
+def vector(*series):
+    return {
+        "resultType": "vector",
+        "result": [{"metric": labels, "value": [1767268800, str(value)]} for labels, value in series],
+    }
+
+
+class FakeDeviceStore:
+    """Empty device inventory."""
+    
+    def list_devices(self):
+        return []
+
+
+@pytest.fixture
+def health(monkeypatch):
+    """Create a HealthScoreService whose Loki client answers with canned data."""
+    def create(data):
+        client = client_with(data)
+        monkeypatch.setattr(health_service, "get_loki_client", lambda: client)
+        return HealthScoreService(device_store=FakeDeviceStore())
+    return create
+
+
+class TestMetricQueries:
+    """Test instant and range metric queries against the query API."""
+    
+    def test_instant_query(self):
+        client = client_with(vector(({"event_type": "intel_match"}, 3), ({"event_type": "new_device"}, 1.5)))
+        at = datetime(2026, 1, 1, 12, 0)
+        
+        samples = client.query_metric('sum by (event_type) (count_over_time({stream="events"}[1h]))', time=at)
+        
+        (url, params), = client.session.requests
+        assert url == "http://loki:3100/loki/api/v1/query"
+        assert params == {
+            "query": 'sum by (event_type) (count_over_time({stream="events"}[1h]))',
+            "time": int(at.timestamp() * 1e9),
+        }
+        assert [(s["labels"], s["value"]) for s in samples] == [
+            ({"event_type": "intel_match"}, 3.0),
+            ({"event_type": "new_device"}, 1.5),
+        ]
+        assert samples[0]["timestamp"] == datetime.fromtimestamp(1767268800)
+    
+    def test_scalar_result(self):
+        client = client_with({"resultType": "scalar", "result": [1767268800, "42"]})
+        assert [(s["labels"], s["value"]) for s in client.query_metric("vector(42)")] == [({}, 42.0)]
+    
+    def test_log_query_is_rejected(self):
+        client = client_with({"resultType": "streams", "result": []})
+        with pytest.raises(ValueError):
+            client.query_metric('{stream="events"}')
+    
+    def test_range_query(self):
+        client = client_with({"resultType": "matrix", "result": [
+            {"metric": {"event_type": "intel_match"}, "values": [[1767268800, "1"], [1767269100, "4"]]},
+        ]})
+        start, end = datetime(2026, 1, 1, 12, 0), datetime(2026, 1, 1, 13, 0)
+        
+        series = client.query_metric_range("count_over_time({stream=\"events\"}[5m])", start, end, step="5m")
+        
+        (url, params), = client.session.requests
+        assert url.endswith("/loki/api/v1/query_range")
+        assert (params["start"], params["end"], params["step"]) == (
+            int(start.timestamp() * 1e9), int(end.timestamp() * 1e9), "5m"
+        )
+        assert series == [{"labels": {"event_type": "intel_match"}, "values": [
+            (datetime.fromtimestamp(1767268800), 1.0),
+            (datetime.fromtimestamp(1767269100), 4.0),
+        ]}]
+
+
+class TestHealthEventCounts:
+    """Test the combined event count query of the health score service."""
+    
+    def test_query(self, health):
+        service = health(vector())
+        assert service._event_count_query() == EVENT_COUNT_QUERY
+        
+        service._count_events()
+        (_, params), = service.loki_client.session.requests
+        assert params == {"query": EVENT_COUNT_QUERY}
+    
+    def test_counts_per_window_type_and_severity(self, health):
+        service = health(vector(
+            ({"window": "24h", "event_type": "device_anomaly", "severity": "CRITICAL"}, 4),
+            ({"window": "168h", "event_type": "device_anomaly", "severity": "CRITICAL"}, 9),
+            ({"window": "168h", "event_type": "device_anomaly", "severity": "INFO"}, 50),
+            ({"window": "168h", "event_type": "intel_match", "severity": "WARNING"}, 2),
+            ({"window": "168h", "event_type": "intel_match", "severity": "CRITICAL"}, 1),
+            ({"window": "168h", "event_type": "new_device", "severity": "INFO"}, 6),
+        ))
+        
+        metrics = service._collect_metrics()
+        assert (
+            metrics.high_anomaly_count,
+            metrics.intel_matches_count,
+            metrics.new_devices_count,
+            metrics.critical_events_count,
+        ) == (4, 3, 6, 10)
+    
+    def test_empty_result_gives_zero_counts(self, health):
+        service = health(vector())
+        assert service._count_events() == {
+            "high_anomaly_count": 0,
+            "intel_matches_count": 0,
+            "new_devices_count": 0,
+            "critical_events_count": 0,
+        }
+        metrics = service._collect_metrics()
+        assert metrics.high_anomaly_count == metrics.intel_matches_count == 0
+        assert metrics.new_devices_count == metrics.critical_events_count == 0
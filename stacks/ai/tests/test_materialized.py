@@ -0,0 +1,174 @@
+"""
+Tests for materialized UI views: single-flight refresh, stale serving and LRU query views.
+"""
+
+import threading
+import time
+
+import pytest
+
+from orion_ai.ui.materialized import MaterializedView, ViewRegistry
+
+
+class Compute:
+    """View function counting its calls; blocks while `gate` is clear."""
+    
+    def __init__(self):
+        self.calls = 0
+        self.fail = False
+        self.gate = threading.Event()
+        self.gate.set()
+        self.entered = threading.Event()
+        self._lock = threading.Lock()
+    
+    def __call__(self):
+        with self._lock:
+            self.calls += 1
+            calls = self.calls
+        self.entered.set()
+        self.gate.wait(5)
+        if self.fail:
+            raise RuntimeError("loki unavailable")
+        return calls
+    
+    def hold(self):
+        """Make the next calls block until release()."""
+        self.entered.clear()
+        self.gate.clear()
+    
+    def release(self):
+        self.gate.set()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+class TestMaterializedView:
+    """Test refresh and serving of a single view."""
+    
+    def test_concurrent_first_reads_share_one_computation(self):
+        compute = Compute()
+        view = MaterializedView("dashboard", compute, ttl=60)
+        compute.hold()
+        
+        results = []
+        readers = [threading.Thread(target=lambda: results.append(view.get())) for _ in range(5)]
+        for reader in readers:
+            reader.start()
+        assert compute.entered.wait(5)
+        wait_until(lambda: view.status()["refreshing"])
+        compute.release()
+        for reader in readers:
+            reader.join(5)
+        
+        assert compute.calls == 1
+        assert [(s.value, s.version) for s in results] == [(1, 1)] * 5
+    
+    def test_stale_snapshot_is_served_during_refresh(self):
+        compute = Compute()
+        view = MaterializedView("dashboard", compute, ttl=0)
+        first = view.get()
+        compute.hold()
+        
+        # Expired: returned at once while a background refresh runs
+        assert view.get() is first
+        assert compute.entered.wait(5)
+        assert view.status()["refreshing"]
+        # Reads during the refresh join it instead of starting another
+        assert view.get() is first
+        assert compute.calls == 2
+        
+        compute.release()
+        wait_until(lambda: not view.status()["refreshing"])
+        assert (view.snapshot.value, view.snapshot.version) == (2, 2)
+    
+    def test_fresh_snapshot_is_not_recomputed(self):
+        compute = Compute()
+        view = MaterializedView("dashboard", compute, ttl=60)
+        view.get()
+        view.get()
+        assert compute.calls == 1
+    
+    def test_failed_refresh_keeps_last_good_value(self):
+        compute = Compute()
+        view = MaterializedView("dashboard", compute, ttl=60)
+        view.get()
+        
+        compute.fail = True
+        snapshot = view.refresh()
+        assert (snapshot.value, snapshot.version, snapshot.error) == (1, 1, "loki unavailable")
+        assert view.get() is snapshot
+        assert view.status()["error"] == "loki unavailable"
+        
+        compute.fail = False
+        snapshot = view.refresh()
+        assert (snapshot.value, snapshot.version, snapshot.error) == (3, 2, None)
+    
+    def test_unavailable_without_any_value(self):
+        compute = Compute()
+        compute.fail = True
+        view = MaterializedView("dashboard", compute, ttl=60)
+        
+        with pytest.raises(RuntimeError):
+            view.get()
+        assert view.snapshot is None
+        assert view.status()["version"] == 0
+
+
+class TestViewRegistry:
+    """Test scheduled and query views."""
+    
+    def test_query_views_are_evicted_least_recently_used(self):
+        registry = ViewRegistry(ttl=60, max_query_views=2)
+        computes = {key: Compute() for key in "abc"}
+        
+        registry.query("a", computes["a"])
+        registry.query("b", computes["b"])
+        # Using "a" again makes "b" the least recently used view
+        registry.query("a", computes["a"])
+        registry.query("c", computes["c"])
+        
+        assert [view["name"] for view in registry.status()] == ["a", "c"]
+        assert computes["a"].calls == 1
+        
+        assert registry.query("b", computes["b"]).value == 2
+        assert [view["name"] for view in registry.status()] == ["c", "b"]
+    
+    def test_scheduled_views(self):
+        registry = ViewRegistry(ttl=60)
+        compute = Compute()
+        registry.register("devices", compute)
+        
+        assert registry.get("devices").value == 1
+        registry.refresh("devices")
+        assert registry.get("devices").value == 2
+        with pytest.raises(KeyError):
+            registry.get("nope")
+    
+    def test_full_refresh_drops_query_views(self):
+        registry = ViewRegistry(ttl=60)
+        scheduled, query = Compute(), Compute()
+        registry.register("devices", scheduled)
+        registry.query("events?limit=10", query)
+        
+        registry.refresh()
+        
+        assert [view["name"] for view in registry.status()] == ["devices"]
+        assert scheduled.calls == 1
+        assert registry.query("events?limit=10", query).value == 2
+    
+    def test_scheduler_refreshes_views(self):
+        registry = ViewRegistry(ttl=60)
+        compute = Compute()
+        registry.register("devices", compute)
+        
+        registry.start(0.01)
+        try:
+            wait_until(lambda: compute.calls >= 2)
+        finally:
+            registry.stop()
+        assert registry.get("devices").version >= 2
@@ -0,0 +1,163 @@
+"""
+Tests for hot-swapping and shadow scoring of managed models.
+
+Model files hold a constant score as text; a fake runner stands in for
+ONNX Runtime so the tests exercise only the registry logic.
+"""
+
+import os
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from orion_ai import model_registry
+from orion_ai.model_registry import ManagedModel
+from orion_ai.model_runner import SessionProfile
+
+
+class FakeRunner:
+    """Runner scoring every row with the constant stored in its file."""
+    
+    # Replaced per runner to hold its predict() calls in flight
+    gate = threading.Event()
+    
+    def __init__(self, path, profile=None):
+        text = path.read_text()
+        if text == "corrupt":
+            raise ValueError("not a model")
+        self.score = float(text)
+        self.input_shape = [None, 4]
+        self.closed = False
+    
+    def predict(self, features, batch_size=None):
+        self.gate.wait(5)
+        return np.full((len(features), 1), self.score, dtype=np.float32)
+    
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture(autouse=True)
+def fake_runner(monkeypatch):
+    FakeRunner.gate.set()
+    monkeypatch.setattr(model_registry, "ModelRunner", FakeRunner)
+    monkeypatch.setattr(model_registry, "load_model", lambda path, profile=None: FakeRunner(path))
+
+
+def drop(directory, name, content, age=100):
+    """Write a model file with an mtime `age` seconds in the past."""
+    path = directory / name
+    path.write_text(content)
+    mtime = time.time() - age
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def managed(tmp_path, **kwargs):
+    drop(tmp_path, "device.onnx", "0.1", age=200)
+    return ManagedModel("device", tmp_path / "device.onnx", SessionProfile(), settle_seconds=0, **kwargs)
+
+
+def score(model, rows=4):
+    return model.predict(np.ones((rows, 4), dtype=np.float32))[:, 0].tolist()
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+class TestModelSwap:
+    """Test loading, validating and swapping new model files."""
+    
+    def test_newer_file_is_swapped_in(self, tmp_path):
+        model = managed(tmp_path)
+        old = model.runner
+        assert score(model) == pytest.approx([0.1] * 4)
+        
+        drop(tmp_path, "device-2.onnx", "0.9")
+        assert model.poll() == "swapped"
+        assert score(model) == pytest.approx([0.9] * 4)
+        assert old.closed
+        assert model.status()["active"] == "device-2.onnx"
+        # The same file is not handled twice
+        assert model.poll() is None
+    
+    def test_unrelated_files_are_ignored(self, tmp_path):
+        model = managed(tmp_path)
+        drop(tmp_path, "devices.onnx", "0.9")
+        drop(tmp_path, "device-2.txt", "0.9")
+        assert model.poll() is None
+    
+    def test_unsettled_file_waits(self, tmp_path):
+        model = managed(tmp_path)
+        model.settle_seconds = 60
+        drop(tmp_path, "device-2.onnx", "0.9", age=0)
+        assert model.poll() is None
+    
+    @pytest.mark.parametrize("content", ["nan", "corrupt"])
+    def test_bad_candidate_is_rejected(self, tmp_path, content):
+        model = managed(tmp_path)
+        drop(tmp_path, "device-2.onnx", content)
+        
+        assert model.poll() == "rejected"
+        assert score(model) == pytest.approx([0.1] * 4)
+        assert model.status()["rejected"] == "device-2.onnx"
+        assert model.poll() is None
+    
+    def test_runner_in_use_is_closed_after_last_call(self, tmp_path):
+        model = managed(tmp_path)
+        old = model.runner
+        old.gate = threading.Event()
+        scoring = threading.Thread(target=score, args=(model,))
+        scoring.start()
+        wait_until(lambda: model._active.users == 1)
+        
+        drop(tmp_path, "device-2.onnx", "0.9")
+        assert model.poll() == "swapped"
+        assert not old.closed
+        
+        old.gate.set()
+        scoring.join(5)
+        assert old.closed
+
+
+class TestShadowScoring:
+    """Test shadow comparison before promotion."""
+    
+    def test_candidate_is_compared_then_promoted(self, tmp_path):
+        model = managed(tmp_path, threshold=0.5, shadow_batches=2)
+        drop(tmp_path, "device-2.onnx", "0.9")
+        assert model.poll() == "shadow"
+        
+        # Decisions still come from the active model
+        assert score(model) == pytest.approx([0.1] * 4)
+        # Matrices arriving while the shadow worker is busy are skipped
+        wait_until(lambda: model.status()["shadow"]["batches"] == 1 and not model._shadow_busy)
+        shadow = model.status()["shadow"]
+        assert shadow["rows"] == 4
+        assert shadow["flips"] == 4
+        assert shadow["max_abs_delta"] == pytest.approx(0.8)
+        assert model.status()["candidate"] == "device-2.onnx"
+        
+        score(model)
+        wait_until(lambda: model.swaps == 1)
+        assert model.status()["candidate"] is None
+        assert score(model) == pytest.approx([0.9] * 4)
+        model.close()
+    
+    def test_newer_candidate_replaces_shadow(self, tmp_path):
+        model = managed(tmp_path, shadow_batches=5)
+        drop(tmp_path, "device-2.onnx", "0.5", age=50)
+        assert model.poll() == "shadow"
+        first = model._candidate.runner
+        
+        drop(tmp_path, "device-3.onnx", "0.7", age=10)
+        assert model.poll() == "shadow"
+        assert first.closed
+        assert model.status()["candidate"] == "device-3.onnx"
+        model.close()
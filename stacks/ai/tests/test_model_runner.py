@@ -0,0 +1,281 @@
+"""
+Tests for model runners: ONNX optimized graph caching, warm-up and
+timings, and TFLite batching with a fake interpreter.
+"""
+
+import os
+import time
+
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+
+from onnx import TensorProto, helper
+
+from orion_ai import model_runner
+from orion_ai.model_runner import ModelRunner, SessionProfile
+
+
+def write_model(path, shape=(None, 4)):
+    """Model summing each row's features into one score."""
+    axes = helper.make_tensor("axes", TensorProto.INT64, [1], [1])
+    graph = helper.make_graph(
+        [helper.make_node("ReduceSum", ["x", "axes"], ["y"], keepdims=1)],
+        "row_sum",
+        [helper.make_tensor_value_info("x", TensorProto.FLOAT, list(shape))],
+        [helper.make_tensor_value_info("y", TensorProto.FLOAT, [shape[0], 1])],
+        [axes],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+    return path
+
+
+@pytest.fixture
+def model_path(tmp_path):
+    return write_model(tmp_path / "device.onnx")
+
+
+def cached_graphs(directory):
+    return sorted(path.name for path in directory.glob("*.opt.onnx"))
+
+
+class TestOptimizedGraphCache:
+    """Test reuse and invalidation of cached optimized graphs."""
+    
+    def test_second_load_uses_cached_graph(self, model_path, tmp_path):
+        profile = SessionProfile(optimized_model_dir=str(tmp_path / "cache"))
+        (tmp_path / "cache").mkdir()
+        
+        first = ModelRunner(model_path, profile=profile)
+        assert not first.optimized_cache_hit
+        assert cached_graphs(tmp_path / "cache") == [first._optimized_cache_path().name]
+        
+        second = ModelRunner(model_path, profile=profile)
+        assert second.optimized_cache_hit
+        np.testing.assert_allclose(second.predict(np.ones((3, 4))), [[4], [4], [4]])
+    
+    def test_cache_key_follows_model_mtime(self, model_path, tmp_path):
+        profile = SessionProfile(optimized_model_dir=str(tmp_path / "cache"))
+        (tmp_path / "cache").mkdir()
+        old_path = ModelRunner(model_path, profile=profile)._optimized_cache_path()
+        
+        # A retrained model with the same size
+        stat = model_path.stat()
+        os.utime(model_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        runner = ModelRunner(model_path, profile=profile)
+        
+        assert runner._optimized_cache_path() != old_path
+        assert not runner.optimized_cache_hit
+        # The stale graph is replaced
+        assert cached_graphs(tmp_path / "cache") == [runner._optimized_cache_path().name]
+    
+    def test_cache_key_follows_optimization_level(self, model_path, tmp_path):
+        paths = {
+            ModelRunner(model_path, profile=SessionProfile(
+                optimized_model_dir=str(tmp_path), graph_optimization=level
+            ))._optimized_cache_path()
+            for level in ("basic", "all")
+        }
+        assert len(paths) == 2
+    
+    def test_unreadable_cached_graph_is_rebuilt(self, model_path, tmp_path):
+        profile = SessionProfile(optimized_model_dir=str(tmp_path / "cache"))
+        (tmp_path / "cache").mkdir()
+        cache_path = ModelRunner(model_path, profile=profile)._optimized_cache_path()
+        cache_path.write_bytes(b"truncated")
+        
+        runner = ModelRunner(model_path, profile=profile)
+        assert not runner.optimized_cache_hit
+        np.testing.assert_allclose(runner.predict(np.ones((1, 4))), [[4]])
+        assert ModelRunner(model_path, profile=profile).optimized_cache_hit
+    
+    def test_no_cache_without_directory_or_optimization(self, model_path, tmp_path):
+        assert ModelRunner(model_path)._optimized_cache_path() is None
+        profile = SessionProfile(optimized_model_dir=str(tmp_path), graph_optimization="disable")
+        assert ModelRunner(model_path, profile=profile)._optimized_cache_path() is None
+
+
+class TestWarmUp:
+    """Test the synthetic warm-up batch and load timings."""
+    
+    @pytest.fixture
+    def warm_ups(self, monkeypatch):
+        shapes = []
+        predict = ModelRunner.predict
+        
+        def record(runner, features, batch_size=None):
+            shapes.append(features.shape)
+            return predict(runner, features, batch_size)
+        monkeypatch.setattr(ModelRunner, "predict", record)
+        return shapes
+    
+    @pytest.mark.parametrize("shape, input_width, expected", [
+        ((None, 4), None, (8, 4)),
+        ((2, 4), None, (2, 4)),
+        ((None, None), 4, (8, 4)),
+        # The model's own width wins over input_width
+        ((None, 4), 6, (8, 4)),
+    ])
+    def test_batch_shape(self, tmp_path, warm_ups, shape, input_width, expected):
+        path = write_model(tmp_path / "device.onnx", shape)
+        runner = ModelRunner(path, profile=SessionProfile(warmup_rows=8), input_width=input_width)
+        
+        assert warm_ups == [expected]
+        assert runner.warmup_seconds > 0
+    
+    def test_skipped_when_width_unknown(self, tmp_path, warm_ups):
+        path = write_model(tmp_path / "device.onnx", (None, None))
+        runner = ModelRunner(path, profile=SessionProfile(warmup_rows=8))
+        
+        assert warm_ups == []
+        assert runner.warmup_seconds == 0
+    
+    def test_off_by_default(self, model_path, warm_ups):
+        ModelRunner(model_path)
+        assert warm_ups == []
+    
+    def test_timings(self, model_path, tmp_path):
+        profile = SessionProfile(optimized_model_dir=str(tmp_path), warmup_rows=4)
+        ModelRunner(model_path, profile=profile)
+        runner = ModelRunner(model_path, profile=profile)
+        
+        assert runner.load_seconds > 0 and runner.warmup_seconds > 0
+        assert runner.timings == {
+            "load_seconds": round(runner.load_seconds, 4),
+            "warmup_seconds": round(runner.warmup_seconds, 4),
+            "optimized_cache_hit": True,
+        }
+
+
+class FakeInterpreter:
+    """TFLite interpreter scoring each row with its feature sum."""
+    
+    def __init__(self, signature, delay=0.0):
+        self.signature = list(signature)
+        self.shape = [1 if dim == -1 else dim for dim in signature]
+        self.delay = delay
+        self.allocated = None
+        self.invoked = []
+    
+    def allocate_tensors(self):
+        self.allocated = list(self.shape)
+    
+    def get_input_details(self):
+        return [{"index": 0, "shape": np.array(self.shape), "shape_signature": np.array(self.signature)}]
+    
+    def get_output_details(self):
+        return [{"index": 1, "shape": np.array([self.shape[0], 1])}]
+    
+    def resize_tensor_input(self, index, shape):
+        assert self.signature[0] == -1, "fixed batch models are never resized"
+        self.shape = list(shape)
+    
+    def set_tensor(self, index, value):
+        assert list(value.shape) == self.allocated
+        self.input = value
+    
+    def invoke(self):
+        self.invoked.append(len(self.input))
+        # Later chunks finish first
+        time.sleep(self.delay / (1 + float(self.input[0, 0])))
+        self.output = self.input.sum(axis=1, keepdims=True)
+    
+    def get_tensor(self, index):
+        return self.output
+
+
+@pytest.fixture
+def tflite(tmp_path, monkeypatch):
+    """Create a TFLite runner whose interpreters are FakeInterpreters."""
+    monkeypatch.setattr(model_runner, "TFLITE_AVAILABLE", True)
+    path = tmp_path / "device.tflite"
+    path.write_bytes(b"")
+    interpreters = []
+    
+    def open_runner(signature, delay=0.0, **profile):
+        def new_interpreter(runner):
+            interpreters.append(FakeInterpreter(signature, delay))
+            return interpreters[-1]
+        monkeypatch.setattr(ModelRunner, "_new_interpreter", new_interpreter)
+        runner = ModelRunner(path, profile=SessionProfile(**profile))
+        runner.interpreters = interpreters
+        return runner
+    
+    return open_runner
+
+
+def invocations(runner):
+    return sorted(size for interpreter in runner.interpreters for size in interpreter.invoked)
+
+
+def indexed_rows(rows, width=4):
+    """Rows whose feature sum is their index."""
+    features = np.zeros((rows, width), dtype=np.float32)
+    features[:, 0] = np.arange(rows)
+    return features
+
+
+class TestTFLiteBatching:
+    """Test chunking, batch buckets and padding of TFLite inference."""
+    
+    def test_fixed_batch_runs_padded_chunks(self, tflite):
+        runner = tflite([2, 4])
+        assert not runner.tflite_dynamic_batch
+        
+        scores = runner.predict(indexed_rows(5))
+        assert scores[:, 0].tolist() == [0, 1, 2, 3, 4]
+        assert invocations(runner) == [2, 2, 2]
+        assert len(runner.interpreters) == 1
+    
+    def test_dynamic_batch_uses_power_of_two_buckets(self, tflite):
+        runner = tflite([-1, 4], tflite_max_batch=8)
+        assert runner.tflite_dynamic_batch
+        assert [runner._tflite_bucket(rows) for rows in (1, 2, 3, 5, 8, 20)] == [1, 2, 4, 8, 8, 8]
+        
+        scores = runner.predict(indexed_rows(13))
+        assert scores.shape == (13, 1)
+        assert scores[:, 0].tolist() == list(range(13))
+        # 8 rows, then 5 rows padded to 8
+        assert invocations(runner) == [8, 8]
+    
+    def test_buckets_are_allocated_once(self, tflite):
+        runner = tflite([-1, 4], tflite_max_batch=8)
+        for _ in range(3):
+            runner.predict(indexed_rows(3))
+        
+        # The initial interpreter plus one for the 4-row bucket
+        assert len(runner.interpreters) == 2
+        assert runner.interpreters[1].invoked == [4, 4, 4]
+    
+    def test_pool_keeps_input_order(self, tflite):
+        runner = tflite([-1, 4], delay=0.05, tflite_max_batch=4, tflite_pool_size=3)
+        try:
+            scores = runner.predict(indexed_rows(30))
+        finally:
+            runner.close()
+        
+        assert scores[:, 0].tolist() == list(range(30))
+        assert invocations(runner) == [2] + [4] * 7
+        # At most one interpreter per pool slot and bucket
+        buckets = [interpreter.shape[0] for interpreter in runner.interpreters[1:]]
+        assert buckets.count(2) <= 3 and buckets.count(4) <= 3
+    
+    def test_pool_splits_one_batch(self, tflite):
+        runner = tflite([-1, 4], tflite_max_batch=64, tflite_pool_size=2)
+        try:
+            scores = runner.predict(indexed_rows(10))
+        finally:
+            runner.close()
+        
+        assert scores[:, 0].tolist() == list(range(10))
+        assert invocations(runner) == [8, 8]
+    
+    @pytest.mark.parametrize("signature", [[-1, 4], [2, 4]])
+    def test_empty_input(self, tflite, signature):
+        runner = tflite(signature)
+        assert runner.predict(np.empty((0, 4), dtype=np.float32)).shape == (0, 1)
+        assert invocations(runner) == []
@@ -0,0 +1,131 @@
+"""
+Tests for the buffered, rotating JSON-lines result log.
+"""
+
+import gzip
+import threading
+import time
+
+import pytest
+
+from orion_ai.output_writer import RotatingJsonLog
+
+
+def line(i):
+    return f'{{"n": {i}}}\n'.encode()
+
+
+def wait_for_rotations(timeout=5):
+    """Wait for background compress/prune threads to finish."""
+    deadline = time.monotonic() + timeout
+    for thread in threading.enumerate():
+        if thread.name == "output-rotate":
+            thread.join(max(deadline - time.monotonic(), 0))
+
+
+def backups(path):
+    return sorted(path.parent.glob(f"{path.name}.*"))
+
+
+class TestRotatingJsonLog:
+    """Test buffering, rotation and pruning."""
+    
+    def test_lines_are_buffered_until_flush(self, tmp_path):
+        path = tmp_path / "results.json"
+        log = RotatingJsonLog(path, buffer_size=1024)
+        log.write(line(1))
+        assert path.read_bytes() == b""
+        
+        log.flush()
+        assert path.read_bytes() == line(1)
+        log.close()
+    
+    def test_full_buffer_is_written(self, tmp_path):
+        path = tmp_path / "results.json"
+        log = RotatingJsonLog(path, buffer_size=len(line(1)) * 3)
+        for i in range(3):
+            log.write(line(i))
+        
+        assert path.read_bytes() == line(0) + line(1) + line(2)
+        log.close()
+    
+    def test_size_rotation_keeps_every_line(self, tmp_path):
+        path = tmp_path / "results.json"
+        log = RotatingJsonLog(path, buffer_size=0, max_bytes=40, backup_count=100, compress=False)
+        for i in range(20):
+            log.write(line(i))
+        log.close()
+        wait_for_rotations()
+        
+        rotated = backups(path)
+        assert len(rotated) > 1
+        data = b"".join(p.read_bytes() for p in rotated) + path.read_bytes()
+        assert data == b"".join(line(i) for i in range(20))
+    
+    def test_rotated_files_are_compressed(self, tmp_path):
+        path = tmp_path / "results.json"
+        log = RotatingJsonLog(path, buffer_size=0, max_bytes=1)
+        log.write(line(1))
+        wait_for_rotations()
+        
+        rotated = backups(path)
+        assert [p.suffix for p in rotated] == [".gz"]
+        assert gzip.decompress(rotated[0].read_bytes()) == line(1)
+        # Promtail keeps reading the same path
+        assert path.exists() and path.read_bytes() == b""
+        log.close()
+    
+    def test_old_backups_are_pruned(self, tmp_path):
+        path = tmp_path / "results.json"
+        log = RotatingJsonLog(path, buffer_size=0, max_bytes=1, backup_count=2, compress=False)
+        for i in range(5):
+            log.write(line(i))
+            wait_for_rotations()
+        log.close()
+        
+        rotated = backups(path)
+        assert [p.read_bytes() for p in rotated] == [line(3), line(4)]
+    
+    def test_age_rotation(self, tmp_path):
+        path = tmp_path / "results.json"
+        log = RotatingJsonLog(path, buffer_size=1024, rotate_seconds=0.05, compress=False)
+        log.write(line(1))
+        log.flush()
+        assert backups(path) == []
+        
+        time.sleep(0.1)
+        log.flush()
+        wait_for_rotations()
+        assert len(backups(path)) == 1
+        log.close()
+    
+    def test_empty_file_is_not_rotated(self, tmp_path):
+        path = tmp_path / "results.json"
+        log = RotatingJsonLog(path, rotate_seconds=0.01)
+        time.sleep(0.05)
+        log.flush()
+        assert backups(path) == []
+        log.close()
+    
+    def test_reopen_appends(self, tmp_path):
+        path = tmp_path / "results.json"
+        log = RotatingJsonLog(path, buffer_size=0)
+        log.write(line(1))
+        log.close()
+        
+        log = RotatingJsonLog(path, buffer_size=0)
+        log.write(line(2))
+        log.close()
+        assert path.read_bytes() == line(1) + line(2)
+    
+    def test_write_after_close_raises(self, tmp_path):
+        path = tmp_path / "results.json"
+        log = RotatingJsonLog(path)
+        log.write(line(1))
+        log.close()
+        
+        with pytest.raises(ValueError):
+            log.write(line(2))
+        log.flush()
+        log.close()
+        assert path.read_bytes() == line(1)
@@ -0,0 +1,182 @@
+"""
+Tests for batched model scoring in the detection pipelines.
+"""
+
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from orion_ai import pipelines
+from orion_ai.core import config as core_config
+from orion_ai.pipelines import DeviceAnomalyPipeline, DomainRiskPipeline, _predict_scores
+
+WINDOW_END = datetime(2026, 1, 1, 12, 0)
+WINDOW_START = WINDOW_END - timedelta(minutes=10)
+BATCH_SIZE = 3
+
+
+class FakeModel:
+    """Deterministic model scoring each row by a weighted feature sum; splits batches like ModelRunner."""
+    
+    def __init__(self, columns=1):
+        self.columns = columns
+        self.calls = []
+    
+    def score(self, features):
+        weights = np.linspace(0.013, 0.17, features.shape[1])
+        return (np.asarray(features, dtype=np.float64) @ weights) % 1
+    
+    def predict(self, features, batch_size=None):
+        features = np.asarray(features, dtype=np.float32)
+        size = batch_size or len(features)
+        outputs = []
+        for i in range(0, len(features), size):
+            chunk = features[i:i + size]
+            self.calls.append(len(chunk))
+            scores = self.score(chunk)
+            outputs.append(scores if self.columns == 0 else np.column_stack([scores] * self.columns))
+        return np.concatenate(outputs)
+
+
+class FakeRegistry:
+    """Model registry handing out one fake model."""
+    
+    def __init__(self, model):
+        self.fake_model = model
+    
+    def model(self, name, path, threshold=None):
+        return self.fake_model
+
+
+class FakeEnforcement:
+    """Enforcement queue accepting every block."""
+    
+    client = None
+    
+    def block(self, domain, comment=None):
+        return "queued"
+
+
+class FakeOutputWriter:
+    """Discards results."""
+    
+    def write_device_anomaly(self, **kwargs):
+        pass
+    
+    def write_domain_risk(self, **kwargs):
+        pass
+
+
+class Entries(list):
+    """Log entries standing in for a LokiStream."""
+    
+    query = "{}"
+    complete = True
+    
+    @property
+    def entries_read(self):
+        return len(self)
+
+
+class FakeLogReader:
+    """Serves fixed flow and DNS entries."""
+    
+    def __init__(self, flows=(), dns=()):
+        self.flows = list(flows)
+        self.dns = list(dns)
+    
+    def stream_suricata_flows(self, start, end, limit=None):
+        return Entries(self.flows)
+    
+    def stream_dns_queries(self, start, end, limit=None):
+        return Entries(self.dns)
+    
+    def stream_suricata_alerts(self, start, end, limit=None):
+        return Entries()
+
+
+def entry(**log):
+    return {"timestamp_ns": int((WINDOW_END - timedelta(minutes=1)).timestamp() * 1e9), "log": json.dumps(log)}
+
+
+@pytest.fixture
+def model(monkeypatch):
+    """Run pipelines with fake collaborators and a small inference batch size."""
+    monkeypatch.setenv("INFERENCE_BATCH_SIZE", str(BATCH_SIZE))
+    monkeypatch.setenv("DEVICE_ANOMALY_THRESHOLD", "0.5")
+    monkeypatch.setenv("DOMAIN_RISK_THRESHOLD", "0.5")
+    monkeypatch.setenv("ENABLE_THREAT_INTEL", "false")
+    monkeypatch.setattr(core_config, "_config", None)
+    
+    fake = FakeModel()
+    monkeypatch.setattr(pipelines, "get_model_registry", lambda: FakeRegistry(fake))
+    monkeypatch.setattr(pipelines, "get_enforcement_queue", lambda: FakeEnforcement())
+    monkeypatch.setattr(pipelines, "OutputWriter", FakeOutputWriter)
+    monkeypatch.setattr(pipelines, "LokiLogReader", FakeLogReader)
+    return fake
+
+
+class TestPredictScores:
+    """Test batched scoring against a single unbatched call."""
+    
+    @pytest.mark.parametrize("columns", [0, 1, 2])
+    @pytest.mark.parametrize("batch_size", [1, 3, 7, 100])
+    def test_batches_match_unbatched_scores(self, columns, batch_size):
+        features = np.random.default_rng(0).random((20, 6)) * 100
+        model = FakeModel(columns)
+        
+        scores = _predict_scores(model, features, batch_size)
+        
+        assert scores.shape == (20,) and scores.dtype == np.float64
+        np.testing.assert_allclose(scores, model.score(features.astype(np.float32)), rtol=1e-6)
+        assert model.calls == [min(batch_size, 20 - i) for i in range(0, 20, batch_size)]
+
+
+class TestPipelineBatching:
+    """Test that batched scores stay aligned with devices and domains."""
+    
+    def test_device_scores_align_with_device_ips(self, model):
+        pipeline = DeviceAnomalyPipeline()
+        pipeline.log_reader = FakeLogReader(flows=[
+            entry(src_ip=f"10.0.0.{n}", dest_ip="1.1.1.1", dest_port=443, proto="TCP",
+                  flow={"bytes_toserver": 100 * n + i, "bytes_toclient": 7 * i, "age": i})
+            for n in range(2, 12)
+            for i in range(n)
+        ])
+        
+        results = pipeline.run(WINDOW_START, WINDOW_END)
+        
+        assert len(results) == 10
+        assert len({round(r.anomaly_score, 6) for r in results}) == 10
+        assert {r.is_anomalous for r in results} == {True, False}
+        assert max(model.calls) == BATCH_SIZE
+        matrix, device_ips, _ = pipeline.feature_extractor.extract_all_device_features(
+            pipeline._read_events(WINDOW_START, WINDOW_END), WINDOW_START, WINDOW_END
+        )
+        expected = dict(zip(device_ips, model.score(matrix.astype(np.float32))))
+        for result in results:
+            assert result.anomaly_score == pytest.approx(expected[result.device_ip])
+            assert result.is_anomalous == (result.anomaly_score >= result.threshold)
+    
+    def test_domain_scores_align_with_domains(self, model):
+        pipeline = DomainRiskPipeline()
+        names = [f"host{i}.example{i % 3}.com" for i in range(8)] + ["x7kq2p.top", "a.b.c.org"]
+        pipeline.log_reader = FakeLogReader(dns=[
+            entry(src_ip="10.0.0.2", dns={"type": "query", "rrname": name})
+            for i, name in enumerate(names)
+            for _ in range(i % 4 + 1)
+        ])
+        
+        results = pipeline.run(WINDOW_START, WINDOW_END)
+        
+        assert [r.domain for r in results] == names
+        assert {r.action for r in results} == {"BLOCK", "ALLOW"}
+        assert max(model.calls) == BATCH_SIZE
+        for result in results:
+            features = pipeline.feature_extractor.extract_domain_features(
+                result.domain, names.index(result.domain) % 4 + 1
+            ).to_vector()
+            assert result.risk_score == pytest.approx(float(model.score(features[None, :])[0]), rel=1e-5)
+            assert result.action == ("BLOCK" if result.risk_score >= result.threshold else "ALLOW")
@@ -0,0 +1,158 @@
+"""
+Tests for compiled playbook matching in the SOAR engine.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pytest
+import yaml
+
+from orion_ai.core.models import Event, EventSeverity, EventType
+from orion_ai.soar.engine import PlaybookEngine
+
+PLAYBOOKS = [
+    {
+        "id": "risky-domain", "name": "Risky domain", "match_event_type": "domain_risk", "priority": 10,
+        "conditions": [{"field": "metadata.risk_score", "operator": ">=", "value": 0.8}],
+        "actions": [{"type": "BLOCK_DOMAIN"}, {"type": "SEND_NOTIFICATION"}],
+    },
+    {
+        "id": "critical-anything", "name": "Critical", "match_event_type": "*", "priority": 20,
+        "conditions": [{"field": "severity", "operator": "==", "value": "CRITICAL"}],
+        "actions": [{"type": "SEND_NOTIFICATION"}],
+    },
+    {
+        "id": "lab-anomaly", "name": "Lab anomaly", "match_event_type": "device_anomaly", "priority": 5,
+        "conditions": [
+            {"field": "metadata.anomaly_score", "operator": ">", "value": 0.5},
+            {"field": "metadata.tags", "operator": "contains", "value": "lab"},
+        ],
+        "actions": [{"type": "TAG_DEVICE", "params": {"tag": "anomalous"}}],
+    },
+    {
+        "id": "known-device", "name": "Known device", "match_event_type": "device_anomaly", "priority": 15,
+        "conditions": [{"field": "device_id", "operator": "in", "value": ["d1", "d2"]}],
+        "actions": [{"type": "LOG_EVENT"}],
+    },
+    {
+        "id": "everything", "name": "Log all", "match_event_type": "*", "priority": 0,
+        "actions": [{"type": "LOG_EVENT"}],
+    },
+    {
+        "id": "disabled", "name": "Disabled", "match_event_type": "*", "priority": 100, "enabled": False,
+        "actions": [{"type": "BLOCK_DOMAIN"}],
+    },
+]
+
+
+def write_engine(tmp_path, playbooks=PLAYBOOKS):
+    path = tmp_path / "playbooks.yml"
+    path.write_text(yaml.safe_dump({"playbooks": playbooks}))
+    return PlaybookEngine(str(path))
+
+
+def event(n, event_type, severity=EventSeverity.INFO, device_id=None, **metadata):
+    return Event(
+        event_id=f"e{n}",
+        event_type=event_type,
+        timestamp=datetime(2026, 1, 1),
+        severity=severity,
+        title="",
+        description="",
+        source="test",
+        device_id=device_id,
+        metadata=metadata,
+    )
+
+
+def random_events(count=300, seed=0):
+    rng = np.random.default_rng(seed)
+    types = [EventType.DOMAIN_RISK, EventType.DEVICE_ANOMALY, EventType.INTEL_MATCH]
+    events = []
+    for n in range(count):
+        metadata = {}
+        if rng.random() < 0.9:
+            metadata["risk_score"] = float(rng.random())
+        if rng.random() < 0.9:
+            metadata["anomaly_score"] = float(rng.random())
+        if rng.random() < 0.5:
+            metadata["tags"] = list(rng.choice(["lab", "iot", "tv"], size=2))
+        events.append(event(
+            n,
+            types[rng.integers(len(types))],
+            severity=list(EventSeverity)[rng.integers(3)],
+            device_id=str(rng.choice(["d1", "d2", "d3"])) if rng.random() < 0.8 else None,
+            **metadata,
+        ))
+    return events
+
+
+def summary(actions):
+    return [(a.playbook_id, a.action.type.value, a.event_id) for a in actions]
+
+
+class TestPlaybookEngine:
+    """Test batched and per-event evaluation against the playbook semantics."""
+    
+    def test_batch_matches_per_event_evaluation(self, tmp_path):
+        engine = write_engine(tmp_path)
+        events = random_events()
+        
+        batched = engine.evaluate_events(events)
+        assert len(batched) == len(events)
+        for e, actions in zip(events, batched):
+            assert summary(actions) == summary(engine.evaluate_event(e))
+    
+    def test_matches_follow_playbook_priority(self, tmp_path):
+        engine = write_engine(tmp_path)
+        events = random_events()
+        
+        for e, actions in zip(events, engine.evaluate_events(events)):
+            data = e.to_dict()
+            expected = [p.id for p in engine.playbooks if p.matches(data)]
+            assert list(dict.fromkeys(a.playbook_id for a in actions)) == expected
+    
+    def test_wildcard_playbooks_match_every_type(self, tmp_path):
+        engine = write_engine(tmp_path)
+        events = [
+            event(1, EventType.NEW_DEVICE, EventSeverity.CRITICAL),
+            event(2, EventType.DOMAIN_RISK, EventSeverity.CRITICAL, risk_score=0.9),
+        ]
+        
+        first, second = [[a.playbook_id for a in actions] for actions in engine.evaluate_events(events)]
+        assert first == ["critical-anything", "everything"]
+        assert second == ["critical-anything", "risky-domain", "risky-domain", "everything"]
+    
+    @pytest.mark.parametrize("match_event_type", ["domain_risk", EventType.DOMAIN_RISK])
+    def test_enum_and_string_event_types(self, tmp_path, match_event_type):
+        engine = write_engine(tmp_path)
+        engine.get_playbook("risky-domain").match_event_type = match_event_type
+        engine._compile()
+        e = event(1, EventType.DOMAIN_RISK, risk_score=0.9)
+        
+        assert "risky-domain" in [a.playbook_id for a in engine.evaluate_event(e)]
+        assert "risky-domain" in [a.playbook_id for a in engine.evaluate_events([e])[0]]
+    
+    def test_disabled_playbooks_are_excluded(self, tmp_path):
+        engine = write_engine(tmp_path)
+        
+        for actions in engine.evaluate_events(random_events(50)):
+            assert "disabled" not in [a.playbook_id for a in actions]
+        assert engine.get_playbook("disabled") is not None
+        assert "disabled" not in [p.id for p in engine.list_playbooks(enabled_only=True)]
+    
+    def test_missing_and_uncomparable_fields_do_not_match(self, tmp_path):
+        engine = write_engine(tmp_path)
+        events = [
+            event(1, EventType.DOMAIN_RISK),
+            event(2, EventType.DOMAIN_RISK, risk_score="high"),
+        ]
+        
+        for actions in engine.evaluate_events(events):
+            assert [a.playbook_id for a in actions] == ["everything"]
+    
+    def test_no_playbooks(self, tmp_path):
+        engine = PlaybookEngine(str(tmp_path / "missing.yml"))
+        assert engine.evaluate_events(random_events(5)) == [[]] * 5
+        assert engine.evaluate_events([]) == []
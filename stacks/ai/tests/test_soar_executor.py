@@ -0,0 +1,153 @@
+"""
+Tests for the concurrent SOAR action executor.
+"""
+
+import threading
+import time
+
+import pytest
+
+from orion_ai.soar.executor import ActionExecutor, ActionLimits, TokenBucket
+from orion_ai.soar.models import Action, ActionType, TriggeredAction
+
+
+class FakeHandler:
+    """Action handler recording executions; blocks while `gate` is clear."""
+    
+    def __init__(self):
+        self.global_dry_run = False
+        self.executed = []
+        self.gate = threading.Event()
+        self.gate.set()
+        self._lock = threading.Lock()
+    
+    def execute(self, triggered_action, dry_run=False):
+        self.gate.wait()
+        with self._lock:
+            self.executed.append((triggered_action.action.type, triggered_action.event_id, time.monotonic()))
+        triggered_action.executed = not dry_run
+        triggered_action.success = True
+        return True
+
+
+def triggered(action_type, event_id="e1", playbook="pb", **params):
+    return TriggeredAction(
+        playbook_id=playbook,
+        playbook_name=playbook,
+        action=Action(action_type, params),
+        event_id=event_id
+    )
+
+
+@pytest.fixture
+def handler():
+    return FakeHandler()
+
+
+class TestTokenBucket:
+    """Test rate limiting."""
+    
+    def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=20, burst=3)
+        start = time.monotonic()
+        for _ in range(7):
+            bucket.acquire()
+        
+        # Three immediately, four more at 20 per second
+        assert time.monotonic() - start >= 0.18
+    
+    def test_unlimited(self):
+        bucket = TokenBucket(rate=0)
+        assert all(bucket.acquire() == 0.0 for _ in range(100))
+
+
+class TestActionExecutor:
+    """Test concurrency, rate limits and deduplication."""
+    
+    def test_rate_limit_per_action_type(self, handler):
+        executor = ActionExecutor(handler, limits={
+            ActionType.SEND_NOTIFICATION: ActionLimits(concurrency=4, rate=10, burst=1),
+        })
+        start = time.monotonic()
+        futures = [
+            executor.submit(triggered(ActionType.SEND_NOTIFICATION, event_id=f"e{i}"))
+            for i in range(4)
+        ]
+        futures.append(executor.submit(triggered(ActionType.LOG_EVENT, message="x")))
+        
+        assert all(f.result(timeout=5) for f in futures)
+        started = {kind: at - start for kind, _, at in handler.executed}
+        # Four notifications at 10 per second with a burst of one
+        assert started[ActionType.SEND_NOTIFICATION] >= 0.28
+        # Other action types are not held up by the notification rate
+        assert started[ActionType.LOG_EVENT] < 0.1
+        executor.close()
+    
+    def test_pending_block_is_shared_across_events(self, handler):
+        executor = ActionExecutor(handler)
+        handler.gate.clear()
+        first = executor.submit(triggered(ActionType.BLOCK_DOMAIN, "e1", domain="evil.com"))
+        second = executor.submit(triggered(ActionType.BLOCK_DOMAIN, "e2", playbook="other", domain="evil.com"))
+        handler.gate.set()
+        
+        assert first.result(timeout=5) and second.result(timeout=5)
+        assert len(handler.executed) == 1
+        assert executor.deduplicated == 1
+        executor.close()
+    
+    def test_notifications_from_different_events_all_run(self, handler):
+        executor = ActionExecutor(handler)
+        handler.gate.clear()
+        futures = [
+            executor.submit(triggered(ActionType.SEND_NOTIFICATION, f"e{i}", message="Anomaly"))
+            for i in range(3)
+        ]
+        futures.append(executor.submit(triggered(ActionType.TAG_DEVICE, "e1", device_id="d1", tag="x")))
+        futures.append(executor.submit(triggered(ActionType.TAG_DEVICE, "e2", device_id="d1", tag="x")))
+        handler.gate.set()
+        
+        assert all(f.result(timeout=5) for f in futures)
+        assert len(handler.executed) == 5
+        assert executor.deduplicated == 0
+        executor.close()
+    
+    def test_same_event_notification_is_shared(self, handler):
+        executor = ActionExecutor(handler)
+        handler.gate.clear()
+        calls = []
+        for playbook in ("a", "b"):
+            executor.submit(
+                triggered(ActionType.SEND_NOTIFICATION, "e1", playbook=playbook, message="Anomaly"),
+                callback=calls.append
+            )
+        handler.gate.set()
+        executor.close()
+        
+        assert len(handler.executed) == 1
+        # Every triggered action still reports
+        assert sorted(action.playbook_id for action in calls) == ["a", "b"]
+        assert all(action.success for action in calls)
+    
+    def test_dry_run_is_not_shared_with_real_run(self, handler):
+        executor = ActionExecutor(handler)
+        handler.gate.clear()
+        executor.submit(triggered(ActionType.BLOCK_DOMAIN, domain="evil.com"), dry_run=True)
+        executor.submit(triggered(ActionType.BLOCK_DOMAIN, domain="evil.com"))
+        handler.gate.set()
+        executor.close()
+        
+        assert len(handler.executed) == 2
+    
+    def test_finished_action_runs_again(self, handler):
+        executor = ActionExecutor(handler)
+        executor.submit(triggered(ActionType.BLOCK_DOMAIN, domain="evil.com")).result(timeout=5)
+        executor.submit(triggered(ActionType.BLOCK_DOMAIN, domain="evil.com")).result(timeout=5)
+        
+        assert len(handler.executed) == 2
+        executor.close()
+    
+    def test_closed_executor_rejects(self, handler):
+        executor = ActionExecutor(handler)
+        executor.close()
+        with pytest.raises(RuntimeError):
+            executor.submit(triggered(ActionType.LOG_EVENT))
@@ -0,0 +1,161 @@
+"""
+Tests for SOAR event consumption: cursor, processed-event window and resume.
+"""
+
+from datetime import datetime, timedelta
+
+from orion_ai.soar.service import SOARService
+from orion_ai.soar.state import ProcessedEvents, SOARStateStore
+
+
+def to_ns(dt):
+    return int(dt.timestamp() * 1e9)
+
+
+class FakeLoki:
+    """Events stream served forward with Loki's inclusive start and limit."""
+    
+    def __init__(self):
+        self.logs = []
+        self.queries = []
+    
+    def add(self, event_id, ts):
+        self.logs.append({
+            "_timestamp_ns": to_ns(ts),
+            "_timestamp": ts,
+            "event_id": event_id,
+            "event_type": "device_anomaly",
+            "severity": "WARNING",
+        })
+        self.logs.sort(key=lambda log: (log["_timestamp_ns"], log["event_id"]))
+    
+    def query_range(self, query, start, end, limit=100, direction="backward"):
+        self.queries.append(start)
+        start_ns, end_ns = to_ns(start), to_ns(end)
+        return [log for log in self.logs if start_ns <= log["_timestamp_ns"] <= end_ns][:limit]
+
+
+class FakeEngine:
+    """Playbook engine that triggers nothing and records what it saw."""
+    
+    def __init__(self):
+        self.evaluated = []
+    
+    def evaluate_events(self, events):
+        self.evaluated.extend(event.event_id for event in events)
+        return [[] for _ in events]
+    
+    def get_playbook(self, playbook_id):
+        return None
+
+
+def make_service(loki, state_path, **kwargs):
+    service = SOARService(
+        engine=FakeEngine(),
+        executor=object(),
+        action_handler=object(),
+        state_path=state_path,
+        **kwargs
+    )
+    service.loki_client = loki
+    return service
+
+
+class TestProcessedEvents:
+    """Test the bounded processed-event window."""
+    
+    def test_evicts_oldest_beyond_capacity(self):
+        processed = ProcessedEvents(capacity=3)
+        for i in range(3):
+            assert processed.add(f"e{i}", i) == []
+        
+        assert processed.add("e3", 3) == ["e0"]
+        assert "e0" not in processed and "e3" in processed
+        assert len(processed) == 3
+    
+    def test_readding_refreshes_position(self):
+        processed = ProcessedEvents(capacity=2)
+        processed.add("a", 1)
+        processed.add("b", 2)
+        processed.add("a", 3)
+        
+        assert processed.add("c", 4) == ["b"]
+        assert [event_id for event_id, _ in processed.items()] == ["a", "c"]
+
+
+class TestSOARStateStore:
+    """Test cursor and window persistence."""
+    
+    def test_round_trip(self, tmp_path):
+        store = SOARStateStore(str(tmp_path / "soar.db"))
+        assert store.load(10)[0] is None
+        
+        store.save((30, "c"), [("a", 10), ("b", 20), ("c", 30)], [])
+        store.save(None, [("d", 40)], ["a"])
+        
+        cursor, processed = store.load(10)
+        assert cursor == (30, "c")
+        assert [event_id for event_id, _ in processed.items()] == ["b", "c", "d"]
+    
+    def test_load_keeps_newest_ids(self, tmp_path):
+        store = SOARStateStore(str(tmp_path / "soar.db"))
+        store.save(None, [(f"e{i}", i) for i in range(10)], [])
+        
+        _, processed = store.load(3)
+        assert [event_id for event_id, _ in processed.items()] == ["e7", "e8", "e9"]
+
+
+class TestSOARServiceConsumption:
+    """Test cursor resume and re-read deduplication in run_once."""
+    
+    def test_events_are_evaluated_once(self, tmp_path):
+        loki = FakeLoki()
+        now = datetime.now()
+        for i in range(5):
+            loki.add(f"e{i}", now - timedelta(minutes=5, seconds=-i))
+        service = make_service(loki, str(tmp_path / "soar.db"))
+        
+        service.run_once()
+        service.run_once()
+        
+        assert service.engine.evaluated == [f"e{i}" for i in range(5)]
+        assert service.cursor == (loki.logs[-1]["_timestamp_ns"], "e4")
+    
+    def test_resume_rereads_overlap_for_late_events(self, tmp_path):
+        loki = FakeLoki()
+        now = datetime.now()
+        loki.add("first", now - timedelta(minutes=3))
+        service = make_service(loki, str(tmp_path / "soar.db"), late_arrival_seconds=60)
+        service.run_once()
+        
+        # Reaches Loki after the run, stamped before the cursor
+        loki.add("late", now - timedelta(minutes=3, seconds=30))
+        service.run_once()
+        
+        assert service.engine.evaluated == ["first", "late"]
+        assert loki.queries[-1] <= now - timedelta(minutes=4)
+        # The cursor never moves backwards
+        assert service.cursor[1] == "first"
+    
+    def test_restart_resumes_from_persisted_state(self, tmp_path):
+        loki = FakeLoki()
+        now = datetime.now()
+        loki.add("old", now - timedelta(minutes=4))
+        state = str(tmp_path / "soar.db")
+        make_service(loki, state).run_once()
+        
+        loki.add("new", now - timedelta(minutes=1))
+        restarted = make_service(loki, state)
+        restarted.run_once()
+        
+        assert restarted.engine.evaluated == ["new"]
+    
+    def test_pages_past_query_limit(self, tmp_path):
+        loki = FakeLoki()
+        now = datetime.now()
+        for i in range(25):
+            loki.add(f"e{i:02d}", now - timedelta(minutes=5) + timedelta(seconds=i // 3))
+        service = make_service(loki, None, page_size=10)
+        
+        service.run_once()
+        assert service.engine.evaluated == [f"e{i:02d}" for i in range(25)]
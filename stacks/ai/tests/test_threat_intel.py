@@ -0,0 +1,205 @@
+"""
+Tests for the IOC store, the in-memory IOC index and threat intel cache.
+"""
+
+import sqlite3
+from datetime import datetime
+
+import numpy as np
+
+from orion_ai.threat_intel.ioc_extractor import IOC, IOCType
+from orion_ai.threat_intel.ioc_index import IOCIndex, indicator_type
+from orion_ai.threat_intel.service import (
+    ThreatIndicator,
+    ThreatIntelligenceCache,
+    ThreatIntelligenceService,
+    ThreatType,
+)
+from orion_ai.threat_intel.store import IOCStore
+
+
+def build_index(rows):
+    return IOCIndex.from_rows((ioc_type, value, value) for ioc_type, value in rows)
+
+
+class TestIOCIndexDomains:
+    """Test exact and parent-domain matching."""
+    
+    def test_exact_and_case_insensitive(self):
+        index = build_index([("domain", "Evil-C2.top")])
+        assert index.lookup("domain", "evil-c2.TOP") == "Evil-C2.top"
+        assert index.match_domain("EVIL-C2.top.") == ("evil-c2.top", "Evil-C2.top")
+    
+    def test_subdomains_match_parent(self):
+        index = build_index([("domain", "evil-c2.top"), ("domain", "cdn.evil-c2.top")])
+        
+        assert index.match_domain("a1b2.evil-c2.top")[0] == "evil-c2.top"
+        # Most specific IOC wins
+        assert index.match_domain("x.cdn.evil-c2.top")[0] == "cdn.evil-c2.top"
+        assert index.match_domain("notevil-c2.top") is None
+        assert index.match_domain("evil-c2.top.example.com") is None
+    
+    def test_bare_tld_only_matches_exactly(self):
+        index = build_index([("domain", "top")])
+        assert index.match_domain("evil.top") is None
+        assert index.match_domain("top") is not None
+    
+    def test_bulk_match_keys_by_given_value(self):
+        index = build_index([("domain", "evil.com")])
+        matches = index.bulk_match_domains(["WWW.Evil.com", "good.com"])
+        assert list(matches) == ["WWW.Evil.com"]
+
+
+class TestIOCIndexIPs:
+    """Test IP and CIDR interval matching."""
+    
+    def test_cidr_and_address_matching(self):
+        index = build_index([
+            ("ip", "10.0.0.0/8"),
+            ("ip", "10.1.0.0/16"),
+            ("ip", "10.1.2.3"),
+            ("ipv6", "2001:db8::/32"),
+        ])
+        
+        assert index.match_ip("10.9.9.9")[0] == "10.0.0.0/8"
+        assert index.match_ip("10.1.9.9")[0] == "10.1.0.0/16"
+        assert index.match_ip("10.1.2.3")[0] == "10.1.2.3"
+        assert index.match_ip("11.0.0.1") is None
+        assert index.match_ip("2001:db8::1")[0] == "2001:db8::/32"
+        assert index.match_ip("not-an-ip") is None
+    
+    def test_range_edges(self):
+        index = build_index([("ip", "192.168.1.0/24")])
+        assert index.match_ip("192.168.1.0") is not None
+        assert index.match_ip("192.168.1.255") is not None
+        assert index.match_ip("192.168.0.255") is None
+        assert index.match_ip("192.168.2.0") is None
+    
+    def test_vectorized_hits_match_single_lookups(self):
+        index = build_index([("ip", "10.0.0.0/24"), ("ip", "8.8.8.8"), ("ipv6", "2001:db8::/64")])
+        ips = np.array(["10.0.0.7", "10.0.1.7", "8.8.8.8", "8.8.4.4", "2001:db8::5", "", "garbage"], dtype=object)
+        
+        hits = index.ip_hits(ips)
+        assert hits.tolist() == [index.match_ip(ip) is not None for ip in ips]
+        assert set(index.bulk_match_ips(ips)) == {"10.0.0.7", "8.8.8.8", "2001:db8::5"}
+    
+    def test_empty_index(self):
+        index = IOCIndex()
+        assert len(index) == 0
+        assert index.match_ip("1.2.3.4") is None
+        assert not index.ip_hits(["1.2.3.4"]).any()
+    
+    def test_indicator_type(self):
+        assert indicator_type("10.0.0.0/8") == "ip"
+        assert indicator_type("::1") == "ip"
+        assert indicator_type("evil.com") == "domain"
+
+
+def indicator(value, threat_type=ThreatType.MALICIOUS_DOMAIN):
+    now = datetime.now()
+    return ThreatIndicator(value, threat_type, "test", 0.9, now, now)
+
+
+class TestThreatIntelligenceCache:
+    """Test index reloads across cache instances."""
+    
+    def test_writes_reach_other_instances(self, tmp_path):
+        db = str(tmp_path / "threat_intel.db")
+        writer = ThreatIntelligenceService(cache_path=db)
+        reader = ThreatIntelligenceService(cache_path=db, index_check_seconds=0)
+        
+        writer.cache.add_indicators([indicator("evil.com"), indicator("6.6.6.0/24", ThreatType.MALICIOUS_IP)])
+        
+        assert reader.check_domain("www.evil.com").value == "evil.com"
+        assert set(reader.check_domains(["evil.com", "good.com"])) == {"evil.com"}
+        assert reader.ip_hits(["6.6.6.6", "7.7.7.7"]).tolist() == [True, False]
+    
+    def test_check_interval_limits_reloads(self, tmp_path):
+        db = str(tmp_path / "threat_intel.db")
+        writer = ThreatIntelligenceCache(db)
+        reader = ThreatIntelligenceCache(db, index_check_seconds=3600)
+        
+        writer.add_indicators([indicator("evil.com")])
+        assert reader.lookup("evil.com") is None
+    
+    def test_cleanup_reloads_index(self, tmp_path):
+        cache = ThreatIntelligenceCache(str(tmp_path / "threat_intel.db"))
+        old = indicator("old.com")
+        old.last_updated = datetime(2020, 1, 1)
+        cache.add_indicators([old, indicator("new.com")])
+        
+        cache.cleanup_old_indicators(days=30)
+        assert cache.lookup("old.com") is None
+        assert cache.lookup("new.com") is not None
+
+
+def query(store, sql, *params):
+    conn = sqlite3.connect(str(store.db_path))
+    try:
+        return conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+
+
+def ioc_row(store, value):
+    return query(store, """
+        SELECT source, confidence, context, first_seen, last_seen,
+               (SELECT COUNT(*) FROM ioc_sources WHERE ioc_id = iocs.id)
+        FROM iocs WHERE value = ?
+    """, value)
+
+
+class TestIOCStore:
+    """Test bulk ingestion into the SQLite IOC store."""
+    
+    def test_fresh_database_schema(self, tmp_path):
+        store = IOCStore(tmp_path / "intel" / "iocs.db")
+        
+        tables = {name for (name,) in query(store, "SELECT name FROM sqlite_master WHERE type = 'table'")}
+        assert {"iocs", "ioc_matches", "sources", "ioc_sources"} <= tables
+        assert query(store, "PRAGMA journal_mode") == [("wal",)]
+        assert store.get_stats()["total"] == 0
+        assert store.add_iocs([]) == 0
+    
+    def test_duplicates_within_one_batch(self, tmp_path):
+        store = IOCStore(tmp_path / "iocs.db")
+        count = store.add_iocs([
+            IOC(IOCType.DOMAIN, "Evil.com", "feed-b", confidence=0.5),
+            IOC(IOCType.DOMAIN, " evil.com ", "feed-a", context="seen in a report", confidence=0.9),
+            IOC(IOCType.DOMAIN, "evil.com", "feed-a", confidence=0.7),
+            IOC(IOCType.IPV4, "6.6.6.6", "feed-a"),
+        ])
+        
+        assert count == 2
+        assert query(store, "SELECT COUNT(*) FROM iocs") == [(2,)]
+        (source, confidence, context, _, _, links), = ioc_row(store, "evil.com")
+        assert (source, confidence, context, links) == ("feed-a,feed-b", 0.9, "seen in a report", 2)
+        assert query(store, "SELECT name FROM sources ORDER BY name") == [("feed-a",), ("feed-b",)]
+    
+    def test_new_source_merges_into_existing_ioc(self, tmp_path):
+        store = IOCStore(tmp_path / "iocs.db")
+        store.add_iocs([IOC(IOCType.DOMAIN, "evil.com", "feed-a", context="first", confidence=0.8)])
+        (_, _, _, first_seen, last_seen, _), = ioc_row(store, "evil.com")
+        
+        assert store.add_iocs([IOC(IOCType.DOMAIN, "evil.com", "feed-c", confidence=0.4)]) == 1
+        # Ingesting from a known source adds no link
+        store.add_iocs([IOC(IOCType.DOMAIN, "evil.com", "feed-a")])
+        
+        (source, confidence, context, first, last, links), = ioc_row(store, "evil.com")
+        assert (source, confidence, context, links) == ("feed-a,feed-c", 1.0, "first", 2)
+        assert first == first_seen and last > last_seen
+        assert query(store, "SELECT COUNT(*) FROM iocs") == [(1,)]
+    
+    def test_single_source_keeps_its_name(self, tmp_path):
+        store = IOCStore(tmp_path / "iocs.db")
+        store.add_iocs([IOC(IOCType.DOMAIN, "evil.com", "feed-a")])
+        store.add_iocs([IOC(IOCType.DOMAIN, "evil.com", "feed-a")])
+        assert ioc_row(store, "evil.com")[0][0] == "feed-a"
+    
+    def test_index_follows_ingestion(self, tmp_path):
+        store = IOCStore(tmp_path / "iocs.db")
+        store.add_iocs([IOC(IOCType.DOMAIN, "evil.com", "feed-a")])
+        assert store.match_domain("www.evil.com")[0] == "evil.com"
+        
+        store.add_iocs([IOC(IOCType.DOMAIN, "evil.com", "feed-b")])
+        assert store.lookup(IOCType.DOMAIN, "evil.com")[2] == "feed-a,feed-b"
@@ -0,0 +1,191 @@
+"""
+Tests for training data collection, manifests and sampled loading.
+"""
+
+import gzip
+import json
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+
+from orion_ai.data_collector import DataCollector
+from orion_ai.training_data import FeatureLoader, FeatureManifest
+
+DAY = datetime(2026, 1, 1)
+ROWS_PER_DAY = [300, 50, 800, 120]
+
+
+def write_days(directory, rows_per_day=ROWS_PER_DAY, width=5):
+    """Daily files whose first feature is the day index."""
+    rng = np.random.default_rng(1)
+    for day, rows in enumerate(rows_per_day):
+        timestamp = DAY + timedelta(days=day)
+        path = directory / f"device_features_{timestamp:%Y-%m-%d}.jsonl.gz"
+        with gzip.open(path, "wt") as f:
+            for i in range(rows):
+                vector = [day] + rng.random(width - 1).tolist()
+                f.write(json.dumps({"timestamp": timestamp.isoformat(), "device_ip": f"{day}:{i}", "feature_vector": vector}) + "\n")
+
+
+def days_of(features):
+    return np.bincount(features[:, 0].astype(int), minlength=len(ROWS_PER_DAY))
+
+
+class Entries(list):
+    """Log entries standing in for a LokiStream."""
+    
+    @property
+    def entries_read(self):
+        return len(self)
+
+
+class FakeLogReader:
+    """Serves fixed flow and DNS entries."""
+    
+    def __init__(self, flows=(), dns=()):
+        self.flows = list(flows)
+        self.dns = list(dns)
+    
+    def stream_suricata_flows(self, start, end, limit=None):
+        return Entries(self.flows)
+    
+    def stream_dns_queries(self, start, end, limit=None):
+        return Entries(self.dns)
+    
+    def stream_suricata_alerts(self, start, end, limit=None):
+        return Entries()
+
+
+def entry(ts, **log):
+    return {"timestamp_ns": int(ts.timestamp() * 1e9), "log": json.dumps(log)}
+
+
+class TestFeatureLoader:
+    """Test full and sampled loading."""
+    
+    def test_loads_every_row(self, tmp_path):
+        write_days(tmp_path)
+        features, ids = FeatureLoader(tmp_path, "device_ip").load()
+        
+        assert features.dtype == np.float32
+        assert features.shape == (sum(ROWS_PER_DAY), 5)
+        assert days_of(features).tolist() == ROWS_PER_DAY
+        assert [int(i.split(":")[0]) for i in ids] == features[:, 0].astype(int).tolist()
+    
+    def test_stratified_sample_splits_budget_across_days(self, tmp_path):
+        write_days(tmp_path)
+        features, ids = FeatureLoader(tmp_path, "device_ip", max_rows=400, sampling="stratified").load()
+        
+        # Small days are taken whole, the rest share the remainder
+        assert days_of(features).tolist() == [117, 50, 117, 116]
+        assert len(set(ids)) == len(ids) == 400
+        assert [int(i.split(":")[0]) for i in ids] == features[:, 0].astype(int).tolist()
+    
+    def test_reservoir_sample_is_proportional(self, tmp_path):
+        write_days(tmp_path)
+        features, ids = FeatureLoader(tmp_path, "device_ip", max_rows=400, sampling="reservoir").load()
+        
+        assert len(set(ids)) == len(ids) == 400
+        assert [int(i.split(":")[0]) for i in ids] == features[:, 0].astype(int).tolist()
+        expected = np.array(ROWS_PER_DAY) * 400 / sum(ROWS_PER_DAY)
+        np.testing.assert_allclose(days_of(features), expected, atol=40)
+    
+    def test_sampling_is_seeded(self, tmp_path):
+        write_days(tmp_path)
+        first = FeatureLoader(tmp_path, "device_ip", max_rows=100, sampling="reservoir", seed=7).load()[1]
+        second = FeatureLoader(tmp_path, "device_ip", max_rows=100, sampling="reservoir", seed=7).load()[1]
+        assert first == second
+    
+    def test_spill_file(self, tmp_path):
+        data = tmp_path / "data"
+        data.mkdir()
+        write_days(data)
+        features, _ = FeatureLoader(data, "device_ip", max_rows=200, spill_dir=tmp_path / "spill").load()
+        
+        assert isinstance(features, np.memmap)
+        assert features.shape == (200, 5)
+    
+    def test_mismatched_widths_are_skipped(self, tmp_path):
+        write_days(tmp_path, rows_per_day=[10])
+        with gzip.open(tmp_path / "device_features_2026-01-09.jsonl.gz", "wt") as f:
+            f.write(json.dumps({"device_ip": "x", "feature_vector": [1, 2]}) + "\n")
+        
+        features, ids = FeatureLoader(tmp_path, "device_ip").load()
+        assert features.shape == (10, 5)
+        assert "x" not in ids
+    
+    def test_invalid_sampling(self, tmp_path):
+        with pytest.raises(ValueError):
+            FeatureLoader(tmp_path, "device_ip", sampling="random")
+
+
+class TestFeatureManifest:
+    """Test row counting without decompressing known files."""
+    
+    def test_unknown_files_are_scanned_once(self, tmp_path):
+        write_days(tmp_path)
+        manifest = FeatureManifest(tmp_path)
+        
+        rows, first, last = manifest.totals()
+        assert rows == sum(ROWS_PER_DAY)
+        assert (first, last) == (DAY.isoformat(), (DAY + timedelta(days=3)).isoformat())
+        assert (tmp_path / "manifest.json").exists()
+    
+    def test_append_updates_entry(self, tmp_path):
+        write_days(tmp_path, rows_per_day=[10])
+        manifest = FeatureManifest(tmp_path)
+        manifest.files()
+        
+        path = tmp_path / "device_features_2026-01-01.jsonl.gz"
+        previous_size = path.stat().st_size
+        with gzip.open(path, "at") as f:
+            f.write(json.dumps({"timestamp": "2026-01-01T23:00:00", "device_ip": "new", "feature_vector": [0] * 5}) + "\n")
+        manifest.record(path.name, 1, datetime(2026, 1, 1, 23), datetime(2026, 1, 1, 23), previous_size)
+        
+        stats = manifest.files()[path]
+        assert stats.rows == 11
+        assert stats.last == "2026-01-01T23:00:00"
+
+
+class TestDataCollector:
+    """Test collection from streamed Loki entries."""
+    
+    @pytest.fixture
+    def collector(self, tmp_path):
+        end = DAY + timedelta(hours=1)
+        flows = [
+            entry(end - timedelta(minutes=i % 10), src_ip=f"10.0.0.{i % 3 + 2}", dest_ip="1.1.1.1",
+                  dest_port=443, proto="TCP", flow={"bytes_toserver": 100 + i, "bytes_toclient": 50, "age": 1})
+            for i in range(30)
+        ]
+        dns = [
+            entry(end - timedelta(minutes=1), src_ip="10.0.0.2", dns={"type": "query", "rrname": name})
+            for name in ["Example.com.", "example.com", "a1b2c3.top"]
+        ]
+        collector = DataCollector(output_dir=tmp_path)
+        collector.log_reader = FakeLogReader(flows, dns)
+        return collector
+    
+    def test_device_records_load_back(self, collector):
+        end = DAY + timedelta(hours=1)
+        assert collector.collect_device_data(end - timedelta(minutes=10), end) == 3
+        
+        features, ids = FeatureLoader(collector.device_dir, "device_ip").load()
+        assert sorted(ids) == ["10.0.0.2", "10.0.0.3", "10.0.0.4"]
+        assert features.shape == (3, 22)
+        # Ten outbound flows per device
+        assert features[:, 1].tolist() == [10, 10, 10]
+        assert FeatureManifest(collector.device_dir).totals()[0] == 3
+    
+    def test_domain_records_count_queries(self, collector):
+        end = DAY + timedelta(hours=1)
+        assert collector.collect_domain_data(end - timedelta(minutes=10), end) == 2
+        
+        features, ids = FeatureLoader(collector.domain_dir, "domain").load()
+        counts = dict(zip(ids, features[:, -1].tolist()))
+        assert counts == {"example.com": 2, "a1b2c3.top": 1}
+    
+    def test_raw_logs_are_streamed_to_disk(self, collector):
+        counts = collector.collect_raw_logs(DAY, DAY + timedelta(hours=1))
+        assert counts == {"suricata": 30, "dns": 3}
@@ -0,0 +1,30 @@
+"""
+Tests for the web UI JSON endpoints.
+"""
+
+import pytest
+
+pytest.importorskip("httpx")
+
+from fastapi.testclient import TestClient
+
+from orion_ai.ui.api import app
+
+
+@pytest.fixture
+def client():
+    # Not entered as a context manager, so startup view refresh does not run
+    return TestClient(app)
+
+
+class TestConfigAndViews:
+    """Test the config and view refresh endpoints."""
+    
+    def test_config_is_served(self, client):
+        response = client.get("/api/config")
+        assert response.status_code == 200
+        assert set(response.json()) == {"detection", "model", "threat_intel"}
+    
+    def test_unknown_view_is_not_found(self, client):
+        response = client.post("/api/views/refresh", params={"name": "nope"})
+        assert response.status_code == 404